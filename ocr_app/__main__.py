@@ -2,14 +2,16 @@ from __future__ import annotations
 
 import multiprocessing as mp
 
-from .ui import run_app
-
 
 def main() -> int:
     try:
         mp.set_start_method("spawn")
     except RuntimeError:
         pass
+    # Imported lazily: spawned workers re-import this module as __mp_main__ and
+    # must not pull in PySide6 just to run OCR jobs.
+    from .ui import run_app
+
     return run_app()
 
 
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 import tempfile
 from pathlib import Path
 
@@ -13,7 +14,70 @@ MAX_QUEUE_ITEMS = 5000
 MAX_DISCOVERED_PDFS = 20000
 MAX_INPUT_FILE_BYTES = 2 * 1024 * 1024 * 1024  # 2 GiB
 MAX_SCAN_DEPTH = 24
+WORKER_MAX_TASKS = 200
+WORKER_MAX_RSS_BYTES = 1024 * 1024 * 1024  # 1 GiB
+# Cancel: SIGTERM to the worker's process group, then SIGKILL.
+CANCEL_TERM_GRACE_SECONDS = 1.0
+CANCEL_KILL_GRACE_SECONDS = 1.0
+# Exit waits this long for stopping workers and temp cleanup before closing anyway.
+CLOSE_TEARDOWN_TIMEOUT_SECONDS = 30.0
+EXECUTION_MODES = ("subprocess", "api")
+# Output durability: fsync every install, one filesystem sync at batch end, or leave it to the OS.
+DURABILITY_MODES = ("fsync", "deferred", "none")
+# Per-file memory limit choices (MiB, 0 = off).
+MEMORY_LIMIT_CHOICES_MB = (0, 2048, 4096, 8192, 16384)
+SHARD_MIN_PAGES = 200
+SHARD_MIN_PAGES_PER_RANGE = 25
+OCR_JOBS_MAX = 8
+OCR_MIN_PAGES_PER_JOB = 4
+OCR_RESERVED_CORES = 1
+TEXT_PROBE_WORKERS = 2
+SEARCHABLE_ACTIONS = ("copy", "skip", "ocr")
+RESULT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2 GiB
+# GPU dispatch VRAM budget.
+GPU_TASK_VRAM_BYTES = 2 * 1024 * 1024 * 1024
+GPU_VRAM_HEADROOM_BYTES = 512 * 1024 * 1024
+GPU_TASKS_WITHOUT_METRICS = 2
+# GPU circuit breaker.
+GPU_BREAKER_FAILURES = 3
+GPU_BREAKER_COOLDOWN_SECONDS = 120.0
+# Admission control: RAM floor, swap-out and load caps, per-file RSS estimate.
+ADMISSION_MIN_AVAILABLE_BYTES = 1024 * 1024 * 1024
+ADMISSION_MAX_SWAP_OUT_BYTES_PER_SECOND = 8 * 1024 * 1024
+ADMISSION_MAX_LOAD_PER_CPU = 2.0
+ADMISSION_BASE_TASK_RSS_BYTES = 256 * 1024 * 1024
+ADMISSION_RSS_PER_INPUT_MB = 16 * 1024 * 1024
+# Worker phases timed per whole-file OCR task, in run order.
+TASK_PHASES = ("validate", "logging", "cache", "launch", "first_output", "ocr", "retry", "install", "cleanup")
+# Learned per-file duration model.
+DURATION_HISTORY_MAX_RECORDS = 2000
+DURATION_MODEL_MIN_SAMPLES = 5
+DURATION_MODEL_FORGETTING = 0.99
+DURATION_MODEL_RIDGE = 1.0
+DURATION_MODEL_ERROR_WINDOW = 50
+# Process-tree sampling: how often descendant lists are re-walked.
+PROCESS_TREE_RELIST_SECONDS = 5.0
+# Live log feed from workers to the GUI.
+LOG_BATCH_SECONDS = 0.25
+LOG_BATCH_MAX_LINES = 200
+LOG_GUI_LINES_PER_SECOND = 50
+LOG_GUI_LEVELS = ("INFO", "WARNING", "ERROR")
+LOG_GUI_TRACKED_TEXT = ("skipping all processing on this page", "with hocrparser")
+# Resident GPU OCR service timeouts.
+GPU_SERVICE_START_TIMEOUT_SECONDS = 15.0
+GPU_SERVICE_PING_TIMEOUT_SECONDS = 5.0
+GPU_SERVICE_REQUEST_TIMEOUT_SECONDS = 600.0
 
 ROOT_DIR = Path(__file__).resolve().parent.parent
 LOG_ROOT = ROOT_DIR / "logs"
 TEMP_ROOT = Path(tempfile.gettempdir()) / "ocr_gui_jobs"
+# Optional tmpfs staging root and its sizing.
+RAM_TEMP_ROOT = Path("/dev/shm") / "ocr_gui_jobs"
+RAM_STAGING_INPUT_FACTOR = 8
+RAM_STAGING_PAGE_BYTES = 8 * 1024 * 1024
+RAM_STAGING_MIN_FREE_BYTES = 1024 * 1024 * 1024
+RESULT_CACHE_ROOT = (
+    Path(os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    / "ocrestra"
+    / "ocr_results"
+)
@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import json
+import os
+from collections import deque
+from pathlib import Path
+from typing import Any
+
+from .config import (
+    DURATION_HISTORY_MAX_RECORDS,
+    DURATION_MODEL_ERROR_WINDOW,
+    DURATION_MODEL_FORGETTING,
+    DURATION_MODEL_MIN_SAMPLES,
+    DURATION_MODEL_RIDGE,
+)
+
+HISTORY_FIELDS = ("pages", "input_bytes", "force_ocr", "use_gpu", "optimize_for_size", "ocr_jobs", "duration_seconds")
+FEATURE_NAMES = ("intercept", "pages_per_job", "input_mib", "force_pages", "gpu_pages", "optimize_pages")
+
+
+def _input_mib(record: dict[str, Any]) -> float:
+    try:
+        return max(0.0, float(record.get("input_bytes") or 0)) / (1024 * 1024)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _feature_parts(record: dict[str, Any]) -> tuple[list[float], list[float]] | None:
+    """The features as ``base + pages * per_page``, or ``None`` for a malformed record."""
+    try:
+        jobs = max(1.0, float(record.get("ocr_jobs") or 1))
+    except (TypeError, ValueError):
+        return None
+    per_job = 1.0 / jobs
+    base = [1.0, 0.0, _input_mib(record), 0.0, 0.0, 0.0]
+    per_page = [
+        0.0,
+        per_job,
+        0.0,
+        per_job if record.get("force_ocr") else 0.0,
+        per_job if record.get("use_gpu") else 0.0,
+        per_job if record.get("optimize_for_size") else 0.0,
+    ]
+    return base, per_page
+
+
+def duration_features(record: dict[str, Any]) -> list[float] | None:
+    """Regression inputs for one file, or ``None`` when its page count is unknown.
+
+    Page work is divided by the file's OCRmyPDF ``--jobs``; force OCR, the GPU
+    backend, and size optimization each get their own per-page term.
+    """
+    try:
+        pages = float(record["pages"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    parts = _feature_parts(record)
+    if pages <= 0 or parts is None:
+        return None
+    base, per_page = parts
+    return [value + pages * rate for value, rate in zip(base, per_page)]
+
+
+def _dot(left: list[float], right: list[float]) -> float:
+    return sum(a * b for a, b in zip(left, right))
+
+
+def _solve(matrix: list[list[float]], vector: list[float]) -> list[float] | None:
+    size = len(vector)
+    rows = [list(matrix[index]) + [vector[index]] for index in range(size)]
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda row: abs(rows[row][column]))
+        if abs(rows[pivot][column]) < 1e-12:
+            return None
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        for row in range(column + 1, size):
+            factor = rows[row][column] / rows[column][column]
+            for index in range(column, size + 1):
+                rows[row][index] -= factor * rows[column][index]
+    solution = [0.0] * size
+    for row in range(size - 1, -1, -1):
+        tail = sum(rows[row][index] * solution[index] for index in range(row + 1, size))
+        solution[row] = (rows[row][size] - tail) / rows[row][row]
+    return solution
+
+
+class DurationModel:
+    """Per-file OCR duration learned from this machine's finished files.
+
+    ``observe`` folds one file into exponentially decayed normal equations and
+    refits a ridge least-squares solution, so the model tracks hardware and
+    option changes without keeping every sample. Each file is predicted before
+    it is folded in; those out-of-sample errors are what ``error_summary``
+    reports. ``predict`` returns ``None`` until ``min_samples`` files are seen.
+    A file without a page count (force OCR skips the text probe) is predicted
+    from its size and the pages per MiB seen in finished files.
+    """
+
+    def __init__(
+        self,
+        min_samples: int = DURATION_MODEL_MIN_SAMPLES,
+        forgetting: float = DURATION_MODEL_FORGETTING,
+        ridge: float = DURATION_MODEL_RIDGE,
+        error_window: int = DURATION_MODEL_ERROR_WINDOW,
+    ) -> None:
+        size = len(FEATURE_NAMES)
+        self.min_samples = max(1, int(min_samples))
+        self.forgetting = min(1.0, max(0.0, float(forgetting)))
+        self.ridge = max(0.0, float(ridge))
+        self.samples = 0
+        self.weights: list[float] | None = None
+        self._xtx = [[0.0] * size for _ in range(size)]
+        self._xty = [0.0] * size
+        self._errors: deque[tuple[float, float]] = deque(maxlen=max(1, int(error_window)))
+        # Decayed page and MiB totals of finished files, for pricing files of unknown length.
+        self._pages = 0.0
+        self._mib = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.weights is not None and self.samples >= self.min_samples
+
+    @property
+    def pages_per_mib(self) -> float | None:
+        return self._pages / self._mib if self._pages > 0 and self._mib > 0 else None
+
+    def predict(self, record: dict[str, Any]) -> float | None:
+        features = duration_features(record)
+        if features is None:
+            features = self._sized_features(record)
+        if features is None or not self.ready:
+            return None
+        return max(1.0, _dot(self.weights, features))
+
+    def _sized_features(self, record: dict[str, Any]) -> list[float] | None:
+        parts = _feature_parts(record)
+        pages_per_mib = self.pages_per_mib
+        if parts is None or pages_per_mib is None:
+            return None
+        pages = _input_mib(record) * pages_per_mib
+        if pages <= 0:
+            return None
+        base, per_page = parts
+        return [value + pages * rate for value, rate in zip(base, per_page)]
+
+    def observe(self, record: dict[str, Any], seconds: float) -> float | None:
+        """Learn one finished file; returns the prediction made for it beforehand."""
+        features = duration_features(record)
+        if features is None or not seconds or seconds <= 0:
+            return None
+        predicted = self.predict(record)
+        if predicted is not None:
+            self._errors.append((predicted - float(seconds), float(seconds)))
+        size = len(features)
+        for row in range(size):
+            self._xty[row] = self.forgetting * self._xty[row] + features[row] * float(seconds)
+            for column in range(size):
+                self._xtx[row][column] = self.forgetting * self._xtx[row][column] + features[row] * features[column]
+        self.samples += 1
+        input_mib = _input_mib(record)
+        if input_mib > 0:
+            self._pages = self.forgetting * self._pages + float(record["pages"])
+            self._mib = self.forgetting * self._mib + input_mib
+        # The intercept is not shrunk; the per-page and per-MiB rates are.
+        regularized = [
+            [value + (self.ridge if row == column and row > 0 else 0.0) for column, value in enumerate(values)]
+            for row, values in enumerate(self._xtx)
+        ]
+        weights = _solve(regularized, self._xty)
+        if weights is not None:
+            self.weights = weights
+        return predicted
+
+    def error_summary(self) -> dict[str, float] | None:
+        """Mean absolute error, mean absolute percentage error, and bias over recent predictions."""
+        if not self._errors:
+            return None
+        count = len(self._errors)
+        return {
+            "files": count,
+            "mae_seconds": sum(abs(error) for error, _actual in self._errors) / count,
+            "mape": sum(abs(error) / actual for error, actual in self._errors) / count,
+            "bias_seconds": sum(error for error, _actual in self._errors) / count,
+        }
+
+
+class QueuedDurations:
+    """Running total of the model's predicted seconds over the queued files.
+
+    Predictions are linear in the features, so the total is the model's weights
+    applied to the queued files' summed features. Adding or removing a file, or
+    a refit after each finished file, never revisits the other queued files.
+    Files without a page count are summed by size and priced with the model's
+    pages per MiB. Each file's ``fallback`` seconds stand in while the model is
+    not ready, and for files it cannot price. The per-file floor of ``predict``
+    is not applied to the total.
+    """
+
+    def __init__(self, model: DurationModel) -> None:
+        self.model = model
+        self.clear()
+
+    def clear(self) -> None:
+        size = len(FEATURE_NAMES)
+        # key -> (kind, features, per-MiB-of-pages features, fallback seconds)
+        self._entries: dict[str, tuple[str, list[float], list[float], float]] = {}
+        self._features = {"paged": [0.0] * size, "sized": [0.0] * size}
+        self._sized_per_page = [0.0] * size
+        self._fallback = {"paged": 0.0, "sized": 0.0, "unpriced": 0.0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def set(self, key: str, record: dict[str, Any], fallback_seconds: float) -> None:
+        self.discard(key)
+        size = len(FEATURE_NAMES)
+        features = duration_features(record)
+        parts = _feature_parts(record)
+        input_mib = _input_mib(record)
+        if features is not None:
+            entry = ("paged", features, [0.0] * size, float(fallback_seconds))
+        elif parts is not None and input_mib > 0:
+            base, per_page = parts
+            entry = ("sized", base, [rate * input_mib for rate in per_page], float(fallback_seconds))
+        else:
+            entry = ("unpriced", [0.0] * size, [0.0] * size, float(fallback_seconds))
+        self._entries[key] = entry
+        self._apply(entry, 1.0)
+
+    def discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._apply(entry, -1.0)
+
+    def total(self) -> float:
+        if not self._entries:
+            return 0.0
+        if not self.model.ready:
+            return max(0.0, sum(self._fallback.values()))
+        weights = self.model.weights
+        total = _dot(weights, self._features["paged"]) + self._fallback["unpriced"]
+        pages_per_mib = self.model.pages_per_mib
+        if pages_per_mib is None:
+            total += self._fallback["sized"]
+        else:
+            total += _dot(weights, self._features["sized"]) + pages_per_mib * _dot(weights, self._sized_per_page)
+        return max(0.0, total)
+
+    def _apply(self, entry: tuple[str, list[float], list[float], float], sign: float) -> None:
+        kind, features, sized_per_page, fallback = entry
+        self._fallback[kind] += sign * fallback
+        if kind == "unpriced":
+            return
+        target = self._features[kind]
+        for index, value in enumerate(features):
+            target[index] += sign * value
+        for index, value in enumerate(sized_per_page):
+            self._sized_per_page[index] += sign * value
+
+
+def history_record(metrics: dict[str, Any]) -> dict[str, Any]:
+    return {field: metrics.get(field) for field in HISTORY_FIELDS}
+
+
+def load_history(path: Path, limit: int = DURATION_HISTORY_MAX_RECORDS) -> list[dict[str, Any]]:
+    """Read the newest ``limit`` records, skipping bad lines; rewrites the file when it holds more."""
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return []
+    records: list[dict[str, Any]] = []
+    for line in lines[-limit:] if limit > 0 else []:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and duration_features(record) is not None:
+            records.append(record)
+    if len(lines) > limit:
+        _rewrite_history(path, records)
+    return records
+
+
+def append_history(path: Path, record: dict[str, Any]) -> bool:
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600)
+        with os.fdopen(fd, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+    except OSError:
+        return False
+    return True
+
+
+def _rewrite_history(path: Path, records: list[dict[str, Any]]) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_NOFOLLOW", 0), 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.writelines(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+        tmp_path.replace(path)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import errno
+import os
+
+# Linux FICLONE ioctl (_IOW(0x94, 9, int)): share extents on btrfs/XFS/bcachefs.
+_FICLONE = 0x40049409
+_COPY_CHUNK_BYTES = 1024 * 1024
+# Errors meaning "this kernel/filesystem pair cannot do it", not "the copy failed".
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.EOPNOTSUPP,
+    errno.ENOTTY,
+    errno.EBADF,
+    errno.EPERM,
+}
+if hasattr(errno, "ENOTSUP"):
+    _UNSUPPORTED_ERRNOS.add(errno.ENOTSUP)
+
+
+def _try_reflink(src_fd: int, dest_fd: int) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        fcntl.ioctl(dest_fd, _FICLONE, src_fd)
+    except OSError as exc:
+        if exc.errno in _UNSUPPORTED_ERRNOS:
+            return False
+        raise
+    return True
+
+
+def _try_copy_file_range(src_fd: int, dest_fd: int, size: int) -> bool:
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is None:
+        return False
+    copied = 0
+    try:
+        while copied < size:
+            count = copy_file_range(src_fd, dest_fd, size - copied, copied, copied)
+            if count <= 0:
+                break
+            copied += count
+    except OSError as exc:
+        if exc.errno not in _UNSUPPORTED_ERRNOS:
+            raise
+    if copied == size:
+        return True
+    os.ftruncate(dest_fd, 0)
+    return False
+
+
+def _plain_copy(src_fd: int, dest_fd: int) -> None:
+    os.lseek(src_fd, 0, os.SEEK_SET)
+    os.lseek(dest_fd, 0, os.SEEK_SET)
+    while True:
+        chunk = os.read(src_fd, _COPY_CHUNK_BYTES)
+        if not chunk:
+            break
+        view = memoryview(chunk)
+        while view:
+            written = os.write(dest_fd, view)
+            view = view[written:]
+
+
+def copy_fd_contents(src_fd: int, dest_fd: int) -> str:
+    """Copy ``src_fd`` into the empty ``dest_fd`` and return the strategy used.
+
+    Tries a reflink first (no data copied), then ``copy_file_range`` (copied in
+    the kernel), then a chunked read/write loop.
+    """
+    if _try_reflink(src_fd, dest_fd):
+        return "reflink"
+    if _try_copy_file_range(src_fd, dest_fd, os.fstat(src_fd).st_size):
+        return "copy_file_range"
+    _plain_copy(src_fd, dest_fd)
+    return "copy"
+
+
+def open_for_copy(path: os.PathLike[str] | str) -> int:
+    flags = os.O_RDONLY
+    for name in ("O_NOFOLLOW", "O_CLOEXEC", "O_BINARY"):
+        flags |= getattr(os, name, 0)
+    return os.open(path, flags)
+
+
+def copy_file(src: os.PathLike[str] | str, dest: os.PathLike[str] | str) -> str:
+    """Create ``dest`` exclusively (mode 0600) from ``src``; refuses symlinks on either side."""
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL
+    for name in ("O_NOFOLLOW", "O_CLOEXEC", "O_BINARY"):
+        flags |= getattr(os, name, 0)
+    src_fd = open_for_copy(src)
+    try:
+        dest_fd = os.open(dest, flags, 0o600)
+        try:
+            return copy_fd_contents(src_fd, dest_fd)
+        except Exception:
+            try:
+                os.unlink(dest)
+            except OSError:
+                pass
+            raise
+        finally:
+            os.close(dest_fd)
+    finally:
+        os.close(src_fd)
+
+
+def _load_syncfs():
+    try:
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        return libc.syncfs
+    except Exception:
+        return None
+
+
+def sync_filesystems(paths: list[os.PathLike[str] | str]) -> tuple[str, int]:
+    """Flush the filesystems holding ``paths``; return ``(method, filesystems_or_files_synced)``.
+
+    Linux issues one ``syncfs`` per distinct device. Other POSIX systems fall back
+    to a global ``os.sync``; Windows fsyncs each file.
+    """
+    existing = [os.fspath(path) for path in paths if os.path.exists(path)]
+    if not existing:
+        return "none", 0
+    if os.name == "nt":
+        synced = 0
+        for path in existing:
+            if os.path.isdir(path):
+                continue
+            try:
+                fd = os.open(path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+            except OSError:
+                continue
+            try:
+                os.fsync(fd)
+                synced += 1
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+        return "fsync", synced
+    syncfs = _load_syncfs()
+    if syncfs is None:
+        os.sync()
+        return "sync", 1
+    devices: set[int] = set()
+    failed = False
+    for path in existing:
+        try:
+            device = os.stat(path).st_dev
+            if device in devices:
+                continue
+            fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+        except OSError:
+            continue
+        try:
+            if syncfs(fd) == 0:
+                devices.add(device)
+            else:
+                failed = True
+        finally:
+            os.close(fd)
+    if failed:
+        os.sync()
+        return "sync", len(devices) + 1
+    return "syncfs", len(devices)
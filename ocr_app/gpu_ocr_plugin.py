@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+from math import atan2, degrees
+from pathlib import Path
+
+from ocrmypdf import BoundingBox, OcrClass, OcrElement, OcrEngine, hookimpl
+from ocrmypdf._exec import tesseract
+from ocrmypdf.builtin_plugins.tesseract_ocr import TesseractOcrEngine
+from ocrmypdf.hocrtransform import HocrParser
+from PIL import Image
+
+# OCRmyPDF loads this plugin by file path (``--plugin .../gpu_ocr_plugin.py``), so
+# the package may not be importable from the ocrmypdf CLI until its root is added.
+try:
+    from ocr_app.gpu_service import GpuServiceClient, GpuServiceError, record_page_outcome, service_from_env
+except ImportError:  # pragma: no cover - ocrmypdf CLI outside the app's sys.path
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    from ocr_app.gpu_service import GpuServiceClient, GpuServiceError, record_page_outcome, service_from_env
+
+log = logging.getLogger(__name__)
+
+OCR_ENGINE_NAME = "ocrestra-gpu"
+
+_client: GpuServiceClient | None = None
+_client_pid = 0
+_client_lock = threading.Lock()
+
+
+def _service_client() -> GpuServiceClient:
+    # OCRmyPDF may fork page workers; each process opens its own connection.
+    global _client, _client_pid
+    target = service_from_env()
+    if target is None:
+        raise GpuServiceError("GPU OCR service is not configured for this worker.")
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = GpuServiceClient(*target)
+            _client_pid = os.getpid()
+        return _client
+
+
+def _words_to_ocr_tree(input_file, words, page_number) -> OcrElement:
+    width, height, dpi = _image_size_and_dpi(input_file)
+
+    lines: list[OcrElement] = []
+    for word in words:
+        text = str(word.get("text") or "")
+        quad = word.get("quad") or []
+        if not text or len(quad) != 8:
+            continue
+        xs = quad[0::2]
+        ys = quad[1::2]
+        bbox = BoundingBox(left=min(xs), top=min(ys), right=max(xs), bottom=max(ys))
+        # Counter-clockwise degrees of the top edge; image y grows downward.
+        angle = degrees(atan2(-(quad[3] - quad[1]), quad[2] - quad[0]))
+        textangle = angle if abs(angle) >= 0.6 else 0.0
+        lines.append(
+            OcrElement(
+                ocr_class=OcrClass.LINE,
+                bbox=bbox,
+                textangle=textangle,
+                children=[OcrElement(ocr_class=OcrClass.WORD, bbox=bbox, text=text)],
+            )
+        )
+
+    return OcrElement(
+        ocr_class=OcrClass.PAGE,
+        bbox=BoundingBox(left=0, top=0, right=width, bottom=height),
+        dpi=dpi,
+        page_number=page_number,
+        children=lines,
+    )
+
+
+def _image_size_and_dpi(input_file) -> tuple[int, int, float]:
+    with Image.open(input_file) as im:
+        return im.width, im.height, float(im.info.get("dpi", (72.0, 72.0))[0])
+
+
+def _tesseract_ocr(input_file, options, page_number) -> tuple[OcrElement, str]:
+    # Same rasterized, rotated, and deskewed page image the GPU was given; only
+    # the recognition step runs again, on Tesseract.
+    image = Path(input_file)
+    output_hocr = image.with_name(f"{image.stem}_cpu_fallback.hocr")
+    output_text = image.with_name(f"{image.stem}_cpu_fallback.txt")
+    TesseractOcrEngine.generate_hocr(image, output_hocr, output_text, options)
+    tree = HocrParser(output_hocr).parse()
+    if not tree.dpi:
+        tree.dpi = _image_size_and_dpi(image)[2]
+    tree.page_number = page_number
+    try:
+        text = output_text.read_text(encoding="utf-8")
+    except OSError:
+        text = ""
+    return tree, text
+
+
+class GpuServiceEngine(OcrEngine):
+    """Sends page images to the resident GPU OCR service; Tesseract handles orientation and skew.
+
+    A page the service cannot recognize is recognized by Tesseract from the same
+    image, so a GPU failure costs one page of CPU OCR instead of a rerun of the file.
+    """
+
+    @staticmethod
+    def version():
+        return "1"
+
+    @staticmethod
+    def creator_tag(options):
+        return "OCRestra GPU OCR service"
+
+    def __str__(self):
+        return "OCRestra GPU OCR service"
+
+    @staticmethod
+    def languages(options):
+        # An empty set skips OCRmyPDF's language check; the service validates codes.
+        return set()
+
+    @staticmethod
+    def get_orientation(input_file, options):
+        return tesseract.get_orientation(
+            input_file,
+            engine_mode=options.tesseract.oem,
+            timeout=options.tesseract.non_ocr_timeout,
+        )
+
+    @staticmethod
+    def get_deskew(input_file, options) -> float:
+        return tesseract.get_deskew(
+            input_file,
+            languages=options.languages,
+            engine_mode=options.tesseract.oem,
+            timeout=options.tesseract.non_ocr_timeout,
+        )
+
+    @staticmethod
+    def supports_generate_ocr() -> bool:
+        return True
+
+    @staticmethod
+    def generate_ocr(input_file, options, page_number=0) -> tuple[OcrElement, str]:
+        started = time.perf_counter()
+        try:
+            image = Path(input_file).read_bytes()
+            words = _service_client().recognize(image, list(options.languages or ["eng"]))
+        except GpuServiceError as exc:
+            gpu_seconds = time.perf_counter() - started
+            log.warning(
+                "GPU OCR failed on page %d (%s); recognizing it on CPU from the same page image.", page_number + 1, exc
+            )
+            started = time.perf_counter()
+            result = _tesseract_ocr(input_file, options, page_number)
+            record_page_outcome(
+                {
+                    "page": page_number,
+                    "backend": "cpu",
+                    "seconds": time.perf_counter() - started,
+                    "gpu_seconds": gpu_seconds,
+                    "error": str(exc),
+                }
+            )
+            return result
+        record_page_outcome({"page": page_number, "backend": "gpu", "seconds": time.perf_counter() - started})
+        text = " ".join(str(word.get("text") or "") for word in words)
+        return _words_to_ocr_tree(input_file, words, page_number), text
+
+    # OCRmyPDF only takes these paths when it cannot use generate_ocr() (an explicit
+    # hocr/sandwich renderer); Tesseract produces the output so the file still gets OCR.
+    @staticmethod
+    def generate_hocr(input_file, output_hocr, output_text, options):
+        TesseractOcrEngine.generate_hocr(input_file, output_hocr, output_text, options)
+
+    @staticmethod
+    def generate_pdf(input_file, output_pdf, output_text, options):
+        TesseractOcrEngine.generate_pdf(input_file, output_pdf, output_text, options)
+
+
+@hookimpl(tryfirst=True)
+def get_ocr_engine(options):
+    # Registered after setuptools plugins, so this runs ahead of ocrmypdf-easyocr's
+    # own tryfirst hook for the default "auto" engine.
+    if options is not None and getattr(options, "ocr_engine", "auto") not in ("auto", OCR_ENGINE_NAME):
+        return None
+    if service_from_env() is None:
+        return None
+    return GpuServiceEngine()
@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+import json
+import multiprocessing as mp
+import os
+import secrets
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from typing import Any
+
+try:
+    from .config import (
+        GPU_SERVICE_PING_TIMEOUT_SECONDS,
+        GPU_SERVICE_REQUEST_TIMEOUT_SECONDS,
+        GPU_SERVICE_START_TIMEOUT_SECONDS,
+    )
+except ImportError:  # pragma: no cover - loaded by file path from the OCRmyPDF plugin
+    from config import (  # type: ignore
+        GPU_SERVICE_PING_TIMEOUT_SECONDS,
+        GPU_SERVICE_REQUEST_TIMEOUT_SECONDS,
+        GPU_SERVICE_START_TIMEOUT_SECONDS,
+    )
+
+# Workers hand the service location to the OCRmyPDF plugin through the environment,
+# so it also reaches OCRmyPDF's page worker processes and the CLI subprocess.
+SERVICE_ADDRESS_ENV = "OCRESTRA_GPU_SERVICE_ADDRESS"
+SERVICE_AUTHKEY_ENV = "OCRESTRA_GPU_SERVICE_AUTHKEY"
+# JSON-lines file where the plugin records which backend recognized each page.
+PAGE_LOG_ENV = "OCRESTRA_GPU_PAGE_LOG"
+MODEL_NAMES = ("easyocr", "fake")
+
+
+class GpuServiceError(RuntimeError):
+    pass
+
+
+class FakeOcrModel:
+    """CPU-only stand-in that "recognizes" one word per page, for tests and smoke checks."""
+
+    name = "fake"
+
+    def __init__(self) -> None:
+        self.loads = 0
+        self.calls = 0
+
+    def load(self) -> None:
+        self.loads += 1
+
+    def recognize(self, image: bytes, languages: list[str]) -> list[dict[str, Any]]:
+        self.calls += 1
+        if not image:
+            raise ValueError("Empty page image.")
+        text = f"page{self.calls}"
+        return [{"quad": [0.0, 0.0, 10.0, 0.0, 10.0, 10.0, 0.0, 10.0], "text": text, "confidence": 1.0}]
+
+
+class EasyOcrModel:
+    """One resident ``easyocr.Reader`` on the GPU, rebuilt only when the language set changes."""
+
+    name = "easyocr"
+
+    def __init__(self) -> None:
+        self._reader: Any = None
+        self._languages: tuple[str, ...] = ()
+
+    @staticmethod
+    def _easyocr_languages(languages: list[str]) -> tuple[str, ...]:
+        try:
+            from ocrmypdf_easyocr._easyocr import ISO_639_3_2
+        except Exception:
+            ISO_639_3_2 = {"eng": "en"}
+        return tuple(ISO_639_3_2.get(code, code) for code in (languages or ["eng"]))
+
+    def load(self, languages: list[str] | None = None) -> None:
+        import easyocr
+
+        wanted = self._easyocr_languages(languages or ["eng"])
+        if self._reader is None or wanted != self._languages:
+            self._reader = easyocr.Reader(list(wanted), gpu=True)
+            self._languages = wanted
+
+    def recognize(self, image: bytes, languages: list[str]) -> list[dict[str, Any]]:
+        self.load(languages)
+        words = []
+        for box, text, confidence in self._reader.readtext(image):
+            quad = [float(value) for point in box for value in point]
+            words.append({"quad": quad, "text": str(text), "confidence": float(confidence)})
+        return words
+
+
+def load_model(name: str) -> Any:
+    if name == "fake":
+        return FakeOcrModel()
+    if name == "easyocr":
+        return EasyOcrModel()
+    raise ValueError(f"Unknown GPU OCR model: {name}")
+
+
+class GpuOcrService:
+    """Serve page recognition requests from one resident model.
+
+    Each client connection gets its own thread; model calls are serialized by a
+    lock because one GPU model runs one inference at a time. The model is loaded
+    on a background thread so clients can connect (and ``ping``) while it warms up.
+    """
+
+    def __init__(self, model: Any, authkey: bytes, address: Any = None) -> None:
+        self.model = model
+        self.authkey = authkey
+        self.listener = Listener(address=address, authkey=authkey)
+        self.address = self.listener.address
+        self.state = "loading"
+        self.error = ""
+        self.pages_served = 0
+        self.started_at = time.monotonic()
+        self._model_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._accept_thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        threading.Thread(target=self._load_model, name="gpu-service-load", daemon=True).start()
+        self._accept_thread = threading.Thread(target=self.serve_forever, name="gpu-service-accept", daemon=True)
+        self._accept_thread.start()
+
+    def _load_model(self) -> None:
+        with self._model_lock:
+            try:
+                self.model.load()
+                self.state = "ready"
+            except Exception as exc:  # noqa: BLE001
+                self.state = "failed"
+                self.error = f"{type(exc).__name__}: {exc}"
+
+    def serve_forever(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                conn = self.listener.accept()
+            except Exception:  # noqa: BLE001
+                # Closed listener on shutdown, or a client that failed authentication.
+                if self._stopped.is_set():
+                    break
+                continue
+            threading.Thread(target=self._serve_client, args=(conn,), name="gpu-service-client", daemon=True).start()
+
+    def _serve_client(self, conn: Any) -> None:
+        try:
+            while not self._stopped.is_set():
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    break
+                reply = self.handle(request)
+                try:
+                    conn.send(reply)
+                except (OSError, ValueError):
+                    break
+        finally:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def handle(self, request: Any) -> dict[str, Any]:
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "Malformed request."}
+        op = request.get("op")
+        if op == "ping":
+            return {
+                "ok": True,
+                "model": getattr(self.model, "name", "unknown"),
+                "state": self.state,
+                "error": self.error,
+                "pages_served": self.pages_served,
+                "uptime_seconds": time.monotonic() - self.started_at,
+            }
+        if op == "recognize":
+            image = request.get("image")
+            if not isinstance(image, (bytes, bytearray)):
+                return {"ok": False, "error": "Request has no page image."}
+            languages = [str(code) for code in request.get("languages") or []]
+            started = time.perf_counter()
+            with self._model_lock:
+                if self.state == "failed":
+                    return {"ok": False, "error": f"GPU OCR model failed to load: {self.error}"}
+                try:
+                    words = self.model.recognize(bytes(image), languages)
+                except Exception as exc:  # noqa: BLE001
+                    return {"ok": False, "error": f"GPU OCR service error: {type(exc).__name__}: {exc}"}
+                self.state = "ready"
+                self.pages_served += 1
+            return {"ok": True, "words": words, "seconds": time.perf_counter() - started}
+        if op == "shutdown":
+            self._stopped.set()
+            return {"ok": True}
+        return {"ok": False, "error": f"Unknown request: {op!r}"}
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._stopped.wait(timeout)
+
+    def close(self) -> None:
+        self._stopped.set()
+        try:
+            self.listener.close()
+        except Exception:
+            pass
+
+
+class GpuServiceClient:
+    """Blocking client for one service connection; safe to share between threads."""
+
+    def __init__(self, address: Any, authkey: bytes, timeout: float = GPU_SERVICE_REQUEST_TIMEOUT_SECONDS) -> None:
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self._conn: Any = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> GpuServiceClient:
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.close()
+
+    def request(self, payload: dict[str, Any], timeout: float | None = None) -> dict[str, Any]:
+        with self._lock:
+            try:
+                if self._conn is None:
+                    self._conn = Client(self.address, authkey=self.authkey)
+                self._conn.send(payload)
+                if not self._conn.poll(self.timeout if timeout is None else timeout):
+                    self._drop()
+                    raise GpuServiceError("GPU OCR service did not answer in time.")
+                reply = self._conn.recv()
+            except GpuServiceError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                self._drop()
+                raise GpuServiceError(f"GPU OCR service is unreachable: {exc}") from exc
+        if not isinstance(reply, dict) or not reply.get("ok"):
+            error = reply.get("error") if isinstance(reply, dict) else ""
+            raise GpuServiceError(str(error or "GPU OCR service rejected the request."))
+        return reply
+
+    def ping(self, timeout: float = GPU_SERVICE_PING_TIMEOUT_SECONDS) -> dict[str, Any]:
+        return self.request({"op": "ping"}, timeout=timeout)
+
+    def recognize(self, image: bytes, languages: list[str]) -> list[dict[str, Any]]:
+        reply = self.request({"op": "recognize", "image": image, "languages": list(languages)})
+        return list(reply.get("words") or [])
+
+    def _drop(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        with self._lock:
+            self._drop()
+
+
+def service_main(conn: Any, model_name: str, authkey: bytes) -> None:
+    """Service process entry point: report the address over ``conn``, then serve until shutdown."""
+    try:
+        service = GpuOcrService(load_model(model_name), authkey)
+    except Exception as exc:  # noqa: BLE001
+        conn.send({"ok": False, "error": f"{type(exc).__name__}: {exc}"})
+        conn.close()
+        return
+    service.start()
+    conn.send({"ok": True, "address": service.address})
+    # Exit with the parent: a closed control pipe means the GUI went away.
+    watcher = threading.Thread(target=_watch_parent, args=(conn, service), name="gpu-service-parent", daemon=True)
+    watcher.start()
+    service.wait()
+    service.close()
+
+
+def _watch_parent(conn: Any, service: GpuOcrService) -> None:
+    try:
+        conn.recv()
+    except (EOFError, OSError):
+        pass
+    service.close()
+
+
+class GpuServiceHandle:
+    """Owns the service process for the GUI; ``env()`` is what workers export to the plugin."""
+
+    def __init__(self, model_name: str = "easyocr", context: Any | None = None) -> None:
+        if model_name not in MODEL_NAMES:
+            raise ValueError(f"Unknown GPU OCR model: {model_name}")
+        self.model_name = model_name
+        self.authkey = secrets.token_bytes(32)
+        self.address: Any = None
+        self._ctx = context or mp
+        self._process: Any = None
+        self._conn: Any = None
+
+    def start(self, timeout: float = GPU_SERVICE_START_TIMEOUT_SECONDS) -> None:
+        parent_conn, child_conn = self._ctx.Pipe(duplex=True)
+        process = self._ctx.Process(
+            target=service_main,
+            args=(child_conn, self.model_name, self.authkey),
+            name="ocr-gpu-service",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self._process = process
+        self._conn = parent_conn
+        try:
+            if not parent_conn.poll(timeout):
+                raise GpuServiceError("GPU OCR service did not start in time.")
+            reply = parent_conn.recv()
+        except GpuServiceError:
+            self.stop()
+            raise
+        except Exception as exc:  # noqa: BLE001
+            self.stop()
+            raise GpuServiceError(f"GPU OCR service failed to start: {exc}") from exc
+        if not isinstance(reply, dict) or not reply.get("ok"):
+            self.stop()
+            raise GpuServiceError(str(reply.get("error") if isinstance(reply, dict) else "GPU OCR service failed."))
+        self.address = reply["address"]
+
+    @property
+    def pid(self) -> int | None:
+        return None if self._process is None else self._process.pid
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive() and self.address is not None
+
+    def env(self) -> dict[str, str]:
+        if not self.is_alive():
+            return {}
+        return {SERVICE_ADDRESS_ENV: str(self.address), SERVICE_AUTHKEY_ENV: self.authkey.hex()}
+
+    def ping(self) -> dict[str, Any]:
+        with GpuServiceClient(self.address, self.authkey) as client:
+            return client.ping()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        process, self._process = self._process, None
+        conn, self._conn = self._conn, None
+        self.address = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+        if process is None:
+            return
+        try:
+            process.join(timeout=timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=0.5)
+        except Exception:
+            pass
+
+
+def service_from_env(environ: Any = None) -> tuple[str, bytes] | None:
+    environ = os.environ if environ is None else environ
+    address = environ.get(SERVICE_ADDRESS_ENV, "")
+    authkey = environ.get(SERVICE_AUTHKEY_ENV, "")
+    if not address or not authkey:
+        return None
+    try:
+        return address, bytes.fromhex(authkey)
+    except ValueError:
+        return None
+
+
+def record_page_outcome(entry: dict[str, Any], environ: Any = None) -> None:
+    """Append one page result to the page log named in the environment, if any.
+
+    OCRmyPDF page workers may be separate processes; each line is one small
+    ``O_APPEND`` write, so concurrent writers do not interleave.
+    """
+    environ = os.environ if environ is None else environ
+    path = environ.get(PAGE_LOG_ENV, "")
+    if not path:
+        return
+    line = json.dumps(entry, separators=(",", ":")) + "\n"
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_CLOEXEC", 0), 0o600)
+    except OSError:
+        return
+    try:
+        os.write(fd, line.encode("utf-8"))
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_page_outcomes(path: os.PathLike[str] | str) -> list[dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            lines = handle.readlines()
+    except OSError:
+        return []
+    entries = []
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(entry, dict):
+            entries.append(entry)
+    return entries
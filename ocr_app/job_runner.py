@@ -1,49 +1,207 @@
 from __future__ import annotations
 
+import contextlib
 import datetime as dt
 import functools
 import importlib.metadata
+import importlib.util
 import logging
 import os
 import re
 import shutil
 import stat
 import subprocess
+import sys
 import tempfile
+import threading
 import time
+import traceback
 from pathlib import Path
-from queue import Full
-from typing import Any
+from typing import Any, Callable
 
 import psutil
 
 try:
-    from .config import LOG_ROOT, MAX_INPUT_FILE_BYTES, TEMP_ROOT
+    from .config import (
+        DURABILITY_MODES,
+        EXECUTION_MODES,
+        LOG_BATCH_MAX_LINES,
+        LOG_BATCH_SECONDS,
+        LOG_GUI_LEVELS,
+        LOG_GUI_LINES_PER_SECOND,
+        LOG_GUI_TRACKED_TEXT,
+        LOG_ROOT,
+        MAX_INPUT_FILE_BYTES,
+        OCR_JOBS_MAX,
+        RAM_TEMP_ROOT,
+        TASK_PHASES,
+        TEMP_ROOT,
+    )
+    from .file_copy import copy_fd_contents, copy_file, open_for_copy
+    from .gpu_service import (
+        PAGE_LOG_ENV,
+        SERVICE_ADDRESS_ENV,
+        SERVICE_AUTHKEY_ENV,
+        GpuServiceClient,
+        read_page_outcomes,
+    )
+    from .ocr_progress import PROGRESS_PLUGIN, parse_progress_line, progress_sink
+    from .pdf_pages import extract_pages, merge_pdfs
+    from .result_cache import ResultCache, cache_key, hash_file
 except ImportError:  # pragma: no cover - direct script execution fallback
-    from config import LOG_ROOT, MAX_INPUT_FILE_BYTES, TEMP_ROOT  # type: ignore
+    from config import (  # type: ignore
+        DURABILITY_MODES,
+        EXECUTION_MODES,
+        LOG_BATCH_MAX_LINES,
+        LOG_BATCH_SECONDS,
+        LOG_GUI_LEVELS,
+        LOG_GUI_LINES_PER_SECOND,
+        LOG_GUI_TRACKED_TEXT,
+        LOG_ROOT,
+        MAX_INPUT_FILE_BYTES,
+        OCR_JOBS_MAX,
+        RAM_TEMP_ROOT,
+        TASK_PHASES,
+        TEMP_ROOT,
+    )
+    from file_copy import copy_fd_contents, copy_file, open_for_copy  # type: ignore
+    from gpu_service import (  # type: ignore
+        PAGE_LOG_ENV,
+        SERVICE_ADDRESS_ENV,
+        SERVICE_AUTHKEY_ENV,
+        GpuServiceClient,
+        read_page_outcomes,
+    )
+    from ocr_progress import PROGRESS_PLUGIN, parse_progress_line, progress_sink  # type: ignore
+    from pdf_pages import extract_pages, merge_pdfs  # type: ignore
+    from result_cache import ResultCache, cache_key, hash_file  # type: ignore
 
+GPU_SERVICE_PLUGIN = Path(__file__).resolve().with_name("gpu_ocr_plugin.py")
+PROGRESS_PLUGIN_PATH = Path(__file__).resolve().with_name(PROGRESS_PLUGIN)
 
 class QueueLogHandler(logging.Handler):
-    def __init__(self, queue_obj: Any, task_id: str) -> None:
+    """Send a task's log records to the GUI as batched ``log_batch`` events.
+
+    Records are buffered and a background thread flushes them every
+    ``flush_seconds``, or at once when ``max_lines`` distinct lines are waiting.
+    A line logged again before the flush only raises its count. Records below
+    ``gui_level`` or past ``lines_per_second`` are counted as held back instead
+    of sent; the task's file handler still writes every record. Errors and the
+    lines the GUI parses for metrics bypass both filters.
+    """
+
+    def __init__(
+        self,
+        queue_obj: Any,
+        task_id: str,
+        gui_level: int = logging.INFO,
+        flush_seconds: float = LOG_BATCH_SECONDS,
+        max_lines: int = LOG_BATCH_MAX_LINES,
+        lines_per_second: float = LOG_GUI_LINES_PER_SECOND,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
         super().__init__()
         self.queue_obj = queue_obj
         self.task_id = task_id
+        self.gui_level = gui_level
+        self.flush_seconds = max(0.0, float(flush_seconds))
+        self.max_lines = max(1, int(max_lines))
+        self.lines_per_second = max(0.0, float(lines_per_second))
+        self.clock = clock
+        # (level, message text) -> [formatted first record, times logged]
+        self._pending: dict[tuple[int, str], list[Any]] = {}
+        self._held_back = 0
+        self._tokens = self.lines_per_second
+        self._refilled_at = clock()
+        self._closed = threading.Event()
+        self._flusher: threading.Thread | None = None
 
     def emit(self, record: logging.LogRecord) -> None:
+        try:
+            text = record.getMessage()
+        except Exception:
+            return
+        entry = self._pending.get((record.levelno, text))
+        if entry is not None:
+            entry[1] += 1
+            return
+        if not self._wanted(record.levelno, text):
+            self._held_back += 1
+            return
         try:
             message = self.format(record)
         except Exception:
             return
-        payload = {"type": "log", "task_id": self.task_id, "message": message}
+        self._pending[(record.levelno, text)] = [message, 1]
+        if len(self._pending) >= self.max_lines or self.flush_seconds <= 0:
+            self._send()
+        elif self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="ocr-log-flush", daemon=True)
+            self._flusher.start()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            self._send()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        self._closed.set()
+        self.flush()
+        super().close()
+
+    def _wanted(self, levelno: int, text: str) -> bool:
+        lowered = text.lower()
+        if levelno >= logging.ERROR or any(marker in lowered for marker in LOG_GUI_TRACKED_TEXT):
+            return True
+        if levelno < self.gui_level:
+            return False
+        if not self.lines_per_second:
+            return True
+        # Token bucket: up to one second's worth of lines in a burst.
+        now = self.clock()
+        self._tokens = min(self.lines_per_second, self._tokens + (now - self._refilled_at) * self.lines_per_second)
+        self._refilled_at = now
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    def _send(self) -> None:
+        if not self._pending and not self._held_back:
+            return
+        payload = {
+            "type": "log_batch",
+            "task_id": self.task_id,
+            "lines": [{"message": message, "count": count} for message, count in self._pending.values()],
+            "held_back": self._held_back,
+        }
+        self._pending = {}
+        self._held_back = 0
         try:
             self.queue_obj.put_nowait(payload)
-        except Full:
-            pass
         except Exception:
             pass
 
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(self.flush_seconds):
+            self.flush()
+
+
+def _flush_gui_log() -> None:
+    # Buffered live-feed lines go out before the event that ends the task.
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, QueueLogHandler):
+            handler.flush()
+
+
+def _gui_log_level(value: Any) -> int:
+    name = str(value or "").strip().upper()
+    return getattr(logging, name if name in LOG_GUI_LEVELS else LOG_GUI_LEVELS[0])
+
 
-def _configure_logging(log_file: Path, queue_obj: Any, task_id: str) -> None:
+def _configure_logging(log_file: Path, queue_obj: Any, task_id: str, gui_level: Any = None) -> None:
     log_file.parent.mkdir(parents=True, exist_ok=True)
     formatter = logging.Formatter(
         "%(asctime)s | %(levelname)s | %(threadName)s | %(message)s",
@@ -51,14 +209,20 @@ def _configure_logging(log_file: Path, queue_obj: Any, task_id: str) -> None:
     )
 
     root = logging.getLogger()
-    root.handlers.clear()
+    # Pool workers configure logging once per task; close the previous task's handlers.
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        try:
+            handler.close()
+        except Exception:
+            pass
     root.setLevel(logging.INFO)
 
     file_handler = logging.FileHandler(log_file, encoding="utf-8")
     file_handler.setFormatter(formatter)
     root.addHandler(file_handler)
 
-    queue_handler = QueueLogHandler(queue_obj, task_id)
+    queue_handler = QueueLogHandler(queue_obj, task_id, gui_level=_gui_log_level(gui_level))
     queue_handler.setFormatter(formatter)
     root.addHandler(queue_handler)
 
@@ -69,6 +233,8 @@ class OCRCommandError(RuntimeError):
     def __init__(self, exit_code: int | None, details: str) -> None:
         self.exit_code = exit_code
         self.details = details.strip()
+        # Set when this error ends a CPU retry that followed a GPU failure.
+        self.gpu_failed = False
         if self.details and self.exit_code is not None:
             message = f"ocrmypdf failed with exit code {self.exit_code}: {self.details}"
         elif self.exit_code is not None:
@@ -86,11 +252,14 @@ def _build_ocr_command(
     use_gpu: bool,
     optimize_for_size: bool,
     include_easyocr_plugin: bool,
+    jobs: int = 1,
+    gpu_plugin: str = "",
+    progress_plugin: str = "",
 ) -> list[str]:
     cmd = [
         ocrmypdf_bin,
         "--jobs",
-        "1",
+        str(max(1, int(jobs))),
         "--rotate-pages",
         "--deskew",
     ]
@@ -98,7 +267,10 @@ def _build_ocr_command(
         cmd.append("--force-ocr")
     else:
         cmd.append("--skip-text")
-    if use_gpu:
+    if use_gpu and gpu_plugin:
+        # The service plugin returns OCR trees, which OCRmyPDF renders itself.
+        cmd.extend(["--plugin", gpu_plugin])
+    elif use_gpu:
         # EasyOCR plugin currently requires sandwich renderer (no hOCR support).
         cmd.extend(["--pdf-renderer", "sandwich"])
     else:
@@ -107,10 +279,85 @@ def _build_ocr_command(
         cmd.extend(["-O", "2", "--jpeg-quality", "75", "--png-quality", "70"])
     if include_easyocr_plugin:
         cmd.extend(["--plugin", "ocrmypdf_easyocr"])
+    if progress_plugin:
+        cmd.extend(["--plugin", progress_plugin])
     cmd.extend([str(input_pdf), str(output_pdf)])
     return cmd
 
 
+def _build_ocr_kwargs(
+    force_ocr: bool,
+    use_gpu: bool,
+    optimize_for_size: bool,
+    include_easyocr_plugin: bool,
+    jobs: int = 1,
+    gpu_plugin: str = "",
+    progress_plugin: str = "",
+) -> dict[str, Any]:
+    # Mirrors _build_ocr_command for the in-process ocrmypdf.ocr() API.
+    options: dict[str, Any] = {
+        "jobs": max(1, int(jobs)),
+        "rotate_pages": True,
+        "deskew": True,
+        "mode": "force" if force_ocr else "skip",
+        "progress_bar": False,
+    }
+    if use_gpu and gpu_plugin:
+        options["plugins"] = [gpu_plugin]
+    elif use_gpu:
+        options["pdf_renderer"] = "sandwich"
+    else:
+        options["ocr_engine"] = "tesseract"
+    if optimize_for_size:
+        options.update({"optimize": 2, "jpg_quality": 75, "png_quality": 70})
+    if include_easyocr_plugin:
+        options["plugins"] = ["ocrmypdf_easyocr"]
+    if progress_plugin:
+        options["plugins"] = [*options.get("plugins", []), progress_plugin]
+    return options
+
+
+def _normalize_execution_mode(value: Any) -> str:
+    mode = str(value or "").strip().lower()
+    return mode if mode in EXECUTION_MODES else EXECUTION_MODES[0]
+
+
+def _normalize_durability(value: Any) -> str:
+    mode = str(value or "").strip().lower()
+    return mode if mode in DURABILITY_MODES else DURABILITY_MODES[0]
+
+
+def _normalize_ocr_jobs(value: Any) -> int:
+    try:
+        jobs = int(value)
+    except Exception:
+        return 1
+    return max(1, min(OCR_JOBS_MAX, jobs))
+
+
+def _normalize_memory_limit(value: Any) -> int:
+    try:
+        return max(0, int(value))
+    except Exception:
+        return 0
+
+
+def _log_ocr_jobs(logger: logging.Logger, jobs: int, config: dict[str, Any]) -> None:
+    detail = str(config.get("ocr_jobs_detail", "")).strip()
+    if detail:
+        logger.info("OCRmyPDF jobs: %d (%s)", jobs, detail)
+    else:
+        logger.info("OCRmyPDF jobs: %d", jobs)
+
+
+@functools.lru_cache(maxsize=1)
+def _ocrmypdf_api_available() -> bool:
+    try:
+        return importlib.util.find_spec("ocrmypdf") is not None
+    except Exception:
+        return False
+
+
 @functools.lru_cache(maxsize=1)
 def _easyocr_plugin_autoregistered() -> bool:
     try:
@@ -128,6 +375,126 @@ def _easyocr_plugin_autoregistered() -> bool:
     return False
 
 
+@functools.lru_cache(maxsize=2)
+def _ocr_engine_fingerprint(use_gpu: bool) -> dict[str, str]:
+    versions: dict[str, str] = {}
+    for dist in ("ocrmypdf", "ocrmypdf-easyocr" if use_gpu else ""):
+        if not dist:
+            continue
+        try:
+            versions[dist] = importlib.metadata.version(dist)
+        except Exception:
+            versions[dist] = "unknown"
+    if not use_gpu:
+        tesseract = shutil.which("tesseract")
+        version = "unknown"
+        if tesseract:
+            try:
+                completed = subprocess.run(
+                    [tesseract, "--version"],
+                    capture_output=True,
+                    text=True,
+                    timeout=10,
+                    check=False,
+                )
+                lines = (completed.stdout or completed.stderr).strip().splitlines()
+                version = lines[0].strip() if lines else "unknown"
+            except Exception:
+                version = "unknown"
+        versions["tesseract"] = version
+    return versions
+
+
+def _planned_ocr_engine(config: dict[str, Any], use_gpu: bool) -> str:
+    """Name the engine a run is set up to use; it is part of the result-cache key."""
+    if not use_gpu:
+        return "tesseract"
+    return "gpu-service" if config.get("gpu_service_address") and config.get("gpu_service_authkey") else "easyocr"
+
+
+def _ocr_engine_used(use_gpu: bool, gpu_plugin: str, used_cpu_fallback: bool, page_log: Path | None) -> str:
+    """Name the engine that produced a finished run's output."""
+    if not use_gpu or used_cpu_fallback:
+        return "tesseract"
+    if not gpu_plugin:
+        return "easyocr"
+    if page_log is not None and any(entry.get("backend") == "cpu" for entry in read_page_outcomes(page_log)):
+        return "mixed"
+    return "gpu-service"
+
+
+def _open_result_cache(
+    config: dict[str, Any],
+    input_pdf: Path,
+    force_ocr: bool,
+    use_gpu: bool,
+    optimize_for_size: bool,
+    logger: logging.Logger,
+) -> tuple[ResultCache | None, str]:
+    if not config.get("result_cache"):
+        return None, ""
+    try:
+        cache = ResultCache(
+            Path(config["result_cache_dir"]),
+            int(config.get("result_cache_max_bytes", 0)),
+        )
+        options = {
+            "force_ocr": force_ocr,
+            "use_gpu": use_gpu,
+            "optimize_for_size": optimize_for_size,
+            "engine": _ocr_engine_fingerprint(use_gpu),
+            "engine_name": _planned_ocr_engine(config, use_gpu),
+        }
+        return cache, cache_key(hash_file(input_pdf), options)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Result cache unavailable for this file: %s", exc)
+        return None, ""
+
+
+def _install_cached_output(
+    cache: ResultCache | None,
+    key: str,
+    output_pdf: Path,
+    logger: logging.Logger,
+    durability: str = "fsync",
+) -> float | None:
+    """Install a cached result and return its install seconds, or ``None`` on a miss."""
+    if cache is None or not key:
+        return None
+    cached = cache.lookup(key)
+    if cached is None:
+        return None
+    try:
+        _strategy, install_seconds = _install_output_pdf(cached, output_pdf, durability=durability)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Cached OCR result could not be installed, running OCR: %s", exc)
+        return None
+    logger.info("Result cache hit (%s); installed cached OCR output.", key[:12])
+    return install_seconds
+
+
+def _store_cached_output(
+    cache: ResultCache | None,
+    key: str,
+    result_pdf: Path,
+    logger: logging.Logger,
+    planned_engine: str = "",
+    engine_used: str = "",
+) -> None:
+    if cache is None or not key:
+        return
+    if engine_used != planned_engine:
+        # A CPU retry or a missing GPU service would poison the key for later GPU runs.
+        logger.info(
+            "OCR output was not cached: %s produced it, but its cache key is for %s.", engine_used, planned_engine
+        )
+        return
+    if cache.store(key, result_pdf):
+        logger.info("Stored OCR output in result cache (%s).", key[:12])
+    else:
+        logger.info("OCR output was not cached (cache disabled, full, or not writable).")
+
+
 def _is_easyocr_duplicate_registration_error(message: str) -> bool:
     lowered = message.lower()
     return (
@@ -172,7 +539,110 @@ def _ocrmypdf_progress_bucket(message: str) -> int | None:
         return None
 
 
-def _run_ocr_command(cmd: list[str]) -> None:
+def _progress_forwarder(queue_obj: Any, task_id: str) -> Callable[[dict[str, Any]], None]:
+    # Progress-plugin events become "progress" pool events for the task or shard.
+    def forward(event: dict[str, Any]) -> None:
+        payload = dict(event)
+        payload["type"] = "progress"
+        payload["task_id"] = task_id
+        try:
+            queue_obj.put_nowait(payload)
+        except Exception:
+            pass
+
+    return forward
+
+
+def _add_phase(timings: dict[str, float] | None, name: str, seconds: float) -> None:
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + max(0.0, seconds)
+
+
+@contextlib.contextmanager
+def _timed_phase(timings: dict[str, float] | None, name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add_phase(timings, name, time.perf_counter() - started)
+
+
+def _format_phases(timings: dict[str, float]) -> str:
+    return ", ".join(f"{name} {timings[name]:.3f}s" for name in TASK_PHASES if name in timings)
+
+
+_RUSAGE_FIELDS = (
+    ("cpu_user", "ru_utime"),
+    ("cpu_system", "ru_stime"),
+    ("block_in", "ru_inblock"),
+    ("block_out", "ru_oublock"),
+    ("ctx_voluntary", "ru_nvcsw"),
+    ("ctx_involuntary", "ru_nivcsw"),
+)
+
+
+def _add_rusage(usage: dict[str, Any] | None, after: Any, before: Any = None, source: str = "wait4") -> None:
+    """Accumulate an OCR run's child rusage (``after - before``) into ``usage``.
+
+    ``wait4`` covers the OCRmyPDF process and every descendant it waited for.
+    ``RUSAGE_CHILDREN`` deltas do the same for in-process runs, but its max RSS
+    is the worker's lifetime peak, so it only counts when this run raised it.
+    """
+    if usage is None or after is None:
+        return
+    for key, attr in _RUSAGE_FIELDS:
+        delta = getattr(after, attr) - (getattr(before, attr) if before is not None else 0)
+        usage[key] = usage.get(key, 0) + max(0, delta)
+    # Linux reports ru_maxrss in KiB, macOS in bytes.
+    scale = 1 if sys.platform == "darwin" else 1024
+    if before is None or after.ru_maxrss > before.ru_maxrss:
+        usage["max_rss"] = max(int(usage.get("max_rss", 0)), int(after.ru_maxrss) * scale)
+    usage["source"] = source
+
+
+def _children_rusage() -> Any:
+    try:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_CHILDREN)
+    except Exception:
+        return None
+
+
+def _wait_with_rusage(proc: Any) -> tuple[int, Any]:
+    # Reaping through wait4 returns the subtree's rusage; Popen then keeps the
+    # returncode instead of waiting again.
+    pid = getattr(proc, "pid", None)
+    wait4 = getattr(os, "wait4", None)
+    if not isinstance(pid, int) or wait4 is None:
+        return proc.wait(), None
+    try:
+        _pid, status, rusage = wait4(pid, 0)
+    except ChildProcessError:
+        return proc.wait(), None
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, rusage
+
+
+def _format_rusage(usage: dict[str, Any]) -> str:
+    if not usage:
+        return "n/a"
+    max_rss = usage.get("max_rss")
+    return (
+        f"CPU user {float(usage.get('cpu_user', 0.0)):.2f}s, system {float(usage.get('cpu_system', 0.0)):.2f}s, "
+        f"peak RSS {_format_bytes_short(int(max_rss)) if max_rss else 'n/a'}, "
+        f"block I/O {int(usage.get('block_in', 0))} in / {int(usage.get('block_out', 0))} out, "
+        f"context switches {int(usage.get('ctx_voluntary', 0))} voluntary / "
+        f"{int(usage.get('ctx_involuntary', 0))} involuntary ({usage.get('source', 'n/a')})"
+    )
+
+
+def _run_ocr_command(
+    cmd: list[str],
+    progress: Callable[[dict[str, Any]], None] | None = None,
+    timings: dict[str, float] | None = None,
+    usage: dict[str, Any] | None = None,
+) -> None:
     logger = logging.getLogger("ocr_gui.worker")
     output_tail: list[str] = []
     output_tail_bytes = 0
@@ -189,6 +659,8 @@ def _run_ocr_command(cmd: list[str]) -> None:
             dropped = output_tail.pop(0)
             output_tail_bytes -= len(dropped.encode("utf-8", errors="replace"))
 
+    # launch: Popen; first_output: until OCRmyPDF prints anything; ocr: the rest of the run.
+    launch_started = time.perf_counter()
     try:
         proc = subprocess.Popen(
             cmd,
@@ -199,11 +671,24 @@ def _run_ocr_command(cmd: list[str]) -> None:
         )
     except FileNotFoundError as exc:
         raise OCRCommandError(None, "ocrmypdf executable is not available in PATH.") from exc
+    running_since = time.perf_counter()
+    _add_phase(timings, "launch", running_since - launch_started)
 
+    seen_output = False
     if proc.stdout is not None:
         for line in proc.stdout:
-            append_tail(line)
+            if not seen_output:
+                seen_output = True
+                now = time.perf_counter()
+                _add_phase(timings, "first_output", now - running_since)
+                running_since = now
             message = line.rstrip()
+            progress_event = parse_progress_line(message)
+            if progress_event is not None:
+                if progress is not None:
+                    progress(progress_event)
+                continue
+            append_tail(line)
             if message:
                 progress_bucket = _ocrmypdf_progress_bucket(message)
                 if progress_bucket is not None:
@@ -212,7 +697,9 @@ def _run_ocr_command(cmd: list[str]) -> None:
                     last_progress_bucket = progress_bucket
                 logger.info("ocrmypdf | %s", message)
 
-    rc = proc.wait()
+    rc, rusage = _wait_with_rusage(proc)
+    _add_phase(timings, "ocr", time.perf_counter() - running_since)
+    _add_rusage(usage, rusage)
     details = "".join(output_tail).strip()
     if rc != 0:
         raise OCRCommandError(rc, details)
@@ -221,6 +708,87 @@ def _run_ocr_command(cmd: list[str]) -> None:
         raise OCRCommandError(None, f"{silent_failure}\n{details}".strip())
 
 
+class _TailCaptureHandler(logging.Handler):
+    def __init__(self, limit: int) -> None:
+        super().__init__(logging.DEBUG)
+        self.limit = limit
+        self._chunks: list[str] = []
+        self._size = 0
+        self.first_record_at: float | None = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.first_record_at is None:
+            self.first_record_at = time.perf_counter()
+        try:
+            chunk = record.getMessage() + "\n"
+            if record.exc_info:
+                chunk += "".join(traceback.format_exception(*record.exc_info))
+        except Exception:
+            return
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        while self._chunks and self._size > self.limit:
+            self._size -= len(self._chunks.pop(0))
+
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+
+def _run_ocr_api(
+    input_pdf: Path,
+    output_pdf: Path,
+    options: dict[str, Any],
+    progress: Callable[[dict[str, Any]], None] | None = None,
+    timings: dict[str, float] | None = None,
+    usage: dict[str, Any] | None = None,
+) -> None:
+    # OCRmyPDF logs through the "ocrmypdf" logger, which propagates to the task's
+    # file and queue handlers, so streaming matches the subprocess mode.
+    launch_started = time.perf_counter()
+    try:
+        import ocrmypdf
+    except Exception as exc:  # noqa: BLE001
+        raise OCRCommandError(None, f"ocrmypdf Python API is not importable: {exc}") from exc
+
+    capture = _TailCaptureHandler(16 * 1024)
+    root = logging.getLogger()
+    root.addHandler(capture)
+    running_since = time.perf_counter()
+    _add_phase(timings, "launch", running_since - launch_started)
+    children_before = _children_rusage() if usage is not None else None
+    try:
+        with progress_sink(progress) if progress is not None else contextlib.nullcontext():
+            rc = ocrmypdf.ocr(input_pdf, output_pdf, **options)
+    except Exception as exc:  # noqa: BLE001
+        details = f"{capture.text()}{traceback.format_exc()}"
+        exit_code = getattr(exc, "exit_code", None)
+        try:
+            exit_code = int(exit_code) if exit_code is not None else None
+        except Exception:
+            exit_code = None
+        raise OCRCommandError(exit_code, details) from exc
+    finally:
+        root.removeHandler(capture)
+        finished = time.perf_counter()
+        if capture.first_record_at is not None:
+            _add_phase(timings, "first_output", capture.first_record_at - running_since)
+            running_since = capture.first_record_at
+        _add_phase(timings, "ocr", finished - running_since)
+        if children_before is not None:
+            _add_rusage(usage, _children_rusage(), children_before, source="rusage_children")
+
+    details = capture.text().strip()
+    try:
+        rc_value = int(rc)
+    except Exception:
+        rc_value = 0
+    if rc_value != 0:
+        raise OCRCommandError(rc_value, details)
+    silent_failure = _detect_silent_easyocr_failure(details)
+    if silent_failure:
+        raise OCRCommandError(None, f"{silent_failure}\n{details}".strip())
+
+
 def _is_gpu_related_failure(details: str) -> bool:
     lowered = details.lower()
     markers = (
@@ -235,6 +803,23 @@ def _is_gpu_related_failure(details: str) -> bool:
     return any(marker in lowered for marker in markers)
 
 
+def _is_memory_limit_failure(details: str) -> bool:
+    lowered = details.lower().replace("cuda out of memory", "")
+    markers = (
+        "memoryerror",
+        "std::bad_alloc",
+        "cannot allocate memory",
+        "out of memory",
+        "vmerror",
+        "enomem",
+    )
+    return any(marker in lowered for marker in markers)
+
+
+def _format_bytes_short(value: int) -> str:
+    return f"{value / (1024 * 1024 * 1024):.1f} GiB" if value >= 1024 * 1024 * 1024 else f"{value // (1024 * 1024)} MiB"
+
+
 def _is_input_file_error(details: str) -> bool:
     lowered = details.lower()
     return "inputfileerror" in lowered or "input file error" in lowered
@@ -249,6 +834,28 @@ def _format_ocr_error(error: OCRCommandError) -> str:
     return str(error)
 
 
+def _summarize_gpu_pages(page_log: Path, run_seconds: float, logger: logging.Logger) -> bool:
+    """Log pages the service plugin recognized on CPU; return True if no page ran on the GPU."""
+    entries = read_page_outcomes(page_log)
+    cpu_pages = [entry for entry in entries if entry.get("backend") == "cpu"]
+    if not cpu_pages:
+        return False
+    gpu_pages = len(entries) - len(cpu_pages)
+    cpu_seconds = sum(float(entry.get("seconds") or 0.0) for entry in cpu_pages)
+    # A whole-file CPU retry would repeat rasterization, orientation, deskew, and
+    # every page's OCR on top of this run. The fallback pages' CPU OCR is part of
+    # both, and GPU pages only get slower on CPU, so this run's length is a floor.
+    logger.warning(
+        "GPU OCR fell back to CPU on %d of %d page(s), reusing their rasterized page images "
+        "(%.2fs of CPU OCR); avoided rerunning the whole file on CPU, estimated at %.2fs or more.",
+        len(cpu_pages),
+        len(entries),
+        cpu_seconds,
+        max(0.0, run_seconds),
+    )
+    return gpu_pages == 0
+
+
 def _run_with_gpu_retry(
     ocrmypdf_bin: str,
     input_pdf: Path,
@@ -257,7 +864,17 @@ def _run_with_gpu_retry(
     use_gpu: bool,
     optimize_for_size: bool,
     logger: logging.Logger,
+    execution_mode: str = "subprocess",
+    jobs: int = 1,
+    gpu_plugin: str = "",
+    progress: Callable[[dict[str, Any]], None] | None = None,
+    timings: dict[str, float] | None = None,
+    usage: dict[str, Any] | None = None,
 ) -> bool:
+    page_log = Path(os.environ[PAGE_LOG_ENV]) if gpu_plugin and os.environ.get(PAGE_LOG_ENV) else None
+    if page_log is not None:
+        page_log.unlink(missing_ok=True)
+    started = time.perf_counter()
     try:
         _run_ocr(
             ocrmypdf_bin,
@@ -266,24 +883,39 @@ def _run_with_gpu_retry(
             force_ocr,
             use_gpu,
             optimize_for_size,
+            execution_mode,
+            jobs,
+            gpu_plugin,
+            progress,
+            timings,
+            usage,
         )
+        if page_log is not None:
+            # Every page on CPU counts as a GPU failure for the session's breaker.
+            return _summarize_gpu_pages(page_log, time.perf_counter() - started, logger)
         return False
     except OCRCommandError as exc:
         if use_gpu and _is_gpu_related_failure(exc.details):
             logger.warning("GPU backend failed. Retrying this file once with CPU backend.")
             try:
-                _run_ocr(
-                    ocrmypdf_bin,
-                    input_pdf,
-                    output_pdf,
-                    force_ocr,
-                    False,
-                    optimize_for_size,
-                )
+                with _timed_phase(timings, "retry"):
+                    _run_ocr(
+                        ocrmypdf_bin,
+                        input_pdf,
+                        output_pdf,
+                        force_ocr,
+                        False,
+                        optimize_for_size,
+                        execution_mode,
+                        jobs,
+                        progress=progress,
+                        usage=usage,
+                    )
                 logger.info("CPU fallback after GPU failure succeeded.")
                 return True
-            except OCRCommandError:
+            except OCRCommandError as cpu_exc:
                 logger.error("CPU fallback after GPU failure also failed.")
+                cpu_exc.gpu_failed = True
                 raise
         raise
 
@@ -295,21 +927,48 @@ def _run_ocr(
     force_ocr: bool,
     use_gpu: bool,
     optimize_for_size: bool,
+    execution_mode: str = "subprocess",
+    jobs: int = 1,
+    gpu_plugin: str = "",
+    progress: Callable[[dict[str, Any]], None] | None = None,
+    timings: dict[str, float] | None = None,
+    usage: dict[str, Any] | None = None,
 ) -> None:
     if output_pdf.exists():
         output_pdf.unlink()
-    include_easyocr_plugin = use_gpu and not _easyocr_plugin_autoregistered()
-    cmd = _build_ocr_command(
-        ocrmypdf_bin,
-        input_pdf,
-        output_pdf,
-        force_ocr,
-        use_gpu=use_gpu,
-        optimize_for_size=optimize_for_size,
-        include_easyocr_plugin=include_easyocr_plugin,
-    )
+    gpu_plugin = gpu_plugin if use_gpu else ""
+    include_easyocr_plugin = use_gpu and not gpu_plugin and not _easyocr_plugin_autoregistered()
+    progress_plugin = str(PROGRESS_PLUGIN_PATH) if progress is not None else ""
+
+    def attempt(include_plugin: bool) -> None:
+        if execution_mode == "api":
+            options = _build_ocr_kwargs(
+                force_ocr,
+                use_gpu=use_gpu,
+                optimize_for_size=optimize_for_size,
+                include_easyocr_plugin=include_plugin,
+                jobs=jobs,
+                gpu_plugin=gpu_plugin,
+                progress_plugin=progress_plugin,
+            )
+            _run_ocr_api(input_pdf, output_pdf, options, progress, timings, usage)
+            return
+        cmd = _build_ocr_command(
+            ocrmypdf_bin,
+            input_pdf,
+            output_pdf,
+            force_ocr,
+            use_gpu=use_gpu,
+            optimize_for_size=optimize_for_size,
+            include_easyocr_plugin=include_plugin,
+            jobs=jobs,
+            gpu_plugin=gpu_plugin,
+            progress_plugin=progress_plugin,
+        )
+        _run_ocr_command(cmd, progress, timings, usage)
+
     try:
-        _run_ocr_command(cmd)
+        attempt(include_easyocr_plugin)
     except OCRCommandError as exc:
         details = exc.details
         if (
@@ -317,16 +976,7 @@ def _run_ocr(
             and include_easyocr_plugin
             and _is_easyocr_duplicate_registration_error(details)
         ):
-            retry_cmd = _build_ocr_command(
-                ocrmypdf_bin,
-                input_pdf,
-                output_pdf,
-                force_ocr,
-                use_gpu=use_gpu,
-                optimize_for_size=optimize_for_size,
-                include_easyocr_plugin=False,
-            )
-            _run_ocr_command(retry_cmd)
+            attempt(False)
             return
         raise
 
@@ -354,17 +1004,145 @@ def _safe_size(path: Path) -> int:
         return 0
 
 
-def _cleanup_temp_dir(temp_dir: Path) -> None:
+def _temp_roots() -> tuple[Path, ...]:
+    return (TEMP_ROOT, RAM_TEMP_ROOT)
+
+
+def _within_temp_roots(path: Path) -> Path | None:
+    """Return ``path`` resolved if it lies under the disk or RAM staging root."""
     try:
-        resolved = temp_dir.resolve()
-        temp_root = TEMP_ROOT.resolve()
-        if resolved != temp_root and temp_root not in resolved.parents:
-            return
+        resolved = path.resolve()
+        for root in _temp_roots():
+            temp_root = root.resolve()
+            if resolved == temp_root or temp_root in resolved.parents:
+                return resolved
     except Exception:
+        return None
+    return None
+
+
+def _cleanup_temp_dir(temp_dir: Path) -> None:
+    if _within_temp_roots(temp_dir) is None:
         return
     shutil.rmtree(temp_dir, ignore_errors=True)
 
 
+@contextlib.contextmanager
+def _scratch_tempdir(temp_dir: Path):
+    """Point OCRmyPDF's work folders (``TMPDIR`` and ``tempfile.tempdir``) at ``temp_dir``.
+
+    Workers run one task at a time, so swapping process-wide state is safe and
+    keeps intermediates on the task's staging root and inside its cleanup.
+    """
+    temp_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    saved_env = {name: os.environ.get(name) for name in ("TMPDIR", "TEMP", "TMP")}
+    saved_tempdir = tempfile.tempdir
+    for name in saved_env:
+        os.environ[name] = str(temp_dir)
+    tempfile.tempdir = str(temp_dir)
+    try:
+        yield
+    finally:
+        tempfile.tempdir = saved_tempdir
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@contextlib.contextmanager
+def _task_memory_limit(limit_bytes: int, loads_cuda: bool, logger: logging.Logger):
+    """Cap the address space of this worker and every OCR process it starts; yield the cap (0 = none).
+
+    Sets the soft ``RLIMIT_AS``, which OCRmyPDF, Ghostscript, and Tesseract inherit
+    at fork, and restores it afterwards so the warm worker keeps its headroom. The
+    limit is per process, not a sum over the tree.
+    """
+    if limit_bytes <= 0:
+        yield 0
+        return
+    if loads_cuda:
+        # CUDA reserves far more virtual address space than it uses.
+        logger.info("Memory limit skipped: EasyOCR loads CUDA in this worker.")
+        yield 0
+        return
+    try:
+        import resource
+
+        soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = limit_bytes if hard == resource.RLIM_INFINITY else min(limit_bytes, hard)
+        mapped = psutil.Process(os.getpid()).memory_info().vms
+        if mapped >= limit:
+            raise ValueError(f"worker already maps {_format_bytes_short(mapped)}")
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Memory limit not applied (%s); running without it.", exc)
+        yield 0
+        return
+    logger.info("Memory limit: %s of address space per OCR process", _format_bytes_short(limit))
+    try:
+        yield limit
+    finally:
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+        except Exception:
+            pass
+
+
+def _memory_limit_error(limit: int, exc: OCRCommandError) -> str:
+    return f"Memory limit exceeded ({_format_bytes_short(limit)} per process): {_format_ocr_error(exc)}"
+
+
+@contextlib.contextmanager
+def _gpu_service_session(
+    config: dict[str, Any], use_gpu: bool, logger: logging.Logger, page_log: Path | None = None
+):
+    """Yield the service plugin path if the resident GPU OCR service answers, else ``""``.
+
+    While active, the service address and key are exported for the plugin, which
+    runs in this process (API mode) or in the ocrmypdf subprocess and its page workers,
+    along with ``page_log``, where the plugin records each page's backend.
+    """
+    address = str(config.get("gpu_service_address") or "")
+    authkey = str(config.get("gpu_service_authkey") or "")
+    if not use_gpu or not address or not authkey:
+        yield ""
+        return
+    try:
+        with GpuServiceClient(address, bytes.fromhex(authkey)) as client:
+            info = client.ping()
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Resident GPU OCR service unavailable (%s); loading EasyOCR in this worker.", exc)
+        yield ""
+        return
+    if info.get("state") == "failed":
+        logger.warning("Resident GPU OCR service has no model (%s); loading EasyOCR in this worker.", info.get("error"))
+        yield ""
+        return
+    logger.info(
+        "OCR backend: resident GPU OCR service (%s model %s, %d page(s) served so far)",
+        info.get("model", "unknown"),
+        info.get("state", "unknown"),
+        int(info.get("pages_served", 0)),
+    )
+    saved = {name: os.environ.get(name) for name in (SERVICE_ADDRESS_ENV, SERVICE_AUTHKEY_ENV, PAGE_LOG_ENV)}
+    os.environ[SERVICE_ADDRESS_ENV] = address
+    os.environ[SERVICE_AUTHKEY_ENV] = authkey
+    if page_log is not None:
+        os.environ[PAGE_LOG_ENV] = str(page_log)
+    else:
+        os.environ.pop(PAGE_LOG_ENV, None)
+    try:
+        yield str(GPU_SERVICE_PLUGIN)
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
 def _sanitize_task_id(value: Any) -> str:
     task_id = str(value)
     if re.fullmatch(r"[a-f0-9]{8,32}", task_id):
@@ -373,15 +1151,7 @@ def _sanitize_task_id(value: Any) -> str:
 
 
 def _safe_temp_dir(path: Path, task_id: str) -> Path:
-    fallback = TEMP_ROOT / task_id
-    try:
-        resolved = path.resolve()
-        temp_root = TEMP_ROOT.resolve()
-        if resolved == temp_root or temp_root in resolved.parents:
-            return resolved
-    except Exception:
-        return fallback
-    return fallback
+    return _within_temp_roots(path) or TEMP_ROOT / task_id
 
 
 def _is_path_within(base: Path, path: Path) -> bool:
@@ -436,14 +1206,41 @@ def _ensure_safe_output_dir(path: Path) -> Path:
     return path
 
 
-def _copy_file_to_fd(src: Path, dest_fd: int) -> None:
-    with src.open("rb") as src_handle, os.fdopen(dest_fd, "wb") as dest_handle:
-        shutil.copyfileobj(src_handle, dest_handle)
-        dest_handle.flush()
-        os.fsync(dest_handle.fileno())
+def _copy_file_to_fd(src: Path, dest_fd: int, sync: bool = True) -> str:
+    """Copy ``src`` into ``dest_fd``, optionally fsync, and close it; return the copy strategy."""
+    try:
+        src_fd = open_for_copy(src)
+        try:
+            strategy = copy_fd_contents(src_fd, dest_fd)
+        finally:
+            os.close(src_fd)
+        if sync:
+            os.fsync(dest_fd)
+    finally:
+        os.close(dest_fd)
+    return strategy
+
+
+def _rename_staged_output(staged_output: Path, temp_name: str, dir_fd: int, sync: bool) -> bool:
+    try:
+        os.rename(staged_output, temp_name, dst_dir_fd=dir_fd)
+    except OSError:
+        # EXDEV (different filesystem) or anything else: fall back to copying.
+        return False
+    flags = os.O_RDONLY
+    if hasattr(os, "O_NOFOLLOW"):
+        flags |= os.O_NOFOLLOW
+    fd = os.open(temp_name, flags, dir_fd=dir_fd)
+    try:
+        os.fchmod(fd, 0o600)
+        if sync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    return True
 
 
-def _install_output_pdf_generic(staged_output: Path, output_pdf: Path) -> None:
+def _install_output_pdf_generic(staged_output: Path, output_pdf: Path, allow_rename: bool, sync: bool) -> str:
     output_dir = _ensure_safe_output_dir(output_pdf.parent)
     temp_fd, temp_name = tempfile.mkstemp(
         prefix=".ocrestra-",
@@ -452,10 +1249,20 @@ def _install_output_pdf_generic(staged_output: Path, output_pdf: Path) -> None:
     )
     temp_path = Path(temp_name)
     try:
-        _copy_file_to_fd(staged_output, temp_fd)
+        strategy = ""
+        if allow_rename:
+            os.close(temp_fd)
+            try:
+                os.replace(staged_output, temp_path)
+                strategy = "rename"
+            except OSError:
+                temp_fd = os.open(temp_path, os.O_WRONLY | os.O_TRUNC | getattr(os, "O_BINARY", 0))
+        if not strategy:
+            strategy = _copy_file_to_fd(staged_output, temp_fd, sync)
         if output_pdf.is_symlink():
             raise PermissionError("Refusing to overwrite symlink output file.")
         os.replace(temp_path, output_pdf)
+        return strategy
     except Exception:
         try:
             if temp_path.exists():
@@ -465,7 +1272,7 @@ def _install_output_pdf_generic(staged_output: Path, output_pdf: Path) -> None:
         raise
 
 
-def _install_output_pdf_posix(staged_output: Path, output_pdf: Path) -> None:
+def _install_output_pdf_posix(staged_output: Path, output_pdf: Path, allow_rename: bool, sync: bool) -> str:
     output_dir = _ensure_safe_output_dir(output_pdf.parent)
     dir_flags = os.O_RDONLY
     if hasattr(os, "O_DIRECTORY"):
@@ -479,9 +1286,12 @@ def _install_output_pdf_posix(staged_output: Path, output_pdf: Path) -> None:
         temp_flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL
         if hasattr(os, "O_NOFOLLOW"):
             temp_flags |= os.O_NOFOLLOW
-        temp_fd = os.open(temp_name, temp_flags, 0o600, dir_fd=dir_fd)
-        _copy_file_to_fd(staged_output, temp_fd)
-        temp_fd = None
+        if allow_rename and _rename_staged_output(staged_output, temp_name, dir_fd, sync):
+            strategy = "rename"
+        else:
+            temp_fd = os.open(temp_name, temp_flags, 0o600, dir_fd=dir_fd)
+            strategy = _copy_file_to_fd(staged_output, temp_fd, sync)
+            temp_fd = None
         try:
             current = os.stat(output_pdf.name, dir_fd=dir_fd, follow_symlinks=False)
         except FileNotFoundError:
@@ -489,10 +1299,12 @@ def _install_output_pdf_posix(staged_output: Path, output_pdf: Path) -> None:
         if current is not None and stat.S_ISLNK(current.st_mode):
             raise PermissionError("Refusing to overwrite symlink output file.")
         os.replace(temp_name, output_pdf.name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
-        try:
-            os.fsync(dir_fd)
-        except OSError:
-            pass
+        if sync:
+            try:
+                os.fsync(dir_fd)
+            except OSError:
+                pass
+        return strategy
     except Exception:
         if temp_fd is not None:
             try:
@@ -510,17 +1322,49 @@ def _install_output_pdf_posix(staged_output: Path, output_pdf: Path) -> None:
         os.close(dir_fd)
 
 
-def _install_output_pdf(staged_output: Path, output_pdf: Path) -> None:
+def _install_output_pdf(
+    staged_output: Path,
+    output_pdf: Path,
+    allow_rename: bool = False,
+    durability: str = "fsync",
+) -> tuple[str, float]:
+    """Atomically install ``staged_output`` as ``output_pdf``; return ``(strategy, seconds)``.
+
+    ``allow_rename`` moves the staged file when it is a throwaway on the same
+    filesystem. Otherwise, or across filesystems, the data is reflinked,
+    copied in-kernel with ``copy_file_range``, or copied plainly. Only the
+    ``fsync`` durability mode syncs the file and directory here; ``deferred``
+    leaves that to the GUI's end-of-batch barrier.
+    """
+    started = time.perf_counter()
     output_pdf = _safe_output_pdf(output_pdf)
     if not staged_output.exists() or staged_output.is_symlink():
         raise FileNotFoundError(f"Staged output is missing or unsafe: {staged_output}")
+    durability = _normalize_durability(durability)
+    sync = durability == "fsync"
     if os.name != "nt":
-        _install_output_pdf_posix(staged_output, output_pdf)
-        return
-    _install_output_pdf_generic(staged_output, output_pdf)
+        strategy = _install_output_pdf_posix(staged_output, output_pdf, allow_rename, sync)
+    else:
+        strategy = _install_output_pdf_generic(staged_output, output_pdf, allow_rename, sync)
+    seconds = time.perf_counter() - started
+    logging.getLogger("ocr_gui.worker").info(
+        "Installed output via %s in %.3fs (durability %s): %s", strategy, seconds, durability, output_pdf
+    )
+    return strategy, seconds
+
+
+def _stage_input_copy(input_pdf: Path, temp_input: Path, logger: logging.Logger) -> None:
+    if temp_input.is_symlink():
+        raise PermissionError(f"Refusing symlinked staging path: {temp_input}")
+    temp_input.unlink(missing_ok=True)
+    strategy = copy_file(input_pdf, temp_input)
+    logger.info("Staged input copy via %s: %s", strategy, temp_input)
 
 
 def run_ocr_job(config: dict[str, Any], queue_obj: Any) -> None:
+    job_started = time.perf_counter()
+    phases: dict[str, float] = {}
+    child_usage: dict[str, Any] = {}
     task_id = _sanitize_task_id(config.get("task_id", "task"))
     try:
         input_pdf = Path(config["input_pdf"])
@@ -530,7 +1374,12 @@ def run_ocr_job(config: dict[str, Any], queue_obj: Any) -> None:
         force_ocr = bool(config.get("force_ocr", False))
         use_gpu = bool(config.get("use_gpu", False))
         optimize_for_size = bool(config.get("optimize_for_size", False))
+        execution_mode = _normalize_execution_mode(config.get("execution_mode"))
+        ocr_jobs = _normalize_ocr_jobs(config.get("ocr_jobs"))
+        durability = _normalize_durability(config.get("durability"))
+        memory_limit = _normalize_memory_limit(config.get("memory_limit_bytes"))
     except Exception as exc:  # noqa: BLE001
+        _flush_gui_log()
         queue_obj.put(
             {
                 "type": "done",
@@ -539,6 +1388,7 @@ def run_ocr_job(config: dict[str, Any], queue_obj: Any) -> None:
                 "error": f"Invalid task configuration: {exc}",
                 "output_pdf": "",
                 "used_fallback": False,
+                "phase_seconds": {"validate": time.perf_counter() - job_started},
                 "duration_seconds": 0.0,
                 "input_size": 0,
                 "output_size": 0,
@@ -552,8 +1402,10 @@ def run_ocr_job(config: dict[str, Any], queue_obj: Any) -> None:
             }
         )
         return
+    phases["validate"] = time.perf_counter() - job_started
 
-    _configure_logging(log_file, queue_obj, task_id)
+    with _timed_phase(phases, "logging"):
+        _configure_logging(log_file, queue_obj, task_id, config.get("gui_log_level"))
     logger = logging.getLogger("ocr_gui.worker")
     proc = psutil.Process(os.getpid())
 
@@ -568,6 +1420,7 @@ def run_ocr_job(config: dict[str, Any], queue_obj: Any) -> None:
             f"Limit is {MAX_INPUT_FILE_BYTES} bytes."
         )
         queue_obj.put({"type": "status", "task_id": task_id, "status": "Failed"})
+        _flush_gui_log()
         queue_obj.put(
             {
                 "type": "done",
@@ -576,6 +1429,7 @@ def run_ocr_job(config: dict[str, Any], queue_obj: Any) -> None:
                 "error": error,
                 "output_pdf": str(output_pdf),
                 "used_fallback": False,
+                "phase_seconds": phases,
                 "duration_seconds": 0.0,
                 "input_size": input_size,
                 "output_size": 0,
@@ -600,71 +1454,144 @@ def run_ocr_job(config: dict[str, Any], queue_obj: Any) -> None:
         "Output size profile: %s",
         "Balanced compression (smaller output)" if optimize_for_size else "Standard",
     )
+    logger.info(
+        "OCR execution: %s",
+        "In-process OCRmyPDF API (warm worker)" if execution_mode == "api" else "ocrmypdf subprocess",
+    )
+    _log_ocr_jobs(logger, ocr_jobs, config)
+    logger.info("Staging directory: %s", temp_dir)
     queue_obj.put({"type": "status", "task_id": task_id, "status": "Running"})
 
     success = False
     error_message = ""
     used_cpu_fallback = False
-    ocrmypdf_bin = shutil.which("ocrmypdf")
+    ocrmypdf_bin = shutil.which("ocrmypdf") or ""
     staged_output = temp_dir / f"{task_id}_output.pdf"
+    page_log = temp_dir / "gpu_pages.jsonl"
+    planned_engine = _planned_ocr_engine(config, use_gpu)
+    engine_used = ""
+    with _timed_phase(phases, "cache"):
+        cache, result_key = _open_result_cache(config, input_pdf, force_ocr, use_gpu, optimize_for_size, logger)
+    cache_status = "disabled" if cache is None else "miss"
+    install_strategy = ""
+    install_seconds = 0.0
+    gpu_service_used = False
+    gpu_failed = False
+    memory_limit_exceeded = False
     try:
-        if not ocrmypdf_bin:
+        with _timed_phase(phases, "cache"):
+            cached_install_seconds = _install_cached_output(cache, result_key, output_pdf, logger, durability)
+        if cached_install_seconds is not None:
+            install_seconds = cached_install_seconds
+            # The lookup's install step is reported as install, not cache time.
+            phases["cache"] -= install_seconds
+            _add_phase(phases, "install", install_seconds)
+            cache_status = "hit"
+            success = True
+        elif execution_mode == "api" and not _ocrmypdf_api_available():
+            error_message = "ocrmypdf Python package is not importable in this environment."
+            logger.error("%s", error_message)
+            queue_obj.put({"type": "status", "task_id": task_id, "status": "Failed"})
+        elif execution_mode != "api" and not ocrmypdf_bin:
             error_message = "ocrmypdf command was not found in PATH."
             logger.error("%s", error_message)
             queue_obj.put({"type": "status", "task_id": task_id, "status": "Failed"})
         else:
-            temp_dir.mkdir(parents=True, exist_ok=True)
-            try:
-                used_cpu_fallback = _run_with_gpu_retry(
-                    ocrmypdf_bin,
-                    input_pdf,
-                    staged_output,
-                    force_ocr,
-                    use_gpu,
-                    optimize_for_size,
-                    logger,
-                )
-                _install_output_pdf(staged_output, output_pdf)
-                success = True
-            except OCRCommandError as exc:
-                if _should_fallback_to_tmp(input_pdf, exc):
-                    try:
-                        used_fallback = True
-                        logger.warning("Permission/mount issue detected. Retrying via %s", temp_dir)
-                        temp_dir.mkdir(parents=True, exist_ok=True)
-                        temp_input = temp_dir / input_pdf.name
-                        temp_output = temp_dir / f"{task_id}_fallback_output.pdf"
-                        shutil.copy2(input_pdf, temp_input)
-                        used_cpu_fallback = _run_with_gpu_retry(
-                            ocrmypdf_bin,
-                            temp_input,
-                            temp_output,
-                            force_ocr,
-                            use_gpu,
-                            optimize_for_size,
-                            logger,
-                        )
-                        _install_output_pdf(temp_output, output_pdf)
-                        success = True
-                    except OCRCommandError as fallback_exc:
-                        error_message = _format_ocr_error(fallback_exc)
-                        if _is_input_file_error(fallback_exc.details):
-                            logger.error("Input file appears invalid/unreadable for OCRmyPDF: %s", input_pdf)
-                        else:
+            with (
+                _scratch_tempdir(temp_dir),
+                _gpu_service_session(config, use_gpu, logger, page_log) as gpu_plugin,
+                _task_memory_limit(memory_limit, use_gpu and not gpu_plugin, logger) as applied_memory_limit,
+            ):
+                gpu_service_used = bool(gpu_plugin)
+                try:
+                    used_cpu_fallback = _run_with_gpu_retry(
+                        ocrmypdf_bin,
+                        input_pdf,
+                        staged_output,
+                        force_ocr,
+                        use_gpu,
+                        optimize_for_size,
+                        logger,
+                        execution_mode,
+                        ocr_jobs,
+                        gpu_plugin,
+                        progress=_progress_forwarder(queue_obj, task_id),
+                        timings=phases,
+                        usage=child_usage,
+                    )
+                    engine_used = _ocr_engine_used(use_gpu, gpu_plugin, used_cpu_fallback, page_log)
+                    with _timed_phase(phases, "cache"):
+                        _store_cached_output(cache, result_key, staged_output, logger, planned_engine, engine_used)
+                    install_strategy, install_seconds = _install_output_pdf(
+                        staged_output, output_pdf, allow_rename=True, durability=durability
+                    )
+                    _add_phase(phases, "install", install_seconds)
+                    success = True
+                except OCRCommandError as exc:
+                    gpu_failed = exc.gpu_failed
+                    if applied_memory_limit and _is_memory_limit_failure(exc.details):
+                        memory_limit_exceeded = True
+                        error_message = _memory_limit_error(applied_memory_limit, exc)
+                        logger.error("%s", error_message)
+                    elif _should_fallback_to_tmp(input_pdf, exc):
+                        try:
+                            used_fallback = True
+                            logger.warning("Permission/mount issue detected. Retrying via %s", temp_dir)
+                            temp_dir.mkdir(parents=True, exist_ok=True)
+                            temp_input = temp_dir / input_pdf.name
+                            temp_output = temp_dir / f"{task_id}_fallback_output.pdf"
+                            _stage_input_copy(input_pdf, temp_input, logger)
+                            used_cpu_fallback = _run_with_gpu_retry(
+                                ocrmypdf_bin,
+                                temp_input,
+                                temp_output,
+                                force_ocr,
+                                use_gpu,
+                                optimize_for_size,
+                                logger,
+                                execution_mode,
+                                ocr_jobs,
+                                gpu_plugin,
+                                progress=_progress_forwarder(queue_obj, task_id),
+                                timings=phases,
+                                usage=child_usage,
+                            )
+                            engine_used = _ocr_engine_used(use_gpu, gpu_plugin, used_cpu_fallback, page_log)
+                            with _timed_phase(phases, "cache"):
+                                _store_cached_output(cache, result_key, temp_output, logger, planned_engine, engine_used)
+                            install_strategy, install_seconds = _install_output_pdf(
+                                temp_output, output_pdf, allow_rename=True, durability=durability
+                            )
+                            _add_phase(phases, "install", install_seconds)
+                            success = True
+                        except OCRCommandError as fallback_exc:
+                            gpu_failed = gpu_failed or fallback_exc.gpu_failed
+                            error_message = _format_ocr_error(fallback_exc)
+                            if applied_memory_limit and _is_memory_limit_failure(fallback_exc.details):
+                                memory_limit_exceeded = True
+                                error_message = _memory_limit_error(applied_memory_limit, fallback_exc)
+                                logger.error("%s", error_message)
+                            elif _is_input_file_error(fallback_exc.details):
+                                logger.error("Input file appears invalid/unreadable for OCRmyPDF: %s", input_pdf)
+                            else:
+                                logger.exception("Fallback OCR failed for %s: %s", input_pdf, fallback_exc)
+                        except Exception as fallback_exc:  # noqa: BLE001
+                            error_message = f"{type(fallback_exc).__name__}: {fallback_exc}"
                             logger.exception("Fallback OCR failed for %s: %s", input_pdf, fallback_exc)
-                    except Exception as fallback_exc:  # noqa: BLE001
-                        error_message = f"{type(fallback_exc).__name__}: {fallback_exc}"
-                        logger.exception("Fallback OCR failed for %s: %s", input_pdf, fallback_exc)
-                else:
-                    error_message = _format_ocr_error(exc)
-                    if _is_input_file_error(exc.details):
-                        logger.error("Input file appears invalid/unreadable for OCRmyPDF: %s", input_pdf)
                     else:
-                        logger.exception("OCR failed for %s: %s", input_pdf, exc)
-            except Exception as exc:  # noqa: BLE001
-                error_message = f"{type(exc).__name__}: {exc}"
-                logger.exception("OCR failed for %s: %s", input_pdf, exc)
+                        error_message = _format_ocr_error(exc)
+                        if _is_input_file_error(exc.details):
+                            logger.error("Input file appears invalid/unreadable for OCRmyPDF: %s", input_pdf)
+                        else:
+                            logger.exception("OCR failed for %s: %s", input_pdf, exc)
+                except Exception as exc:  # noqa: BLE001
+                    error_message = f"{type(exc).__name__}: {exc}"
+                    logger.exception("OCR failed for %s: %s", input_pdf, exc)
     finally:
+        # Temp files are removed before "done", so the GUI never sees a finished
+        # task whose scratch space is still being deleted.
+        with _timed_phase(phases, "cleanup"):
+            _cleanup_temp_dir(temp_dir)
         duration = time.time() - start
         end_stamp = dt.datetime.now().isoformat(timespec="seconds")
         end_rss = proc.memory_info().rss
@@ -682,11 +1609,14 @@ def run_ocr_job(config: dict[str, Any], queue_obj: Any) -> None:
         logger.info("Process RSS end: %d bytes", end_rss)
         logger.info("Process CPU user delta: %.4f", end_cpu.user - start_cpu.user)
         logger.info("Process CPU system delta: %.4f", end_cpu.system - start_cpu.system)
+        logger.info("OCR child processes: %s", _format_rusage(child_usage))
         if used_fallback:
             logger.info("Used /tmp fallback: yes")
         if used_cpu_fallback:
             logger.info("Used CPU retry after GPU failure: yes")
+        logger.info("Phase timings: %s", _format_phases(phases))
 
+        _flush_gui_log()
         queue_obj.put(
             {
                 "type": "done",
@@ -696,6 +1626,17 @@ def run_ocr_job(config: dict[str, Any], queue_obj: Any) -> None:
                 "output_pdf": str(output_pdf),
                 "used_fallback": used_fallback,
                 "used_cpu_fallback": used_cpu_fallback,
+                "phase_seconds": phases,
+                "gpu_failed": used_cpu_fallback or gpu_failed,
+                "gpu_service": gpu_service_used,
+                "engine_used": engine_used,
+                "memory_limit_exceeded": memory_limit_exceeded,
+                "execution_mode": execution_mode,
+                "ocr_jobs": ocr_jobs,
+                "cache_status": cache_status,
+                "install_strategy": install_strategy,
+                "install_seconds": install_seconds,
+                "durability": durability,
                 "duration_seconds": duration,
                 "input_size": input_size,
                 "output_size": output_size,
@@ -704,13 +1645,334 @@ def run_ocr_job(config: dict[str, Any], queue_obj: Any) -> None:
                 "rss_end": end_rss,
                 "cpu_user_delta": end_cpu.user - start_cpu.user,
                 "cpu_system_delta": end_cpu.system - start_cpu.system,
+                "child_rusage": child_usage,
                 "start_stamp": start_stamp,
                 "end_stamp": end_stamp,
             }
         )
+
+
+def run_ocr_shard(config: dict[str, Any], queue_obj: Any) -> None:
+    task_id = _sanitize_task_id(config.get("task_id", "task"))
+    parent_id = _sanitize_task_id(config.get("parent_id", "task"))
+    start = time.time()
+    try:
+        input_pdf = Path(config["input_pdf"])
+        part_pdf = Path(config["part_pdf"])
+        if _within_temp_roots(part_pdf.parent) is None or part_pdf.suffix.lower() != ".pdf":
+            raise PermissionError(f"Shard output must stay under a staging root: {part_pdf}")
+        first_page, end_page = (int(value) for value in config["page_range"])
+        shard_label = f"{int(config.get('shard_index', 0)) + 1}/{int(config.get('shard_count', 1))}"
+        log_file = _safe_log_file(Path(config["log_file"]), parent_id)
+        temp_dir = _safe_temp_dir(Path(config["temp_dir"]), task_id)
+        force_ocr = bool(config.get("force_ocr", False))
+        use_gpu = bool(config.get("use_gpu", False))
+        optimize_for_size = bool(config.get("optimize_for_size", False))
+        execution_mode = _normalize_execution_mode(config.get("execution_mode"))
+        ocr_jobs = _normalize_ocr_jobs(config.get("ocr_jobs"))
+        memory_limit = _normalize_memory_limit(config.get("memory_limit_bytes"))
+    except Exception as exc:  # noqa: BLE001
+        _flush_gui_log()
+        queue_obj.put(
+            {
+                "type": "done",
+                "task_id": task_id,
+                "success": False,
+                "error": f"Invalid shard configuration: {exc}",
+                "duration_seconds": 0.0,
+            }
+        )
+        return
+
+    _configure_logging(log_file, queue_obj, task_id, config.get("gui_log_level"))
+    logger = logging.getLogger("ocr_gui.worker")
+    proc = psutil.Process(os.getpid())
+    start_cpu = proc.cpu_times()
+    logger.info("Shard %s started: pages %d-%d of %s", shard_label, first_page + 1, end_page, input_pdf)
+    _log_ocr_jobs(logger, ocr_jobs, config)
+
+    success = False
+    error_message = ""
+    used_cpu_fallback = False
+    engine_used = ""
+    gpu_failed = False
+    memory_limit_exceeded = False
+    applied_memory_limit = 0
+    child_usage: dict[str, Any] = {}
+    ocrmypdf_bin = shutil.which("ocrmypdf") or ""
+    try:
+        if execution_mode == "api" and not _ocrmypdf_api_available():
+            error_message = "ocrmypdf Python package is not importable in this environment."
+        elif execution_mode != "api" and not ocrmypdf_bin:
+            error_message = "ocrmypdf command was not found in PATH."
+        else:
+            shard_input = temp_dir / f"{task_id}_pages.pdf"
+            shard_output = temp_dir / f"{task_id}_output.pdf"
+            page_log = temp_dir / "gpu_pages.jsonl"
+            with (
+                _scratch_tempdir(temp_dir),
+                _gpu_service_session(config, use_gpu, logger, page_log) as gpu_plugin,
+                _task_memory_limit(memory_limit, use_gpu and not gpu_plugin, logger) as applied_memory_limit,
+            ):
+                extract_pages(input_pdf, shard_input, first_page, end_page)
+                used_cpu_fallback = _run_with_gpu_retry(
+                    ocrmypdf_bin,
+                    shard_input,
+                    shard_output,
+                    force_ocr,
+                    use_gpu,
+                    optimize_for_size,
+                    logger,
+                    execution_mode,
+                    ocr_jobs,
+                    gpu_plugin,
+                    progress=_progress_forwarder(queue_obj, task_id),
+                    usage=child_usage,
+                )
+                engine_used = _ocr_engine_used(use_gpu, gpu_plugin, used_cpu_fallback, page_log)
+            part_pdf.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(shard_output, part_pdf)
+            success = True
+    except OCRCommandError as exc:
+        gpu_failed = exc.gpu_failed
+        error_message = _format_ocr_error(exc)
+        if applied_memory_limit and _is_memory_limit_failure(exc.details):
+            memory_limit_exceeded = True
+            error_message = _memory_limit_error(applied_memory_limit, exc)
+        logger.exception("OCR failed for shard %s of %s: %s", shard_label, input_pdf, exc)
+    except Exception as exc:  # noqa: BLE001
+        error_message = f"{type(exc).__name__}: {exc}"
+        logger.exception("OCR failed for shard %s of %s: %s", shard_label, input_pdf, exc)
+    finally:
+        duration = time.time() - start
+        end_cpu = proc.cpu_times()
+        if error_message and not success:
+            logger.error("Shard %s failed: %s", shard_label, error_message)
+        else:
+            logger.info("Shard %s finished in %.2f seconds.", shard_label, duration)
+        logger.info("Shard %s OCR child processes: %s", shard_label, _format_rusage(child_usage))
+        _flush_gui_log()
+        queue_obj.put(
+            {
+                "type": "done",
+                "task_id": task_id,
+                "success": success,
+                "error": error_message,
+                "part_pdf": str(part_pdf),
+                "pages": end_page - first_page,
+                "used_cpu_fallback": used_cpu_fallback,
+                "engine_used": engine_used,
+                "gpu_failed": used_cpu_fallback or gpu_failed,
+                "memory_limit_exceeded": memory_limit_exceeded,
+                "duration_seconds": duration,
+                "cpu_user_delta": end_cpu.user - start_cpu.user,
+                "cpu_system_delta": end_cpu.system - start_cpu.system,
+                "child_rusage": child_usage,
+            }
+        )
         _cleanup_temp_dir(temp_dir)
 
 
+def run_merge_job(config: dict[str, Any], queue_obj: Any) -> None:
+    task_id = _sanitize_task_id(config.get("task_id", "task"))
+    start = time.time()
+    start_stamp = dt.datetime.now().isoformat(timespec="seconds")
+    output_pdf = Path(str(config.get("output_pdf", "")))
+    temp_dir = TEMP_ROOT / task_id
+    success = False
+    error_message = ""
+    input_size = 0
+    install_seconds = 0.0
+    try:
+        output_pdf = _safe_output_pdf(Path(config["output_pdf"]))
+        log_file = _safe_log_file(Path(config["log_file"]), task_id)
+        temp_dir = _safe_temp_dir(Path(config["temp_dir"]), task_id)
+        parts = [Path(value) for value in config["parts"]]
+        input_size = _safe_size(Path(config["input_pdf"]))
+        for part in parts:
+            if not _is_path_within(temp_dir, part):
+                raise PermissionError(f"Shard part is outside the task temp directory: {part}")
+    except Exception as exc:  # noqa: BLE001
+        _flush_gui_log()
+        queue_obj.put(
+            {
+                "type": "done",
+                "task_id": task_id,
+                "success": False,
+                "error": f"Invalid merge configuration: {exc}",
+                "output_pdf": "",
+                "duration_seconds": 0.0,
+            }
+        )
+        _cleanup_temp_dir(temp_dir)
+        return
+
+    _configure_logging(log_file, queue_obj, task_id, config.get("gui_log_level"))
+    logger = logging.getLogger("ocr_gui.worker")
+    logger.info("Merging %d OCR shard(s) into %s", len(parts), output_pdf)
+    staged_output = temp_dir / f"{task_id}_output.pdf"
+    try:
+        page_count = merge_pdfs(parts, staged_output, Path(config["input_pdf"]))
+        logger.info("Merged %d page(s).", page_count)
+        result_key = str(config.get("cache_key", ""))
+        if config.get("result_cache") and re.fullmatch(r"[a-f0-9]{64}", result_key):
+            cache = ResultCache(
+                Path(config["result_cache_dir"]),
+                int(config.get("result_cache_max_bytes", 0)),
+            )
+            _store_cached_output(cache, result_key, staged_output, logger)
+        _strategy, install_seconds = _install_output_pdf(
+            staged_output, output_pdf, allow_rename=True, durability=config.get("durability")
+        )
+        success = True
+    except Exception as exc:  # noqa: BLE001
+        error_message = f"{type(exc).__name__}: {exc}"
+        logger.exception("Merge failed for %s: %s", output_pdf, exc)
+    finally:
+        duration = time.time() - start
+        output_size = _safe_size(output_pdf) if success else 0
+        logger.info("Merge duration: %.2f seconds", duration)
+        _flush_gui_log()
+        queue_obj.put(
+            {
+                "type": "done",
+                "task_id": task_id,
+                "success": success,
+                "error": error_message,
+                "output_pdf": str(output_pdf),
+                "used_fallback": False,
+                "merge_seconds": duration,
+                "install_seconds": install_seconds,
+                "input_size": input_size,
+                "output_size": output_size,
+                "size_ratio": (output_size / input_size) if input_size else 0.0,
+                "start_stamp": start_stamp,
+                "end_stamp": dt.datetime.now().isoformat(timespec="seconds"),
+            }
+        )
+        _cleanup_temp_dir(temp_dir)
+
+
+def run_cache_probe(config: dict[str, Any], queue_obj: Any) -> None:
+    task_id = _sanitize_task_id(config.get("task_id", "task"))
+    start = time.time()
+    success = False
+    error_message = ""
+    result_key = ""
+    install_seconds = 0.0
+    output_pdf = Path(str(config.get("output_pdf", "")))
+    try:
+        input_pdf = Path(config["input_pdf"])
+        output_pdf = _safe_output_pdf(Path(config["output_pdf"]))
+        log_file = _safe_log_file(Path(config["log_file"]), task_id)
+        _configure_logging(log_file, queue_obj, task_id, config.get("gui_log_level"))
+        logger = logging.getLogger("ocr_gui.worker")
+        cache, result_key = _open_result_cache(
+            config,
+            input_pdf,
+            bool(config.get("force_ocr", False)),
+            bool(config.get("use_gpu", False)),
+            bool(config.get("optimize_for_size", False)),
+            logger,
+        )
+        cached_install_seconds = _install_cached_output(
+            cache, result_key, output_pdf, logger, config.get("durability", "fsync")
+        )
+        success = cached_install_seconds is not None
+        if success:
+            install_seconds = cached_install_seconds
+        else:
+            logger.info("Result cache miss; splitting into page ranges.")
+    except Exception as exc:  # noqa: BLE001
+        error_message = f"{type(exc).__name__}: {exc}"
+    finally:
+        _flush_gui_log()
+        queue_obj.put(
+            {
+                "type": "done",
+                "kind": "cache_probe",
+                "task_id": task_id,
+                "success": success,
+                "error": error_message,
+                "output_pdf": str(output_pdf),
+                "cache_key": result_key,
+                "cache_engine": _planned_ocr_engine(config, bool(config.get("use_gpu", False))),
+                "cache_status": "hit" if success else "miss",
+                "install_seconds": install_seconds,
+                "duration_seconds": time.time() - start,
+                "output_size": _safe_size(output_pdf) if success else 0,
+            }
+        )
+
+
+def run_passthrough_job(config: dict[str, Any], queue_obj: Any) -> None:
+    task_id = _sanitize_task_id(config.get("task_id", "task"))
+    start = time.time()
+    start_stamp = dt.datetime.now().isoformat(timespec="seconds")
+    success = False
+    error_message = ""
+    input_size = 0
+    install_seconds = 0.0
+    output_pdf = Path(str(config.get("output_pdf", "")))
+    try:
+        input_pdf = Path(config["input_pdf"])
+        output_pdf = _safe_output_pdf(Path(config["output_pdf"]))
+        log_file = _safe_log_file(Path(config["log_file"]), task_id)
+        _configure_logging(log_file, queue_obj, task_id, config.get("gui_log_level"))
+        logger = logging.getLogger("ocr_gui.worker")
+        input_size = _safe_size(input_pdf)
+        logger.info("Task %s started.", task_id)
+        logger.info("Input PDF: %s", input_pdf)
+        logger.info("Output PDF: %s", output_pdf)
+        logger.info(
+            "Text probe found text on all %d page(s); copying input without running OCRmyPDF.",
+            int(config.get("text_pages", 0)),
+        )
+        _strategy, install_seconds = _install_output_pdf(
+            input_pdf, output_pdf, durability=config.get("durability", "fsync")
+        )
+        success = True
+    except Exception as exc:  # noqa: BLE001
+        error_message = f"{type(exc).__name__}: {exc}"
+        logging.getLogger("ocr_gui.worker").exception("Copy-through failed for %s: %s", output_pdf, exc)
+    finally:
+        duration = time.time() - start
+        output_size = _safe_size(output_pdf) if success else 0
+        _flush_gui_log()
+        queue_obj.put(
+            {
+                "type": "done",
+                "task_id": task_id,
+                "success": success,
+                "error": error_message,
+                "output_pdf": str(output_pdf),
+                "used_fallback": False,
+                "skipped_searchable": success,
+                "install_seconds": install_seconds,
+                "duration_seconds": duration,
+                "input_size": input_size,
+                "output_size": output_size,
+                "size_ratio": (output_size / input_size) if input_size else 0.0,
+                "start_stamp": start_stamp,
+                "end_stamp": dt.datetime.now().isoformat(timespec="seconds"),
+            }
+        )
+
+
+def run_task(config: dict[str, Any], queue_obj: Any) -> None:
+    kind = str(config.get("kind", "ocr"))
+    if kind == "passthrough":
+        run_passthrough_job(config, queue_obj)
+    elif kind == "cache_probe":
+        run_cache_probe(config, queue_obj)
+    elif kind == "shard":
+        run_ocr_shard(config, queue_obj)
+    elif kind == "merge":
+        run_merge_job(config, queue_obj)
+    else:
+        run_ocr_job(config, queue_obj)
+
+
 if __name__ == "__main__":
     print("job_runner.py is an internal worker module.")
     print("Launch the app with: python -m ocr_app")
@@ -5,6 +5,20 @@ from pathlib import Path
 from typing import Any
 
 
+@dataclass
+class ShardItem:
+    shard_id: str
+    index: int
+    start_page: int
+    end_page: int
+    part_path: Path
+    status: str = "Queued"
+    worker_pid: int | None = None
+    ocr_jobs: int = 1
+    use_gpu: bool = False
+    engine_used: str = ""
+
+
 @dataclass
 class TaskItem:
     task_id: str
@@ -14,13 +28,25 @@ class TaskItem:
     log_file: Path
     row: int
     status: str = "Queued"
-    process: Any | None = None
-    queue: Any | None = None
+    worker_pid: int | None = None
     ps_proc: Any | None = None
     used_fallback: bool = False
     peak_cpu_percent: float = 0.0
     peak_rss_bytes: int = 0
+    # Whole process tree as sampled by the GUI: I/O totals and per-tick peaks.
+    peak_processes: int = 0
+    io_read_bytes: int = 0
+    io_write_bytes: int = 0
+    peak_read_rate: float = 0.0
+    peak_write_rate: float = 0.0
     progress_value: int = 0
     run_token: int = 0
     counted: bool = False
     metrics: dict[str, Any] = field(default_factory=dict)
+    shards: list[ShardItem] = field(default_factory=list)
+    shard_phase: str = ""
+    text_probe: str = ""
+    text_pages: int = 0
+    page_count: int = 0
+    # Size when the file was added; live estimates use it instead of a stat per tick.
+    input_size: int = 0
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+PROGRESS_PLUGIN = "progress_plugin.py"
+# Lines the progress plugin writes to stderr in subprocess mode; the worker
+# strips them from the log stream and forwards them as "progress" events.
+PROGRESS_PREFIX = "OCRESTRA-PROGRESS "
+
+# OCRmyPDF progress-bar descriptions mapped to pipeline stages, in run order,
+# with each stage's share of a typical run.
+_STAGE_NAMES = {
+    "Scanning contents": "scan",
+    "OCR": "ocr",
+    "Image processing": "ocr",
+    "hOCR": "ocr",
+    "Grafting hOCR to PDF": "graft",
+    "PDF/A conversion": "pdfa",
+    "JBIG2": "optimize",
+    "Recompressing JPEGs": "optimize",
+    "Deflating JPEGs": "optimize",
+    "PNGs": "optimize",
+    "Linearizing": "linearize",
+}
+STAGE_WEIGHTS = (
+    ("scan", 0.05),
+    ("ocr", 0.75),
+    ("graft", 0.03),
+    ("pdfa", 0.10),
+    ("optimize", 0.05),
+    ("linearize", 0.02),
+)
+
+_sink: Callable[[dict[str, Any]], None] | None = None
+_sink_lock = threading.Lock()
+
+
+def stage_for(desc: str | None) -> str | None:
+    return _STAGE_NAMES.get(str(desc or "").strip())
+
+
+def run_fraction(stage: str | None, done: float, total: float | None) -> float | None:
+    """Fraction of the whole OCRmyPDF run finished at ``done``/``total`` of ``stage``."""
+    base = 0.0
+    for name, weight in STAGE_WEIGHTS:
+        if name == stage:
+            step = min(1.0, max(0.0, done / total)) if total else 0.0
+            return min(1.0, base + weight * step)
+        base += weight
+    return None
+
+
+def estimate_remaining_seconds(event: dict[str, Any], run_elapsed: float) -> float | None:
+    """Seconds left in the OCRmyPDF run, from the page rate while OCR is running.
+
+    During OCR the rate of finished pages extrapolates the rest of the stage, and
+    the later stages are scaled from the OCR stage's projected length. Otherwise
+    the overall run fraction extrapolates ``run_elapsed``.
+    """
+    stage = event.get("stage")
+    done = float(event.get("done") or 0.0)
+    total = float(event.get("total") or 0.0)
+    if stage == "ocr" and done > 0 and total > 0:
+        stage_elapsed = float(event.get("stage_elapsed") or 0.0)
+        ocr_left = stage_elapsed / done * max(0.0, total - done)
+        ocr_index = [name for name, _weight in STAGE_WEIGHTS].index("ocr")
+        after = sum(weight for _name, weight in STAGE_WEIGHTS[ocr_index + 1 :])
+        return ocr_left + (stage_elapsed + ocr_left) * after / STAGE_WEIGHTS[ocr_index][1]
+    fraction = run_fraction(stage, done, total)
+    if not fraction or fraction < 0.02 or run_elapsed <= 0:
+        return None
+    return run_elapsed * (1.0 - fraction) / fraction
+
+
+@contextmanager
+def progress_sink(callback: Callable[[dict[str, Any]], None]) -> Iterator[None]:
+    """Deliver progress events to ``callback`` while OCRmyPDF runs in this process (API mode)."""
+    global _sink
+    with _sink_lock:
+        previous, _sink = _sink, callback
+    try:
+        yield
+    finally:
+        with _sink_lock:
+            _sink = previous
+
+
+def emit_progress(event: dict[str, Any]) -> None:
+    sink = _sink
+    if sink is not None:
+        try:
+            sink(event)
+        except Exception:
+            pass
+        return
+    try:
+        sys.stderr.write(PROGRESS_PREFIX + json.dumps(event, separators=(",", ":")) + "\n")
+        sys.stderr.flush()
+    except Exception:
+        pass
+
+
+def parse_progress_line(line: str) -> dict[str, Any] | None:
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    try:
+        event = json.loads(line[len(PROGRESS_PREFIX) :])
+    except ValueError:
+        return None
+    return event if isinstance(event, dict) else None
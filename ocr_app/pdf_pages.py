@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+# pikepdf ships with OCRmyPDF; import it lazily so the GUI and worker bootstrap
+# stay cheap and a missing install only disables page-range sharding.
+
+
+def _load_pikepdf():
+    try:
+        import pikepdf
+    except Exception:
+        return None
+    return pikepdf
+
+
+def pikepdf_available() -> bool:
+    return _load_pikepdf() is not None
+
+
+def count_pages(path: Path) -> int | None:
+    pikepdf = _load_pikepdf()
+    if pikepdf is None:
+        return None
+    try:
+        with pikepdf.open(path) as pdf:
+            return len(pdf.pages)
+    except Exception:
+        return None
+
+
+_TEXT_SHOWING_OPERATORS = {"Tj", "TJ", "'", '"'}
+_MAX_FORM_DEPTH = 4
+
+
+def _content_has_text(pikepdf, owner, resources, depth: int = 0) -> bool:
+    for operands, operator in pikepdf.parse_content_stream(owner):
+        name = str(operator)
+        if name in _TEXT_SHOWING_OPERATORS:
+            return True
+        if name != "Do" or depth >= _MAX_FORM_DEPTH or not operands or resources is None:
+            continue
+        try:
+            xobject = resources.get("/XObject", {}).get(operands[0])
+            if xobject is None or xobject.get("/Subtype") != pikepdf.Name.Form:
+                continue
+            form_resources = xobject.get("/Resources", resources)
+        except Exception:
+            continue
+        if _content_has_text(pikepdf, xobject, form_resources, depth + 1):
+            return True
+    return False
+
+
+def probe_text_layer(path: Path) -> tuple[bool, int, int] | None:
+    """Return ``(all_pages_have_text, pages_checked, page_count)`` or ``None`` if unreadable.
+
+    Stops at the first page without text-showing operators, so image-only scans
+    are rejected after parsing one small content stream.
+    """
+    pikepdf = _load_pikepdf()
+    if pikepdf is None:
+        return None
+    try:
+        with pikepdf.open(path) as pdf:
+            total = len(pdf.pages)
+            for index, page in enumerate(pdf.pages):
+                # Page.resources honours /Resources inherited from the page tree.
+                if not _content_has_text(pikepdf, page, page.resources):
+                    return False, index + 1, total
+            return total > 0, total, total
+    except Exception:
+        return None
+
+
+def plan_page_ranges(page_count: int, max_shards: int, min_pages_per_shard: int) -> list[tuple[int, int]]:
+    """Split ``page_count`` pages into contiguous ``[start, end)`` ranges of near-equal size."""
+    if page_count <= 0:
+        return []
+    min_pages = max(1, int(min_pages_per_shard))
+    shards = max(1, min(int(max_shards), page_count // min_pages))
+    base, extra = divmod(page_count, shards)
+    ranges: list[tuple[int, int]] = []
+    start = 0
+    for index in range(shards):
+        end = start + base + (1 if index < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def extract_pages(input_pdf: Path, output_pdf: Path, start: int, end: int) -> int:
+    pikepdf = _load_pikepdf()
+    if pikepdf is None:
+        raise RuntimeError("pikepdf is not available; cannot split PDF pages.")
+    with pikepdf.open(input_pdf) as source:
+        total = len(source.pages)
+        if not 0 <= start < end <= total:
+            raise ValueError(f"Page range {start + 1}-{end} is outside 1-{total}.")
+        part = pikepdf.new()
+        part.pages.extend(source.pages[start:end])
+        part.save(output_pdf)
+    return end - start
+
+
+# Page keys that carry what OCRmyPDF changed; everything else on the page
+# (annotations, structure, links to it) stays with the original page object.
+_PAGE_CONTENT_KEYS = ("/Contents", "/Resources", "/MediaBox", "/CropBox", "/Rotate", "/UserUnit")
+_PAGE_BOX_KEYS = ("/TrimBox", "/BleedBox", "/ArtBox")
+
+
+def _replace_page_content(pdf, original, replacement) -> None:
+    # copy_foreign only takes indirect objects; drop /Parent first so copying the
+    # page does not pull in the rest of the part's page tree.
+    del replacement["/Parent"]
+    replacement = pdf.copy_foreign(replacement)
+    for key in (*_PAGE_CONTENT_KEYS, *_PAGE_BOX_KEYS):
+        if key in replacement:
+            original[key] = replacement[key]
+        elif key in original:
+            del original[key]
+    # /Rotate and /CropBox can be inherited from the page tree; pin them so the
+    # original's inherited values do not override what the OCR'd page dropped.
+    if "/Rotate" not in replacement:
+        original["/Rotate"] = 0
+    if "/CropBox" not in replacement and "/MediaBox" in original:
+        original["/CropBox"] = original["/MediaBox"]
+
+
+def merge_pdfs(parts: list[Path], output_pdf: Path, source_pdf: Path | None = None) -> int:
+    """Join ``parts`` in page order and save the result to ``output_pdf``.
+
+    With ``source_pdf`` the original document is saved with each page's content
+    swapped for its OCR'd counterpart, so docinfo, XMP, the outline, forms, and
+    named destinations survive the split. Without it the parts are appended onto
+    the first part.
+    """
+    pikepdf = _load_pikepdf()
+    if pikepdf is None:
+        raise RuntimeError("pikepdf is not available; cannot merge PDF parts.")
+    if not parts:
+        raise ValueError("No PDF parts to merge.")
+    opened = []
+    try:
+        if source_pdf is None:
+            merged = pikepdf.open(parts[0])
+            opened.append(merged)
+            for part_path in parts[1:]:
+                part = pikepdf.open(part_path)
+                opened.append(part)
+                merged.pages.extend(part.pages)
+        else:
+            merged = pikepdf.open(source_pdf)
+            opened.append(merged)
+            ocr_pages = []
+            for part_path in parts:
+                part = pikepdf.open(part_path)
+                opened.append(part)
+                ocr_pages.extend(part.pages)
+            if len(ocr_pages) != len(merged.pages):
+                raise ValueError(f"Shards have {len(ocr_pages)} page(s); the input has {len(merged.pages)}.")
+            for original, replacement in zip(merged.pages, ocr_pages):
+                _replace_page_content(merged, original.obj, replacement.obj)
+        page_count = len(merged.pages)
+        merged.save(output_pdf)
+    finally:
+        for pdf in reversed(opened):
+            try:
+                pdf.close()
+            except Exception:
+                pass
+    return page_count
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import os
+import signal
+import time
+from typing import Any
+
+import psutil
+
+from .config import CANCEL_KILL_GRACE_SECONDS, CANCEL_TERM_GRACE_SECONDS
+
+_POLL_SECONDS = 0.05
+
+
+def start_process_group() -> bool:
+    """Make the calling process lead a new session; return whether it leads its group.
+
+    Subprocesses inherit the group, so one ``killpg`` reaches OCRmyPDF and the
+    Tesseract/Ghostscript processes it starts.
+    """
+    setsid = getattr(os, "setsid", None)
+    if setsid is not None:
+        try:
+            setsid()
+        except OSError:
+            # Already a group leader.
+            pass
+    return leads_process_group(os.getpid())
+
+
+def leads_process_group(pid: int) -> bool:
+    getpgid = getattr(os, "getpgid", None)
+    if getpgid is None:
+        return False
+    try:
+        return getpgid(pid) == pid
+    except OSError:
+        return False
+
+
+def _group_members(pgid: int) -> list[psutil.Process]:
+    members: list[psutil.Process] = []
+    for proc in psutil.process_iter():
+        try:
+            if os.getpgid(proc.pid) == pgid:
+                members.append(proc)
+        except (OSError, psutil.Error):
+            continue
+    return members
+
+
+def _tree_snapshot(pid: int, own_group: bool) -> list[psutil.Process]:
+    try:
+        root = psutil.Process(pid)
+        return [root, *root.children(recursive=True)]
+    except psutil.Error:
+        # The root is gone and its children were reparented; only the group id
+        # still ties them together.
+        return _group_members(pid) if own_group else []
+
+
+def _is_gone(proc: psutil.Process) -> bool:
+    # Zombies count as gone: their parent (the pool for a worker) reaps them.
+    try:
+        return not proc.is_running() or proc.status() == psutil.STATUS_ZOMBIE
+    except psutil.Error:
+        return True
+
+
+def _wait_gone(procs: list[psutil.Process], timeout: float) -> list[psutil.Process]:
+    deadline = time.monotonic() + max(0.0, timeout)
+    alive = [proc for proc in procs if not _is_gone(proc)]
+    while alive and time.monotonic() < deadline:
+        time.sleep(_POLL_SECONDS)
+        alive = [proc for proc in alive if not _is_gone(proc)]
+    return alive
+
+
+def _signal_group(pgid: int, sig: int) -> bool:
+    try:
+        os.killpg(pgid, sig)
+    except OSError:
+        return False
+    return True
+
+
+def _signal_each(procs: list[psutil.Process], force: bool) -> None:
+    for proc in procs:
+        try:
+            if force:
+                proc.kill()
+            else:
+                proc.terminate()
+        except psutil.Error:
+            continue
+
+
+def terminate_process_tree(
+    pid: int,
+    own_group: bool | None = None,
+    term_grace: float = CANCEL_TERM_GRACE_SECONDS,
+    kill_grace: float = CANCEL_KILL_GRACE_SECONDS,
+) -> dict[str, Any]:
+    """Stop ``pid`` and everything it started: SIGTERM, then SIGKILL after ``term_grace``.
+
+    A root that leads its own process group is signalled with ``killpg``, which
+    also reaches descendants that were reparented when their parent died. Other
+    roots (or Windows) fall back to the psutil process tree captured up front.
+    The root is not reaped here; its parent should ``join`` it.
+    """
+    return terminate_process_trees([(pid, own_group)], term_grace, kill_grace)[0]
+
+
+def terminate_process_trees(
+    roots: list[tuple[int, bool | None]],
+    term_grace: float = CANCEL_TERM_GRACE_SECONDS,
+    kill_grace: float = CANCEL_KILL_GRACE_SECONDS,
+) -> list[dict[str, Any]]:
+    """``terminate_process_tree`` for several ``(pid, own_group)`` roots at once.
+
+    Every tree is signalled before any is waited on, so stopping N workers takes
+    one grace period rather than N.
+    """
+    trees: list[tuple[int, bool, list[psutil.Process], dict[str, Any]]] = []
+    for pid, own_group in roots:
+        if own_group is None:
+            own_group = leads_process_group(pid)
+        use_group = bool(own_group) and hasattr(os, "killpg")
+        procs = _tree_snapshot(pid, use_group)
+        report: dict[str, Any] = {
+            "method": "process_group" if use_group else "process_tree",
+            "processes": len(procs),
+            "killed": 0,
+            "survivors": 0,
+        }
+        trees.append((pid, use_group, procs, report))
+    for pid, use_group, procs, _report in trees:
+        if use_group:
+            _signal_group(pid, signal.SIGTERM)
+        # Members that left the group (setsid in a child) still get the signal directly.
+        _signal_each(procs, force=False)
+    survivors = {id(proc) for proc in _wait_gone([proc for tree in trees for proc in tree[2]], term_grace)}
+    stubborn: list[psutil.Process] = []
+    for pid, use_group, procs, report in trees:
+        if use_group:
+            # Also catches anything forked into the group after the snapshot.
+            _signal_group(pid, signal.SIGKILL)
+        alive = [proc for proc in procs if id(proc) in survivors]
+        report["killed"] = len(alive)
+        _signal_each(alive, force=True)
+        stubborn.extend(alive)
+    remaining = {id(proc) for proc in _wait_gone(stubborn, kill_grace)} if stubborn else set()
+    for _pid, _use_group, procs, report in trees:
+        report["survivors"] = sum(1 for proc in procs if id(proc) in remaining)
+    return [tree[3] for tree in trees]
+
+
+def kill_process_group(pgid: int) -> bool:
+    """SIGKILL a process group whose leader already exited; False when nothing was left."""
+    if not hasattr(os, "killpg"):
+        return False
+    return _signal_group(pgid, signal.SIGKILL)
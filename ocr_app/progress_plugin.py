@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+from ocrmypdf import hookimpl
+
+# OCRmyPDF loads this plugin by file path, like gpu_ocr_plugin.py.
+try:
+    from ocr_app.ocr_progress import emit_progress, stage_for
+except ImportError:  # pragma: no cover - ocrmypdf CLI outside the app's sys.path
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    from ocr_app.ocr_progress import emit_progress, stage_for
+
+# Percent-based stages (Linearizing) report many tiny steps; pages are always sent.
+_MIN_EMIT_INTERVAL_SECONDS = 0.25
+
+
+class StructuredProgressBar:
+    """OCRmyPDF progress bar that reports stage, i/N, and step timing to the worker instead of drawing.
+
+    OCRmyPDF keeps progress bars in its main process, so every event comes from
+    one place even when pages are processed in a worker pool.
+    """
+
+    def __init__(self, *, total=None, desc=None, unit=None, disable=False, **kwargs):
+        # ``disable`` only silences OCRmyPDF's console bar; the worker still wants events.
+        self.total = total
+        self.desc = desc
+        self.stage = stage_for(desc)
+        self.unit = unit
+        self.done = 0.0
+        self._started = 0.0
+        self._last_step = 0.0
+        self._last_emit = 0.0
+
+    def __enter__(self):
+        self._started = self._last_step = time.perf_counter()
+        self._emit(None)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None and self.total:
+            self.done = max(self.done, float(self.total))
+        self._emit(None, finished=exc_type is None)
+        return False
+
+    def update(self, n=1, *, completed=None):
+        now = time.perf_counter()
+        step_seconds = now - self._last_step
+        self._last_step = now
+        if completed is not None:
+            self.done = float(completed)
+        else:
+            self.done += float(1 if n is None else n)
+        if self.unit != "page" and now - self._last_emit < _MIN_EMIT_INTERVAL_SECONDS:
+            return
+        self._emit(step_seconds)
+
+    def _emit(self, step_seconds: float | None, finished: bool = False) -> None:
+        now = time.perf_counter()
+        self._last_emit = now
+        event = {
+            "stage": self.stage,
+            "desc": self.desc,
+            "unit": self.unit,
+            "done": self.done,
+            "total": self.total,
+            "stage_elapsed": now - self._started,
+        }
+        if step_seconds is not None:
+            event["step_seconds"] = step_seconds
+        if finished:
+            event["finished"] = True
+        emit_progress(event)
+
+
+@hookimpl(tryfirst=True)
+def get_progressbar_class():
+    return StructuredProgressBar
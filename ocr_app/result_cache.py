@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from .config import RESULT_CACHE_MAX_BYTES, RESULT_CACHE_ROOT
+from .file_copy import copy_fd_contents, open_for_copy
+
+_KEY_PATTERN = re.compile(r"[a-f0-9]{64}")
+
+
+def hash_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while True:
+            chunk = handle.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(content_hash: str, options: dict[str, Any]) -> str:
+    payload = json.dumps({"content": content_hash, "options": options}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Content-addressed store of finished OCR outputs with mtime-based LRU eviction.
+
+    Entries live at ``<root>/<key[:2]>/<key>.pdf``. A hit refreshes the entry's
+    mtime, and every store evicts the least recently used entries until the
+    cache fits in ``max_bytes``. Workers share the directory, so every step
+    tolerates files disappearing underneath it.
+    """
+
+    def __init__(self, root: Path = RESULT_CACHE_ROOT, max_bytes: int = RESULT_CACHE_MAX_BYTES) -> None:
+        self.root = Path(root)
+        self.max_bytes = max(0, int(max_bytes))
+
+    def _entry_path(self, key: str) -> Path:
+        if not _KEY_PATTERN.fullmatch(key):
+            raise ValueError("Invalid cache key.")
+        return self.root / key[:2] / f"{key}.pdf"
+
+    def _ensure_root(self) -> None:
+        if self.root.is_symlink():
+            raise PermissionError(f"Refusing symlinked cache directory: {self.root}")
+        self.root.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    def lookup(self, key: str) -> Path | None:
+        try:
+            entry = self._entry_path(key)
+            if entry.is_symlink() or not entry.is_file():
+                return None
+            os.utime(entry)
+        except Exception:
+            return None
+        return entry
+
+    def store(self, key: str, source: Path) -> bool:
+        if self.max_bytes <= 0:
+            return False
+        try:
+            entry = self._entry_path(key)
+            if source.stat().st_size > self.max_bytes:
+                return False
+            self._ensure_root()
+            entry.parent.mkdir(mode=0o700, exist_ok=True)
+            if entry.parent.is_symlink():
+                return False
+            fd, temp_name = tempfile.mkstemp(prefix=".store-", suffix=".tmp", dir=entry.parent)
+        except Exception:
+            return False
+        try:
+            try:
+                src_fd = open_for_copy(source)
+                try:
+                    copy_fd_contents(src_fd, fd)
+                finally:
+                    os.close(src_fd)
+            finally:
+                os.close(fd)
+            os.replace(temp_name, entry)
+        except Exception:
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+            return False
+        self.evict()
+        return True
+
+    def entries(self) -> list[tuple[float, int, Path]]:
+        found: list[tuple[float, int, Path]] = []
+        try:
+            buckets = list(self.root.iterdir())
+        except OSError:
+            return found
+        for bucket in buckets:
+            if bucket.is_symlink() or not bucket.is_dir():
+                continue
+            try:
+                children = list(bucket.iterdir())
+            except OSError:
+                continue
+            for child in children:
+                if child.suffix != ".pdf" or not _KEY_PATTERN.fullmatch(child.stem):
+                    continue
+                try:
+                    info = child.lstat()
+                except OSError:
+                    continue
+                found.append((info.st_mtime, info.st_size, child))
+        return found
+
+    def size_bytes(self) -> int:
+        return sum(size for _mtime, size, _path in self.entries())
+
+    def evict(self) -> int:
+        entries = sorted(self.entries(), key=lambda item: item[0])
+        total = sum(size for _mtime, size, _path in entries)
+        removed = 0
+        for _mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from .config import (
+    ADMISSION_BASE_TASK_RSS_BYTES,
+    ADMISSION_MAX_LOAD_PER_CPU,
+    ADMISSION_MAX_SWAP_OUT_BYTES_PER_SECOND,
+    ADMISSION_MIN_AVAILABLE_BYTES,
+    ADMISSION_RSS_PER_INPUT_MB,
+    GPU_BREAKER_COOLDOWN_SECONDS,
+    GPU_BREAKER_FAILURES,
+    GPU_TASK_VRAM_BYTES,
+    GPU_TASKS_WITHOUT_METRICS,
+    GPU_VRAM_HEADROOM_BYTES,
+    OCR_JOBS_MAX,
+    OCR_MIN_PAGES_PER_JOB,
+    OCR_RESERVED_CORES,
+    RAM_STAGING_INPUT_FACTOR,
+    RAM_STAGING_MIN_FREE_BYTES,
+    RAM_STAGING_PAGE_BYTES,
+)
+
+
+@dataclass(frozen=True)
+class JobAllocation:
+    jobs: int
+    page_count: int | None
+    idle_cores: int
+    reserved_for_queue: int
+
+    def describe(self) -> str:
+        pages = "unknown" if self.page_count is None else str(self.page_count)
+        return (
+            f"pages={pages}, idle cores={self.idle_cores}, "
+            f"reserved for queued files={self.reserved_for_queue}"
+        )
+
+
+def cpu_budget(cpu_count: int | None = None) -> int:
+    cores = cpu_count if cpu_count is not None else (os.cpu_count() or 1)
+    return max(1, int(cores) - OCR_RESERVED_CORES)
+
+
+def allocate_ocr_jobs(
+    page_count: int | None,
+    budget: int,
+    jobs_in_use: int,
+    queued_remaining: int,
+    free_slots: int,
+    max_jobs: int = OCR_JOBS_MAX,
+) -> JobAllocation:
+    """Pick OCRmyPDF ``--jobs`` for a file that is about to start.
+
+    ``jobs_in_use`` is the sum already handed to running files and ``free_slots``
+    counts worker slots still open after this file starts. Each queued file that
+    can take one of those slots keeps one core back, so a lone large document
+    gets the spare cores while a long queue keeps every file at ``--jobs 1``.
+    """
+    idle_cores = max(0, int(budget) - max(0, int(jobs_in_use)))
+    reserved = max(0, min(int(queued_remaining), int(free_slots)))
+    jobs = idle_cores - reserved
+    if page_count is not None:
+        jobs = min(jobs, max(1, int(page_count) // OCR_MIN_PAGES_PER_JOB))
+    jobs = max(1, min(int(max_jobs), jobs))
+    return JobAllocation(jobs=jobs, page_count=page_count, idle_cores=idle_cores, reserved_for_queue=reserved)
+
+
+def ram_staging_estimate(input_bytes: int, page_count: int | None = None) -> int:
+    """Rough peak size of a task's OCRmyPDF intermediates plus staged output."""
+    estimate = max(0, int(input_bytes)) * RAM_STAGING_INPUT_FACTOR
+    if page_count:
+        estimate = max(estimate, int(page_count) * RAM_STAGING_PAGE_BYTES)
+    return estimate
+
+
+def ram_staging_fits(
+    estimate_bytes: int,
+    free_bytes: int,
+    reserved_bytes: int,
+    min_free_bytes: int = RAM_STAGING_MIN_FREE_BYTES,
+) -> bool:
+    """True when ``estimate_bytes`` fits on tmpfs next to tasks already staged there.
+
+    ``reserved_bytes`` is the summed estimate of running RAM-staged tasks; their
+    intermediates grow over time, so ``free_bytes`` alone would over-admit.
+    """
+    return int(free_bytes) - int(reserved_bytes) - int(estimate_bytes) >= int(min_free_bytes)
+
+
+class GpuDispatcher:
+    """Cap GPU-backed tasks by a VRAM budget so overflow files run on CPU instead.
+
+    ``memory_source`` returns ``(used_bytes, total_bytes)`` or ``None`` when no
+    metrics are available. ``begin_batch`` records the VRAM already in use, and
+    each ``observe`` call while GPU tasks run raises the per-task estimate to the
+    largest share measured. ``max_tasks`` > 0 overrides the budget entirely.
+    """
+
+    def __init__(
+        self,
+        memory_source: Callable[[], tuple[int, int] | None],
+        task_bytes: int = GPU_TASK_VRAM_BYTES,
+        max_tasks: int = 0,
+        headroom_bytes: int = GPU_VRAM_HEADROOM_BYTES,
+    ) -> None:
+        self.memory_source = memory_source
+        self.default_task_bytes = max(1, int(task_bytes))
+        self.max_tasks = max(0, int(max_tasks))
+        self.headroom_bytes = max(0, int(headroom_bytes))
+        self.baseline_bytes: int | None = None
+        self.total_bytes: int | None = None
+        self.measured_task_bytes = 0
+
+    def _sample(self) -> tuple[int, int] | None:
+        try:
+            sample = self.memory_source()
+        except Exception:
+            return None
+        if not sample or int(sample[1]) <= 0:
+            return None
+        return max(0, int(sample[0])), int(sample[1])
+
+    def begin_batch(self) -> None:
+        sample = self._sample()
+        self.measured_task_bytes = 0
+        if sample is None:
+            self.baseline_bytes = self.total_bytes = None
+            return
+        self.baseline_bytes, self.total_bytes = sample
+
+    def observe(self, gpu_tasks_running: int) -> None:
+        if gpu_tasks_running <= 0 or self.baseline_bytes is None:
+            return
+        sample = self._sample()
+        if sample is None:
+            return
+        used, self.total_bytes = sample
+        share = max(0, used - self.baseline_bytes) // int(gpu_tasks_running)
+        self.measured_task_bytes = max(self.measured_task_bytes, share)
+
+    def task_bytes(self) -> int:
+        return max(self.default_task_bytes, self.measured_task_bytes)
+
+    def capacity(self) -> int:
+        if self.max_tasks:
+            return self.max_tasks
+        if self.baseline_bytes is None or self.total_bytes is None:
+            return GPU_TASKS_WITHOUT_METRICS
+        budget = self.total_bytes - self.baseline_bytes - self.headroom_bytes
+        return max(1, budget // self.task_bytes())
+
+    def admit(self, gpu_tasks_running: int) -> bool:
+        return int(gpu_tasks_running) < self.capacity()
+
+    def describe(self) -> str:
+        if self.max_tasks:
+            return f"GPU task cap {self.max_tasks} (configured)"
+        if self.baseline_bytes is None:
+            return f"GPU task cap {self.capacity()} (no VRAM metrics)"
+        source = "measured" if self.measured_task_bytes > self.default_task_bytes else "default"
+        return (
+            f"GPU task cap {self.capacity()} "
+            f"({self.task_bytes() // (1024 * 1024)} MiB per task, {source})"
+        )
+
+
+class GpuCircuitBreaker:
+    """Session-wide breaker that stops sending files to a GPU backend that keeps failing.
+
+    ``closed`` lets every file try the GPU. ``failure_threshold`` GPU failures in
+    a row trip it ``open``: files run on CPU until ``cooldown_seconds`` pass. It
+    then goes ``half_open`` and lets exactly one unit probe the GPU; a success
+    closes the breaker and a failure reopens it for another cooldown.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = GPU_BREAKER_FAILURES,
+        cooldown_seconds: float = GPU_BREAKER_COOLDOWN_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown_seconds = max(0.0, float(cooldown_seconds))
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = 0.0
+        self.probe_id: str | None = None
+
+    def allow(self, unit_id: str) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if self.remaining_cooldown() > 0:
+                return False
+            self.state = "half_open"
+            self.probe_id = None
+        if self.probe_id is None:
+            self.probe_id = unit_id
+            return True
+        return False
+
+    def record_success(self, unit_id: str) -> bool:
+        """Count a GPU success; return True if it closed the breaker."""
+        self.failures = 0
+        if self.state != "half_open":
+            return False
+        self.state = "closed"
+        self.probe_id = None
+        return True
+
+    def record_failure(self, unit_id: str) -> bool:
+        """Count a GPU failure; return True if it opened the breaker."""
+        if self.state == "closed":
+            self.failures += 1
+            if self.failures < self.failure_threshold:
+                return False
+        elif self.state == "half_open" and unit_id != self.probe_id:
+            return False
+        elif self.state == "open":
+            # Files started before the breaker opened keep reporting; do not extend the cooldown.
+            return False
+        self.state = "open"
+        self.opened_at = self.clock()
+        self.probe_id = None
+        self.trips += 1
+        return True
+
+    def abandon(self, unit_id: str) -> None:
+        """Forget a probe that ended without a GPU verdict (canceled, cached, or non-GPU error)."""
+        if self.probe_id == unit_id:
+            self.probe_id = None
+
+    def remaining_cooldown(self) -> float:
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.opened_at + self.cooldown_seconds - self.clock())
+
+    def describe(self) -> str:
+        if self.state == "open":
+            return f"open, GPU retry in {self.remaining_cooldown():.0f}s"
+        if self.state == "half_open":
+            return "half-open, probing GPU" if self.probe_id else "half-open"
+        return "closed" if not self.failures else f"closed, {self.failures}/{self.failure_threshold} failures"
+
+
+@dataclass(frozen=True)
+class PressureSample:
+    available_bytes: int
+    swap_out_bytes: int
+    load_average: float
+    cpu_count: int
+
+
+def _mib(value: float) -> str:
+    return f"{value / (1024 * 1024):.0f} MiB"
+
+
+class AdmissionController:
+    """Hold new starts while the machine is short of memory, swapping, or overloaded.
+
+    ``sample_source`` returns available RAM, cumulative bytes swapped out, the
+    1-minute load average, and the core count. ``observe`` turns consecutive
+    samples into a swap-out rate. ``admit`` compares available RAM against the
+    floor plus the new file's expected peak RSS and whatever the running files
+    are still expected to grow by. With nothing running, a file always starts,
+    so a busy machine slows the batch down instead of stalling it.
+    """
+
+    def __init__(
+        self,
+        sample_source: Callable[[], PressureSample | None],
+        min_available_bytes: int = ADMISSION_MIN_AVAILABLE_BYTES,
+        max_swap_out_rate: float = ADMISSION_MAX_SWAP_OUT_BYTES_PER_SECOND,
+        max_load_per_cpu: float = ADMISSION_MAX_LOAD_PER_CPU,
+        base_task_bytes: int = ADMISSION_BASE_TASK_RSS_BYTES,
+        rss_per_input_mb: float = ADMISSION_RSS_PER_INPUT_MB,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.sample_source = sample_source
+        self.min_available_bytes = max(0, int(min_available_bytes))
+        self.max_swap_out_rate = max(0.0, float(max_swap_out_rate))
+        self.max_load_per_cpu = max(0.0, float(max_load_per_cpu))
+        self.base_task_bytes = max(0, int(base_task_bytes))
+        self.rss_per_input_mb = max(0.0, float(rss_per_input_mb))
+        self.clock = clock
+        self.learned_samples = 0
+        self.sample: PressureSample | None = None
+        self.swap_out_rate = 0.0
+        self.hold_reason = ""
+        self._last_swap: tuple[float, int] | None = None
+
+    def observe(self) -> PressureSample | None:
+        try:
+            sample = self.sample_source()
+        except Exception:
+            sample = None
+        now = self.clock()
+        if sample is None:
+            self.sample = None
+            return None
+        if self._last_swap is not None and now > self._last_swap[0]:
+            swapped = max(0, int(sample.swap_out_bytes) - self._last_swap[1])
+            self.swap_out_rate = swapped / (now - self._last_swap[0])
+        self._last_swap = (now, int(sample.swap_out_bytes))
+        self.sample = sample
+        return sample
+
+    def expected_peak(self, input_bytes: int) -> int:
+        size_mb = max(0.0, int(input_bytes) / (1024 * 1024))
+        return int(self.base_task_bytes + self.rss_per_input_mb * size_mb)
+
+    def learn(self, input_bytes: int, peak_rss_bytes: int) -> None:
+        """Fold one finished file's peak RSS into the per-input-MiB rate (EWMA)."""
+        size_mb = int(input_bytes) / (1024 * 1024)
+        if size_mb < 1.0 or peak_rss_bytes <= 0:
+            return
+        rate = max(0.0, (int(peak_rss_bytes) - self.base_task_bytes) / size_mb)
+        weight = 0.5 if self.learned_samples < 4 else 0.2
+        self.rss_per_input_mb += weight * (rate - self.rss_per_input_mb)
+        self.learned_samples += 1
+
+    def admit(self, expected_bytes: int, pending_growth_bytes: int, running: int) -> bool:
+        """Decide one start; ``hold_reason`` explains the last refusal ("" when admitted)."""
+        self.hold_reason = self._pressure_reason(int(expected_bytes) + max(0, int(pending_growth_bytes)))
+        if self.hold_reason and int(running) <= 0:
+            self.hold_reason = ""
+        return not self.hold_reason
+
+    def _pressure_reason(self, needed_bytes: int) -> str:
+        sample = self.sample
+        if sample is None:
+            return ""
+        if self.max_swap_out_rate and self.swap_out_rate > self.max_swap_out_rate:
+            return f"swapping out {_mib(self.swap_out_rate)}/s"
+        available = int(sample.available_bytes)
+        if available - needed_bytes < self.min_available_bytes:
+            return (
+                f"available RAM {_mib(available)} < {_mib(self.min_available_bytes)} floor "
+                f"+ {_mib(needed_bytes)} expected"
+            )
+        cores = max(1, int(sample.cpu_count))
+        if self.max_load_per_cpu and sample.load_average / cores > self.max_load_per_cpu:
+            return f"load average {sample.load_average:.1f} over {self.max_load_per_cpu * cores:.1f}"
+        return ""
+
+    def describe(self) -> str:
+        if self.sample is None:
+            return "Admission: no metrics"
+        if self.hold_reason:
+            return f"Admission: holding ({self.hold_reason})"
+        source = "learned" if self.learned_samples else "default"
+        return f"Admission: open ({self.rss_per_input_mb / (1024 * 1024):.1f} MiB RSS per input MiB, {source})"
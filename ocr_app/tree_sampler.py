@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+import psutil
+
+from .config import PROCESS_TREE_RELIST_SECONDS
+
+
+@dataclass(frozen=True)
+class TreeSample:
+    processes: int
+    cpu_percent: float
+    rss_bytes: int
+    # Bytes read/written by the tree since the previous sample, and the matching rates.
+    read_bytes: int
+    write_bytes: int
+    read_rate: float
+    write_rate: float
+
+
+@dataclass
+class _Tree:
+    roots: frozenset[int] = frozenset()
+    procs: dict[int, psutil.Process] = field(default_factory=dict)
+    io: dict[int, tuple[int, int]] = field(default_factory=dict)
+    listed_at: float | None = None
+    sampled_at: float | None = None
+
+
+def _read_process(proc: psutil.Process) -> tuple[float, int, tuple[int, int] | None]:
+    with proc.oneshot():
+        cpu = proc.cpu_percent(None)
+        rss = proc.memory_info().rss
+        try:
+            counters = proc.io_counters()
+            io = (int(counters.read_bytes), int(counters.write_bytes))
+        except (psutil.AccessDenied, AttributeError, NotImplementedError):
+            # No per-process I/O counters on macOS or for other users' processes.
+            io = None
+    return cpu, rss, io
+
+
+class ProcessTreeSampler:
+    """Aggregate CPU%, RSS, and I/O over each task's worker processes and all their descendants.
+
+    ``psutil.Process`` handles are kept between ticks, so ``cpu_percent`` and the
+    I/O counters are deltas since the previous sample, and each process is read
+    inside one ``oneshot`` block. Walking ``children(recursive=True)`` is the
+    expensive part; it is redone every ``relist_seconds`` or when a cached
+    process has exited. Pool workers outlive their tasks, so a root's I/O is
+    counted from its first sample; descendants count from their start.
+    """
+
+    def __init__(
+        self,
+        relist_seconds: float = PROCESS_TREE_RELIST_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.relist_seconds = max(0.0, float(relist_seconds))
+        self.clock = clock
+        self._trees: dict[str, _Tree] = {}
+
+    def sample(self, key: str, root_pids: Iterable[int]) -> TreeSample | None:
+        roots = frozenset(int(pid) for pid in root_pids if pid)
+        if not roots:
+            # Between a task's phases; keep its cached handles.
+            return None
+        now = self.clock()
+        tree = self._trees.setdefault(key, _Tree())
+        if tree.roots != roots or tree.listed_at is None or now - tree.listed_at >= self.relist_seconds:
+            self._relist(tree, roots, now)
+
+        processes = 0
+        cpu_total = 0.0
+        rss_total = 0
+        read_delta = 0
+        write_delta = 0
+        exited = False
+        for pid, proc in list(tree.procs.items()):
+            try:
+                cpu, rss, io = _read_process(proc)
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                exited = True
+                tree.procs.pop(pid, None)
+                tree.io.pop(pid, None)
+                continue
+            except psutil.Error:
+                continue
+            processes += 1
+            cpu_total += cpu
+            rss_total += rss
+            if io is None:
+                continue
+            previous = tree.io.get(pid)
+            if previous is None:
+                # Descendants appeared during the task; a root's earlier I/O belongs to other tasks.
+                previous = io if pid in roots else (0, 0)
+            read_delta += max(0, io[0] - previous[0])
+            write_delta += max(0, io[1] - previous[1])
+            tree.io[pid] = io
+        if exited:
+            # Exits mean the tree is churning (one Tesseract per page); pick up replacements next tick.
+            tree.listed_at = None
+
+        elapsed = now - tree.sampled_at if tree.sampled_at is not None else 0.0
+        tree.sampled_at = now
+        return TreeSample(
+            processes=processes,
+            cpu_percent=cpu_total,
+            rss_bytes=rss_total,
+            read_bytes=read_delta,
+            write_bytes=write_delta,
+            read_rate=read_delta / elapsed if elapsed > 0 else 0.0,
+            write_rate=write_delta / elapsed if elapsed > 0 else 0.0,
+        )
+
+    def forget(self, key: str) -> None:
+        self._trees.pop(key, None)
+
+    def retain(self, keys: Iterable[str]) -> None:
+        keep = set(keys)
+        for key in [key for key in self._trees if key not in keep]:
+            del self._trees[key]
+
+    def _relist(self, tree: _Tree, roots: frozenset[int], now: float) -> None:
+        procs: dict[int, psutil.Process] = {}
+        for pid in roots:
+            root = tree.procs.get(pid)
+            try:
+                if root is None or not root.is_running():
+                    root = psutil.Process(pid)
+                procs[pid] = root
+                children = root.children(recursive=True)
+            except psutil.Error:
+                continue
+            for child in children:
+                cached = tree.procs.get(child.pid)
+                # Reuse the cached handle (and its CPU baseline) unless the pid was recycled.
+                procs[child.pid] = cached if cached is not None and cached == child else child
+        for pid in [pid for pid in tree.io if pid not in procs or procs[pid] is not tree.procs.get(pid)]:
+            del tree.io[pid]
+        tree.roots = roots
+        tree.procs = procs
+        tree.listed_at = now
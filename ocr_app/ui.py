@@ -2,17 +2,18 @@ from __future__ import annotations
 
 import importlib.metadata
 import json
-import multiprocessing as mp
 import os
-import queue
 import re
 import shlex
 import shutil
 import stat
 import subprocess
 import sys
+import threading
 import time
 import uuid
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
 import psutil
@@ -61,22 +62,60 @@ from PySide6.QtWidgets import (
 )
 
 from .config import (
+    ADMISSION_MAX_LOAD_PER_CPU,
+    ADMISSION_MAX_SWAP_OUT_BYTES_PER_SECOND,
+    ADMISSION_MIN_AVAILABLE_BYTES,
+    ADMISSION_RSS_PER_INPUT_MB,
+    DURABILITY_MODES,
     APP_NAME,
+    CLOSE_TEARDOWN_TIMEOUT_SECONDS,
     DEFAULT_WORKERS,
+    EXECUTION_MODES,
+    GPU_TASK_VRAM_BYTES,
+    LOG_GUI_LEVELS,
     LOG_ROOT,
     MAX_DISCOVERED_PDFS,
     MAX_INPUT_FILE_BYTES,
+    RAM_TEMP_ROOT,
     MAX_QUEUE_ITEMS,
     MAX_SCAN_DEPTH,
     MAX_WORKERS,
+    MEMORY_LIMIT_CHOICES_MB,
+    OCR_JOBS_MAX,
     ORG_NAME,
+    RESULT_CACHE_MAX_BYTES,
+    RESULT_CACHE_ROOT,
+    SEARCHABLE_ACTIONS,
     SETTINGS_APP,
+    SHARD_MIN_PAGES,
+    SHARD_MIN_PAGES_PER_RANGE,
+    TASK_PHASES,
     TEMP_ROOT,
+    TEXT_PROBE_WORKERS,
+    WORKER_MAX_RSS_BYTES,
+    WORKER_MAX_TASKS,
+)
+from .duration_model import DurationModel, QueuedDurations, append_history, history_record, load_history
+from .file_copy import sync_filesystems
+from .gpu_service import GpuServiceError, GpuServiceHandle
+from .models import ShardItem, TaskItem
+from .ocr_progress import estimate_remaining_seconds, run_fraction
+from .pdf_pages import plan_page_ranges, probe_text_layer
+from .scheduling import (
+    AdmissionController,
+    GpuCircuitBreaker,
+    GpuDispatcher,
+    JobAllocation,
+    PressureSample,
+    allocate_ocr_jobs,
+    cpu_budget,
+    ram_staging_estimate,
+    ram_staging_fits,
 )
-from .job_runner import run_ocr_job
-from .models import TaskItem
 from .runtime_env import repair_ssl_cert_env
 from .themes import apply_theme
+from .tree_sampler import ProcessTreeSampler
+from .worker_pool import WorkerPool
 
 TABLE_COL_INPUT = 0
 TABLE_COL_STATUS = 1
@@ -111,6 +150,7 @@ MAX_STATE_FILE_BYTES = 2 * 1024 * 1024
 MAX_RESTORE_PATHS = 5000
 MAX_CUSTOM_FILE_MANAGER_CMD_LEN = 512
 GPU_METRICS_REFRESH_SECONDS = 4.0
+TASK_METRICS_EXPORT_NAME = "metrics.jsonl"
 
 
 def _resolve_app_icon_path() -> Path | None:
@@ -163,6 +203,21 @@ def _format_bytes(size: int) -> str:
     return f"{size} B"
 
 
+def _format_eta(seconds: float) -> str:
+    seconds = max(0, int(round(seconds)))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+def _format_phases(phases: dict) -> str:
+    # Worker phases in run order, then the GUI-measured dispatch overhead.
+    names = [name for name in (*TASK_PHASES, "dispatch") if name in phases]
+    return ", ".join(f"{name} {float(phases[name]):.3f}s" for name in names) or "n/a"
+
+
 def _safe_file_part(value: str) -> str:
     filtered = "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in value)
     return filtered.strip("_") or "job"
@@ -330,6 +385,12 @@ class QueueEmptyStateOverlay(QWidget):
 
 
 class MainWindow(QMainWindow):
+    text_probe_ready = Signal(str, object)
+    durability_barrier_done = Signal(str, int, float)
+    workers_stopped = Signal(int, object)
+    temp_cleanup_done = Signal(int)
+    worker_events_ready = Signal()
+
     def __init__(self, app: QApplication) -> None:
         super().__init__()
         self.app = app
@@ -345,7 +406,51 @@ class MainWindow(QMainWindow):
         self.custom_manager_warned_this_session = False
         self.priority_mode = self.settings.value("priority_mode", "normal", type=str)
         self.use_gpu_acceleration = self.settings.value("use_gpu_acceleration", False, type=bool)
+        self.gpu_service_enabled = self.settings.value("gpu_service_enabled", True, type=bool)
         self.optimize_for_size = self.settings.value("optimize_for_size", False, type=bool)
+        self.shard_large_pdfs = self.settings.value("shard_large_pdfs", False, type=bool)
+        self.result_cache_enabled = self.settings.value("result_cache_enabled", False, type=bool)
+        self.ram_staging = self.settings.value("ram_staging", False, type=bool)
+        self.searchable_action = self.settings.value("searchable_action", SEARCHABLE_ACTIONS[0], type=str)
+        if self.searchable_action not in SEARCHABLE_ACTIONS:
+            self.searchable_action = SEARCHABLE_ACTIONS[0]
+        self.result_cache_max_mb = self.settings.value(
+            "result_cache_max_mb", RESULT_CACHE_MAX_BYTES // (1024 * 1024), type=int
+        )
+        self.execution_mode = self.settings.value("execution_mode", EXECUTION_MODES[0], type=str)
+        if self.execution_mode not in EXECUTION_MODES:
+            self.execution_mode = EXECUTION_MODES[0]
+        self.durability = self.settings.value("durability", DURABILITY_MODES[0], type=str)
+        if self.durability not in DURABILITY_MODES:
+            self.durability = DURABILITY_MODES[0]
+        self.memory_limit_mb = self.settings.value("memory_limit_mb", 0, type=int)
+        if self.memory_limit_mb not in MEMORY_LIMIT_CHOICES_MB:
+            self.memory_limit_mb = 0
+        self.worker_max_tasks = self.settings.value("worker_max_tasks", WORKER_MAX_TASKS, type=int)
+        self.gpu_max_tasks = self.settings.value("gpu_max_tasks", 0, type=int)
+        self.gpu_task_vram_mb = self.settings.value(
+            "gpu_task_vram_mb", GPU_TASK_VRAM_BYTES // (1024 * 1024), type=int
+        )
+        self.worker_max_rss_mb = self.settings.value(
+            "worker_max_rss_mb", WORKER_MAX_RSS_BYTES // (1024 * 1024), type=int
+        )
+        self.admission_min_available_mb = self.settings.value(
+            "admission_min_available_mb", ADMISSION_MIN_AVAILABLE_BYTES // (1024 * 1024), type=int
+        )
+        self.admission_max_swap_mb_per_s = self.settings.value(
+            "admission_max_swap_mb_per_s", ADMISSION_MAX_SWAP_OUT_BYTES_PER_SECOND / (1024 * 1024), type=float
+        )
+        self.admission_max_load_per_cpu = self.settings.value(
+            "admission_max_load_per_cpu", ADMISSION_MAX_LOAD_PER_CPU, type=float
+        )
+        # Learned, not user-set: written back on exit so the next session starts from it.
+        self.admission_rss_per_input_mb = self.settings.value(
+            "admission_rss_per_input_mb", ADMISSION_RSS_PER_INPUT_MB / (1024 * 1024), type=float
+        )
+        # Lowest level workers send to the live log; the task log files keep everything.
+        self.gui_log_level = self.settings.value("gui_log_level", LOG_GUI_LEVELS[0], type=str).upper()
+        if self.gui_log_level not in LOG_GUI_LEVELS:
+            self.gui_log_level = LOG_GUI_LEVELS[0]
         valid_choices = {manager_id for manager_id, _label, _cmd in self._file_manager_options_for_platform()}
         valid_choices.add("custom")
         if self.file_manager_choice not in valid_choices:
@@ -359,20 +464,75 @@ class MainWindow(QMainWindow):
 
         self.tasks: dict[str, TaskItem] = {}
         self.path_to_task: dict[str, str] = {}
-        self.log_entries: list[tuple[str | None, str, str]] = []
+        self.log_entries: deque[tuple[str | None, str, str]] = deque(maxlen=20000)
         self.active_run_token = 0
         self.total_batch = 0
         self.finished_batch = 0
+        # Summed progress of this batch's unfinished files, kept by _set_progress.
+        self.batch_progress_sum = 0
         self.batch_running = False
         self.current_worker_limit = DEFAULT_WORKERS
         self.current_force_ocr = False
         self.current_use_gpu = False
+        self.current_gpu_service = False
+        self.gpu_service: GpuServiceHandle | None = None
         self.current_optimize_for_size = False
+        self.current_execution_mode = self.execution_mode
+        self.current_durability = self.durability
+        self.current_memory_limit_mb = self.memory_limit_mb
+        self.durability_barrier_thread: threading.Thread | None = None
+        # Background teardown: worker stop rounds and temp-dir removals still in flight.
+        self.stop_batches: dict[int, tuple[list[tuple[TaskItem, int]], bool]] = {}
+        self.next_stop_token = 0
+        self.teardown_stops = 0
+        self.teardown_cleanups = 0
+        self.close_requested = False
+        self.teardown_forced = False
+        self.current_shard_large_pdfs = False
+        self.current_result_cache = False
+        self.current_ram_staging = False
+        self.current_searchable_action = self.searchable_action
+        self.text_probe_executor = ThreadPoolExecutor(
+            max_workers=TEXT_PROBE_WORKERS, thread_name_prefix="ocr-text-probe"
+        )
+        self.shard_owner: dict[str, str] = {}
+        # Queued file ids of the active batch in start order, and the files running now.
+        self.run_queue: deque[str] = deque()
+        self.running_tasks: dict[str, TaskItem] = {}
+        # Files per status as of their last _set_status, for the queue badges.
+        self.status_counts: Counter[str] = Counter()
+        self.counted_status: dict[str, str] = {}
+        self.batch_started_at = 0.0
         self.batch_log_dir: Path | None = None
         self._cached_gpu_metrics: tuple[float, int, int, int] | None = None
         self._last_gpu_metrics_probe = 0.0
+        self.gpu_dispatcher = GpuDispatcher(
+            self._gpu_memory_sample,
+            task_bytes=max(1, self.gpu_task_vram_mb) * 1024 * 1024,
+            max_tasks=max(0, self.gpu_max_tasks),
+        )
+        self.gpu_breaker = GpuCircuitBreaker()
+        self.admission = AdmissionController(
+            self._pressure_sample,
+            min_available_bytes=max(0, self.admission_min_available_mb) * 1024 * 1024,
+            max_swap_out_rate=max(0.0, self.admission_max_swap_mb_per_s) * 1024 * 1024,
+            max_load_per_cpu=max(0.0, self.admission_max_load_per_cpu),
+            rss_per_input_mb=max(0.0, self.admission_rss_per_input_mb) * 1024 * 1024,
+        )
+        self._admission_hold_logged = ""
+        self.duration_model = DurationModel()
+        self.queued_durations = QueuedDurations(self.duration_model)
+        self._load_duration_history()
+        self.tree_sampler = ProcessTreeSampler()
         self._table_compact_mode = False
         self._adjusting_table_columns = False
+        self.worker_pool = WorkerPool(
+            size=DEFAULT_WORKERS,
+            max_tasks_per_worker=max(1, self.worker_max_tasks),
+            max_rss_bytes=max(0, self.worker_max_rss_mb) * 1024 * 1024,
+        )
+        # The pool's reader thread wakes the GUI thread as soon as a worker has events or exits.
+        self.worker_pool.set_notifier(self.worker_events_ready.emit)
 
         self.app_proc = psutil.Process(os.getpid())
         self.app_proc.cpu_percent(None)
@@ -393,9 +553,11 @@ class MainWindow(QMainWindow):
         self._restore_queue_state_prompt()
         self._check_runtime_dependencies()
 
+        # Worker events arrive through worker_events_ready; this tick animates estimated
+        # progress and polls as a fallback.
         self.poll_timer = QTimer(self)
         self.poll_timer.setInterval(200)
-        self.poll_timer.timeout.connect(self._poll_workers)
+        self.poll_timer.timeout.connect(self._on_poll_timer)
         self.poll_timer.start()
 
         self.metrics_timer = QTimer(self)
@@ -554,12 +716,43 @@ class MainWindow(QMainWindow):
         self.priority_combo.addItem("Background (Low + I/O)", "background")
         self._set_combo_data(self.priority_combo, self.priority_mode)
 
+        self.execution_mode_combo = ArrowComboBox()
+        self.execution_mode_combo.addItem("ocrmypdf Subprocess", "subprocess")
+        self.execution_mode_combo.addItem("In-Process API (Warm Worker)", "api")
+        self._set_combo_data(self.execution_mode_combo, self.execution_mode)
+
+        self.durability_combo = ArrowComboBox()
+        self.durability_combo.addItem("Sync Each File (Safest)", "fsync")
+        self.durability_combo.addItem("Sync Once at Batch End", "deferred")
+        self.durability_combo.addItem("No Explicit Sync (Fastest)", "none")
+        self._set_combo_data(self.durability_combo, self.durability)
+
+        self.memory_limit_combo = ArrowComboBox()
+        for limit_mb in MEMORY_LIMIT_CHOICES_MB:
+            self.memory_limit_combo.addItem(f"{limit_mb // 1024} GiB per Process" if limit_mb else "No Limit", limit_mb)
+        self._set_combo_data(self.memory_limit_combo, self.memory_limit_mb)
+
         self.advanced_section = CollapsibleSection("Advanced Settings", expanded=False)
         advanced_form = QFormLayout()
         advanced_form.setContentsMargins(0, 0, 0, 0)
         advanced_form.setSpacing(10)
         advanced_form.addRow("OCR mode", self.ocr_mode)
 
+        searchable_help_text = (
+            "Each added PDF is checked in the background for an existing text layer.\n"
+            "In Smart OCR mode, PDFs with text on every page can be copied to\n"
+            "OCR_Output or skipped without starting OCRmyPDF. Force OCR ignores this."
+        )
+        self.searchable_action_combo = ArrowComboBox()
+        self.searchable_action_combo.addItem("Copy Without OCR", "copy")
+        self.searchable_action_combo.addItem("Skip (No Output)", "skip")
+        self.searchable_action_combo.addItem("Run OCRmyPDF Anyway", "ocr")
+        self._set_combo_data(self.searchable_action_combo, self.searchable_action)
+        advanced_form.addRow(
+            "Searchable PDFs",
+            self._build_control_with_help(self.searchable_action_combo, searchable_help_text),
+        )
+
         path_display_help_text = (
             "Controls only how source file paths appear in the queue table.\n"
             "Full path shows the absolute path, Elided path shortens the middle,\n"
@@ -571,6 +764,39 @@ class MainWindow(QMainWindow):
         )
         advanced_form.addRow("Priority", self.priority_combo)
 
+        execution_mode_help_text = (
+            "Subprocess starts the ocrmypdf command for every file.\n"
+            "In-process API calls ocrmypdf.ocr() inside the already running\n"
+            "worker, skipping interpreter start-up and plugin discovery per file.\n"
+            "The batch summary in the log reports timings to compare both."
+        )
+        advanced_form.addRow(
+            "OCR runner",
+            self._build_control_with_help(self.execution_mode_combo, execution_mode_help_text),
+        )
+
+        durability_help_text = (
+            "Sync Each File flushes every finished PDF and its folder to disk before\n"
+            "the next one, which serializes workers on NAS mounts and spinning disks.\n"
+            "Sync Once at Batch End flushes the output filesystems after the batch;\n"
+            "No Explicit Sync leaves flushing to the operating system."
+        )
+        advanced_form.addRow(
+            "Output durability",
+            self._build_control_with_help(self.durability_combo, durability_help_text),
+        )
+
+        memory_limit_help_text = (
+            "Caps the address space of each OCRmyPDF, Ghostscript, and Tesseract\n"
+            "process so one pathological PDF cannot starve the other workers.\n"
+            "A file that hits the limit fails cleanly and is retried once alone,\n"
+            "without the limit. Not applied when EasyOCR loads CUDA in the worker."
+        )
+        advanced_form.addRow(
+            "Memory limit",
+            self._build_control_with_help(self.memory_limit_combo, memory_limit_help_text),
+        )
+
         parallel_wrap = QWidget()
         parallel_layout = QHBoxLayout(parallel_wrap)
         parallel_layout.setContentsMargins(0, 0, 0, 0)
@@ -588,6 +814,16 @@ class MainWindow(QMainWindow):
         self.gpu_checkbox.setChecked(self.use_gpu_acceleration)
         advanced_form.addRow("", self._build_option_row(self.gpu_checkbox, gpu_help_text))
 
+        gpu_service_help_text = (
+            "Loads the EasyOCR model once in a background GPU OCR service and keeps it\n"
+            "resident across files and batches; workers send it page images.\n"
+            "If the service is unavailable, files load EasyOCR in their own worker,\n"
+            "and GPU failures still retry the file on CPU."
+        )
+        self.gpu_service_checkbox = QCheckBox("Keep GPU OCR Model Loaded")
+        self.gpu_service_checkbox.setChecked(self.gpu_service_enabled)
+        advanced_form.addRow("", self._build_option_row(self.gpu_service_checkbox, gpu_service_help_text))
+
         compression_help_text = (
             "Applies balanced compression to reduce output size.\n"
             "Good for email/sharing/cloud archives.\n"
@@ -596,6 +832,37 @@ class MainWindow(QMainWindow):
         self.optimize_size_checkbox = QCheckBox("Optimize for Smaller Output")
         self.optimize_size_checkbox.setChecked(self.optimize_for_size)
         advanced_form.addRow("", self._build_option_row(self.optimize_size_checkbox, compression_help_text))
+
+        shard_help_text = (
+            f"Splits PDFs with {SHARD_MIN_PAGES}+ pages into page ranges that run\n"
+            "in parallel worker slots, then merges them into one output PDF.\n"
+            "Helps when a few very long scans would otherwise finish last."
+        )
+        self.shard_checkbox = QCheckBox("Split Large PDFs Across Workers")
+        self.shard_checkbox.setChecked(self.shard_large_pdfs)
+        advanced_form.addRow("", self._build_option_row(self.shard_checkbox, shard_help_text))
+
+        cache_help_text = (
+            "Reuses a previous OCR result when the same PDF content is processed\n"
+            "again with the same OCR mode, backend, size profile, and engine version.\n"
+            "Off by default: every OCR'd file is also copied into the cache folder.\n"
+            f"Cache folder: {RESULT_CACHE_ROOT}\n"
+            f"Size cap: {max(0, self.result_cache_max_mb)} MB (least recently used results are removed first)."
+        )
+        self.result_cache_checkbox = QCheckBox("Reuse Cached OCR Results")
+        self.result_cache_checkbox.setChecked(self.result_cache_enabled)
+        advanced_form.addRow("", self._build_option_row(self.result_cache_checkbox, cache_help_text))
+
+        ram_staging_help_text = (
+            f"Keeps OCRmyPDF intermediates and staged outputs in {RAM_TEMP_ROOT.parent} (tmpfs)\n"
+            "instead of on disk. Each file is admitted only if its estimated footprint\n"
+            "fits in free tmpfs space beside other RAM-staged files; otherwise it is\n"
+            "staged on disk as usual. Uses RAM, so leave off on memory-tight machines."
+        )
+        self.ram_staging_checkbox = QCheckBox("Stage Temp Files in RAM")
+        self.ram_staging_checkbox.setChecked(self.ram_staging and self._ram_staging_supported())
+        self.ram_staging_checkbox.setEnabled(self._ram_staging_supported())
+        advanced_form.addRow("", self._build_option_row(self.ram_staging_checkbox, ram_staging_help_text))
         self.advanced_section.content_layout.addLayout(advanced_form)
         config_layout.addWidget(self.advanced_section)
 
@@ -742,6 +1009,17 @@ class MainWindow(QMainWindow):
         self.batch_meta_label = QLabel("0/0 files")
         self.batch_meta_label.setObjectName("BatchMeta")
         progress_row.addWidget(self.batch_meta_label)
+        self.teardown_label = QLabel("")
+        self.teardown_label.setObjectName("BatchMeta")
+        self.teardown_label.setVisible(False)
+        progress_row.addWidget(self.teardown_label)
+        self.teardown_busy = QProgressBar()
+        self.teardown_busy.setObjectName("TeardownBusy")
+        self.teardown_busy.setRange(0, 0)
+        self.teardown_busy.setTextVisible(False)
+        self.teardown_busy.setFixedSize(72, 10)
+        self.teardown_busy.setVisible(False)
+        progress_row.addWidget(self.teardown_busy)
         queue_layout.addLayout(progress_row)
 
         self.queue_log_splitter.addWidget(queue_panel)
@@ -791,6 +1069,15 @@ class MainWindow(QMainWindow):
         self.ocr_mode.currentIndexChanged.connect(self._update_parallel_hint)
         self.gpu_checkbox.toggled.connect(self._on_gpu_toggle_changed)
         self.optimize_size_checkbox.toggled.connect(self._on_optimize_size_changed)
+        self.shard_checkbox.toggled.connect(self._on_shard_large_pdfs_changed)
+        self.result_cache_checkbox.toggled.connect(self._on_result_cache_changed)
+        self.ram_staging_checkbox.toggled.connect(self._on_ram_staging_changed)
+        self.gpu_service_checkbox.toggled.connect(self._on_gpu_service_changed)
+        self.text_probe_ready.connect(self._apply_text_probe)
+        self.durability_barrier_done.connect(self._on_durability_barrier_done)
+        self.workers_stopped.connect(self._on_workers_stopped)
+        self.temp_cleanup_done.connect(self._on_temp_cleanup_done)
+        self.worker_events_ready.connect(self._poll_workers)
         self.priority_combo.currentIndexChanged.connect(self._on_priority_changed)
         self.path_display_combo.currentIndexChanged.connect(self._on_path_display_changed)
         self.log_filter_combo.currentIndexChanged.connect(self._refresh_log_view)
@@ -928,7 +1215,15 @@ class MainWindow(QMainWindow):
             "custom_workers": DEFAULT_WORKERS,
             "ocr_mode": "smart",
             "use_gpu_acceleration": False,
+            "gpu_service_enabled": True,
             "optimize_for_size": False,
+            "execution_mode": EXECUTION_MODES[0],
+            "durability": DURABILITY_MODES[0],
+            "memory_limit_mb": 0,
+            "shard_large_pdfs": False,
+            "result_cache_enabled": False,
+            "ram_staging": False,
+            "searchable_action": SEARCHABLE_ACTIONS[0],
             "folder_scan_recursive": True,
             "priority_mode": "normal",
             "path_display_mode": "elided",
@@ -945,9 +1240,25 @@ class MainWindow(QMainWindow):
         self._set_combo_data(self.priority_combo, "normal")
         self._set_combo_data(self.path_display_combo, "elided")
         self.gpu_checkbox.setChecked(False)
+        self.gpu_service_checkbox.setChecked(True)
         self.optimize_size_checkbox.setChecked(False)
+        self._set_combo_data(self.execution_mode_combo, EXECUTION_MODES[0])
+        self._set_combo_data(self.durability_combo, DURABILITY_MODES[0])
+        self._set_combo_data(self.memory_limit_combo, 0)
+        self.shard_checkbox.setChecked(False)
+        self.result_cache_checkbox.setChecked(False)
+        self.ram_staging_checkbox.setChecked(False)
+        self._set_combo_data(self.searchable_action_combo, SEARCHABLE_ACTIONS[0])
         self.use_gpu_acceleration = False
+        self.gpu_service_enabled = True
         self.optimize_for_size = False
+        self.execution_mode = EXECUTION_MODES[0]
+        self.durability = DURABILITY_MODES[0]
+        self.memory_limit_mb = 0
+        self.shard_large_pdfs = False
+        self.result_cache_enabled = False
+        self.ram_staging = False
+        self.searchable_action = SEARCHABLE_ACTIONS[0]
         self.folder_scan_recursive = True
         self.priority_mode = "normal"
         self.path_display_mode = "elided"
@@ -1135,11 +1446,29 @@ class MainWindow(QMainWindow):
         self.settings.setValue("use_gpu_acceleration", self.use_gpu_acceleration)
         self._update_parallel_hint()
 
+    def _on_gpu_service_changed(self, checked: bool) -> None:
+        self.gpu_service_enabled = bool(checked)
+        self.settings.setValue("gpu_service_enabled", self.gpu_service_enabled)
+        if not checked and not self.batch_running:
+            self._stop_gpu_service()
+
     def _on_optimize_size_changed(self, checked: bool) -> None:
         self.optimize_for_size = bool(checked)
         self.settings.setValue("optimize_for_size", self.optimize_for_size)
         self._update_parallel_hint()
 
+    def _on_shard_large_pdfs_changed(self, checked: bool) -> None:
+        self.shard_large_pdfs = bool(checked)
+        self.settings.setValue("shard_large_pdfs", self.shard_large_pdfs)
+
+    def _on_result_cache_changed(self, checked: bool) -> None:
+        self.result_cache_enabled = bool(checked)
+        self.settings.setValue("result_cache_enabled", self.result_cache_enabled)
+
+    def _on_ram_staging_changed(self, checked: bool) -> None:
+        self.ram_staging = bool(checked)
+        self.settings.setValue("ram_staging", self.ram_staging)
+
     def _on_priority_changed(self) -> None:
         self.priority_mode = self.priority_combo.currentData()
         self.settings.setValue("priority_mode", self.priority_mode)
@@ -1262,9 +1591,11 @@ class MainWindow(QMainWindow):
                 temp_dir=TEMP_ROOT / task_id,
                 log_file=LOG_ROOT / f"{task_id}.log",
                 row=row,
+                input_size=file_size,
             )
             self.tasks[task_id] = task
             self.path_to_task[path_key] = task_id
+            self._queue_text_probe(task)
 
             display_path = self._display_input_path(pdf_path)
             self.table.setItem(row, TABLE_COL_INPUT, QTableWidgetItem(display_path))
@@ -1430,9 +1761,14 @@ class MainWindow(QMainWindow):
             return
         self.tasks.clear()
         self.path_to_task.clear()
+        self.status_counts.clear()
+        self.counted_status.clear()
+        self.queued_durations.clear()
         self.table.setRowCount(0)
         self.total_batch = 0
         self.finished_batch = 0
+        # Summed progress of this batch's unfinished files, kept by _set_progress.
+        self.batch_progress_sum = 0
         self.batch_running = False
         self._update_batch_progress()
         self._update_parallel_hint()
@@ -1466,42 +1802,86 @@ class MainWindow(QMainWindow):
         self.active_run_token += 1
         self.total_batch = len(pending)
         self.finished_batch = 0
+        self.batch_progress_sum = 0
         self.batch_running = True
         self.start_button.setEnabled(False)
         self.current_worker_limit = self._resolved_workers(len(pending))
+        self.worker_pool.resize(self.current_worker_limit)
         self.current_force_ocr = self.ocr_mode.currentData() == "force"
         self.current_use_gpu = bool(self.gpu_checkbox.isChecked())
+        self.current_gpu_service = self.current_use_gpu and bool(self.gpu_service_checkbox.isChecked())
         self.current_optimize_for_size = bool(self.optimize_size_checkbox.isChecked())
+        self.current_execution_mode = str(self.execution_mode_combo.currentData() or EXECUTION_MODES[0])
+        self.execution_mode = self.current_execution_mode
+        self.current_durability = str(self.durability_combo.currentData() or DURABILITY_MODES[0])
+        self.durability = self.current_durability
+        self.current_memory_limit_mb = int(self.memory_limit_combo.currentData() or 0)
+        self.memory_limit_mb = self.current_memory_limit_mb
+        self.current_shard_large_pdfs = bool(self.shard_checkbox.isChecked())
+        self.current_result_cache = bool(self.result_cache_checkbox.isChecked()) and self.result_cache_max_mb > 0
+        self.current_ram_staging = bool(self.ram_staging_checkbox.isChecked()) and self._ram_staging_supported()
+        self.current_searchable_action = str(self.searchable_action_combo.currentData() or SEARCHABLE_ACTIONS[0])
+        self.searchable_action = self.current_searchable_action
+        self.batch_started_at = time.monotonic()
         self.settings.setValue("parallel_mode", self.parallel_mode.currentData())
         self.settings.setValue("custom_workers", self.custom_workers.value())
         self.settings.setValue("ocr_mode", self.ocr_mode.currentData())
         self.settings.setValue("use_gpu_acceleration", self.current_use_gpu)
+        self.settings.setValue("gpu_service_enabled", bool(self.gpu_service_checkbox.isChecked()))
         self.settings.setValue("optimize_for_size", self.current_optimize_for_size)
+        self.settings.setValue("execution_mode", self.current_execution_mode)
+        self.settings.setValue("durability", self.current_durability)
+        self.settings.setValue("memory_limit_mb", self.current_memory_limit_mb)
+        self.settings.setValue("shard_large_pdfs", self.current_shard_large_pdfs)
+        self.settings.setValue("result_cache_enabled", bool(self.result_cache_checkbox.isChecked()))
+        self.settings.setValue("ram_staging", bool(self.ram_staging_checkbox.isChecked()))
+        self.settings.setValue("searchable_action", self.current_searchable_action)
 
         batch_stamp = Path.cwd().name + "_" + uuid.uuid4().hex[:8]
         self.batch_log_dir = LOG_ROOT / batch_stamp
         self.batch_log_dir.mkdir(parents=True, exist_ok=True)
 
+        self.run_queue.clear()
+        self.queued_durations.clear()
         for task in pending:
             task.status = "Queued"
-            task.run_token = self.active_run_token
             task.counted = False
             task.metrics.clear()
+            self._reset_task_shards(task)
             task.used_fallback = False
             task.peak_cpu_percent = 0.0
             task.peak_rss_bytes = 0
+            task.peak_processes = 0
+            task.io_read_bytes = 0
+            task.io_write_bytes = 0
+            task.peak_read_rate = 0.0
+            task.peak_write_rate = 0.0
             task.progress_value = 0
             self._set_status(task, "Queued")
             self._set_result(task, "")
+            self._show_text_probe(task)
             self._set_progress(task, 0)
             self._refresh_action_button(task)
+        self._enqueue_tasks(pending)
 
+        if self.current_gpu_service:
+            self._ensure_gpu_service()
+        if self.current_use_gpu:
+            self._cached_gpu_metrics = self._query_nvidia_gpu_metrics()
+            self._last_gpu_metrics_probe = time.monotonic()
+            self.gpu_dispatcher.begin_batch()
+            self._append_log(f"GPU dispatch: {self.gpu_dispatcher.describe()}; files over the cap run on CPU.")
+        self.admission.observe()
+        self._admission_hold_logged = ""
+        self._append_log(f"{self.admission.describe()}.")
         self._append_log(
             "Starting batch: "
             f"{self.total_batch} file(s), {self.current_worker_limit} parallel workers, "
             f"{'force OCR' if self.current_force_ocr else 'smart OCR'} mode, "
             f"{'GPU plugin enabled' if self.current_use_gpu else 'CPU mode'}, "
-            f"{'size optimization enabled' if self.current_optimize_for_size else 'standard size profile'}."
+            f"{'size optimization enabled' if self.current_optimize_for_size else 'standard size profile'}, "
+            f"{'in-process API' if self.current_execution_mode == 'api' else 'subprocess'} runner"
+            f"{', large-PDF splitting enabled' if self.current_shard_large_pdfs else ''}."
         )
         self._schedule_tasks()
         self._update_batch_progress()
@@ -1520,22 +1900,80 @@ class MainWindow(QMainWindow):
         )
         return answer == QMessageBox.Yes
 
+    def _has_free_worker_slot(self) -> bool:
+        return self.worker_pool.busy_count() < self.current_worker_limit and self.worker_pool.can_accept()
+
+    def _enqueue_tasks(self, tasks: list[TaskItem]) -> None:
+        for task in tasks:
+            if task.run_token != self.active_run_token and not task.counted:
+                self.batch_progress_sum += task.progress_value
+            task.run_token = self.active_run_token
+            self.run_queue.append(task.task_id)
+            self._queue_duration(task)
+
+    def _next_queued_task(self) -> TaskItem | None:
+        # Canceled or removed files leave their ids behind; drop them when they reach the front.
+        while self.run_queue:
+            task = self.tasks.get(self.run_queue[0])
+            if task is not None and task.status == "Queued" and task.run_token == self.active_run_token:
+                return task
+            self.run_queue.popleft()
+        return None
+
+    def _running_task_list(self) -> list[TaskItem]:
+        for task_id in [task_id for task_id, task in self.running_tasks.items() if task.status != "Running"]:
+            del self.running_tasks[task_id]
+        return list(self.running_tasks.values())
+
     def _schedule_tasks(self) -> None:
+        # Runs after every worker wake-up, so it only touches running files and the head of the queue.
         if not self.batch_running:
             return
-        running = [task for task in self.tasks.values() if task.status == "Running"]
-        slots = self.current_worker_limit - len(running)
-        if slots <= 0:
+        # Finish documents that are already split before starting new files.
+        for task in self._running_task_list():
+            if task.shards:
+                self._dispatch_shard_work(task)
+        # A file that hit the memory limit reruns alone: drain the pool, then start it by itself.
+        head = self._next_queued_task()
+        memory_retry = head if head is not None and head.metrics.get("memory_retry") else None
+        if memory_retry is not None or self._memory_retry_running():
+            if memory_retry is not None and self.worker_pool.busy_count() == 0:
+                self.run_queue.popleft()
+                self._start_task(memory_retry)
             return
-        queued_tasks = [
-            task
-            for task in self.tasks.values()
-            if task.status == "Queued" and task.run_token == self.active_run_token
-        ]
-        for task in queued_tasks[:slots]:
+        while self._has_free_worker_slot():
+            task = self._next_queued_task()
+            # Page counts come from the background text probe; _apply_text_probe reschedules.
+            if task is None or task.text_probe == "pending" or not self._admit_task(task):
+                break
+            self.run_queue.popleft()
             self._start_task(task)
+            if task.status == "Running" and task.shards:
+                self._dispatch_shard_work(task)
+
+    def _memory_retry_running(self) -> bool:
+        return any(task.metrics.get("memory_retry") for task in self._running_task_list())
+
+    def _retry_after_memory_limit(self, task: TaskItem, event: dict) -> bool:
+        if not event.get("memory_limit_exceeded") or task.shards or task.metrics.get("memory_retry"):
+            return False
+        task.metrics["memory_retry"] = True
+        task.status = "Queued"
+        self.run_queue.appendleft(task.task_id)
+        self._queue_duration(task)
+        self._close_task_process(task)
+        self._set_status(task, "Queued")
+        self._set_result(task, "Memory limit exceeded; retrying alone without the limit")
+        self._set_progress(task, 0)
+        self._refresh_action_button(task)
+        self._append_log(
+            f"Memory limit exceeded for {task.input_path}; it reruns once without the limit "
+            "after the running files finish, with no other file beside it."
+        )
+        return True
 
     def _start_task(self, task: TaskItem) -> None:
+        self.queued_durations.discard(task.task_id)
         if not task.input_path.exists():
             task.status = "Failed"
             self._set_status(task, "Failed")
@@ -1581,71 +2019,697 @@ class MainWindow(QMainWindow):
         task.log_file = self.batch_log_dir / f"{safe_name}_{task.task_id}.log"
         task.temp_dir = TEMP_ROOT / task.task_id
 
-        config = {
-            "task_id": task.task_id,
-            "input_pdf": str(task.input_path),
-            "output_pdf": str(task.output_path),
-            "log_file": str(task.log_file),
-            "temp_dir": str(task.temp_dir),
+        shortcut = self._searchable_shortcut(task)
+        if shortcut == "skip":
+            self._skip_searchable_task(task)
+            return
+        if shortcut == "copy":
+            config = {
+                "kind": "passthrough",
+                "task_id": task.task_id,
+                "input_pdf": str(task.input_path),
+                "output_pdf": str(task.output_path),
+                "log_file": str(task.log_file),
+                "text_pages": task.text_pages,
+                "durability": self.current_durability,
+            }
+            start_note = "copy-through, text layer present"
+        else:
+            # Known from the text probe; None when pikepdf could not read the file either.
+            page_count = task.page_count or None
+            if page_count:
+                task.metrics["page_count"] = page_count
+            task.temp_dir = self._task_temp_root(task, input_size, page_count) / task.task_id
+            shards = [] if task.metrics.get("memory_retry") else self._plan_task_shards(task, page_count)
+            if shards:
+                self._start_sharded_task(task, shards)
+                return
+
+            use_gpu = self._dispatch_to_gpu(task.task_id)
+            task.metrics["ocr_backend"] = "gpu" if use_gpu else "cpu"
+            allocation = self._allocate_ocr_jobs(page_count, use_gpu)
+            task.metrics["ocr_jobs"] = allocation.jobs
+            config = {
+                "task_id": task.task_id,
+                "input_pdf": str(task.input_path),
+                "output_pdf": str(task.output_path),
+                "log_file": str(task.log_file),
+                "temp_dir": str(task.temp_dir),
+                **self._ocr_options_config(use_gpu),
+                **self._ocr_jobs_config(allocation, use_gpu),
+                **self._result_cache_config(),
+            }
+            start_note = f"OCRmyPDF jobs {allocation.jobs}{self._backend_note(use_gpu, task.task_id)}"
+            if task.metrics.get("memory_retry"):
+                config["memory_limit_bytes"] = 0
+                start_note = f"{start_note}, memory-limit retry running alone"
+        try:
+            task.worker_pid = self._submit_to_pool(config)
+        except Exception as exc:
+            task.status = "Failed"
+            self._set_status(task, "Failed")
+            self._set_result(task, f"Worker start failed: {exc}")
+            self._set_progress(task, 0)
+            self._refresh_action_button(task)
+            self._append_log(f"Failed to start worker for {task.input_path}: {exc}")
+            self._mark_batch_progress(task)
+            return
+        try:
+            task.ps_proc = psutil.Process(task.worker_pid)
+            self._apply_process_priority(task.ps_proc)
+        except Exception:
+            task.ps_proc = None
+        # Baseline CPU and I/O counters so the first metrics tick reports this task only.
+        self._sample_task_tree(task)
+        task.status = "Running"
+        self.running_tasks[task.task_id] = task
+        task.metrics["started_monotonic"] = time.monotonic()
+        task.metrics["estimated_seconds"] = self._estimate_task_duration(task)
+        task.metrics["last_progress_tick"] = time.monotonic()
+
+        self._set_status(task, "Running")
+        self._set_result(task, "In progress...")
+        self._set_log_button(task, enabled=True)
+        self._set_progress(task, 1)
+        self._refresh_action_button(task)
+        self._append_log(f"Started {task.input_path} (worker PID {task.worker_pid}, {start_note})")
+
+    def _queue_text_probe(self, task: TaskItem) -> None:
+        task.text_probe = "pending"
+        try:
+            future = self.text_probe_executor.submit(probe_text_layer, task.input_path)
+        except RuntimeError:
+            task.text_probe = ""
+            return
+        future.add_done_callback(lambda done, task_id=task.task_id: self._emit_text_probe(task_id, done))
+
+    def _emit_text_probe(self, task_id: str, future: Future) -> None:
+        # Runs on the probe thread; the signal hands the verdict to the GUI thread.
+        try:
+            result = None if future.cancelled() else future.result()
+        except Exception:
+            result = None
+        try:
+            self.text_probe_ready.emit(task_id, result)
+        except RuntimeError:
+            pass
+
+    def _apply_text_probe(self, task_id: str, result: object) -> None:
+        task = self.tasks.get(task_id)
+        if task is None or task.text_probe != "pending":
+            return
+        if not isinstance(result, tuple) or len(result) != 3:
+            task.text_probe = "unknown"
+        else:
+            all_text, checked, total = result
+            task.page_count = int(total)
+            task.text_probe = "searchable" if all_text else "needs_ocr"
+            task.text_pages = int(checked) if all_text else max(0, int(checked) - 1)
+        if task.task_id in self.queued_durations:
+            self._queue_duration(task)
+        self._show_text_probe(task)
+        if self.batch_running and task.status == "Queued":
+            self._schedule_tasks()
+
+    def _text_probe_label(self, task: TaskItem) -> str:
+        if task.text_probe == "searchable":
+            return f"Searchable ({task.text_pages}/{task.page_count} pages have text)"
+        if task.text_probe == "needs_ocr":
+            return f"Needs OCR (page {task.text_pages + 1} has no text)"
+        if task.text_probe == "unknown":
+            return "Text layer unknown"
+        return ""
+
+    def _show_text_probe(self, task: TaskItem) -> None:
+        if task.status != "Queued":
+            return
+        label = self._text_probe_label(task)
+        if label:
+            self._set_result(task, label)
+
+    def _searchable_shortcut(self, task: TaskItem) -> str:
+        if self.current_force_ocr or task.text_probe != "searchable":
+            return ""
+        return self.current_searchable_action if self.current_searchable_action in {"copy", "skip"} else ""
+
+    def _skip_searchable_task(self, task: TaskItem) -> None:
+        task.metrics["skipped_searchable"] = True
+        self._append_log(f"Skipped {task.input_path}: text layer already present on all {task.page_count} pages.")
+        self._finalize_task(task, True, "No output (already searchable)", "Skipped (Already Searchable)")
+
+    @staticmethod
+    def _ram_staging_supported() -> bool:
+        return os.name != "nt" and RAM_TEMP_ROOT.parent.is_dir()
+
+    @staticmethod
+    def _prepare_ram_temp_root() -> bool:
+        try:
+            RAM_TEMP_ROOT.mkdir(mode=0o700, exist_ok=True)
+            info = RAM_TEMP_ROOT.lstat()
+        except OSError:
+            return False
+        # tmpfs mounts like /dev/shm are world-writable; refuse a root planted by someone else.
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+            return False
+        if info.st_mode & 0o077:
+            try:
+                os.chmod(RAM_TEMP_ROOT, 0o700)
+            except OSError:
+                return False
+        return True
+
+    def _task_temp_root(self, task: TaskItem, input_size: int, page_count: int | None) -> Path:
+        task.metrics.pop("ram_staging_bytes", None)
+        if not self.current_ram_staging:
+            return TEMP_ROOT
+        estimate = ram_staging_estimate(input_size, page_count)
+        reserved = sum(
+            int(other.metrics.get("ram_staging_bytes", 0)) for other in self._running_task_list() if other is not task
+        )
+        try:
+            free_bytes = shutil.disk_usage(RAM_TEMP_ROOT.parent).free
+        except OSError:
+            free_bytes = 0
+        if not ram_staging_fits(estimate, free_bytes, reserved) or not self._prepare_ram_temp_root():
+            self._append_log(
+                f"Staging {task.input_path.name} on disk: needs ~{_format_bytes(estimate)}, "
+                f"tmpfs has {_format_bytes(free_bytes)} free with {_format_bytes(reserved)} reserved.",
+                task.task_id,
+            )
+            return TEMP_ROOT
+        task.metrics["ram_staging_bytes"] = estimate
+        return RAM_TEMP_ROOT
+
+    def _ocr_options_config(self, use_gpu: bool | None = None) -> dict:
+        use_gpu = self.current_use_gpu if use_gpu is None else use_gpu
+        return {
             "force_ocr": self.current_force_ocr,
-            "use_gpu": self.current_use_gpu,
+            "use_gpu": use_gpu,
             "optimize_for_size": self.current_optimize_for_size,
+            "execution_mode": self.current_execution_mode,
+            "durability": self.current_durability,
+            "memory_limit_bytes": self.current_memory_limit_mb * 1024 * 1024,
+            **(self._gpu_service_config() if use_gpu else {}),
+        }
+
+    @staticmethod
+    def _pressure_sample() -> PressureSample | None:
+        try:
+            memory = psutil.virtual_memory()
+            swap = psutil.swap_memory()
+            load_average = psutil.getloadavg()[0]
+        except Exception:
+            return None
+        return PressureSample(
+            available_bytes=int(memory.available),
+            swap_out_bytes=int(getattr(swap, "sout", 0) or 0),
+            load_average=float(load_average),
+            cpu_count=os.cpu_count() or 1,
+        )
+
+    def _admit_task(self, task: TaskItem) -> bool:
+        # Runs on every wake-up while a file is held: no stat, and only running files are summed.
+        expected = self.admission.expected_peak(task.input_size)
+        # Running files may still grow towards their expected peak.
+        pending_growth = sum(
+            max(0, int(other.metrics.get("expected_peak_rss", 0)) - other.peak_rss_bytes)
+            for other in self._running_task_list()
+        )
+        admitted = self.admission.admit(expected, pending_growth, self.worker_pool.busy_count())
+        if admitted:
+            task.metrics["expected_peak_rss"] = expected
+            if self._admission_hold_logged:
+                self._append_log("Admission control: resumed starting files.")
+                self._admission_hold_logged = ""
+        elif self.admission.hold_reason != self._admission_hold_logged:
+            self._admission_hold_logged = self.admission.hold_reason
+            self._append_log(
+                f"Admission control: holding new files ({self.admission.hold_reason}); "
+                f"{len(self.queued_durations)} queued, {self.worker_pool.busy_count()} running."
+            )
+        return admitted
+
+    def _gpu_memory_sample(self) -> tuple[int, int] | None:
+        stats = self._cached_gpu_metrics
+        if stats is None:
+            return None
+        _util, used_mib, total_mib, _count = stats
+        return used_mib * 1024 * 1024, total_mib * 1024 * 1024
+
+    def _gpu_tasks_running(self) -> int:
+        running = 0
+        for task in self._running_task_list():
+            if task.shards:
+                running += sum(1 for shard in task.shards if shard.status == "Running" and shard.use_gpu)
+            elif task.worker_pid is not None and task.metrics.get("ocr_backend") == "gpu":
+                running += 1
+        return running
+
+    def _dispatch_to_gpu(self, unit_id: str) -> bool:
+        if not self.current_use_gpu:
+            return False
+        if not self.gpu_dispatcher.admit(self._gpu_tasks_running()):
+            return False
+        return self.gpu_breaker.allow(unit_id)
+
+    def _backend_note(self, use_gpu: bool, unit_id: str) -> str:
+        if not self.current_use_gpu:
+            return ""
+        if use_gpu:
+            return ", GPU probe (circuit breaker half-open)" if self.gpu_breaker.probe_id == unit_id else ", GPU"
+        if self.gpu_breaker.state != "closed":
+            return f", CPU (GPU circuit breaker {self.gpu_breaker.describe()})"
+        return f", CPU overflow ({self.gpu_dispatcher.describe()} reached)"
+
+    def _record_gpu_outcome(self, unit_id: str, event: dict) -> None:
+        breaker = self.gpu_breaker
+        if event.get("gpu_failed"):
+            if breaker.record_failure(unit_id):
+                self._append_log(
+                    f"GPU circuit breaker opened after GPU failures (trip {breaker.trips}); new files run on CPU "
+                    f"for {breaker.cooldown_seconds:.0f}s, then one file probes the GPU again."
+                )
+        elif event.get("success") and event.get("cache_status") != "hit":
+            if breaker.record_success(unit_id):
+                self._append_log("GPU circuit breaker closed: the GPU probe succeeded.")
+        else:
+            breaker.abandon(unit_id)
+
+    def _gpu_breaker_note(self) -> str:
+        if self.gpu_breaker.state == "closed" and not self.gpu_breaker.failures:
+            return ""
+        return f" | breaker {self.gpu_breaker.describe()}"
+
+    def _ensure_gpu_service(self) -> bool:
+        if self.gpu_service is not None and self.gpu_service.is_alive():
+            return True
+        self._stop_gpu_service()
+        handle = GpuServiceHandle()
+        try:
+            handle.start()
+        except GpuServiceError as exc:
+            self._append_log(f"GPU OCR service did not start; workers will load EasyOCR themselves: {exc}")
+            return False
+        self.gpu_service = handle
+        self._append_log(f"GPU OCR service started (pid {handle.pid}); the model stays loaded across files.")
+        return True
+
+    def _stop_gpu_service(self) -> None:
+        handle, self.gpu_service = self.gpu_service, None
+        if handle is None:
+            return
+        # Joining the service can take seconds; stop it off the GUI thread like pool workers.
+        future: Future = Future()
+
+        def stop() -> None:
+            try:
+                handle.stop()
+            except Exception:
+                pass
+            future.set_result({})
+
+        threading.Thread(target=stop, name="ocr-gpu-service-stop", daemon=True).start()
+        self._track_worker_stop(self._allocate_stop_token(), future)
+
+    def _gpu_service_config(self) -> dict:
+        if not self.current_gpu_service or self.gpu_service is None or not self.gpu_service.is_alive():
+            return {}
+        return {
+            "gpu_service_address": str(self.gpu_service.address),
+            "gpu_service_authkey": self.gpu_service.authkey.hex(),
+        }
+
+    def _allocate_ocr_jobs(
+        self, page_count: int | None, use_gpu: bool | None = None, starting_shard: bool = False
+    ) -> JobAllocation:
+        # Queued files are counted by queued_durations; a starting file has already left it.
+        queued = len(self.queued_durations)
+        jobs_in_use = 0
+        for task in self._running_task_list():
+            if task.shards:
+                jobs_in_use += sum(shard.ocr_jobs for shard in task.shards if shard.status == "Running")
+                queued += sum(1 for shard in task.shards if shard.status == "Queued")
+            elif task.worker_pid is not None:
+                jobs_in_use += int(task.metrics.get("ocr_jobs", 1))
+        if starting_shard:
+            # The page range being started is still Queued above.
+            queued = max(0, queued - 1)
+        free_slots = max(0, self.current_worker_limit - self.worker_pool.busy_count() - 1)
+        use_gpu = self.current_use_gpu if use_gpu is None else use_gpu
+        max_jobs = 1 if use_gpu else OCR_JOBS_MAX
+        return allocate_ocr_jobs(page_count, cpu_budget(), jobs_in_use, queued, free_slots, max_jobs)
+
+    def _submit_to_pool(self, config: dict) -> int:
+        config["gui_log_level"] = self.gui_log_level
+        return self.worker_pool.submit(config)
+
+    def _result_cache_config(self) -> dict:
+        return {
+            "result_cache": self.current_result_cache,
+            "result_cache_dir": str(RESULT_CACHE_ROOT),
+            "result_cache_max_bytes": max(0, self.result_cache_max_mb) * 1024 * 1024,
         }
-        task.queue = mp.Queue()
-        task.process = mp.Process(target=run_ocr_job, args=(config, task.queue), name=f"ocr-{task.task_id}")
-        task.process.start()
-        task.ps_proc = psutil.Process(task.process.pid)
-        task.ps_proc.cpu_percent(None)
-        self._apply_process_priority(task.ps_proc)
+
+    def _ocr_jobs_config(self, allocation: JobAllocation, use_gpu: bool | None = None) -> dict:
+        detail = allocation.describe()
+        if self.current_use_gpu if use_gpu is None else use_gpu:
+            detail = f"GPU mode keeps one job; {detail}"
+        return {"ocr_jobs": allocation.jobs, "ocr_jobs_detail": detail}
+
+    def _plan_task_shards(self, task: TaskItem, page_count: int | None) -> list[ShardItem]:
+        if not self.current_shard_large_pdfs or self.current_worker_limit < 2:
+            return []
+        if not page_count or page_count < SHARD_MIN_PAGES:
+            return []
+        ranges = plan_page_ranges(page_count, self.current_worker_limit, SHARD_MIN_PAGES_PER_RANGE)
+        if len(ranges) < 2:
+            return []
+        return [
+            ShardItem(
+                shard_id=uuid.uuid4().hex,
+                index=index,
+                start_page=start,
+                end_page=end,
+                part_path=task.temp_dir / f"part_{index:04d}.pdf",
+            )
+            for index, (start, end) in enumerate(ranges)
+        ]
+
+    def _start_sharded_task(self, task: TaskItem, shards: list[ShardItem]) -> None:
+        self._reset_task_shards(task)
+        task.shards = shards
+        task.shard_phase = "probe" if self.current_result_cache else "ocr"
+        for shard in shards:
+            self.shard_owner[shard.shard_id] = task.task_id
         task.status = "Running"
-        task.progress_value = 1
+        self.running_tasks[task.task_id] = task
         task.metrics["started_monotonic"] = time.monotonic()
-        task.metrics["estimated_seconds"] = self._estimate_task_duration(task)
+        task.metrics["estimated_seconds"] = self._estimate_task_duration(task) / min(
+            len(shards), self.current_worker_limit
+        )
         task.metrics["last_progress_tick"] = time.monotonic()
 
         self._set_status(task, "Running")
-        self._set_result(task, "In progress...")
+        self._set_result(task, f"Split into {len(shards)} page ranges...")
         self._set_log_button(task, enabled=True)
         self._set_progress(task, 1)
         self._refresh_action_button(task)
-        self._append_log(f"Started {task.input_path} (PID {task.process.pid})")
+        self._append_log(
+            f"Started {task.input_path} as {len(shards)} page ranges "
+            f"({task.metrics.get('page_count', 0)} pages)."
+        )
 
-    def _poll_workers(self) -> None:
-        self._advance_running_progress()
-        for task in list(self.tasks.values()):
-            self._drain_task_queue(task)
-            if task.status == "Running" and task.process is not None and not task.process.is_alive():
-                self._finalize_task(task, False, "Worker process exited unexpectedly.")
-        self._schedule_tasks()
-        if self.batch_running:
-            self._update_batch_progress()
+    def _reset_task_shards(self, task: TaskItem) -> None:
+        for shard in task.shards:
+            self.shard_owner.pop(shard.shard_id, None)
+        task.shards = []
+        task.shard_phase = ""
+
+    def _dispatch_shard_work(self, task: TaskItem) -> None:
+        if task.shard_phase == "probe" and self._has_free_worker_slot():
+            self._submit_cache_probe(task)
+        if task.shard_phase != "ocr":
+            if task.status == "Running" and task.shard_phase == "merge_pending" and self._has_free_worker_slot():
+                self._submit_shard_merge(task)
+            return
+        for shard in task.shards:
+            if task.status != "Running":
+                return
+            if shard.status != "Queued":
+                continue
+            if not self._has_free_worker_slot():
+                return
+            self._submit_shard(task, shard)
+
+    def _submit_shard(self, task: TaskItem, shard: ShardItem) -> None:
+        use_gpu = self._dispatch_to_gpu(shard.shard_id)
+        allocation = self._allocate_ocr_jobs(shard.end_page - shard.start_page, use_gpu, starting_shard=True)
+        config = {
+            "kind": "shard",
+            "task_id": shard.shard_id,
+            "parent_id": task.task_id,
+            "input_pdf": str(task.input_path),
+            "part_pdf": str(shard.part_path),
+            "page_range": [shard.start_page, shard.end_page],
+            "shard_index": shard.index,
+            "shard_count": len(task.shards),
+            "log_file": str(task.log_file),
+            "temp_dir": str(task.temp_dir.parent / shard.shard_id),
+            **self._ocr_options_config(use_gpu),
+            **self._ocr_jobs_config(allocation, use_gpu),
+        }
+        try:
+            shard.worker_pid = self._submit_to_pool(config)
+        except Exception as exc:
+            self._fail_sharded_task(task, f"Worker start failed: {exc}")
+            return
+        shard.status = "Running"
+        shard.ocr_jobs = allocation.jobs
+        shard.use_gpu = use_gpu
+        try:
+            self._apply_process_priority(psutil.Process(shard.worker_pid))
+        except Exception:
+            pass
+        self._sample_task_tree(task)
 
-    def _drain_task_queue(self, task: TaskItem) -> None:
-        if task.queue is None:
+    def _submit_cache_probe(self, task: TaskItem) -> None:
+        config = {
+            "kind": "cache_probe",
+            "task_id": task.task_id,
+            "input_pdf": str(task.input_path),
+            "output_pdf": str(task.output_path),
+            "log_file": str(task.log_file),
+            **self._ocr_options_config(),
+            **self._result_cache_config(),
+        }
+        try:
+            task.worker_pid = self._submit_to_pool(config)
+        except Exception as exc:
+            self._fail_sharded_task(task, f"Worker start failed: {exc}")
+            return
+        task.shard_phase = "probing"
+
+    def _handle_cache_probe(self, task: TaskItem, event: dict) -> None:
+        task.worker_pid = None
+        task.metrics["cache_status"] = event.get("cache_status", "miss")
+        if event.get("success"):
+            self._cleanup_shard_files(task)
+            result = event.get("output_pdf", "")
+            if result:
+                task.output_path = Path(result)
+            self._finalize_task(task, True, result, None, {"duration_seconds": event.get("duration_seconds", 0.0)})
             return
-        while True:
+        task.metrics["cache_key"] = event.get("cache_key", "")
+        task.metrics["cache_engine"] = event.get("cache_engine", "")
+        task.shard_phase = "ocr"
+        self._dispatch_shard_work(task)
+
+    def _submit_shard_merge(self, task: TaskItem) -> None:
+        cache_key = task.metrics.get("cache_key", "")
+        cache_engine = task.metrics.get("cache_engine", "")
+        if cache_key and any(shard.engine_used != cache_engine for shard in task.shards):
+            # Ranges sent to CPU (overflow, breaker, or retry) would poison the key for later runs.
+            cache_key = ""
+            self._append_log(
+                f"Not caching the merged output: its page ranges did not all run on {cache_engine or 'one engine'}.",
+                task.task_id,
+            )
+        config = {
+            "kind": "merge",
+            "task_id": task.task_id,
+            "input_pdf": str(task.input_path),
+            "output_pdf": str(task.output_path),
+            "log_file": str(task.log_file),
+            "temp_dir": str(task.temp_dir),
+            "parts": [str(shard.part_path) for shard in task.shards],
+            "cache_key": cache_key,
+            "durability": self.current_durability,
+            **self._result_cache_config(),
+        }
+        try:
+            task.worker_pid = self._submit_to_pool(config)
+        except Exception as exc:
+            self._fail_sharded_task(task, f"Worker start failed: {exc}")
+            return
+        task.shard_phase = "merging"
+        self._set_result(task, "Merging page ranges...")
+
+    def _handle_shard_event(self, task: TaskItem, shard: ShardItem, event: dict) -> None:
+        event_type = event.get("type")
+        if event_type == "log":
+            message = event.get("message", "")
+            self._track_task_log_metrics(task, message)
+            self._append_log(message, task.task_id)
+            return
+        if event_type == "log_batch":
+            self._handle_log_batch(task, event)
+            return
+        if event_type == "progress":
+            if task.status == "Running" and shard.status == "Running":
+                self._apply_progress_event(task, event, shard)
+            return
+        if event_type not in {"done", "worker_lost"}:
+            return
+        if task.status != "Running" or shard.status != "Running":
+            return
+        shard.worker_pid = None
+        if shard.use_gpu:
+            self._record_gpu_outcome(shard.shard_id, event)
+        if event_type == "done" and event.get("success"):
+            shard.status = "Done"
+            shard.engine_used = str(event.get("engine_used", ""))
+            for key in ("cpu_user_delta", "cpu_system_delta"):
+                task.metrics[key] = float(task.metrics.get(key, 0.0)) + float(event.get(key, 0.0))
+            if event.get("child_rusage"):
+                self._merge_child_rusage(task, event["child_rusage"])
+            if event.get("used_cpu_fallback"):
+                task.metrics["used_cpu_fallback"] = True
+            done_count = sum(1 for item in task.shards if item.status == "Done")
+            self._set_progress(task, max(task.progress_value, int(done_count / len(task.shards) * 90)))
+            if done_count == len(task.shards):
+                task.shard_phase = "merge_pending"
+                self._append_log(f"All {done_count} page ranges finished; merging.", task.task_id)
+            self._dispatch_shard_work(task)
+            return
+        shard.status = "Failed"
+        error = event.get("error") or "Worker process exited unexpectedly."
+        self._fail_sharded_task(
+            task,
+            f"Pages {shard.start_page + 1}-{shard.end_page} failed: {error}",
+        )
+
+    def _fail_sharded_task(self, task: TaskItem, error: str) -> None:
+        # Shard temp dirs are removed once the remaining range workers are gone.
+        self._stop_task_processes([task], remove_outputs=False)
+        self._finalize_task(task, False, error, "Failed")
+
+    def _cleanup_shard_files(self, task: TaskItem) -> None:
+        self._discard_temp_dirs([task.temp_dir, *(task.temp_dir.parent / shard.shard_id for shard in task.shards)])
+
+    def _discard_temp_dirs(self, paths: list[Path]) -> None:
+        doomed: list[Path] = []
+        for path in paths:
             try:
-                event = task.queue.get_nowait()
-            except queue.Empty:
-                break
+                if not any(self._is_path_within(root, path) for root in (TEMP_ROOT, RAM_TEMP_ROOT)):
+                    continue
+                if path.is_symlink() or not path.is_dir():
+                    continue
+                # Rename first so a rerun of the same task can recreate its temp dir
+                # while the old one is still being deleted.
+                discard = path.with_name(f".{path.name}.discard-{uuid.uuid4().hex[:8]}")
+                try:
+                    path.rename(discard)
+                except OSError:
+                    discard = path
+                doomed.append(discard)
             except Exception:
-                break
+                pass
+        if not doomed:
+            return
+        self.teardown_cleanups += 1
+        self._update_teardown_indicator()
+        threading.Thread(
+            target=self._remove_temp_dirs,
+            args=(doomed,),
+            name="ocr-temp-cleanup",
+            daemon=True,
+        ).start()
+
+    def _remove_temp_dirs(self, paths: list[Path]) -> None:
+        # Runs off the GUI thread: a canceled batch can leave gigabytes of page images.
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+        try:
+            self.temp_cleanup_done.emit(len(paths))
+        except RuntimeError:
+            pass
+
+    def _on_temp_cleanup_done(self, _count: int) -> None:
+        self.teardown_cleanups = max(0, self.teardown_cleanups - 1)
+        self._update_teardown_indicator()
+        self._finish_deferred_close()
+
+    def _on_poll_timer(self) -> None:
+        self._advance_running_progress()
+        self._poll_workers()
+        if self.batch_running:
+            self._update_batch_progress()
+
+    def _poll_workers(self) -> None:
+        for event in self.worker_pool.poll():
+            if event.get("type") == "worker_ready":
+                self._log_worker_ready(event)
+                continue
+            event_task_id = str(event.get("task_id", ""))
+            task = self.tasks.get(event_task_id)
+            if task is None:
+                owner = self.tasks.get(self.shard_owner.get(event_task_id, ""))
+                shard = next((item for item in owner.shards if item.shard_id == event_task_id), None) if owner else None
+                if owner is not None and shard is not None:
+                    self._handle_shard_event(owner, shard, event)
+                continue
             self._handle_worker_event(task, event)
+        self._schedule_tasks()
+
+    def _log_worker_ready(self, event: dict) -> None:
+        message = (
+            f"Worker PID {event.get('worker_pid', '?')} ready in "
+            f"{float(event.get('startup_seconds', 0.0)):.2f}s "
+            f"(RSS {_format_bytes(int(event.get('rss', 0)))}, {int(event.get('module_count', 0))} modules)."
+        )
+        if event.get("qt_loaded"):
+            message += " Warning: worker imported PySide6."
+        self._append_log(message)
 
     def _handle_worker_event(self, task: TaskItem, event: dict) -> None:
         event_type = event.get("type")
+        if event_type == "worker_lost":
+            self.gpu_breaker.abandon(task.task_id)
+            if task.status == "Running":
+                self._finalize_task(task, False, event.get("error", "Worker process exited unexpectedly."))
+            return
         if event_type == "log":
             message = event.get("message", "")
             self._track_task_log_metrics(task, message)
             self._append_log(message, task.task_id)
             return
+        if event_type == "log_batch":
+            self._handle_log_batch(task, event)
+            return
         if event_type == "status":
             status = event.get("status", "Running")
             self._set_status(task, status)
             return
+        if event_type == "progress":
+            if task.status == "Running":
+                self._apply_progress_event(task, event)
+            return
         if event_type == "done":
             if task.status == "Canceled":
                 return
+            if event.get("kind") == "cache_probe":
+                if task.status == "Running":
+                    self._handle_cache_probe(task, event)
+                return
+            if not task.shards and task.metrics.get("ocr_backend") == "gpu":
+                self._record_gpu_outcome(task.task_id, event)
+            if not task.shards and isinstance(event.get("phase_seconds"), dict):
+                # GUI wall time the worker did not account for: pool dispatch,
+                # worker wake-up, and event delivery back to this poll.
+                phases = dict(event["phase_seconds"])
+                worker_seconds = float(event.get("duration_seconds", 0.0) or 0.0)
+                worker_seconds += float(phases.get("validate", 0.0)) + float(phases.get("logging", 0.0))
+                elapsed = time.monotonic() - float(task.metrics.get("started_monotonic", time.monotonic()))
+                phases["dispatch"] = max(0.0, elapsed - worker_seconds)
+                event = dict(event)
+                event["phase_seconds"] = phases
+            if task.shards:
+                event = dict(event)
+                event["shard_count"] = len(task.shards)
+                event["duration_seconds"] = max(
+                    0.0, time.monotonic() - float(task.metrics.get("started_monotonic", time.monotonic()))
+                )
+                event.setdefault("used_cpu_fallback", bool(task.metrics.get("used_cpu_fallback", False)))
             success = bool(event.get("success", False))
             if success:
                 result = event.get("output_pdf", "")
@@ -1654,6 +2718,8 @@ class MainWindow(QMainWindow):
                 task.used_fallback = bool(event.get("used_fallback", False))
                 self._finalize_task(task, True, result, None, event)
             else:
+                if self._retry_after_memory_limit(task, event):
+                    return
                 error = event.get("error", "Unknown OCR error")
                 self._finalize_task(task, False, error, "Failed", event)
 
@@ -1687,8 +2753,13 @@ class MainWindow(QMainWindow):
         self._refresh_action_button(task)
         self._close_task_process(task)
 
+        if success and not task.shards and merged_metrics.get("cache_status") in {"miss", "disabled"}:
+            self.admission.learn(int(merged_metrics.get("input_size", 0) or 0), task.peak_rss_bytes)
+            self._learn_task_duration(task)
+
         if merged_metrics:
             self._append_metrics_to_log(task)
+        self._export_task_metrics(task)
         self._mark_batch_progress(task)
         self._update_metrics_labels()
 
@@ -1696,48 +2767,202 @@ class MainWindow(QMainWindow):
         if task.run_token == self.active_run_token and not task.counted:
             task.counted = True
             self.finished_batch += 1
+            self.batch_progress_sum -= task.progress_value
         self._update_batch_progress()
         if self.batch_running and self.finished_batch >= self.total_batch:
             self.batch_running = False
             self.start_button.setEnabled(True)
             self._append_log("Batch completed.")
+            self._append_batch_summary()
+            self._start_durability_barrier()
 
-    def cancel_task(self, task_id: str) -> None:
-        task = self.tasks.get(task_id)
-        if task is None:
+    def _append_batch_summary(self) -> None:
+        batch_tasks = [
+            task for task in self.tasks.values() if task.run_token == self.active_run_token and task.counted
+        ]
+        durations: list[float] = []
+        for task in batch_tasks:
+            try:
+                duration = float(task.metrics.get("duration_seconds", 0.0))
+            except Exception:
+                continue
+            if duration > 0:
+                durations.append(duration)
+        wall_seconds = max(0.0, time.monotonic() - self.batch_started_at) if self.batch_started_at else 0.0
+        done_count = sum(1 for task in batch_tasks if task.status.startswith(("Done", "Skipped")))
+        avg_text = f"{sum(durations) / len(durations):.2f}s" if durations else "n/a"
+        throughput = f"{len(batch_tasks) / wall_seconds * 60.0:.1f} files/min" if wall_seconds > 0 else "n/a"
+        cache_hits = sum(1 for task in batch_tasks if task.metrics.get("cache_status") == "hit")
+        cache_misses = sum(1 for task in batch_tasks if task.metrics.get("cache_status") == "miss")
+        install_times = [
+            float(task.metrics["install_seconds"])
+            for task in batch_tasks
+            if isinstance(task.metrics.get("install_seconds"), (int, float))
+            and task.status.startswith(("Done", "Skipped"))
+        ]
+        child_usages = [
+            task.metrics["child_rusage"]
+            for task in batch_tasks
+            if isinstance(task.metrics.get("child_rusage"), dict) and task.metrics["child_rusage"]
+        ]
+        child_cpu = sum(
+            float(usage.get("cpu_user", 0.0)) + float(usage.get("cpu_system", 0.0)) for usage in child_usages
+        )
+        child_peak_rss = max((int(usage.get("max_rss", 0) or 0) for usage in child_usages), default=0)
+        sampled_tasks = [task for task in batch_tasks if task.peak_processes]
+        install_text = (
+            f"{sum(install_times) / len(install_times):.3f}s avg / {max(install_times):.3f}s max"
+            if install_times
+            else "n/a"
+        )
+        self._append_log(
+            "Batch summary: "
+            f"runner={self.current_execution_mode}, files={len(batch_tasks)}, done={done_count}, "
+            f"wall={wall_seconds:.2f}s, avg_task={avg_text}, throughput={throughput}, "
+            f"cache hits={cache_hits}, cache misses={cache_misses}, "
+            f"durability={self.current_durability}, install={install_text}, "
+            f"duration model={self._duration_error_text()}"
+            + (
+                f", ocr child cpu={child_cpu:.1f}s, ocr child peak rss={_format_bytes(child_peak_rss)}"
+                if child_usages
+                else ""
+            )
+            + (
+                f", tree peak cpu={max(task.peak_cpu_percent for task in sampled_tasks):.0f}%"
+                f", tree peak rss={_format_bytes(max(task.peak_rss_bytes for task in sampled_tasks))}"
+                f", tree io={_format_bytes(sum(task.io_read_bytes for task in sampled_tasks))} read"
+                f" / {_format_bytes(sum(task.io_write_bytes for task in sampled_tasks))} written"
+                if sampled_tasks
+                else ""
+            )
+            + (
+                f", ram staged={sum(1 for task in batch_tasks if task.metrics.get('ram_staging_bytes'))}"
+                if self.current_ram_staging
+                else ""
+            )
+            + (
+                f", gpu files={sum(1 for task in batch_tasks if task.metrics.get('ocr_backend') == 'gpu')}"
+                f", cpu overflow={sum(1 for task in batch_tasks if task.metrics.get('ocr_backend') == 'cpu')}"
+                f", gpu breaker={self.gpu_breaker.state} (trips={self.gpu_breaker.trips})"
+                if self.current_use_gpu
+                else ""
+            )
+            + (
+                f", gpu service files={sum(1 for task in batch_tasks if task.metrics.get('gpu_service'))}"
+                if self.current_gpu_service
+                else ""
+            )
+            + (
+                f", memory limit={self.current_memory_limit_mb} MiB"
+                f" (retried alone={sum(1 for task in batch_tasks if task.metrics.get('memory_retry'))})"
+                if self.current_memory_limit_mb
+                else ""
+            )
+        )
+        phased = [
+            task.metrics["phase_seconds"]
+            for task in batch_tasks
+            if isinstance(task.metrics.get("phase_seconds"), dict)
+        ]
+        if phased:
+            totals: dict[str, float] = {}
+            for phases in phased:
+                for name, seconds in phases.items():
+                    if isinstance(seconds, (int, float)):
+                        totals[name] = totals.get(name, 0.0) + float(seconds)
+            worker_total = sum(seconds for name, seconds in totals.items() if name != "dispatch")
+            ocr_share = (totals.get("ocr", 0.0) + totals.get("retry", 0.0)) / worker_total if worker_total > 0 else 0.0
+            self._append_log(
+                f"Batch phase timings (avg over {len(phased)} files): "
+                f"{_format_phases({name: seconds / len(phased) for name, seconds in totals.items()})}; "
+                f"OCR share of worker time {ocr_share:.0%}"
+            )
+        if self.batch_log_dir is not None and (self.batch_log_dir / TASK_METRICS_EXPORT_NAME).exists():
+            self._append_log(f"Per-file metrics: {self.batch_log_dir / TASK_METRICS_EXPORT_NAME}")
+
+    def _start_durability_barrier(self) -> None:
+        if self.current_durability != "deferred":
             return
-        if task.status == "Queued":
+        outputs = [
+            task.output_path
+            for task in self.tasks.values()
+            if task.run_token == self.active_run_token and task.status.startswith(("Done", "Skipped"))
+        ]
+        if not outputs:
+            return
+        thread = threading.Thread(
+            target=self._run_durability_barrier,
+            args=(outputs,),
+            name="ocr-durability-barrier",
+            daemon=True,
+        )
+        self.durability_barrier_thread = thread
+        self._update_teardown_indicator()
+        thread.start()
+
+    def _run_durability_barrier(self, outputs: list[Path]) -> None:
+        # Runs off the GUI thread: syncfs on a NAS can take seconds.
+        started = time.perf_counter()
+        try:
+            method, synced = sync_filesystems(outputs)
+        except Exception:
+            method, synced = "failed", 0
+        try:
+            self.durability_barrier_done.emit(method, synced, time.perf_counter() - started)
+        except RuntimeError:
+            pass
+
+    def _on_durability_barrier_done(self, method: str, synced: int, seconds: float) -> None:
+        self.durability_barrier_thread = None
+        if method == "failed":
+            self._append_log("Durability barrier failed; outputs are left for the OS to flush.")
+        else:
+            self._append_log(f"Durability barrier ({method}): flushed {synced} target(s) in {seconds:.3f}s.")
+        self._update_teardown_indicator()
+        self._finish_deferred_close()
+
+    def cancel_task(self, task_id: str) -> None:
+        self._cancel_tasks([task_id])
+
+    def _cancel_tasks(self, task_ids: list[str]) -> None:
+        running: list[TaskItem] = []
+        for task_id in task_ids:
+            task = self.tasks.get(task_id)
+            if task is None:
+                continue
+            if task.status == "Queued":
+                task.status = "Canceled"
+                self.queued_durations.discard(task.task_id)
+                self._set_status(task, "Canceled")
+                self._set_result(task, "Canceled before start")
+                self._set_progress(task, 0)
+                self._refresh_action_button(task)
+                self._mark_batch_progress(task)
+                continue
+            if task.status != "Running":
+                continue
+            self._set_status(task, "Canceling...")
+            self._append_log(f"Cancel requested for {task.input_path}")
+            for unit_id in (task.task_id, *(shard.shard_id for shard in task.shards)):
+                self.gpu_breaker.abandon(unit_id)
+            running.append(task)
+        for task in running:
             task.status = "Canceled"
             self._set_status(task, "Canceled")
-            self._set_result(task, "Canceled before start")
+            self._set_result(task, "Canceled by user")
             self._set_progress(task, 0)
             self._refresh_action_button(task)
+            self._append_cancel_to_log(task)
             self._mark_batch_progress(task)
-            return
-        if task.status != "Running":
-            return
-
-        self._set_status(task, "Canceling...")
-        self._append_log(f"Cancel requested for {task.input_path}")
-        self._terminate_task_process(task)
-        self._cleanup_task_files(task)
-        task.status = "Canceled"
-        self._set_status(task, "Canceled")
-        self._set_result(task, "Canceled by user")
-        self._set_progress(task, 0)
-        self._refresh_action_button(task)
-        self._append_cancel_to_log(task)
-        self._mark_batch_progress(task)
+        if running:
+            self._stop_task_processes(running, remove_outputs=True)
 
     def cancel_selected(self) -> None:
-        for task_id in self._selected_task_ids():
-            self.cancel_task(task_id)
+        self._cancel_tasks(self._selected_task_ids())
         self._update_metrics_labels()
 
     def cancel_all(self) -> None:
-        for task in list(self.tasks.values()):
-            if task.status in {"Queued", "Running"}:
-                self.cancel_task(task.task_id)
+        self._cancel_tasks([task.task_id for task in self.tasks.values() if task.status in {"Queued", "Running"}])
         self._update_metrics_labels()
 
     def _selected_task_ids(self) -> list[str]:
@@ -1841,56 +3066,128 @@ class MainWindow(QMainWindow):
             item.setToolTip(str(task.input_path))
 
     def _close_task_process(self, task: TaskItem) -> None:
-        if task.process is not None:
-            try:
-                task.process.join(timeout=1.0)
-                if task.process.is_alive():
-                    task.process.terminate()
-                    task.process.join(timeout=0.5)
-            except Exception:
-                pass
-            task.process = None
-        if task.queue is not None:
-            try:
-                task.queue.close()
-            except Exception:
-                pass
-            task.queue = None
+        # Pool workers outlive their tasks; only drop the per-task handles.
+        task.worker_pid = None
         task.ps_proc = None
-
-    def _terminate_task_process(self, task: TaskItem) -> None:
-        proc = task.process
-        if proc is None:
+        self.tree_sampler.forget(task.task_id)
+
+    def _stop_task_processes(self, tasks: list[TaskItem], remove_outputs: bool) -> None:
+        # Every worker is signalled in one round; the grace-period wait runs on a
+        # pool thread and temp cleanup follows in _on_workers_stopped.
+        unit_ids: list[str] = []
+        for task in tasks:
+            unit_ids.append(task.task_id)
+            for shard in task.shards:
+                if shard.status == "Running":
+                    unit_ids.append(shard.shard_id)
+                    shard.status = "Canceled"
+                    shard.worker_pid = None
             self._close_task_process(task)
-            return
+        token = self._allocate_stop_token()
+        self.stop_batches[token] = ([(task, task.run_token) for task in tasks], remove_outputs)
         try:
-            if proc.is_alive():
-                proc.terminate()
-                proc.join(timeout=1.0)
-            if proc.is_alive():
-                proc.kill()
-                proc.join(timeout=1.0)
+            future = self.worker_pool.cancel_many(unit_ids)
         except Exception:
-            pass
-        self._close_task_process(task)
+            future = None
+        self._track_worker_stop(token, future)
+
+    def _allocate_stop_token(self) -> int:
+        token = self.next_stop_token
+        self.next_stop_token += 1
+        return token
+
+    def _track_worker_stop(self, token: int, future: Future | None) -> None:
+        self.teardown_stops += 1
+        self._update_teardown_indicator()
+        if future is None:
+            self._on_workers_stopped(token, {})
+            return
+        future.add_done_callback(lambda done, token=token: self._emit_workers_stopped(token, done))
 
-    def _cleanup_task_files(self, task: TaskItem) -> None:
+    def _emit_workers_stopped(self, token: int, future: Future) -> None:
+        # Called on the pool's stop thread, or inline when nothing had to be stopped.
         try:
-            if self._is_path_within(TEMP_ROOT, task.temp_dir):
-                shutil.rmtree(task.temp_dir, ignore_errors=True)
+            reports = future.result() or {}
         except Exception:
+            reports = {}
+        try:
+            self.workers_stopped.emit(token, reports)
+        except RuntimeError:
             pass
+
+    def _on_workers_stopped(self, token: int, reports: dict) -> None:
+        self.teardown_stops = max(0, self.teardown_stops - 1)
+        entries, remove_outputs = self.stop_batches.pop(token, ([], False))
+        for task, run_token in entries:
+            for unit_id in (task.task_id, *(shard.shard_id for shard in task.shards)):
+                report = reports.get(unit_id)
+                if not report or not report.get("processes"):
+                    continue
+                message = f"Stopped {report['processes']} process(es) for {unit_id}"
+                if report.get("killed"):
+                    message += f"; {report['killed']} needed SIGKILL"
+                if report.get("survivors"):
+                    message += f"; {report['survivors']} still running"
+                self._append_log(f"{message}.", task.task_id)
+            if task.run_token != run_token:
+                # Restarted in a new batch while its old workers were stopping.
+                continue
+            self._cleanup_shard_files(task)
+            if remove_outputs:
+                self._remove_partial_output(task)
+        self._update_teardown_indicator()
+        self._finish_deferred_close()
+
+    def _remove_partial_output(self, task: TaskItem) -> None:
         try:
             output_root = task.input_path.parent / "OCR_Output"
             is_safe_output = (
                 task.output_path.suffix.lower() == ".pdf"
                 and self._is_path_within(output_root, task.output_path)
             )
-            if is_safe_output and task.output_path.exists() and not task.output_path.is_symlink():
+            claimed = any(
+                other is not task and other.output_path == task.output_path and other.status != "Canceled"
+                for other in self.tasks.values()
+            )
+            if is_safe_output and not claimed and task.output_path.exists() and not task.output_path.is_symlink():
                 task.output_path.unlink()
         except Exception:
             pass
 
+    def _update_teardown_indicator(self) -> None:
+        if not hasattr(self, "teardown_label"):
+            return
+        parts: list[str] = []
+        if self.teardown_stops:
+            parts.append("Stopping workers")
+        if self.teardown_cleanups:
+            parts.append(f"Removing temp files ({self.teardown_cleanups} left)")
+        if self.durability_barrier_thread is not None:
+            parts.append("Flushing outputs to disk")
+        active = bool(parts)
+        text = "; ".join(parts)
+        if active and self.close_requested:
+            text += " before exit"
+        self.teardown_label.setText(f"{text}..." if active else "")
+        self.teardown_label.setVisible(active)
+        self.teardown_busy.setVisible(active)
+
+    def _teardown_pending(self) -> bool:
+        return not self.teardown_forced and bool(
+            self.teardown_stops or self.teardown_cleanups or self.durability_barrier_thread is not None
+        )
+
+    def _finish_deferred_close(self) -> None:
+        if self.close_requested and not self._teardown_pending():
+            self.close()
+
+    def _force_deferred_close(self) -> None:
+        if not self.close_requested or not self._teardown_pending():
+            return
+        self.teardown_forced = True
+        self._append_log("Exit no longer waits for worker stop, temp cleanup, and output flush.")
+        self.close()
+
     @staticmethod
     def _restyle_widget(widget: QWidget) -> None:
         style = widget.style()
@@ -1899,11 +3196,11 @@ class MainWindow(QMainWindow):
         widget.update()
 
     def _update_queue_summary(self) -> None:
-        unfinished = sum(
-            1 for task in self.tasks.values() if task.status in {"Queued", "Running", "Canceling..."}
-        )
+        # Runs on every status change, so it reads the counters instead of walking the table.
+        counts = self.status_counts
+        unfinished = counts["Queued"] + counts["Running"] + counts["Canceling..."]
         total = len(self.tasks)
-        has_running = any(task.status == "Running" for task in self.tasks.values())
+        has_running = counts["Running"] > 0
         if hasattr(self, "queue_active_badge"):
             self.queue_active_badge.setText(f"{unfinished} Active")
         if hasattr(self, "queue_total_badge"):
@@ -1944,12 +3241,30 @@ class MainWindow(QMainWindow):
         if item is not None:
             item.setText(value)
             self._apply_status_item_style(item, value)
+        previous = self.counted_status.get(task.task_id)
+        if previous != task.status:
+            if previous is not None:
+                self.status_counts[previous] -= 1
+            self.status_counts[task.status] += 1
+            self.counted_status[task.task_id] = task.status
         self._update_queue_summary()
 
-    def _track_task_log_metrics(self, task: TaskItem, message: str) -> None:
+    def _handle_log_batch(self, task: TaskItem, event: dict) -> None:
+        messages: list[str] = []
+        for line in event.get("lines") or []:
+            message = str(line.get("message", ""))
+            count = max(1, int(line.get("count", 1) or 1))
+            self._track_task_log_metrics(task, message, count)
+            messages.append(f"{message} (x{count})" if count > 1 else message)
+        held_back = int(event.get("held_back", 0) or 0)
+        if held_back > 0:
+            task.metrics["log_lines_held_back"] = int(task.metrics.get("log_lines_held_back", 0)) + held_back
+        self._append_log_lines(messages, task.task_id)
+
+    def _track_task_log_metrics(self, task: TaskItem, message: str, count: int = 1) -> None:
         lowered = message.lower()
         if "skipping all processing on this page" in lowered:
-            task.metrics["skip_page_hits"] = int(task.metrics.get("skip_page_hits", 0)) + 1
+            task.metrics["skip_page_hits"] = int(task.metrics.get("skip_page_hits", 0)) + count
 
         if "parsing" in lowered and "with hocrparser" in lowered:
             match = re.search(r"Parsing\s+(\d+)\s+pages?\s+with HocrParser", message)
@@ -1957,6 +3272,8 @@ class MainWindow(QMainWindow):
                 task.metrics["hocr_pages"] = int(match.group(1))
 
     def _was_effectively_skipped(self, task: TaskItem) -> bool:
+        if task.metrics.get("skipped_searchable"):
+            return True
         hocr_pages = int(task.metrics.get("hocr_pages", 0))
         skip_hits = int(task.metrics.get("skip_page_hits", 0))
         if hocr_pages > 0:
@@ -2005,12 +3322,16 @@ class MainWindow(QMainWindow):
         if bar.maximum() == 0:
             bar.setRange(0, 100)
         value = max(0, min(100, value))
+        if task.run_token == self.active_run_token and not task.counted:
+            self.batch_progress_sum += value - task.progress_value
         task.progress_value = value
         bar.setValue(value)
-        if task.status == "Running" and value >= 95 and value < 100:
+        real = task.status == "Running" and bool(task.metrics.get("real_progress"))
+        if task.status == "Running" and value >= 95 and value < 100 and not real:
             bar.setFormat(f"~{value}%")
         else:
             bar.setFormat(f"{value}%")
+        bar.setToolTip(str(task.metrics.get("progress_detail", "")) if real else "")
         bar.setStyleSheet(self._progress_style_for_value(value))
 
     def _set_action_button(self, task: TaskItem, label: str, enabled: bool, tone: str) -> None:
@@ -2501,17 +3822,138 @@ class MainWindow(QMainWindow):
         self._sync_empty_state_overlay()
 
     def _estimate_task_duration(self, task: TaskItem) -> float:
-        try:
-            size_bytes = task.input_path.stat().st_size
-        except Exception:
-            size_bytes = 5 * 1024 * 1024
-        size_mb = max(1.0, size_bytes / (1024 * 1024))
+        record = self._duration_record(task)
+        predicted = self.duration_model.predict(record)
+        if predicted is not None:
+            return predicted
+        return self._size_based_duration(record["input_bytes"])
+
+    @staticmethod
+    def _size_based_duration(input_bytes: int) -> float:
+        size_mb = max(1.0, (input_bytes or 5 * 1024 * 1024) / (1024 * 1024))
         return max(8.0, min(240.0, size_mb * 2.2))
 
+    def _queue_duration(self, task: TaskItem) -> None:
+        record = self._duration_record(task)
+        self.queued_durations.set(task.task_id, record, self._size_based_duration(record["input_bytes"]))
+
+    def _duration_record(self, task: TaskItem) -> dict:
+        metrics = task.metrics
+        input_bytes = metrics.get("input_size") or task.input_size
+        backend = metrics.get("ocr_backend")
+        return {
+            "pages": metrics.get("page_count") or task.page_count,
+            "input_bytes": int(input_bytes or 0),
+            "force_ocr": self.current_force_ocr,
+            "use_gpu": backend == "gpu" if backend else self.current_use_gpu,
+            "optimize_for_size": self.current_optimize_for_size,
+            # Queued files have no allocation yet; assume an even split of the CPU budget.
+            "ocr_jobs": metrics.get("ocr_jobs") or max(1, cpu_budget() // max(1, self.current_worker_limit)),
+        }
+
+    def _duration_history_path(self) -> Path:
+        return self._state_file_path().parent / "duration_history.jsonl"
+
+    def _load_duration_history(self) -> None:
+        path = self._duration_history_path()
+        if not path.exists() or not self._is_secure_state_dir(path.parent) or not self._is_secure_state_file(path):
+            return
+        for record in load_history(path):
+            self.duration_model.observe(record, float(record.get("duration_seconds") or 0.0))
+
+    def _learn_task_duration(self, task: TaskItem) -> None:
+        record = self._duration_record(task)
+        record["duration_seconds"] = float(task.metrics.get("duration_seconds", 0.0) or 0.0)
+        if record["duration_seconds"] <= 0 or not record["pages"]:
+            return
+        predicted = self.duration_model.observe(record, record["duration_seconds"])
+        path = self._duration_history_path()
+        if self._ensure_secure_state_dir(path.parent) and self._is_secure_state_file(path):
+            append_history(path, history_record(record))
+        if predicted is None:
+            return
+        task.metrics["predicted_seconds"] = predicted
+        error = (predicted - record["duration_seconds"]) / record["duration_seconds"]
+        self._append_log(
+            f"Duration model: predicted {predicted:.1f}s, took {record['duration_seconds']:.1f}s "
+            f"({error:+.0%}) for {task.input_path.name}.",
+            task.task_id,
+        )
+
+    def _duration_error_text(self) -> str:
+        summary = self.duration_model.error_summary()
+        if summary is None:
+            return "n/a"
+        return (
+            f"MAE {summary['mae_seconds']:.1f}s / {summary['mape']:.0%} "
+            f"(bias {summary['bias_seconds']:+.1f}s, last {int(summary['files'])} files)"
+        )
+
+    def _batch_remaining_seconds(self) -> float | None:
+        # Runs every tick: touches running files only; queued files are a running total.
+        now = time.monotonic()
+        running: list[float] = []
+        for task in self._running_task_list():
+            if task.run_token != self.active_run_token:
+                continue
+            if "eta_seconds" in task.metrics:
+                left = float(task.metrics["eta_seconds"]) - (now - float(task.metrics.get("eta_at", now)))
+            else:
+                elapsed = now - float(task.metrics.get("started_monotonic", now))
+                left = float(task.metrics.get("estimated_seconds", 30.0)) - elapsed
+            running.append(max(0.0, left))
+        queued = self.queued_durations.total()
+        if not running and not queued:
+            return None
+        # Queued files share the worker slots; the longest running file bounds the end.
+        return max(max(running, default=0.0), (sum(running) + queued) / max(1, self.current_worker_limit))
+
+    def _apply_progress_event(self, task: TaskItem, event: dict, shard: ShardItem | None = None) -> None:
+        # Real OCRmyPDF stage/page progress from the progress plugin. The OCRmyPDF
+        # run spans 5-95% of a file's bar; shards split 0-90% by page count.
+        fraction = run_fraction(event.get("stage"), float(event.get("done") or 0.0), event.get("total"))
+        if fraction is None:
+            return
+        now = time.monotonic()
+        task.metrics["real_progress"] = True
+        if shard is None:
+            run_started = float(task.metrics.setdefault("progress_run_started", now))
+            value = 5 + int(fraction * 90)
+            remaining = estimate_remaining_seconds(event, now - run_started)
+        else:
+            run_started = float(task.metrics.setdefault(f"progress_run_started:{shard.shard_id}", now))
+            fractions = task.metrics.setdefault("shard_fractions", {})
+            fractions[shard.shard_id] = fraction
+            estimates = task.metrics.setdefault("shard_remaining", {})
+            estimates[shard.shard_id] = estimate_remaining_seconds(event, now - run_started)
+            total_pages = sum(max(1, item.end_page - item.start_page) for item in task.shards)
+            done_pages = sum(
+                max(1, item.end_page - item.start_page)
+                * (1.0 if item.status == "Done" else fractions.get(item.shard_id, 0.0))
+                for item in task.shards
+            )
+            value = int(done_pages / max(1, total_pages) * 90)
+            # Running page ranges finish in parallel; queued ranges have no estimate yet.
+            running = [estimates.get(item.shard_id) for item in task.shards if item.status == "Running"]
+            remaining = max(running) if running and None not in running else None
+        detail = str(event.get("desc") or event.get("stage") or "")
+        if event.get("unit") == "page" and event.get("total"):
+            detail += f" {int(float(event.get('done') or 0))}/{int(float(event['total']))} pages"
+        if shard is not None:
+            detail = f"Pages {shard.start_page + 1}-{shard.end_page}: {detail}"
+        if remaining is not None:
+            task.metrics["eta_seconds"] = remaining
+            task.metrics["eta_at"] = now
+            detail += f", about {_format_eta(remaining)} left"
+        task.metrics["progress_detail"] = detail
+        if event.get("step_seconds") is not None and event.get("unit") == "page":
+            task.metrics["last_page_seconds"] = float(event["step_seconds"])
+        self._set_progress(task, max(task.progress_value, min(95, value)))
+
     def _advance_running_progress(self) -> None:
         now = time.monotonic()
-        for task in self.tasks.values():
-            if task.status != "Running":
+        for task in self._running_task_list():
+            if task.metrics.get("real_progress"):
                 continue
             started = float(task.metrics.get("started_monotonic", now))
             estimated = float(task.metrics.get("estimated_seconds", 30.0))
@@ -2535,30 +3977,17 @@ class MainWindow(QMainWindow):
             self.batch_percent_label.setText("0%")
             self.batch_meta_label.setText("0/0 files")
             return
-        active_tasks = [
-            task for task in self.tasks.values() if task.run_token == self.active_run_token
-        ]
-        if not active_tasks:
-            pct = int((self.finished_batch / self.total_batch) * 100)
-        else:
-            total = 0
-            for task in active_tasks:
-                if task.status in {
-                    "Done",
-                    "Done (tmp fallback)",
-                    "Skipped (Already Searchable)",
-                    "Skipped (Already Searchable) (tmp fallback)",
-                    "Failed",
-                    "Canceled",
-                }:
-                    total += 100
-                else:
-                    total += max(0, min(100, task.progress_value))
-            pct = int(total / len(active_tasks))
+        # Finished files count 100 each; the rest are summed as their bars move, so a tick is O(1).
+        total = self.finished_batch * 100 + max(0, self.batch_progress_sum)
+        pct = max(0, min(100, int(total / self.total_batch)))
         self.batch_progress.setValue(pct)
         self.batch_progress.setStyleSheet(self._progress_style_for_value(pct))
         self.batch_percent_label.setText(f"{pct}%")
-        self.batch_meta_label.setText(f"{self.finished_batch}/{self.total_batch} files")
+        meta = f"{self.finished_batch}/{self.total_batch} files"
+        remaining = self._batch_remaining_seconds() if self.batch_running else None
+        if remaining is not None:
+            meta += f", about {_format_eta(remaining)} left"
+        self.batch_meta_label.setText(meta)
 
     def _update_metrics_labels(self) -> None:
         try:
@@ -2570,26 +3999,20 @@ class MainWindow(QMainWindow):
         sys_cpu = psutil.cpu_percent(None)
         sys_ram = psutil.virtual_memory().percent
 
-        running = 0
-        queued = 0
-        for task in self.tasks.values():
-            if task.status == "Running":
-                running += 1
-                if task.ps_proc is not None:
-                    try:
-                        cpu_now = task.ps_proc.cpu_percent(None)
-                        rss_now = task.ps_proc.memory_info().rss
-                        task.peak_cpu_percent = max(task.peak_cpu_percent, cpu_now)
-                        task.peak_rss_bytes = max(task.peak_rss_bytes, rss_now)
-                    except Exception:
-                        pass
-            elif task.status == "Queued":
-                queued += 1
+        running_tasks = self._running_task_list()
+        running = len(running_tasks)
+        queued = self.status_counts["Queued"]
+        for task in running_tasks:
+            self._sample_task_tree(task)
+        self.tree_sampler.retain([task.task_id for task in running_tasks])
 
         now = time.monotonic()
         if now - self._last_gpu_metrics_probe >= GPU_METRICS_REFRESH_SECONDS:
             self._cached_gpu_metrics = self._query_nvidia_gpu_metrics()
             self._last_gpu_metrics_probe = now
+            if self.batch_running and self.current_use_gpu:
+                self.gpu_dispatcher.observe(self._gpu_tasks_running())
+        self.admission.observe()
         gpu_stats = self._cached_gpu_metrics
         self.metrics_cpu_value.setText(f"{sys_cpu:.0f}%")
         self.metrics_cpu_sub.setText(f"App {app_cpu:.1f}%")
@@ -2597,7 +4020,7 @@ class MainWindow(QMainWindow):
         self.metrics_ram_sub.setText(f"System {sys_ram:.1f}%")
         if gpu_stats is None:
             self.metrics_gpu_value.setText("N/A")
-            self.metrics_gpu_sub.setText("No NVIDIA metrics")
+            self.metrics_gpu_sub.setText(f"No NVIDIA metrics{self._gpu_breaker_note()}")
             self.metrics_vram_value.setText("N/A")
             self.metrics_vram_sub.setText("Waiting for GPU")
         else:
@@ -2605,19 +4028,61 @@ class MainWindow(QMainWindow):
             used_bytes = used_mib * 1024 * 1024
             total_bytes = total_mib * 1024 * 1024
             self.metrics_gpu_value.setText(f"{gpu_util:.0f}%")
-            self.metrics_gpu_sub.setText(f"{gpu_count} GPU{'s' if gpu_count != 1 else ''}")
+            self.metrics_gpu_sub.setText(f"{gpu_count} GPU{'s' if gpu_count != 1 else ''}{self._gpu_breaker_note()}")
             self.metrics_vram_value.setText(_format_bytes(used_bytes))
             self.metrics_vram_sub.setText(f"of {_format_bytes(total_bytes)}")
         cpu_state, cpu_color = self._resource_health(sys_cpu, 60.0, 85.0)
         ram_state, ram_color = self._resource_health(sys_ram, 70.0, 88.0)
         self.metrics_workers.setText(f"Workers: {running} active / {queued} queued")
-        self.metrics_health.setText(f"Health: CPU {cpu_state} | RAM {ram_state}")
+        holding = self.batch_running and bool(self._admission_hold_logged)
+        self.metrics_health.setText(
+            f"Health: CPU {cpu_state} | RAM {ram_state}{' | Holding new files' if holding else ''}"
+        )
+        self.metrics_health.setToolTip(self.admission.describe())
         health_color = ram_color if ram_state == "Red" else cpu_color
         if cpu_state == "Yellow" or ram_state == "Yellow":
             health_color = "#e8ba2f"
         if cpu_state == "Green" and ram_state == "Green":
             health_color = "#2fd06f"
+        if holding and health_color == "#2fd06f":
+            health_color = "#e8ba2f"
         self.metrics_health.setStyleSheet(f"color: {health_color};")
+        if holding and self._count_pending():
+            # Pressure can ease without a task finishing; retry the held starts.
+            self._schedule_tasks()
+
+    @staticmethod
+    def _task_root_pids(task: TaskItem) -> list[int]:
+        # Page-range workers while shards run; the task's own worker for probes, whole files, and merges.
+        pids = [shard.worker_pid for shard in task.shards if shard.status == "Running" and shard.worker_pid]
+        if task.worker_pid:
+            pids.append(task.worker_pid)
+        return pids
+
+    def _sample_task_tree(self, task: TaskItem) -> None:
+        # Subprocess mode runs OCRmyPDF, Tesseract, and Ghostscript as descendants of the worker.
+        try:
+            sample = self.tree_sampler.sample(task.task_id, self._task_root_pids(task))
+        except Exception:
+            sample = None
+        if sample is None:
+            return
+        task.peak_cpu_percent = max(task.peak_cpu_percent, sample.cpu_percent)
+        task.peak_rss_bytes = max(task.peak_rss_bytes, sample.rss_bytes)
+        task.peak_processes = max(task.peak_processes, sample.processes)
+        task.io_read_bytes += sample.read_bytes
+        task.io_write_bytes += sample.write_bytes
+        task.peak_read_rate = max(task.peak_read_rate, sample.read_rate)
+        task.peak_write_rate = max(task.peak_write_rate, sample.write_rate)
+
+    def _tree_summary_lines(self, task: TaskItem) -> list[str]:
+        return [
+            f"Peak child CPU% observed by GUI: {task.peak_cpu_percent:.2f}",
+            f"Peak child RSS observed by GUI: {task.peak_rss_bytes} bytes ({_format_bytes(task.peak_rss_bytes)})",
+            f"Peak processes in task tree: {task.peak_processes}",
+            f"Task tree I/O: {_format_bytes(task.io_read_bytes)} read / {_format_bytes(task.io_write_bytes)} written "
+            f"(peak {_format_bytes(int(task.peak_read_rate))}/s read, {_format_bytes(int(task.peak_write_rate))}/s write)",
+        ]
 
     def _append_metrics_to_log(self, task: TaskItem) -> None:
         if not task.log_file:
@@ -2628,21 +4093,81 @@ class MainWindow(QMainWindow):
         lines = [
             "",
             "=== GUI Summary ===",
-            f"Peak child CPU% observed by GUI: {task.peak_cpu_percent:.2f}",
-            f"Peak child RSS observed by GUI: {task.peak_rss_bytes} bytes ({_format_bytes(task.peak_rss_bytes)})",
+            *self._tree_summary_lines(task),
             f"Duration (reported): {metrics.get('duration_seconds', 0.0):.2f} seconds",
             f"Input size: {metrics.get('input_size', 0)} bytes ({_format_bytes(int(metrics.get('input_size', 0)))})",
             f"Output size: {metrics.get('output_size', 0)} bytes ({_format_bytes(int(metrics.get('output_size', 0)))})",
             f"Output/Input ratio: {float(metrics.get('size_ratio', 0.0)):.4f}",
             f"CPU user delta: {float(metrics.get('cpu_user_delta', 0.0)):.4f}",
             f"CPU system delta: {float(metrics.get('cpu_system_delta', 0.0)):.4f}",
+            f"Output install: {float(metrics.get('install_seconds', 0.0)):.3f} seconds "
+            f"({metrics.get('install_strategy') or 'n/a'}, durability {metrics.get('durability', self.current_durability)})",
         ]
+        if isinstance(metrics.get("phase_seconds"), dict):
+            lines.append(f"Phase timings: {_format_phases(metrics['phase_seconds'])}")
+        if metrics.get("log_lines_held_back"):
+            lines.append(
+                f"Log lines kept out of the live view: {int(metrics['log_lines_held_back'])} "
+                f"(below {self.gui_log_level} or over the rate cap; all are above)"
+            )
+        usage = metrics.get("child_rusage")
+        if isinstance(usage, dict) and usage:
+            max_rss = int(usage.get("max_rss", 0) or 0)
+            lines.extend(
+                [
+                    f"OCR child CPU user/system: {float(usage.get('cpu_user', 0.0)):.2f}s / "
+                    f"{float(usage.get('cpu_system', 0.0)):.2f}s ({usage.get('source', 'n/a')})",
+                    f"OCR child peak RSS: {f'{max_rss} bytes ({_format_bytes(max_rss)})' if max_rss else 'n/a'}",
+                    f"OCR child block I/O: {int(usage.get('block_in', 0))} in / {int(usage.get('block_out', 0))} out",
+                    f"OCR child context switches: {int(usage.get('ctx_voluntary', 0))} voluntary / "
+                    f"{int(usage.get('ctx_involuntary', 0))} involuntary",
+                ]
+            )
         try:
             with task.log_file.open("a", encoding="utf-8") as handle:
                 handle.write("\n".join(lines) + "\n")
         except Exception:
             pass
 
+    def _export_task_metrics(self, task: TaskItem) -> None:
+        # One JSON line per finished file beside the batch's per-file logs.
+        if self.batch_log_dir is None:
+            return
+        record = {
+            "task_id": task.task_id,
+            "input": str(task.input_path),
+            "output": str(task.output_path),
+            "status": task.status,
+            "gui_sampled": {
+                "peak_cpu_percent": task.peak_cpu_percent,
+                "peak_rss_bytes": task.peak_rss_bytes,
+                "peak_processes": task.peak_processes,
+                "io_read_bytes": task.io_read_bytes,
+                "io_write_bytes": task.io_write_bytes,
+                "peak_read_bytes_per_second": task.peak_read_rate,
+                "peak_write_bytes_per_second": task.peak_write_rate,
+            },
+            "metrics": task.metrics,
+        }
+        try:
+            self.batch_log_dir.mkdir(parents=True, exist_ok=True)
+            with (self.batch_log_dir / TASK_METRICS_EXPORT_NAME).open("a", encoding="utf-8") as handle:
+                handle.write(json.dumps(record, default=str, separators=(",", ":")) + "\n")
+        except Exception:
+            pass
+
+    @staticmethod
+    def _merge_child_rusage(task: TaskItem, usage: dict) -> None:
+        # Page ranges add up, except peak RSS, which is the largest range's.
+        merged = task.metrics.setdefault("child_rusage", {})
+        for key, value in usage.items():
+            if key == "max_rss":
+                merged[key] = max(int(merged.get(key, 0)), int(value))
+            elif isinstance(value, (int, float)):
+                merged[key] = merged.get(key, 0) + value
+            else:
+                merged[key] = value
+
     def _append_cancel_to_log(self, task: TaskItem) -> None:
         if not task.log_file:
             return
@@ -2650,10 +4175,7 @@ class MainWindow(QMainWindow):
             task.log_file.parent.mkdir(parents=True, exist_ok=True)
             with task.log_file.open("a", encoding="utf-8") as handle:
                 handle.write("\n=== GUI Summary ===\nCanceled by user.\n")
-                handle.write(f"Peak child CPU% observed by GUI: {task.peak_cpu_percent:.2f}\n")
-                handle.write(
-                    f"Peak child RSS observed by GUI: {task.peak_rss_bytes} bytes ({_format_bytes(task.peak_rss_bytes)})\n"
-                )
+                handle.write("\n".join(self._tree_summary_lines(task)) + "\n")
         except Exception:
             pass
 
@@ -2751,6 +4273,7 @@ class MainWindow(QMainWindow):
             "ocr_mode": self.ocr_mode.currentData() if hasattr(self, "ocr_mode") else "smart",
             "use_gpu_acceleration": self.gpu_checkbox.isChecked() if hasattr(self, "gpu_checkbox") else False,
             "optimize_for_size": self.optimize_size_checkbox.isChecked() if hasattr(self, "optimize_size_checkbox") else False,
+            "shard_large_pdfs": self.shard_checkbox.isChecked() if hasattr(self, "shard_checkbox") else False,
             "parallel_mode": self.parallel_mode.currentData() if hasattr(self, "parallel_mode") else "auto",
             "custom_workers": self.custom_workers.value() if hasattr(self, "custom_workers") else DEFAULT_WORKERS,
             "priority_mode": self.priority_combo.currentData() if hasattr(self, "priority_combo") else "normal",
@@ -2833,6 +4356,7 @@ class MainWindow(QMainWindow):
         self._set_combo_data(self.ocr_mode, str(data.get("ocr_mode", self.ocr_mode.currentData())))
         self.gpu_checkbox.setChecked(bool(data.get("use_gpu_acceleration", self.gpu_checkbox.isChecked())))
         self.optimize_size_checkbox.setChecked(bool(data.get("optimize_for_size", self.optimize_size_checkbox.isChecked())))
+        self.shard_checkbox.setChecked(bool(data.get("shard_large_pdfs", self.shard_checkbox.isChecked())))
         self._set_combo_data(self.parallel_mode, str(data.get("parallel_mode", self.parallel_mode.currentData())))
         try:
             restored_workers = int(data.get("custom_workers", self.custom_workers.value()))
@@ -2907,6 +4431,13 @@ class MainWindow(QMainWindow):
         )
 
     def closeEvent(self, event) -> None:  # noqa: N802
+        if self.close_requested:
+            # Second pass, after (or instead of) waiting for background teardown.
+            if self._teardown_pending():
+                event.ignore()
+                return
+            super().closeEvent(event)
+            return
         running = [task for task in self.tasks.values() if task.status == "Running"]
         queued_paths_override: list[str] | None = None
         if running:
@@ -2923,30 +4454,65 @@ class MainWindow(QMainWindow):
             else:
                 self._append_log("Discarded unfinished queue on exit.")
             self.cancel_all()
+        self.close_requested = True
+        # Idle workers get the exit message; stragglers are stopped off the GUI thread.
+        try:
+            shutdown = self.worker_pool.shutdown(wait=False)
+        except Exception:
+            shutdown = None
+        self._track_worker_stop(self._allocate_stop_token(), shutdown)
+        self._stop_gpu_service()
+        self.text_probe_executor.shutdown(wait=False, cancel_futures=True)
         self.settings.setValue("last_dir", self.last_dir)
         self.settings.setValue("theme", self.theme)
         self.settings.setValue("parallel_mode", self.parallel_mode.currentData())
         self.settings.setValue("custom_workers", self.custom_workers.value())
         self.settings.setValue("ocr_mode", self.ocr_mode.currentData())
         self.settings.setValue("use_gpu_acceleration", self.gpu_checkbox.isChecked())
+        self.settings.setValue("gpu_service_enabled", self.gpu_service_checkbox.isChecked())
         self.settings.setValue("optimize_for_size", self.optimize_size_checkbox.isChecked())
+        self.settings.setValue("execution_mode", self.execution_mode_combo.currentData())
+        self.settings.setValue("durability", self.durability_combo.currentData())
+        self.settings.setValue("memory_limit_mb", self.memory_limit_combo.currentData())
+        self.settings.setValue("admission_rss_per_input_mb", self.admission.rss_per_input_mb / (1024 * 1024))
+        self.settings.setValue("shard_large_pdfs", self.shard_checkbox.isChecked())
+        self.settings.setValue("result_cache_enabled", self.result_cache_checkbox.isChecked())
+        self.settings.setValue("ram_staging", self.ram_staging_checkbox.isChecked())
+        self.settings.setValue("searchable_action", self.searchable_action_combo.currentData())
         self.settings.setValue("priority_mode", self.priority_combo.currentData())
         self.settings.setValue("path_display_mode", self.path_display_combo.currentData())
         self.settings.setValue("show_stats", self.show_stats_toggle.isChecked())
         self.settings.setValue("file_manager_choice", self.file_manager_choice)
         self.settings.setValue("file_manager_custom_cmd", self.file_manager_custom_cmd)
         self._save_queue_state(queued_paths_override=queued_paths_override)
+        if self._teardown_pending():
+            event.ignore()
+            centre = self.centralWidget()
+            if centre is not None:
+                centre.setEnabled(False)
+            self.menuBar().setEnabled(False)
+            self._update_teardown_indicator()
+            # A deferred durability flush is waited for here too, instead of joined on the GUI thread.
+            self._append_log("Waiting for workers to stop, temp files to go, and outputs to flush before exit.")
+            QTimer.singleShot(int(CLOSE_TEARDOWN_TIMEOUT_SECONDS * 1000), self._force_deferred_close)
+            return
         super().closeEvent(event)
 
     def _append_log(self, message: str, task_id: str | None = None) -> None:
-        if not message:
-            return
-        level = self._extract_log_level(message)
-        self.log_entries.append((task_id, level, message))
-        if len(self.log_entries) > 20000:
-            self.log_entries = self.log_entries[-20000:]
-        if self._log_entry_visible(task_id, level):
-            self.log_view.appendPlainText(message)
+        self._append_log_lines([message], task_id)
+
+    def _append_log_lines(self, messages: list[str], task_id: str | None = None) -> None:
+        visible: list[str] = []
+        for message in messages:
+            if not message:
+                continue
+            level = self._extract_log_level(message)
+            self.log_entries.append((task_id, level, message))
+            if self._log_entry_visible(task_id, level):
+                visible.append(message)
+        if visible:
+            # One append and one scroll per worker batch.
+            self.log_view.appendPlainText("\n".join(visible))
             scroll = self.log_view.verticalScrollBar()
             scroll.setValue(scroll.maximum())
 
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable
+
+import psutil
+
+# Spawned pool workers import this module, never the GUI. Keep imports limited to
+# the job runner, config, pdf_pages (lazy pikepdf), process_tree, and psutil so
+# children do not load PySide6.
+from .job_runner import run_task
+from .process_tree import start_process_group
+
+
+class ConnectionQueue:
+    """Queue-like adapter so job runners can stream events over a pool pipe."""
+
+    def __init__(self, conn: Any) -> None:
+        self.conn = conn
+        self._lock = threading.Lock()
+
+    def put(self, payload: dict[str, Any], block: bool = True, timeout: float | None = None) -> None:
+        with self._lock:
+            self.conn.send(payload)
+
+    def put_nowait(self, payload: dict[str, Any]) -> None:
+        self.put(payload)
+
+
+def worker_bootstrap_report(proc: psutil.Process | None = None) -> dict[str, Any]:
+    proc = proc or psutil.Process(os.getpid())
+    try:
+        rss = proc.memory_info().rss
+    except Exception:
+        rss = 0
+    top_level = sorted({name.split(".", 1)[0] for name in list(sys.modules) if not name.startswith("_")})
+    return {
+        "rss": rss,
+        "module_count": len(sys.modules),
+        "top_level_modules": top_level,
+        "qt_loaded": any(name == "PySide6" or name.startswith("PySide6.") for name in list(sys.modules)),
+        "process_uptime_seconds": max(0.0, time.time() - proc.create_time()),
+    }
+
+
+def worker_main(conn: Any, job: Callable[[dict[str, Any], Any], None] | None = None) -> None:
+    job = job or run_task
+    # Lead a process group so a cancel can signal this worker's OCR subprocesses too.
+    process_group = start_process_group()
+    events = ConnectionQueue(conn)
+    pid = os.getpid()
+    proc = psutil.Process(pid)
+    tasks_completed = 0
+    ready = {"type": "worker_ready", "worker_pid": pid, "process_group": process_group}
+    ready.update(worker_bootstrap_report(proc))
+    events.put(ready)
+    while True:
+        try:
+            config = conn.recv()
+        except (EOFError, OSError):
+            break
+        if config is None:
+            break
+        try:
+            job(config, events)
+        except Exception:  # noqa: BLE001
+            # The pool reports a task that ends without a "done" event as failed.
+            pass
+        tasks_completed += 1
+        try:
+            rss = proc.memory_info().rss
+        except Exception:
+            rss = 0
+        try:
+            events.put(
+                {
+                    "type": "worker_idle",
+                    "worker_pid": pid,
+                    "tasks_completed": tasks_completed,
+                    "rss": rss,
+                }
+            )
+        except (EOFError, OSError):
+            break
+    try:
+        conn.close()
+    except OSError:
+        pass
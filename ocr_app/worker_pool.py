@@ -0,0 +1,425 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from multiprocessing.connection import wait as wait_for_ready
+from typing import Any, Callable, Iterable
+
+from .config import WORKER_MAX_RSS_BYTES, WORKER_MAX_TASKS
+from .process_tree import kill_process_group, terminate_process_trees
+from .worker import worker_main
+
+
+@dataclass
+class PoolWorker:
+    process: Any
+    conn: Any
+    pid: int
+    task_id: str | None = None
+    busy: bool = False
+    tasks_completed: int = 0
+    last_rss: int = 0
+    spawned_at: float = 0.0
+    process_group: bool | None = None
+
+
+class WorkerPool:
+    """Long-lived OCR worker processes that run one task config at a time.
+
+    Each worker owns a duplex pipe: the pool sends task configs down it and the
+    worker streams the usual log/status/done events back. Killing one worker on
+    cancel therefore cannot wedge a lock shared with the others. Workers lead
+    their own process group, so a cancel also stops the OCRmyPDF, Tesseract, and
+    Ghostscript processes a task started.
+
+    With ``set_notifier`` a reader thread blocks on every worker pipe and
+    process sentinel at once and calls the notifier as soon as one is ready,
+    so the caller can ``poll`` on demand instead of on a timer. The thread
+    never reads messages itself: pool state stays on the caller's thread, and
+    the notifier fires at most once per ``poll``.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        max_tasks_per_worker: int = WORKER_MAX_TASKS,
+        max_rss_bytes: int = WORKER_MAX_RSS_BYTES,
+        job: Callable[[dict[str, Any], Any], None] | None = None,
+        context: Any | None = None,
+    ) -> None:
+        self.size = max(1, int(size))
+        self.max_tasks_per_worker = max(1, int(max_tasks_per_worker))
+        self.max_rss_bytes = max(0, int(max_rss_bytes))
+        self._job = job
+        self._ctx = context or mp
+        self._workers: dict[int, PoolWorker] = {}
+        self._task_workers: dict[str, int] = {}
+        self._retired: list[Any] = []
+        self._spawned = 0
+        self._notify: Callable[[], None] | None = None
+        self._notifier: threading.Thread | None = None
+        self._armed = threading.Event()
+        self._armed.set()
+        self._closing = False
+        self._waitables: tuple[Any, ...] = ()
+        self._wake_reader, self._wake_writer = mp.Pipe(duplex=False)
+
+    def set_notifier(self, notify: Callable[[], None]) -> None:
+        """Call ``notify`` from a reader thread whenever a worker sends an event or exits.
+
+        The thread starts with the first worker. ``notify`` runs off the
+        caller's thread, so it should only schedule a ``poll`` (a queued Qt
+        signal, for example).
+        """
+        self._notify = notify
+        if self._workers:
+            self._start_notifier()
+
+    def resize(self, size: int) -> None:
+        self.size = max(1, int(size))
+        surplus = len(self._workers) - self.size
+        for worker in list(self._workers.values()):
+            if surplus <= 0:
+                break
+            if not worker.busy:
+                self._retire(worker)
+                surplus -= 1
+
+    def busy_count(self) -> int:
+        return sum(1 for worker in self._workers.values() if worker.busy)
+
+    def can_accept(self) -> bool:
+        if any(not worker.busy for worker in self._workers.values()):
+            return True
+        return len(self._workers) < self.size
+
+    def worker_pid(self, task_id: str) -> int | None:
+        return self._task_workers.get(task_id)
+
+    def submit(self, config: dict[str, Any]) -> int:
+        task_id = str(config.get("task_id", ""))
+        worker = next((item for item in self._workers.values() if not item.busy), None)
+        if worker is None:
+            if len(self._workers) >= self.size:
+                raise RuntimeError("Worker pool has no free worker.")
+            worker = self._spawn()
+        try:
+            worker.conn.send(config)
+        except (OSError, ValueError):
+            self._discard(worker)
+            worker = self._spawn()
+            worker.conn.send(config)
+        worker.busy = True
+        worker.task_id = task_id
+        self._task_workers[task_id] = worker.pid
+        return worker.pid
+
+    def cancel(self, task_id: str) -> dict[str, Any] | None:
+        """Stop the worker running ``task_id`` and its process tree; None if it was not running."""
+        worker = self._detach(task_id)
+        if worker is None:
+            return None
+        return self._stop_workers([worker])[0]
+
+    def cancel_many(self, task_ids: Iterable[str]) -> Future:
+        """Stop the workers running ``task_ids`` together, off the calling thread.
+
+        The workers leave the pool at once, so their slots are free for new
+        submits; the future resolves to ``{task_id: stop report}`` when every
+        process tree is gone.
+        """
+        detached: list[tuple[str, PoolWorker]] = []
+        for task_id in task_ids:
+            worker = self._detach(task_id)
+            if worker is not None:
+                detached.append((task_id, worker))
+        future: Future = Future()
+        if not detached:
+            future.set_result({})
+            return future
+
+        def stop() -> None:
+            try:
+                reports = self._stop_workers([worker for _task_id, worker in detached])
+                future.set_result({task_id: report for (task_id, _worker), report in zip(detached, reports)})
+            except Exception as exc:  # noqa: BLE001
+                future.set_exception(exc)
+
+        threading.Thread(target=stop, name="ocr-worker-stop", daemon=True).start()
+        return future
+
+    def poll(self) -> list[dict[str, Any]]:
+        try:
+            return self._drain()
+        finally:
+            # Pipes are level-triggered: anything that arrived during the drain wakes the reader at once.
+            self._armed.set()
+
+    def _drain(self) -> list[dict[str, Any]]:
+        events: list[dict[str, Any]] = []
+        for worker in list(self._workers.values()):
+            lost = False
+            while True:
+                try:
+                    if not worker.conn.poll():
+                        break
+                    message = worker.conn.recv()
+                except (EOFError, OSError):
+                    lost = True
+                    break
+                event = self._handle_message(worker, message)
+                if event is not None:
+                    events.append(event)
+            if worker.pid not in self._workers:
+                continue
+            if lost or not worker.process.is_alive():
+                events.extend(self._handle_lost_worker(worker))
+        self._reap_retired()
+        return events
+
+    def shutdown(self, timeout: float = 2.0, wait: bool = True) -> Future:
+        """Ask every worker to exit, then stop any still running after ``timeout``.
+
+        Workers share one deadline and stragglers are terminated together. With
+        ``wait=False`` the waiting happens on a background thread and the
+        returned future resolves when all workers are gone.
+        """
+        workers = list(self._workers.values())
+        self._workers.clear()
+        self._task_workers.clear()
+        self._closing = True
+        self._armed.set()
+        self._refresh_waitables()
+        if self._notifier is None:
+            self._wake_reader.close()
+        self._wake_writer.close()
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        retired, self._retired = self._retired, []
+        future: Future = Future()
+
+        def finish() -> None:
+            try:
+                deadline = time.monotonic() + timeout
+                for process in [*(worker.process for worker in workers), *retired]:
+                    try:
+                        process.join(timeout=max(0.0, deadline - time.monotonic()))
+                    except Exception:
+                        pass
+                stuck = [worker for worker in workers if worker.process.is_alive()]
+                if stuck:
+                    self._stop_workers(stuck)
+                for worker in workers:
+                    self._close_conn(worker)
+            finally:
+                future.set_result(None)
+
+        if wait:
+            finish()
+        else:
+            threading.Thread(target=finish, name="ocr-pool-shutdown", daemon=True).start()
+        return future
+
+    def _spawn(self) -> PoolWorker:
+        parent_conn, child_conn = self._ctx.Pipe(duplex=True)
+        self._spawned += 1
+        spawned_at = time.monotonic()
+        process = self._ctx.Process(
+            target=worker_main,
+            args=(child_conn, self._job),
+            name=f"ocr-worker-{self._spawned}",
+        )
+        process.start()
+        child_conn.close()
+        worker = PoolWorker(
+            process=process,
+            conn=parent_conn,
+            pid=int(process.pid),
+            spawned_at=spawned_at,
+        )
+        self._workers[worker.pid] = worker
+        self._refresh_waitables()
+        if self._notify is not None:
+            self._start_notifier()
+        return worker
+
+    def _start_notifier(self) -> None:
+        if self._notifier is None and not self._closing:
+            self._notifier = threading.Thread(target=self._notify_loop, name="ocr-pool-reader", daemon=True)
+            self._notifier.start()
+
+    def _refresh_waitables(self) -> None:
+        # Called on the caller's thread after every change to the worker set; the
+        # reader picks up the new tuple when the wake-up pipe interrupts its wait.
+        waitables: list[Any] = []
+        for worker in self._workers.values():
+            waitables.append(worker.conn)
+            sentinel = getattr(worker.process, "sentinel", None)
+            if sentinel is not None:
+                waitables.append(sentinel)
+        self._waitables = tuple(waitables)
+        if self._notifier is not None:
+            try:
+                self._wake_writer.send_bytes(b"")
+            except (OSError, ValueError):
+                pass
+
+    def _notify_loop(self) -> None:
+        while not self._closing:
+            self._armed.wait()
+            if self._closing:
+                break
+            try:
+                ready = wait_for_ready([self._wake_reader, *self._waitables])
+            except (OSError, ValueError):
+                # A pipe closed between the snapshot and the wait; the next snapshot drops it.
+                time.sleep(0.01)
+                continue
+            if self._wake_reader in ready:
+                ready.remove(self._wake_reader)
+                try:
+                    while self._wake_reader.poll():
+                        self._wake_reader.recv_bytes()
+                except (EOFError, OSError):
+                    # shutdown() closed the writer.
+                    break
+            if ready and not self._closing:
+                # Stay quiet until poll() drains the ready pipes and re-arms.
+                self._armed.clear()
+                try:
+                    self._notify()
+                except Exception:
+                    pass
+        try:
+            self._wake_reader.close()
+        except OSError:
+            pass
+
+    def _handle_message(self, worker: PoolWorker, message: Any) -> dict[str, Any] | None:
+        if not isinstance(message, dict):
+            return None
+        event_type = message.get("type")
+        if event_type == "worker_ready":
+            worker.process_group = bool(message.get("process_group"))
+            event = dict(message)
+            event["startup_seconds"] = max(0.0, time.monotonic() - worker.spawned_at)
+            return event
+        if event_type == "worker_idle":
+            orphan_task = worker.task_id
+            worker.busy = False
+            worker.task_id = None
+            worker.tasks_completed = int(message.get("tasks_completed", worker.tasks_completed + 1))
+            worker.last_rss = int(message.get("rss", 0))
+            if orphan_task is not None:
+                self._task_workers.pop(orphan_task, None)
+            if self._should_recycle(worker):
+                self._retire(worker)
+            if orphan_task is not None:
+                return {
+                    "type": "worker_lost",
+                    "task_id": orphan_task,
+                    "exitcode": None,
+                    "error": "Worker finished without reporting a result.",
+                }
+            return None
+        if event_type == "done":
+            task_id = str(message.get("task_id", ""))
+            if worker.task_id == task_id:
+                worker.task_id = None
+            self._task_workers.pop(task_id, None)
+        return message
+
+    def _should_recycle(self, worker: PoolWorker) -> bool:
+        if worker.tasks_completed >= self.max_tasks_per_worker:
+            return True
+        if self.max_rss_bytes and worker.last_rss > self.max_rss_bytes:
+            return True
+        return len(self._workers) > self.size
+
+    def _detach(self, task_id: str) -> PoolWorker | None:
+        pid = self._task_workers.pop(task_id, None)
+        if pid is None:
+            return None
+        worker = self._workers.pop(pid, None)
+        self._refresh_waitables()
+        return worker
+
+    def _stop_workers(self, workers: list[PoolWorker]) -> list[dict[str, Any]]:
+        # Signals every tree before waiting on any, so N workers cost one grace period.
+        reports: list[dict[str, Any]] = [
+            {"method": "none", "processes": 0, "killed": 0, "survivors": 0} for _worker in workers
+        ]
+        try:
+            alive = [index for index, worker in enumerate(workers) if worker.process.is_alive()]
+            stopped = terminate_process_trees([(workers[index].pid, workers[index].process_group) for index in alive])
+            for index, report in zip(alive, stopped):
+                reports[index] = report
+        except Exception:
+            pass
+        for worker in workers:
+            try:
+                worker.process.join(timeout=1.0)
+                if worker.process.is_alive():
+                    worker.process.kill()
+                    worker.process.join(timeout=1.0)
+            except Exception:
+                pass
+            self._close_conn(worker)
+        return reports
+
+    def _handle_lost_worker(self, worker: PoolWorker) -> list[dict[str, Any]]:
+        self._discard(worker)
+        if worker.process_group:
+            # A crashed worker leaves its OCR subprocesses behind in its group.
+            kill_process_group(worker.pid)
+        if worker.task_id is None:
+            return []
+        self._task_workers.pop(worker.task_id, None)
+        return [
+            {
+                "type": "worker_lost",
+                "task_id": worker.task_id,
+                "exitcode": worker.process.exitcode,
+                "error": "Worker process exited unexpectedly.",
+            }
+        ]
+
+    def _retire(self, worker: PoolWorker) -> None:
+        self._workers.pop(worker.pid, None)
+        self._refresh_waitables()
+        try:
+            worker.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self._close_conn(worker)
+        self._retired.append(worker.process)
+
+    def _discard(self, worker: PoolWorker) -> None:
+        self._workers.pop(worker.pid, None)
+        self._refresh_waitables()
+        self._close_conn(worker)
+        self._retired.append(worker.process)
+
+    def _reap_retired(self) -> None:
+        still_running: list[Any] = []
+        for process in self._retired:
+            try:
+                process.join(timeout=0)
+                if process.is_alive():
+                    still_running.append(process)
+            except Exception:
+                continue
+        self._retired = still_running
+
+    @staticmethod
+    def _close_conn(worker: PoolWorker) -> None:
+        try:
+            worker.conn.close()
+        except OSError:
+            pass
@@ -13,6 +13,19 @@ MODULES = [
     Path("ocr_app/config.py"),
     Path("ocr_app/models.py"),
     Path("ocr_app/job_runner.py"),
+    Path("ocr_app/worker.py"),
+    Path("ocr_app/worker_pool.py"),
+    Path("ocr_app/process_tree.py"),
+    Path("ocr_app/pdf_pages.py"),
+    Path("ocr_app/scheduling.py"),
+    Path("ocr_app/result_cache.py"),
+    Path("ocr_app/file_copy.py"),
+    Path("ocr_app/gpu_service.py"),
+    Path("ocr_app/gpu_ocr_plugin.py"),
+    Path("ocr_app/duration_model.py"),
+    Path("ocr_app/tree_sampler.py"),
+    Path("ocr_app/ocr_progress.py"),
+    Path("ocr_app/progress_plugin.py"),
     Path("ocr_app/themes.py"),
     Path("ocr_app/ui.py"),
 ]
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Measure spawn start-up time, RSS, and imports of an OCRestra pool worker.
+
+Set OCRESTRA_MEASURE_WITH_UI=1 to emulate the old bootstrap, where the spawned
+child re-imported the GUI module, and compare the numbers.
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+if os.environ.get("OCRESTRA_MEASURE_WITH_UI") == "1":
+    import ocr_app.ui  # noqa: F401  (re-imported by every spawned child)
+
+from ocr_app.worker_pool import WorkerPool  # noqa: E402
+
+
+def _format_mib(value: int) -> str:
+    return f"{value / (1024 * 1024):.1f} MiB"
+
+
+def measure(samples: int) -> list[dict]:
+    reports: list[dict] = []
+    for _ in range(samples):
+        pool = WorkerPool(size=1)
+        started = time.monotonic()
+        pool._spawn()
+        ready: dict | None = None
+        while ready is None and time.monotonic() - started < 60.0:
+            for event in pool.poll():
+                if event.get("type") == "worker_ready":
+                    ready = event
+            time.sleep(0.005)
+        pool.shutdown()
+        if ready is None:
+            raise SystemExit("Worker did not report ready within 60 seconds.")
+        reports.append(ready)
+    return reports
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=3, help="number of workers to spawn")
+    parser.add_argument("--modules", action="store_true", help="list top-level modules imported by the worker")
+    args = parser.parse_args()
+
+    mp.set_start_method("spawn")
+    reports = measure(max(1, args.samples))
+    for index, report in enumerate(reports, start=1):
+        print(
+            f"worker {index}: ready in {report['startup_seconds'] * 1000:.0f} ms, "
+            f"RSS {_format_mib(int(report['rss']))}, {report['module_count']} modules, "
+            f"PySide6 loaded: {'yes' if report['qt_loaded'] else 'no'}"
+        )
+    average_ms = sum(float(report["startup_seconds"]) for report in reports) / len(reports) * 1000
+    average_rss = sum(int(report["rss"]) for report in reports) // len(reports)
+    print(f"average: {average_ms:.0f} ms, RSS {_format_mib(average_rss)}")
+    if args.modules:
+        print("top-level modules:")
+        for name in reports[-1]["top_level_modules"]:
+            print(f"  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
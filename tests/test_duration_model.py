@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from ocr_app.duration_model import (
+    DurationModel,
+    QueuedDurations,
+    append_history,
+    duration_features,
+    history_record,
+    load_history,
+)
+
+
+def _record(pages: int, jobs: int = 1, force: bool = False, gpu: bool = False, mib: float = 1.0) -> dict:
+    return {
+        "pages": pages,
+        "input_bytes": int(mib * 1024 * 1024),
+        "force_ocr": force,
+        "use_gpu": gpu,
+        "optimize_for_size": False,
+        "ocr_jobs": jobs,
+    }
+
+
+def _true_seconds(record: dict) -> float:
+    # 3 s/page on CPU, 1 s/page on GPU, spread over --jobs, plus 4 s fixed cost.
+    per_page = 1.0 if record["use_gpu"] else 3.0
+    return 4.0 + per_page * record["pages"] / record["ocr_jobs"]
+
+
+class DurationModelTests(unittest.TestCase):
+    def test_no_prediction_until_enough_files_are_seen(self) -> None:
+        model = DurationModel(min_samples=3)
+
+        self.assertIsNone(model.observe(_record(10), 34.0))
+        self.assertIsNone(model.observe(_record(20), 64.0))
+        self.assertIsNone(model.predict(_record(30)))
+        self.assertIsNone(model.error_summary())
+
+    def test_fits_pages_jobs_and_backend(self) -> None:
+        model = DurationModel(min_samples=3, forgetting=1.0, ridge=1e-6)
+        for pages, jobs, gpu in [(10, 1, False), (40, 2, False), (80, 4, False), (20, 1, True), (60, 2, True), (5, 1, False)]:
+            record = _record(pages, jobs, gpu=gpu, mib=pages * 0.5)
+            model.observe(record, _true_seconds(record))
+
+        unseen = _record(100, 4, gpu=True, mib=50)
+        self.assertAlmostEqual(model.predict(unseen), _true_seconds(unseen), places=3)
+
+    def test_prediction_error_is_measured_before_each_update(self) -> None:
+        model = DurationModel(min_samples=1, forgetting=1.0, ridge=1e-6)
+        model.observe(_record(10), 34.0)
+
+        predicted = model.observe(_record(10), 44.0)
+        summary = model.error_summary()
+
+        self.assertIsNotNone(predicted)
+        self.assertEqual(summary["files"], 1)
+        self.assertAlmostEqual(summary["mae_seconds"], abs(predicted - 44.0))
+        self.assertAlmostEqual(summary["bias_seconds"], predicted - 44.0)
+
+    def test_forgetting_tracks_a_slower_machine(self) -> None:
+        model = DurationModel(min_samples=1, forgetting=0.8, ridge=1e-6)
+        for pages in (10, 20, 30, 40) * 3:
+            model.observe(_record(pages), 3.0 * pages)
+        for pages in (10, 20, 30, 40) * 6:
+            model.observe(_record(pages), 6.0 * pages)
+
+        self.assertAlmostEqual(model.predict(_record(50)), 300.0, delta=15.0)
+
+    def test_records_without_pages_are_ignored(self) -> None:
+        model = DurationModel(min_samples=1)
+
+        self.assertIsNone(duration_features({"pages": None}))
+        self.assertIsNone(model.observe({"pages": 0, "ocr_jobs": 1}, 10.0))
+        self.assertEqual(model.samples, 0)
+
+    def test_files_without_pages_are_priced_by_size(self) -> None:
+        model = DurationModel(min_samples=3, forgetting=1.0, ridge=1e-6)
+        for pages in (10, 20, 40, 80):
+            record = _record(pages, mib=pages * 0.5)
+            model.observe(record, _true_seconds(record))
+
+        unknown = _record(60, mib=30)
+        unknown["pages"] = None
+
+        self.assertAlmostEqual(model.pages_per_mib, 2.0)
+        self.assertAlmostEqual(model.predict(unknown), _true_seconds(_record(60, mib=30)), places=3)
+
+
+class QueuedDurationsTests(unittest.TestCase):
+    def test_total_tracks_refits_without_revisiting_files(self) -> None:
+        model = DurationModel(min_samples=2, forgetting=1.0, ridge=1e-6)
+        queued = QueuedDurations(model)
+        paged = _record(30, jobs=2, mib=15)
+        sized = _record(0, mib=10)
+        sized["pages"] = None
+        queued.set("paged", paged, 50.0)
+        queued.set("sized", sized, 20.0)
+        queued.set("gone", _record(5), 7.0)
+        queued.discard("gone")
+
+        self.assertEqual(len(queued), 2)
+        self.assertAlmostEqual(queued.total(), 70.0)
+
+        for pages in (10, 20, 40):
+            record = _record(pages, mib=pages * 0.5)
+            model.observe(record, _true_seconds(record))
+            if not model.ready:
+                self.assertAlmostEqual(queued.total(), 70.0)
+                continue
+            self.assertAlmostEqual(queued.total(), model.predict(paged) + model.predict(sized), places=6)
+
+        queued.set("paged", _record(60, jobs=2, mib=15), 50.0)
+        self.assertAlmostEqual(queued.total(), model.predict(_record(60, jobs=2, mib=15)) + model.predict(sized))
+        queued.clear()
+        self.assertEqual(queued.total(), 0.0)
+
+
+class DurationHistoryTests(unittest.TestCase):
+    def test_history_round_trips_skips_bad_lines_and_compacts(self) -> None:
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "duration_history.jsonl"
+            for pages in range(1, 6):
+                record = _record(pages)
+                record["duration_seconds"] = float(pages)
+                self.assertTrue(append_history(path, history_record(record)))
+            with open(path, "a", encoding="utf-8") as handle:
+                handle.write("not json\n")
+
+            records = load_history(path, limit=4)
+            lines = path.read_text(encoding="utf-8").splitlines()
+
+        self.assertEqual([record["pages"] for record in records], [3, 4, 5])
+        self.assertEqual([json.loads(line)["pages"] for line in lines], [3, 4, 5])
+        self.assertEqual(set(records[0]), {"pages", "input_bytes", "force_ocr", "use_gpu", "optimize_for_size", "ocr_jobs", "duration_seconds"})
+
+    def test_missing_history_is_empty(self) -> None:
+        with TemporaryDirectory() as tmp:
+            self.assertEqual(load_history(Path(tmp) / "missing.jsonl"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from ocr_app.file_copy import copy_file, sync_filesystems
+
+
+class CopyFileTests(unittest.TestCase):
+    def test_copy_matches_source_with_private_mode(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            source = root / "source.pdf"
+            source.write_bytes(os.urandom(3 * 1024 * 1024 + 17))
+            dest = root / "dest.pdf"
+
+            strategy = copy_file(source, dest)
+
+            self.assertIn(strategy, {"reflink", "copy_file_range", "copy"})
+            self.assertEqual(dest.read_bytes(), source.read_bytes())
+            if os.name != "nt":
+                self.assertEqual(dest.stat().st_mode & 0o777, 0o600)
+
+    def test_falls_back_to_plain_copy_when_kernel_paths_are_unsupported(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            source = root / "source.pdf"
+            source.write_bytes(b"%PDF-1.4\n" * 1000)
+            dest = root / "dest.pdf"
+
+            with mock.patch("ocr_app.file_copy._try_reflink", return_value=False), mock.patch(
+                "ocr_app.file_copy._try_copy_file_range", return_value=False
+            ):
+                strategy = copy_file(source, dest)
+
+            self.assertEqual(strategy, "copy")
+            self.assertEqual(dest.read_bytes(), source.read_bytes())
+
+    def test_refuses_existing_destination_and_symlinked_source(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            source = root / "source.pdf"
+            source.write_bytes(b"%PDF-1.4\n")
+            dest = root / "dest.pdf"
+            dest.write_bytes(b"existing")
+
+            with self.assertRaises(FileExistsError):
+                copy_file(source, dest)
+
+            link = root / "link.pdf"
+            try:
+                link.symlink_to(source)
+            except OSError as exc:
+                self.skipTest(f"symlink creation unavailable: {exc}")
+            with self.assertRaises(OSError):
+                copy_file(link, root / "other.pdf")
+
+
+class SyncFilesystemsTests(unittest.TestCase):
+    def test_missing_paths_are_ignored(self) -> None:
+        with TemporaryDirectory() as tmp:
+            self.assertEqual(sync_filesystems([Path(tmp) / "missing.pdf"]), ("none", 0))
+
+    def test_files_on_one_filesystem_are_synced_once(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            outputs = []
+            for name in ("a.pdf", "b.pdf"):
+                path = root / name
+                path.write_bytes(b"%PDF-1.4\n")
+                outputs.append(path)
+
+            method, synced = sync_filesystems(outputs)
+
+            self.assertIn(method, {"syncfs", "sync", "fsync"})
+            self.assertEqual(synced, 2 if method == "fsync" else 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
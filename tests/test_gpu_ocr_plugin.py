@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+import types
+import unittest
+from dataclasses import dataclass
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from PIL import Image
+
+from ocr_app.gpu_service import PAGE_LOG_ENV, GpuServiceError, read_page_outcomes
+
+
+@dataclass
+class BoundingBox:
+    left: float
+    top: float
+    right: float
+    bottom: float
+
+
+class OcrElement(types.SimpleNamespace):
+    pass
+
+
+class HocrParser:
+    def __init__(self, path) -> None:
+        self.path = path
+
+    def parse(self) -> OcrElement:
+        return OcrElement(ocr_class="ocr_page", source=self.path, dpi=0.0, page_number=None, children=[])
+
+
+def _stub_ocrmypdf_modules() -> dict[str, types.ModuleType]:
+    # Just enough of OCRmyPDF's plugin API for gpu_ocr_plugin to import without it.
+    ocrmypdf = types.ModuleType("ocrmypdf")
+    ocrmypdf.BoundingBox = BoundingBox
+    ocrmypdf.OcrClass = types.SimpleNamespace(PAGE="ocr_page", LINE="ocr_line", WORD="ocrx_word")
+    ocrmypdf.OcrElement = OcrElement
+    ocrmypdf.OcrEngine = type("OcrEngine", (), {})
+    ocrmypdf.hookimpl = lambda **_kwargs: (lambda func: func)
+    exec_module = types.ModuleType("ocrmypdf._exec")
+    exec_module.tesseract = mock.Mock(name="tesseract")
+    builtin_plugins = types.ModuleType("ocrmypdf.builtin_plugins")
+    tesseract_ocr = types.ModuleType("ocrmypdf.builtin_plugins.tesseract_ocr")
+    tesseract_ocr.TesseractOcrEngine = mock.Mock(name="TesseractOcrEngine")
+    hocrtransform = types.ModuleType("ocrmypdf.hocrtransform")
+    hocrtransform.HocrParser = HocrParser
+    return {
+        "ocrmypdf": ocrmypdf,
+        "ocrmypdf._exec": exec_module,
+        "ocrmypdf.builtin_plugins": builtin_plugins,
+        "ocrmypdf.builtin_plugins.tesseract_ocr": tesseract_ocr,
+        "ocrmypdf.hocrtransform": hocrtransform,
+    }
+
+
+class GpuOcrPluginTests(unittest.TestCase):
+    def setUp(self) -> None:
+        modules = mock.patch.dict(sys.modules, _stub_ocrmypdf_modules())
+        modules.start()
+        self.addCleanup(modules.stop)
+        sys.modules.pop("ocr_app.gpu_ocr_plugin", None)
+        self.plugin = importlib.import_module("ocr_app.gpu_ocr_plugin")
+        self.tesseract_engine = self.plugin.TesseractOcrEngine
+
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.image = self.root / "000002_ocr.png"
+        Image.new("L", (400, 300), 255).save(self.image, dpi=(300, 300))
+        self.page_log = self.root / "gpu_pages.jsonl"
+        env = mock.patch.dict(os.environ, {PAGE_LOG_ENV: str(self.page_log)})
+        env.start()
+        self.addCleanup(env.stop)
+        self.options = types.SimpleNamespace(languages=["eng", "deu"])
+
+    def _serve(self, **recognize) -> mock.Mock:
+        client = mock.Mock()
+        client.recognize.configure_mock(**recognize)
+        patcher = mock.patch.object(self.plugin, "_service_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return client
+
+    def test_words_become_lines_with_boxes_and_angles(self) -> None:
+        words = [
+            {"text": "flat", "quad": [10, 20, 110, 20, 110, 40, 10, 40]},
+            {"text": "tilted", "quad": [0, 100, 100, 0, 110, 10, 10, 110]},
+            {"text": "skewed", "quad": [0, 50, 100, 49.5, 100, 60, 0, 60]},
+            {"text": "", "quad": [0, 0, 1, 0, 1, 1, 0, 1]},
+            {"text": "short", "quad": [0, 0, 1, 0]},
+        ]
+
+        tree = self.plugin._words_to_ocr_tree(self.image, words, 2)
+
+        self.assertEqual(tree.ocr_class, "ocr_page")
+        self.assertEqual(tree.bbox, BoundingBox(left=0, top=0, right=400, bottom=300))
+        self.assertAlmostEqual(tree.dpi, 300.0, delta=0.01)
+        self.assertEqual(tree.page_number, 2)
+        self.assertEqual([line.children[0].text for line in tree.children], ["flat", "tilted", "skewed"])
+        flat, tilted, skewed = tree.children
+        self.assertEqual(flat.bbox, BoundingBox(left=10, top=20, right=110, bottom=40))
+        self.assertEqual(flat.children[0].bbox, flat.bbox)
+        self.assertEqual(flat.textangle, 0.0)
+        self.assertEqual(tilted.bbox, BoundingBox(left=0, top=0, right=110, bottom=110))
+        self.assertAlmostEqual(tilted.textangle, 45.0)
+        # Sub-threshold skew is left to OCRmyPDF's deskew instead of rotating the line.
+        self.assertEqual(skewed.textangle, 0.0)
+
+    def test_gpu_page_returns_tree_and_records_gpu_outcome(self) -> None:
+        client = self._serve(
+            return_value=[
+                {"text": "hello", "quad": [10, 20, 110, 20, 110, 40, 10, 40]},
+                {"text": "world", "quad": [120, 20, 220, 20, 220, 40, 120, 40]},
+            ]
+        )
+
+        tree, text = self.plugin.GpuServiceEngine.generate_ocr(self.image, self.options, page_number=2)
+
+        client.recognize.assert_called_once_with(self.image.read_bytes(), ["eng", "deu"])
+        self.assertEqual(text, "hello world")
+        self.assertEqual(len(tree.children), 2)
+        self.assertEqual(tree.page_number, 2)
+        self.tesseract_engine.generate_hocr.assert_not_called()
+        (entry,) = read_page_outcomes(self.page_log)
+        self.assertEqual(entry["page"], 2)
+        self.assertEqual(entry["backend"], "gpu")
+        self.assertGreaterEqual(entry["seconds"], 0.0)
+        self.assertNotIn("error", entry)
+
+    def test_service_error_recognizes_the_page_with_tesseract(self) -> None:
+        self._serve(side_effect=GpuServiceError("CUDA out of memory"))
+
+        def write_hocr(_image, output_hocr, output_text, _options):
+            Path(output_hocr).write_text("<html></html>", encoding="utf-8")
+            Path(output_text).write_text("cpu text", encoding="utf-8")
+
+        self.tesseract_engine.generate_hocr.side_effect = write_hocr
+
+        tree, text = self.plugin.GpuServiceEngine.generate_ocr(self.image, self.options, page_number=4)
+
+        self.tesseract_engine.generate_hocr.assert_called_once_with(
+            self.image,
+            self.root / "000002_ocr_cpu_fallback.hocr",
+            self.root / "000002_ocr_cpu_fallback.txt",
+            self.options,
+        )
+        self.assertEqual(text, "cpu text")
+        self.assertEqual(tree.source, self.root / "000002_ocr_cpu_fallback.hocr")
+        self.assertEqual(tree.page_number, 4)
+        self.assertAlmostEqual(tree.dpi, 300.0, delta=0.01)
+        (entry,) = read_page_outcomes(self.page_log)
+        self.assertEqual(entry["page"], 4)
+        self.assertEqual(entry["backend"], "cpu")
+        self.assertEqual(entry["error"], "CUDA out of memory")
+        self.assertGreaterEqual(entry["seconds"], 0.0)
+        self.assertGreaterEqual(entry["gpu_seconds"], 0.0)
+
+    def test_hocr_and_pdf_output_is_delegated_to_tesseract(self) -> None:
+        engine = self.plugin.GpuServiceEngine
+        hocr, pdf, text = self.root / "page.hocr", self.root / "page.pdf", self.root / "page.txt"
+
+        engine.generate_hocr(self.image, hocr, text, self.options)
+        engine.generate_pdf(self.image, pdf, text, self.options)
+
+        self.tesseract_engine.generate_hocr.assert_called_once_with(self.image, hocr, text, self.options)
+        self.tesseract_engine.generate_pdf.assert_called_once_with(self.image, pdf, text, self.options)
+
+
+if __name__ == "__main__":
+    unittest.main()
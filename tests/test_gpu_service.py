@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from ocr_app.gpu_service import (
+    PAGE_LOG_ENV,
+    SERVICE_ADDRESS_ENV,
+    SERVICE_AUTHKEY_ENV,
+    FakeOcrModel,
+    GpuOcrService,
+    GpuServiceClient,
+    GpuServiceError,
+    GpuServiceHandle,
+    read_page_outcomes,
+    record_page_outcome,
+    service_from_env,
+)
+
+
+class BrokenModel(FakeOcrModel):
+    def load(self) -> None:
+        raise RuntimeError("CUDA driver not found")
+
+
+def _wait_for_state(client: GpuServiceClient, state: str) -> dict:
+    deadline = time.monotonic() + 5.0
+    info = client.ping()
+    while info["state"] != state and time.monotonic() < deadline:
+        time.sleep(0.01)
+        info = client.ping()
+    return info
+
+
+class GpuOcrServiceTests(unittest.TestCase):
+    def _start(self, model: FakeOcrModel) -> GpuOcrService:
+        service = GpuOcrService(model, b"k" * 32)
+        service.start()
+        self.addCleanup(service.close)
+        return service
+
+    def test_model_is_loaded_once_and_serves_pages_from_several_clients(self) -> None:
+        model = FakeOcrModel()
+        service = self._start(model)
+
+        with GpuServiceClient(service.address, b"k" * 32) as first, GpuServiceClient(service.address, b"k" * 32) as second:
+            self.assertEqual(_wait_for_state(first, "ready")["model"], "fake")
+            first_words = first.recognize(b"png-1", ["eng"])
+            second_words = second.recognize(b"png-2", ["eng"])
+            info = second.ping()
+
+        self.assertEqual(model.loads, 1)
+        self.assertEqual([word["text"] for word in first_words + second_words], ["page1", "page2"])
+        self.assertEqual(len(first_words[0]["quad"]), 8)
+        self.assertEqual(info["pages_served"], 2)
+
+    def test_model_errors_are_reported_to_the_client(self) -> None:
+        service = self._start(FakeOcrModel())
+
+        with GpuServiceClient(service.address, b"k" * 32) as client:
+            with self.assertRaisesRegex(GpuServiceError, "Empty page image"):
+                client.recognize(b"", ["eng"])
+            # The connection stays usable after a rejected page.
+            self.assertEqual(len(client.recognize(b"png", ["eng"])), 1)
+
+    def test_failed_model_load_is_visible_in_ping_and_rejects_pages(self) -> None:
+        service = self._start(BrokenModel())
+
+        with GpuServiceClient(service.address, b"k" * 32) as client:
+            info = _wait_for_state(client, "failed")
+            with self.assertRaisesRegex(GpuServiceError, "failed to load"):
+                client.recognize(b"png", ["eng"])
+
+        self.assertIn("CUDA driver not found", info["error"])
+
+    def test_wrong_authkey_is_refused(self) -> None:
+        service = self._start(FakeOcrModel())
+
+        with GpuServiceClient(service.address, b"x" * 32, timeout=2.0) as client:
+            with self.assertRaises(GpuServiceError):
+                client.ping()
+
+    def test_service_from_env_requires_address_and_hex_key(self) -> None:
+        self.assertIsNone(service_from_env({}))
+        self.assertIsNone(service_from_env({SERVICE_ADDRESS_ENV: "/tmp/sock", SERVICE_AUTHKEY_ENV: "not-hex"}))
+        self.assertEqual(
+            service_from_env({SERVICE_ADDRESS_ENV: "/tmp/sock", SERVICE_AUTHKEY_ENV: "6b6b"}),
+            ("/tmp/sock", b"kk"),
+        )
+
+    def test_page_outcomes_round_trip_and_skip_bad_lines(self) -> None:
+        with TemporaryDirectory() as tmp:
+            page_log = Path(tmp) / "gpu_pages.jsonl"
+            environ = {PAGE_LOG_ENV: str(page_log)}
+            record_page_outcome({"page": 0, "backend": "gpu"}, environ)
+            with open(page_log, "a", encoding="utf-8") as handle:
+                handle.write("not json\n")
+            record_page_outcome({"page": 1, "backend": "cpu"}, environ)
+            record_page_outcome({"page": 2, "backend": "gpu"}, {})
+
+            outcomes = read_page_outcomes(page_log)
+
+        self.assertEqual([entry["backend"] for entry in outcomes], ["gpu", "cpu"])
+        self.assertEqual(read_page_outcomes(Path(tmp) / "missing.jsonl"), [])
+
+
+class GpuServiceHandleTests(unittest.TestCase):
+    def test_handle_runs_fake_service_process_until_stopped(self) -> None:
+        handle = GpuServiceHandle("fake", context=mp.get_context("spawn"))
+        handle.start()
+        self.addCleanup(handle.stop)
+
+        self.assertTrue(handle.is_alive())
+        self.assertEqual(handle.ping()["model"], "fake")
+        env = handle.env()
+        self.assertEqual(service_from_env(env), (str(handle.address), handle.authkey))
+
+        handle.stop()
+        self.assertFalse(handle.is_alive())
+        self.assertEqual(handle.env(), {})
+
+    def test_unknown_model_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            GpuServiceHandle("tesseract")
+
+
+if __name__ == "__main__":
+    unittest.main()
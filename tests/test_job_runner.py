@@ -1,11 +1,56 @@
 from __future__ import annotations
 
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import types
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from unittest import mock
 
-from ocr_app.job_runner import OCRCommandError, _install_output_pdf, _run_ocr_command
+from ocr_app.gpu_service import (
+    PAGE_LOG_ENV,
+    SERVICE_ADDRESS_ENV,
+    FakeOcrModel,
+    GpuOcrService,
+    record_page_outcome,
+)
+from ocr_app.job_runner import (
+    GPU_SERVICE_PLUGIN,
+    PROGRESS_PLUGIN_PATH,
+    OCRCommandError,
+    QueueLogHandler,
+    _build_ocr_command,
+    _build_ocr_kwargs,
+    _cleanup_temp_dir,
+    _configure_logging,
+    _gpu_service_session,
+    _install_output_pdf,
+    _is_input_file_error,
+    _is_memory_limit_failure,
+    _ocr_engine_used,
+    _open_result_cache,
+    _planned_ocr_engine,
+    _run_ocr,
+    _run_ocr_api,
+    _run_ocr_command,
+    _run_with_gpu_retry,
+    _safe_temp_dir,
+    _scratch_tempdir,
+    _summarize_gpu_pages,
+    _task_memory_limit,
+    run_merge_job,
+    run_ocr_job,
+    run_ocr_shard,
+    run_passthrough_job,
+)
+from ocr_app.ocr_progress import emit_progress
+from ocr_app.pdf_pages import count_pages, pikepdf_available
 
 
 class InstallOutputPdfTests(unittest.TestCase):
@@ -27,6 +72,40 @@ class InstallOutputPdfTests(unittest.TestCase):
             self.assertTrue(output_pdf.exists())
             self.assertEqual(output_pdf.read_bytes(), b"%PDF-1.4\nstaged\n")
 
+    def test_install_output_pdf_keeps_source_unless_rename_is_allowed(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            staged_output = root / "staged.pdf"
+            staged_output.write_bytes(b"%PDF-1.4\nstaged\n")
+            output_dir = root / "OCR_Output"
+
+            strategy, _seconds = _install_output_pdf(staged_output, output_dir / "copied.pdf")
+            self.assertNotEqual(strategy, "rename")
+            self.assertTrue(staged_output.exists())
+
+            strategy, _seconds = _install_output_pdf(staged_output, output_dir / "moved.pdf", allow_rename=True)
+            self.assertEqual(strategy, "rename")
+            self.assertFalse(staged_output.exists())
+            self.assertEqual((output_dir / "moved.pdf").read_bytes(), b"%PDF-1.4\nstaged\n")
+            self.assertEqual(list(output_dir.glob(".ocrestra-*")), [])
+
+    def test_install_output_pdf_only_fsyncs_in_fsync_durability_mode(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            staged_output = root / "staged.pdf"
+            staged_output.write_bytes(b"%PDF-1.4\nstaged\n")
+            output_dir = root / "OCR_Output"
+
+            with mock.patch("ocr_app.job_runner.os.fsync") as fsync:
+                _install_output_pdf(staged_output, output_dir / "deferred.pdf", durability="deferred")
+                _install_output_pdf(staged_output, output_dir / "none.pdf", durability="none")
+                fsync.assert_not_called()
+                _strategy, seconds = _install_output_pdf(staged_output, output_dir / "synced.pdf")
+
+            self.assertGreater(fsync.call_count, 0)
+            self.assertGreaterEqual(seconds, 0.0)
+            self.assertEqual((output_dir / "deferred.pdf").read_bytes(), b"%PDF-1.4\nstaged\n")
+
     def test_install_output_pdf_rejects_symlink_destination(self) -> None:
         with TemporaryDirectory() as tmp:
             root = Path(tmp)
@@ -59,6 +138,148 @@ class InstallOutputPdfTests(unittest.TestCase):
                 _install_output_pdf(staged_output, output_pdf)
 
 
+class StagingRootTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        for patcher in (
+            mock.patch("ocr_app.job_runner.TEMP_ROOT", self.root / "disk"),
+            mock.patch("ocr_app.job_runner.RAM_TEMP_ROOT", self.root / "shm"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_temp_dirs_are_accepted_under_either_staging_root(self) -> None:
+        ram_dir = self.root / "shm" / "aaaaaaaa"
+
+        self.assertEqual(_safe_temp_dir(ram_dir, "aaaaaaaa"), ram_dir.resolve())
+        self.assertEqual(_safe_temp_dir(self.root / "elsewhere", "aaaaaaaa"), self.root / "disk" / "aaaaaaaa")
+
+    def test_cleanup_removes_ram_staged_dir_but_not_outside_paths(self) -> None:
+        ram_dir = self.root / "shm" / "aaaaaaaa"
+        ram_dir.mkdir(parents=True)
+        outside = self.root / "keep"
+        outside.mkdir()
+
+        _cleanup_temp_dir(ram_dir)
+        _cleanup_temp_dir(outside)
+
+        self.assertFalse(ram_dir.exists())
+        self.assertTrue(outside.exists())
+
+    def test_scratch_tempdir_redirects_and_restores_tmpdir(self) -> None:
+        scratch = self.root / "shm" / "aaaaaaaa"
+        before = os.environ.get("TMPDIR")
+
+        with _scratch_tempdir(scratch):
+            self.assertEqual(os.environ["TMPDIR"], str(scratch))
+            self.assertEqual(tempfile.gettempdir(), str(scratch))
+
+        self.assertEqual(os.environ.get("TMPDIR"), before)
+        self.assertNotEqual(tempfile.gettempdir(), str(scratch))
+
+
+class GpuServiceSessionTests(unittest.TestCase):
+    def test_gpu_plugin_replaces_easyocr_plugin_and_sandwich_renderer(self) -> None:
+        cmd = _build_ocr_command(
+            "ocrmypdf", Path("in.pdf"), Path("out.pdf"), False, True, False, False, gpu_plugin="/x/gpu_ocr_plugin.py"
+        )
+        kwargs = _build_ocr_kwargs(False, True, False, False, gpu_plugin="/x/gpu_ocr_plugin.py")
+
+        self.assertEqual(cmd[cmd.index("--plugin") + 1], "/x/gpu_ocr_plugin.py")
+        self.assertNotIn("--pdf-renderer", cmd)
+        self.assertEqual(kwargs["plugins"], ["/x/gpu_ocr_plugin.py"])
+        self.assertNotIn("pdf_renderer", kwargs)
+
+    def test_session_exports_service_while_it_answers(self) -> None:
+        service = GpuOcrService(FakeOcrModel(), b"k" * 32)
+        service.start()
+        self.addCleanup(service.close)
+        config = {"gpu_service_address": service.address, "gpu_service_authkey": (b"k" * 32).hex()}
+        logger = mock.Mock()
+
+        with _gpu_service_session(config, True, logger) as plugin:
+            self.assertEqual(plugin, str(GPU_SERVICE_PLUGIN))
+            self.assertEqual(os.environ[SERVICE_ADDRESS_ENV], service.address)
+        with _gpu_service_session(config, False, logger) as cpu_plugin:
+            self.assertEqual(cpu_plugin, "")
+
+        self.assertNotIn(SERVICE_ADDRESS_ENV, os.environ)
+        self.assertTrue(GPU_SERVICE_PLUGIN.is_file())
+
+    def test_session_falls_back_when_service_is_gone(self) -> None:
+        service = GpuOcrService(FakeOcrModel(), b"k" * 32)
+        address = service.address
+        service.close()
+        logger = mock.Mock()
+
+        with _gpu_service_session(
+            {"gpu_service_address": address, "gpu_service_authkey": (b"k" * 32).hex()}, True, logger
+        ) as plugin:
+            self.assertEqual(plugin, "")
+
+        logger.warning.assert_called_once()
+
+    def test_run_ocr_passes_service_plugin_to_ocrmypdf(self) -> None:
+        with TemporaryDirectory() as tmp:
+            with mock.patch("ocr_app.job_runner._run_ocr_command") as run_command:
+                _run_ocr("ocrmypdf", Path("in.pdf"), Path(tmp) / "out.pdf", False, True, False, gpu_plugin="/p.py")
+
+        cmd = run_command.call_args.args[0]
+        self.assertEqual(cmd.count("--plugin"), 1)
+        self.assertEqual(cmd[cmd.index("--plugin") + 1], "/p.py")
+
+    def test_page_level_cpu_fallback_is_logged_without_rerunning_the_file(self) -> None:
+        def plugin_run(*_args):
+            record_page_outcome({"page": 0, "backend": "gpu", "seconds": 0.5})
+            record_page_outcome({"page": 1, "backend": "cpu", "seconds": 2.0, "error": "CUDA out of memory"})
+
+        logger = mock.Mock()
+        with TemporaryDirectory() as tmp:
+            page_log = Path(tmp) / "gpu_pages.jsonl"
+            page_log.write_text('{"page": 9, "backend": "cpu", "seconds": 1.0}\n', encoding="utf-8")
+            with mock.patch.dict(os.environ, {PAGE_LOG_ENV: str(page_log)}):
+                with mock.patch("ocr_app.job_runner._run_ocr", side_effect=plugin_run) as run_ocr:
+                    with mock.patch("ocr_app.job_runner.time.perf_counter", side_effect=[0.0, 10.0]):
+                        gpu_failed = _run_with_gpu_retry(
+                            "ocrmypdf", Path("in.pdf"), Path("out.pdf"), False, True, False, logger, gpu_plugin="/p.py"
+                        )
+
+        run_ocr.assert_called_once()
+        self.assertFalse(gpu_failed)
+        # The stale line from an earlier attempt is dropped before the run.
+        self.assertEqual(logger.warning.call_args.args[1:], (1, 2, 2.0, 10.0))
+
+    def test_all_pages_on_cpu_report_the_whole_rerun_as_avoided(self) -> None:
+        with TemporaryDirectory() as tmp:
+            page_log = Path(tmp) / "gpu_pages.jsonl"
+            with mock.patch.dict(os.environ, {PAGE_LOG_ENV: str(page_log)}):
+                for page in range(3):
+                    record_page_outcome({"page": page, "backend": "cpu", "seconds": 3.0, "gpu_seconds": 0.1})
+            logger = logging.getLogger("test.gpu_pages")
+            with self.assertLogs(logger, level="WARNING") as logs:
+                gpu_failed = _summarize_gpu_pages(page_log, 10.0, logger)
+
+        self.assertTrue(gpu_failed)
+        (message,) = logs.output
+        self.assertIn("on 3 of 3 page(s)", message)
+        self.assertIn("(9.00s of CPU OCR)", message)
+        # The CPU OCR ran in both cases; only subtracting it would claim ~1s saved.
+        self.assertIn("estimated at 10.00s or more", message)
+
+    def test_session_exports_page_log_only_with_the_service(self) -> None:
+        service = GpuOcrService(FakeOcrModel(), b"k" * 32)
+        service.start()
+        self.addCleanup(service.close)
+        config = {"gpu_service_address": service.address, "gpu_service_authkey": (b"k" * 32).hex()}
+
+        with _gpu_service_session(config, True, mock.Mock(), Path("/tmp/task/gpu_pages.jsonl")):
+            self.assertEqual(os.environ[PAGE_LOG_ENV], "/tmp/task/gpu_pages.jsonl")
+
+        self.assertNotIn(PAGE_LOG_ENV, os.environ)
+
+
 class OCRCommandTests(unittest.TestCase):
     def test_run_ocr_command_raises_for_silent_easyocr_cert_failure(self) -> None:
         class FakeProc:
@@ -98,6 +319,20 @@ class OCRCommandTests(unittest.TestCase):
         with mock.patch("ocr_app.job_runner.subprocess.Popen", return_value=FakeProc(lines)):
             _run_ocr_command(["ocrmypdf"])
 
+    def test_run_ocr_command_times_launch_first_output_and_ocr(self) -> None:
+        class FakeProc:
+            stdout = iter(["Start processing\n", "Output file is a PDF\n"])
+
+            def wait(self) -> int:
+                return 0
+
+        timings: dict[str, float] = {}
+        with mock.patch("ocr_app.job_runner.subprocess.Popen", return_value=FakeProc()):
+            _run_ocr_command(["ocrmypdf"], timings=timings)
+
+        self.assertEqual(set(timings), {"launch", "first_output", "ocr"})
+        self.assertTrue(all(seconds >= 0 for seconds in timings.values()))
+
     def test_run_ocr_command_throttles_progress_lines_by_percent_bucket(self) -> None:
         class FakeProc:
             def __init__(self, lines: list[str]) -> None:
@@ -130,6 +365,673 @@ class OCRCommandTests(unittest.TestCase):
             ],
         )
 
+    def test_run_ocr_command_forwards_progress_lines_instead_of_logging_them(self) -> None:
+        class FakeProc:
+            def __init__(self, lines: list[str]) -> None:
+                self.stdout = iter(lines)
+
+            def wait(self) -> int:
+                return 0
+
+        lines = [
+            "Scanning contents\n",
+            'OCRESTRA-PROGRESS {"stage":"ocr","done":1,"total":4,"unit":"page"}\n',
+            "OCRESTRA-PROGRESS not json\n",
+            "Postprocessing...\n",
+        ]
+        events: list[dict] = []
+        fake_logger = mock.Mock()
+        with mock.patch("ocr_app.job_runner.subprocess.Popen", return_value=FakeProc(lines)):
+            with mock.patch("ocr_app.job_runner.logging.getLogger", return_value=fake_logger):
+                _run_ocr_command(["ocrmypdf"], events.append)
+
+        self.assertEqual(events, [{"stage": "ocr", "done": 1, "total": 4, "unit": "page"}])
+        logged_messages = [call.args[1] for call in fake_logger.info.call_args_list]
+        self.assertEqual(logged_messages, ["Scanning contents", "OCRESTRA-PROGRESS not json", "Postprocessing..."])
+
+    def test_progress_plugin_is_loaded_only_when_progress_is_forwarded(self) -> None:
+        with TemporaryDirectory() as tmp:
+            with mock.patch("ocr_app.job_runner._run_ocr_command") as run_command:
+                _run_ocr("ocrmypdf", Path("in.pdf"), Path(tmp) / "out.pdf", False, True, False, gpu_plugin="/p.py")
+                _run_ocr(
+                    "ocrmypdf",
+                    Path("in.pdf"),
+                    Path(tmp) / "out.pdf",
+                    False,
+                    True,
+                    False,
+                    gpu_plugin="/p.py",
+                    progress=lambda _event: None,
+                )
+
+        without, with_progress = (call.args[0] for call in run_command.call_args_list)
+        self.assertNotIn(str(PROGRESS_PLUGIN_PATH), without)
+        self.assertEqual(
+            [with_progress[index + 1] for index, arg in enumerate(with_progress) if arg == "--plugin"],
+            ["/p.py", str(PROGRESS_PLUGIN_PATH)],
+        )
+        kwargs = _build_ocr_kwargs(False, True, False, False, gpu_plugin="/p.py", progress_plugin="/progress.py")
+        self.assertEqual(kwargs["plugins"], ["/p.py", "/progress.py"])
+
+    def test_failed_cpu_retry_after_gpu_failure_is_marked_gpu_failed(self) -> None:
+        failures = [
+            OCRCommandError(1, "RuntimeError: CUDA out of memory"),
+            OCRCommandError(1, "tesseract crashed"),
+        ]
+        with mock.patch("ocr_app.job_runner._run_ocr", side_effect=failures) as run_ocr:
+            with self.assertRaises(OCRCommandError) as ctx:
+                _run_with_gpu_retry(
+                    "ocrmypdf", Path("in.pdf"), Path("out.pdf"), False, True, False, mock.Mock()
+                )
+
+        self.assertEqual(run_ocr.call_count, 2)
+        self.assertTrue(ctx.exception.gpu_failed)
+        self.assertIn("tesseract crashed", ctx.exception.details)
+
+
+# Spawns a grandchild that burns CPU, so only subtree accounting sees the work.
+_BUSY_TREE = (
+    "import subprocess, sys; print('Start processing', flush=True); "
+    "subprocess.run([sys.executable, '-c', 'import time\\nend = time.process_time() + 0.3\\n"
+    "while time.process_time() < end: pass'], check=True)"
+)
+
+
+@unittest.skipUnless(hasattr(os, "wait4"), "wait4 is POSIX-only")
+class ChildRusageTests(unittest.TestCase):
+    def test_run_ocr_command_reports_the_whole_subtree_from_wait4(self) -> None:
+        usage: dict = {}
+
+        _run_ocr_command([sys.executable, "-c", _BUSY_TREE], usage=usage)
+
+        self.assertEqual(usage["source"], "wait4")
+        self.assertGreaterEqual(usage["cpu_user"] + usage["cpu_system"], 0.25)
+        self.assertGreater(usage["max_rss"], 1024 * 1024)
+        self.assertGreater(usage["ctx_voluntary"] + usage["ctx_involuntary"], 0)
+
+    def test_run_ocr_command_keeps_exit_codes_when_reaping_with_wait4(self) -> None:
+        usage: dict = {}
+
+        with self.assertRaises(OCRCommandError) as ctx:
+            _run_ocr_command([sys.executable, "-c", "import sys; print('boom'); sys.exit(3)"], usage=usage)
+
+        self.assertEqual(ctx.exception.exit_code, 3)
+        self.assertIn("cpu_user", usage)
+
+    def test_run_ocr_command_without_a_pid_skips_rusage(self) -> None:
+        class FakeProc:
+            stdout = iter(["Start processing\n"])
+
+            def wait(self) -> int:
+                return 0
+
+        usage: dict = {}
+        with mock.patch("ocr_app.job_runner.subprocess.Popen", return_value=FakeProc()):
+            _run_ocr_command(["ocrmypdf"], usage=usage)
+
+        self.assertEqual(usage, {})
+
+    def test_run_ocr_api_reports_children_reaped_during_the_run(self) -> None:
+        def busy_ocr(*_args, **_kwargs):
+            subprocess.run([sys.executable, "-c", _BUSY_TREE], check=True, stdout=subprocess.DEVNULL)
+            return 0
+
+        module = types.ModuleType("ocrmypdf")
+        module.ocr = busy_ocr  # type: ignore[attr-defined]
+        usage: dict = {}
+        with mock.patch.dict(sys.modules, {"ocrmypdf": module}):
+            _run_ocr_api(Path("in.pdf"), Path("out.pdf"), {}, usage=usage)
+
+        self.assertEqual(usage["source"], "rusage_children")
+        self.assertGreaterEqual(usage["cpu_user"] + usage["cpu_system"], 0.25)
+
+
+class OCRApiModeTests(unittest.TestCase):
+    def _fake_ocrmypdf(self, ocr: mock.Mock) -> mock._patch:
+        module = types.ModuleType("ocrmypdf")
+        module.ocr = ocr  # type: ignore[attr-defined]
+        return mock.patch.dict(sys.modules, {"ocrmypdf": module})
+
+    def test_build_ocr_kwargs_mirrors_command_line_options(self) -> None:
+        cpu = _build_ocr_kwargs(False, use_gpu=False, optimize_for_size=True, include_easyocr_plugin=False)
+        self.assertEqual(cpu["mode"], "skip")
+        self.assertEqual(cpu["ocr_engine"], "tesseract")
+        self.assertEqual((cpu["optimize"], cpu["jpg_quality"], cpu["png_quality"]), (2, 75, 70))
+        self.assertNotIn("plugins", cpu)
+
+        gpu = _build_ocr_kwargs(True, use_gpu=True, optimize_for_size=False, include_easyocr_plugin=True)
+        self.assertEqual(gpu["mode"], "force")
+        self.assertEqual(gpu["pdf_renderer"], "sandwich")
+        self.assertEqual(gpu["plugins"], ["ocrmypdf_easyocr"])
+        self.assertNotIn("optimize", gpu)
+
+    def test_ocr_jobs_are_passed_to_both_runners(self) -> None:
+        cmd = _build_ocr_command(
+            "ocrmypdf", Path("in.pdf"), Path("out.pdf"), False, False, False, False, jobs=4
+        )
+        kwargs = _build_ocr_kwargs(False, False, False, False, jobs=4)
+
+        self.assertEqual(cmd[cmd.index("--jobs") + 1], "4")
+        self.assertEqual(kwargs["jobs"], 4)
+
+    def test_run_ocr_api_classifies_exceptions_with_log_tail(self) -> None:
+        class InputFileError(Exception):
+            exit_code = 2
+
+        def failing_ocr(*_args, **_kwargs):
+            logging.getLogger("ocrmypdf").error("input file is not a valid PDF")
+            raise InputFileError("bad input")
+
+        with self._fake_ocrmypdf(mock.Mock(side_effect=failing_ocr)):
+            with self.assertRaises(OCRCommandError) as ctx:
+                _run_ocr_api(Path("in.pdf"), Path("out.pdf"), {})
+
+        self.assertEqual(ctx.exception.exit_code, 2)
+        self.assertIn("input file is not a valid PDF", ctx.exception.details)
+        self.assertTrue(_is_input_file_error(ctx.exception.details))
+
+    def test_run_ocr_api_routes_in_process_progress_events_to_the_callback(self) -> None:
+        def ocr_with_progress(*_args, **_kwargs):
+            emit_progress({"stage": "ocr", "done": 2, "total": 3})
+            return 0
+
+        events: list[dict] = []
+        with self._fake_ocrmypdf(mock.Mock(side_effect=ocr_with_progress)):
+            _run_ocr_api(Path("in.pdf"), Path("out.pdf"), {}, events.append)
+
+        self.assertEqual(events, [{"stage": "ocr", "done": 2, "total": 3}])
+
+    def test_run_ocr_api_treats_nonzero_exit_code_as_failure(self) -> None:
+        with self._fake_ocrmypdf(mock.Mock(return_value=15)):
+            with self.assertRaises(OCRCommandError) as ctx:
+                _run_ocr_api(Path("in.pdf"), Path("out.pdf"), {})
+
+        self.assertEqual(ctx.exception.exit_code, 15)
+
+    def test_run_ocr_dispatches_to_api_mode(self) -> None:
+        fake_ocr = mock.Mock(return_value=0)
+        with TemporaryDirectory() as tmp:
+            output_pdf = Path(tmp) / "out.pdf"
+            with self._fake_ocrmypdf(fake_ocr):
+                with mock.patch("ocr_app.job_runner.subprocess.Popen") as popen:
+                    _run_ocr("", Path("in.pdf"), output_pdf, False, False, False, "api")
+
+        popen.assert_not_called()
+        fake_ocr.assert_called_once()
+        self.assertEqual(fake_ocr.call_args.kwargs["ocr_engine"], "tesseract")
+
+
+class RecordingQueue:
+    def __init__(self) -> None:
+        self.events: list[dict] = []
+
+    def put(self, payload: dict) -> None:
+        self.events.append(payload)
+
+    def put_nowait(self, payload: dict) -> None:
+        self.put(payload)
+
+    def done(self) -> dict:
+        return next(event for event in self.events if event.get("type") == "done")
+
+
+@unittest.skipUnless(pikepdf_available(), "pikepdf is not installed")
+class ShardJobTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.temp_root = self.root / "jobs"
+        self.log_root = self.root / "logs"
+        for patcher in (
+            mock.patch("ocr_app.job_runner.TEMP_ROOT", self.temp_root),
+            mock.patch("ocr_app.job_runner.LOG_ROOT", self.log_root),
+            mock.patch("ocr_app.job_runner._configure_logging"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _write_pdf(self, path: Path, pages: int) -> None:
+        import pikepdf
+
+        pdf = pikepdf.new()
+        for _ in range(pages):
+            pdf.add_blank_page()
+        pdf.save(path)
+
+    def test_shard_ocrs_only_its_page_range_into_the_parent_temp_dir(self) -> None:
+        source = self.root / "scan.pdf"
+        self._write_pdf(source, 10)
+        part_pdf = self.temp_root / "aaaaaaaa" / "part_0001.pdf"
+        queue_obj = RecordingQueue()
+
+        def fake_ocr(_bin, input_pdf, output_pdf, *_args, **_kwargs):
+            shutil.copyfile(input_pdf, output_pdf)
+            return False
+
+        with mock.patch("ocr_app.job_runner.shutil.which", return_value="/usr/bin/ocrmypdf"):
+            with mock.patch("ocr_app.job_runner._run_with_gpu_retry", side_effect=fake_ocr):
+                run_ocr_shard(
+                    {
+                        "task_id": "bbbbbbbb",
+                        "parent_id": "aaaaaaaa",
+                        "input_pdf": str(source),
+                        "part_pdf": str(part_pdf),
+                        "page_range": [4, 7],
+                        "shard_index": 1,
+                        "shard_count": 3,
+                        "log_file": str(self.log_root / "scan.log"),
+                        "temp_dir": str(self.temp_root / "bbbbbbbb"),
+                    },
+                    queue_obj,
+                )
+
+        done = queue_obj.done()
+        self.assertTrue(done["success"], done["error"])
+        self.assertEqual(done["pages"], 3)
+        self.assertEqual(count_pages(part_pdf), 3)
+        self.assertFalse((self.temp_root / "bbbbbbbb").exists())
+
+    def test_merge_installs_combined_output_and_removes_parts(self) -> None:
+        temp_dir = self.temp_root / "aaaaaaaa"
+        temp_dir.mkdir(parents=True)
+        parts = []
+        for index, pages in enumerate((2, 3)):
+            part = temp_dir / f"part_{index:04d}.pdf"
+            self._write_pdf(part, pages)
+            parts.append(str(part))
+        source = self.root / "scan.pdf"
+        self._write_pdf(source, 5)
+        output_pdf = self.root / "OCR_Output" / "scan_ocr.pdf"
+        queue_obj = RecordingQueue()
+
+        run_merge_job(
+            {
+                "task_id": "aaaaaaaa",
+                "input_pdf": str(source),
+                "output_pdf": str(output_pdf),
+                "log_file": str(self.log_root / "scan.log"),
+                "temp_dir": str(temp_dir),
+                "parts": parts,
+            },
+            queue_obj,
+        )
+
+        done = queue_obj.done()
+        self.assertTrue(done["success"], done["error"])
+        self.assertEqual(count_pages(output_pdf), 5)
+        self.assertFalse(temp_dir.exists())
+
+    def test_merge_rejects_parts_outside_task_temp_dir(self) -> None:
+        outside = self.root / "outside.pdf"
+        self._write_pdf(outside, 1)
+        queue_obj = RecordingQueue()
+
+        run_merge_job(
+            {
+                "task_id": "aaaaaaaa",
+                "input_pdf": str(outside),
+                "output_pdf": str(self.root / "OCR_Output" / "out.pdf"),
+                "log_file": str(self.log_root / "scan.log"),
+                "temp_dir": str(self.temp_root / "aaaaaaaa"),
+                "parts": [str(outside)],
+            },
+            queue_obj,
+        )
+
+        self.assertFalse(queue_obj.done()["success"])
+        self.assertFalse((self.root / "OCR_Output" / "out.pdf").exists())
+
+
+class ResultCacheJobTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.input_pdf = self.root / "scan.pdf"
+        self.input_pdf.write_bytes(b"%PDF-1.4\nscan\n")
+        for patcher in (
+            mock.patch("ocr_app.job_runner.TEMP_ROOT", self.root / "jobs"),
+            mock.patch("ocr_app.job_runner.LOG_ROOT", self.root / "logs"),
+            mock.patch("ocr_app.job_runner._configure_logging"),
+            mock.patch("ocr_app.job_runner._ocr_engine_fingerprint", return_value={"ocrmypdf": "test"}),
+            mock.patch("ocr_app.job_runner.shutil.which", return_value="/usr/bin/ocrmypdf"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _config(self, name: str) -> dict:
+        return {
+            "task_id": "aaaaaaaa",
+            "input_pdf": str(self.input_pdf),
+            "output_pdf": str(self.root / "OCR_Output" / name),
+            "log_file": str(self.root / "logs" / "scan.log"),
+            "temp_dir": str(self.root / "jobs" / "aaaaaaaa"),
+            "result_cache": True,
+            "result_cache_dir": str(self.root / "cache"),
+            "result_cache_max_bytes": 1024 * 1024,
+        }
+
+    def test_second_run_installs_cached_output_without_ocr(self) -> None:
+        def fake_ocr(_bin, _input_pdf, output_pdf, *_args, **_kwargs):
+            Path(output_pdf).write_bytes(b"%PDF-1.4\nocr\n")
+            return False
+
+        with mock.patch("ocr_app.job_runner._run_with_gpu_retry", side_effect=fake_ocr) as ocr:
+            first = RecordingQueue()
+            run_ocr_job(self._config("first.pdf"), first)
+            second = RecordingQueue()
+            run_ocr_job(self._config("second.pdf"), second)
+
+        self.assertEqual(ocr.call_count, 1)
+        self.assertEqual(first.done()["cache_status"], "miss")
+        self.assertEqual(second.done()["cache_status"], "hit")
+        self.assertTrue(second.done()["success"])
+        self.assertEqual((self.root / "OCR_Output" / "second.pdf").read_bytes(), b"%PDF-1.4\nocr\n")
+
+    def test_cpu_retry_output_is_not_stored_under_the_gpu_key(self) -> None:
+        def fake_ocr(_bin, _input_pdf, output_pdf, *_args, **_kwargs):
+            Path(output_pdf).write_bytes(b"%PDF-1.4\ntesseract\n")
+            return True
+
+        config = {**self._config("first.pdf"), "use_gpu": True}
+        with mock.patch("ocr_app.job_runner._run_with_gpu_retry", side_effect=fake_ocr) as ocr:
+            first = RecordingQueue()
+            run_ocr_job(config, first)
+            second = RecordingQueue()
+            run_ocr_job({**config, "output_pdf": str(self.root / "OCR_Output" / "second.pdf")}, second)
+
+        self.assertEqual(ocr.call_count, 2)
+        self.assertEqual(first.done()["engine_used"], "tesseract")
+        self.assertEqual(second.done()["cache_status"], "miss")
+
+    def test_cache_key_names_the_engine(self) -> None:
+        logger = mock.Mock()
+        service = {"gpu_service_address": "/tmp/ocr.sock", "gpu_service_authkey": "00"}
+        keys = {
+            _open_result_cache({**self._config("x.pdf"), **extra}, self.input_pdf, False, use_gpu, False, logger)[1]
+            for use_gpu, extra in ((False, {}), (True, {}), (True, service))
+        }
+
+        self.assertEqual(len(keys), 3)
+        self.assertEqual(_planned_ocr_engine(service, True), "gpu-service")
+        self.assertEqual(_planned_ocr_engine(service, False), "tesseract")
+        self.assertEqual(_planned_ocr_engine({}, True), "easyocr")
+
+    def test_engine_used_reports_page_level_fallback_as_mixed(self) -> None:
+        page_log = self.root / "gpu_pages.jsonl"
+        with mock.patch.dict(os.environ, {PAGE_LOG_ENV: str(page_log)}):
+            record_page_outcome({"page": 0, "backend": "gpu", "seconds": 0.5})
+
+        self.assertEqual(_ocr_engine_used(True, "/p.py", False, page_log), "gpu-service")
+        with mock.patch.dict(os.environ, {PAGE_LOG_ENV: str(page_log)}):
+            record_page_outcome({"page": 1, "backend": "cpu", "seconds": 2.0})
+        self.assertEqual(_ocr_engine_used(True, "/p.py", False, page_log), "mixed")
+        self.assertEqual(_ocr_engine_used(True, "", False, None), "easyocr")
+        self.assertEqual(_ocr_engine_used(True, "", True, None), "tesseract")
+        self.assertEqual(_ocr_engine_used(False, "", False, None), "tesseract")
+
+    def test_done_reports_phase_timings_after_temp_cleanup(self) -> None:
+        temp_dir = self.root / "jobs" / "aaaaaaaa"
+
+        def fake_ocr(_bin, _input_pdf, output_pdf, *_args, timings=None, **_kwargs):
+            timings["ocr"] = 0.5
+            Path(output_pdf).write_bytes(b"%PDF-1.4\nocr\n")
+            return False
+
+        class CleanupCheckingQueue(RecordingQueue):
+            def put(self, payload: dict) -> None:
+                if payload.get("type") == "done":
+                    payload["temp_dir_exists"] = temp_dir.exists()
+                super().put(payload)
+
+        queue = CleanupCheckingQueue()
+        with mock.patch("ocr_app.job_runner._run_with_gpu_retry", side_effect=fake_ocr):
+            run_ocr_job(self._config("out.pdf"), queue)
+
+        done = queue.done()
+        self.assertTrue(done["success"])
+        self.assertFalse(done["temp_dir_exists"])
+        self.assertEqual(
+            set(done["phase_seconds"]), {"validate", "logging", "cache", "ocr", "install", "cleanup"}
+        )
+        self.assertEqual(done["phase_seconds"]["ocr"], 0.5)
+
+    def test_passthrough_copies_input_without_ocr(self) -> None:
+        output_pdf = self.root / "OCR_Output" / "scan_ocr.pdf"
+        queue = RecordingQueue()
+
+        with mock.patch("ocr_app.job_runner._run_with_gpu_retry") as ocr:
+            run_passthrough_job(
+                {
+                    "kind": "passthrough",
+                    "task_id": "aaaaaaaa",
+                    "input_pdf": str(self.input_pdf),
+                    "output_pdf": str(output_pdf),
+                    "log_file": str(self.root / "logs" / "scan.log"),
+                    "text_pages": 1,
+                },
+                queue,
+            )
+
+        ocr.assert_not_called()
+        self.assertTrue(queue.done()["success"])
+        self.assertTrue(queue.done()["skipped_searchable"])
+        self.assertEqual(output_pdf.read_bytes(), self.input_pdf.read_bytes())
+
+    def test_option_change_misses_the_cache(self) -> None:
+        def fake_ocr(_bin, _input_pdf, output_pdf, *_args, **_kwargs):
+            Path(output_pdf).write_bytes(b"%PDF-1.4\nocr\n")
+            return False
+
+        with mock.patch("ocr_app.job_runner._run_with_gpu_retry", side_effect=fake_ocr) as ocr:
+            run_ocr_job(self._config("first.pdf"), RecordingQueue())
+            forced = RecordingQueue()
+            run_ocr_job({**self._config("forced.pdf"), "force_ocr": True}, forced)
+
+        self.assertEqual(ocr.call_count, 2)
+        self.assertEqual(forced.done()["cache_status"], "miss")
+
+
+class MemoryLimitTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.input_pdf = self.root / "scan.pdf"
+        self.input_pdf.write_bytes(b"%PDF-1.4\nscan\n")
+        for patcher in (
+            mock.patch("ocr_app.job_runner.TEMP_ROOT", self.root / "jobs"),
+            mock.patch("ocr_app.job_runner._configure_logging"),
+            mock.patch("ocr_app.job_runner.shutil.which", return_value="/usr/bin/ocrmypdf"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_memory_failures_are_classified_apart_from_cuda(self) -> None:
+        self.assertTrue(_is_memory_limit_failure("terminate called after throwing an instance of 'std::bad_alloc'"))
+        self.assertTrue(_is_memory_limit_failure("GPL Ghostscript: Unrecoverable error, exit code 1 VMerror"))
+        self.assertTrue(_is_memory_limit_failure("Traceback ...\nMemoryError"))
+        self.assertFalse(_is_memory_limit_failure("RuntimeError: CUDA out of memory. Tried to allocate 2 GiB"))
+        self.assertFalse(_is_memory_limit_failure("InputFileError: not a PDF"))
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "RLIMIT_AS is enforced on Linux")
+    def test_limit_is_inherited_by_children_and_restored(self) -> None:
+        import resource
+        import subprocess
+
+        before = resource.getrlimit(resource.RLIMIT_AS)
+        limit = 64 * 1024 * 1024 * 1024
+        with _task_memory_limit(limit, False, mock.Mock()) as applied:
+            child = subprocess.run(
+                [sys.executable, "-c", "import resource; print(resource.getrlimit(resource.RLIMIT_AS)[0])"],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+        with _task_memory_limit(limit, True, mock.Mock()) as cuda_applied:
+            pass
+
+        self.assertEqual(applied, limit)
+        self.assertEqual(int(child.stdout), limit)
+        self.assertEqual(cuda_applied, 0)
+        self.assertEqual(resource.getrlimit(resource.RLIMIT_AS), before)
+
+    def test_task_over_the_limit_fails_with_memory_classification(self) -> None:
+        config = {
+            "task_id": "aaaaaaaa",
+            "input_pdf": str(self.input_pdf),
+            "output_pdf": str(self.root / "OCR_Output" / "scan_ocr.pdf"),
+            "log_file": str(self.root / "logs" / "scan.log"),
+            "temp_dir": str(self.root / "jobs" / "aaaaaaaa"),
+            "memory_limit_bytes": 2 * 1024 * 1024 * 1024,
+        }
+        queue = RecordingQueue()
+        failure = OCRCommandError(1, "tesseract: std::bad_alloc")
+
+        with mock.patch("ocr_app.job_runner._task_memory_limit") as memory_limit:
+            memory_limit.return_value.__enter__.return_value = 2 * 1024 * 1024 * 1024
+            with mock.patch("ocr_app.job_runner._run_with_gpu_retry", side_effect=failure):
+                run_ocr_job(config, queue)
+
+        done = queue.done()
+        self.assertFalse(done["success"])
+        self.assertTrue(done["memory_limit_exceeded"])
+        self.assertTrue(done["error"].startswith("Memory limit exceeded (2.0 GiB per process)"))
+        self.assertEqual(memory_limit.call_args.args[0], 2 * 1024 * 1024 * 1024)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class QueueLogHandlerTests(unittest.TestCase):
+    def _handler(self, **kwargs) -> tuple[QueueLogHandler, RecordingQueue, logging.Logger]:
+        queue = RecordingQueue()
+        handler = QueueLogHandler(queue, "aaaaaaaa", flush_seconds=60.0, **kwargs)
+        self.addCleanup(handler.close)
+        logger = logging.getLogger(f"test.queue_log.{self.id()}")
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        return handler, queue, logger
+
+    def test_records_are_batched_and_repeats_are_counted(self) -> None:
+        handler, queue, logger = self._handler()
+
+        logger.info("page 1 done")
+        logger.info("retrying page 2")
+        logger.info("page 1 done")
+        self.assertEqual(queue.events, [])
+        handler.flush()
+
+        self.assertEqual(len(queue.events), 1)
+        batch = queue.events[0]
+        self.assertEqual(batch["type"], "log_batch")
+        self.assertEqual(batch["task_id"], "aaaaaaaa")
+        self.assertEqual([line["message"] for line in batch["lines"]], ["page 1 done", "retrying page 2"])
+        self.assertEqual([line["count"] for line in batch["lines"]], [2, 1])
+        self.assertEqual(batch["held_back"], 0)
+
+    def test_full_batch_is_sent_without_waiting_for_the_flush(self) -> None:
+        _handler, queue, logger = self._handler(max_lines=2)
+
+        logger.info("one")
+        logger.info("two")
+
+        self.assertEqual(len(queue.events), 1)
+        self.assertEqual(len(queue.events[0]["lines"]), 2)
+
+    def test_level_and_rate_cap_hold_lines_back_except_errors_and_tracked_lines(self) -> None:
+        clock = FakeClock()
+        handler, queue, logger = self._handler(gui_level=logging.WARNING, lines_per_second=2, clock=clock)
+
+        logger.info("routine detail")
+        for index in range(4):
+            logger.warning("warning %d", index)
+        logger.info("1 skipping all processing on this page")
+        logger.error("tesseract crashed")
+        handler.flush()
+
+        batch = queue.events[0]
+        self.assertEqual(
+            [line["message"] for line in batch["lines"]],
+            ["warning 0", "warning 1", "1 skipping all processing on this page", "tesseract crashed"],
+        )
+        self.assertEqual(batch["held_back"], 3)
+
+        clock.now += 1.0
+        logger.warning("warning 4")
+        handler.flush()
+        self.assertEqual([line["message"] for line in queue.events[1]["lines"]], ["warning 4"])
+
+    def test_background_flush_sends_buffered_lines(self) -> None:
+        queue = RecordingQueue()
+        handler = QueueLogHandler(queue, "aaaaaaaa", flush_seconds=0.01)
+        self.addCleanup(handler.close)
+
+        handler.handle(logging.makeLogRecord({"msg": "page 1 done", "levelno": logging.INFO}))
+        for _ in range(200):
+            if queue.events:
+                break
+            threading.Event().wait(0.01)
+
+        self.assertEqual([line["message"] for line in queue.events[0]["lines"]], ["page 1 done"])
+
+    def test_buffered_lines_are_sent_before_done(self) -> None:
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        input_pdf = root / "scan.pdf"
+        input_pdf.write_bytes(b"%PDF-1.4\nscan\n")
+        root_logger = logging.getLogger()
+        saved_handlers, saved_level = list(root_logger.handlers), root_logger.level
+
+        def restore() -> None:
+            for handler in list(root_logger.handlers):
+                root_logger.removeHandler(handler)
+                handler.close()
+            for handler in saved_handlers:
+                root_logger.addHandler(handler)
+            root_logger.setLevel(saved_level)
+
+        self.addCleanup(restore)
+
+        def configure(log_file, queue_obj, task_id, gui_level=None):
+            _configure_logging(log_file, queue_obj, task_id, gui_level)
+            for handler in root_logger.handlers:
+                if isinstance(handler, QueueLogHandler):
+                    # Only the flush before ``done`` may send.
+                    handler.flush_seconds = 60.0
+
+        queue = RecordingQueue()
+        with (
+            mock.patch("ocr_app.job_runner.LOG_ROOT", root / "logs"),
+            mock.patch("ocr_app.job_runner._configure_logging", side_effect=configure),
+        ):
+            run_passthrough_job(
+                {
+                    "kind": "passthrough",
+                    "task_id": "aaaaaaaa",
+                    "input_pdf": str(input_pdf),
+                    "output_pdf": str(root / "out.pdf"),
+                    "log_file": str(root / "logs" / "scan.log"),
+                    "text_pages": 1,
+                    "gui_log_level": "warning",
+                },
+                queue,
+            )
+
+        sent = [event["type"] for event in queue.events]
+        self.assertTrue(queue.done()["success"])
+        self.assertLess(sent.index("log_batch"), sent.index("done"))
+        self.assertGreater(queue.events[sent.index("log_batch")]["held_back"], 0)
+        self.assertIn("| INFO |", (root / "logs" / "scan.log").read_text(encoding="utf-8"))
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import io
+import unittest
+from unittest import mock
+
+from ocr_app.ocr_progress import (
+    PROGRESS_PREFIX,
+    emit_progress,
+    estimate_remaining_seconds,
+    parse_progress_line,
+    progress_sink,
+    run_fraction,
+    stage_for,
+)
+
+
+class RunFractionTests(unittest.TestCase):
+    def test_stages_map_ocrmypdf_descriptions(self) -> None:
+        self.assertEqual(stage_for("OCR"), "ocr")
+        self.assertEqual(stage_for("Image processing"), "ocr")
+        self.assertEqual(stage_for("Recompressing JPEGs"), "optimize")
+        self.assertIsNone(stage_for("Something new"))
+
+    def test_fraction_counts_earlier_stages_as_finished(self) -> None:
+        self.assertAlmostEqual(run_fraction("scan", 5, 10), 0.025)
+        self.assertAlmostEqual(run_fraction("ocr", 0, 10), 0.05)
+        self.assertAlmostEqual(run_fraction("ocr", 10, 10), 0.80)
+        self.assertAlmostEqual(run_fraction("linearize", 100, 100), 1.0)
+        self.assertAlmostEqual(run_fraction("ocr", 3, None), 0.05)
+        self.assertIsNone(run_fraction(None, 1, 2))
+
+    def test_ocr_stage_extrapolates_from_page_rate(self) -> None:
+        # 4 of 10 pages in 8s: 12s of OCR left, and the later stages are scaled
+        # from the projected 20s OCR stage (0.20 / 0.75 of it).
+        remaining = estimate_remaining_seconds({"stage": "ocr", "done": 4, "total": 10, "stage_elapsed": 8.0}, 9.0)
+        self.assertAlmostEqual(remaining, 12.0 + 20.0 * 0.20 / 0.75)
+
+    def test_other_stages_extrapolate_from_run_fraction(self) -> None:
+        remaining = estimate_remaining_seconds({"stage": "pdfa", "done": 5, "total": 10}, 86.0)
+        self.assertAlmostEqual(remaining, 86.0 * (1 - 0.88) / 0.88)
+        self.assertIsNone(estimate_remaining_seconds({"stage": "scan", "done": 0, "total": 10}, 1.0))
+
+
+class ProgressChannelTests(unittest.TestCase):
+    def test_events_go_to_stderr_lines_without_a_sink(self) -> None:
+        stderr = io.StringIO()
+        with mock.patch("sys.stderr", stderr):
+            emit_progress({"stage": "ocr", "done": 1, "total": 2})
+
+        line = stderr.getvalue()
+        self.assertTrue(line.startswith(PROGRESS_PREFIX))
+        self.assertEqual(parse_progress_line(line.rstrip()), {"stage": "ocr", "done": 1, "total": 2})
+        self.assertIsNone(parse_progress_line("Progress: 50%"))
+        self.assertIsNone(parse_progress_line(PROGRESS_PREFIX + "[1, 2]"))
+
+    def test_sink_receives_events_only_while_installed(self) -> None:
+        events: list[dict] = []
+        stderr = io.StringIO()
+        with mock.patch("sys.stderr", stderr):
+            with progress_sink(events.append):
+                emit_progress({"done": 1})
+            emit_progress({"done": 2})
+
+        self.assertEqual(events, [{"done": 1}])
+        self.assertIn('"done":2', stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from ocr_app.pdf_pages import (
+    count_pages,
+    extract_pages,
+    merge_pdfs,
+    pikepdf_available,
+    plan_page_ranges,
+    probe_text_layer,
+)
+
+
+def _write_blank_pdf(path: Path, pages: int, width: int = 200) -> None:
+    import pikepdf
+
+    pdf = pikepdf.new()
+    for _ in range(pages):
+        pdf.add_blank_page(page_size=(width, 200))
+    pdf.save(path)
+
+
+def _write_text_pdf(path: Path, text_pages: int, blank_pages: int = 0) -> None:
+    import pikepdf
+
+    pdf = pikepdf.new()
+    font = pdf.make_indirect(
+        pikepdf.Dictionary(Type=pikepdf.Name.Font, Subtype=pikepdf.Name.Type1, BaseFont=pikepdf.Name.Helvetica)
+    )
+    for _ in range(text_pages):
+        pdf.add_blank_page(page_size=(200, 200))
+        page = pdf.pages[-1]
+        page.Resources = pikepdf.Dictionary(Font=pikepdf.Dictionary(F1=font))
+        page.Contents = pdf.make_stream(b"BT /F1 12 Tf 10 10 Td (Hello) Tj ET")
+    for _ in range(blank_pages):
+        pdf.add_blank_page(page_size=(200, 200))
+    pdf.save(path)
+
+
+class PlanPageRangesTests(unittest.TestCase):
+    def test_ranges_cover_every_page_once(self) -> None:
+        ranges = plan_page_ranges(901, max_shards=4, min_pages_per_shard=25)
+
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], 901)
+        for (_start, end), (next_start, _next_end) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, next_start)
+        sizes = [end - start for start, end in ranges]
+        self.assertLessEqual(max(sizes) - min(sizes), 1)
+
+    def test_min_pages_limits_shard_count(self) -> None:
+        self.assertEqual(plan_page_ranges(60, max_shards=8, min_pages_per_shard=25), [(0, 30), (30, 60)])
+        self.assertEqual(plan_page_ranges(10, max_shards=8, min_pages_per_shard=25), [(0, 10)])
+        self.assertEqual(plan_page_ranges(0, max_shards=8, min_pages_per_shard=25), [])
+
+
+@unittest.skipUnless(pikepdf_available(), "pikepdf is not installed")
+class SplitMergeTests(unittest.TestCase):
+    def test_extract_and_merge_round_trip_preserves_page_order(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            source = root / "source.pdf"
+            import pikepdf
+
+            pdf = pikepdf.new()
+            for width in range(100, 110):
+                pdf.add_blank_page(page_size=(width, 200))
+            pdf.save(source)
+
+            parts = []
+            for index, (start, end) in enumerate(plan_page_ranges(10, max_shards=3, min_pages_per_shard=1)):
+                part = root / f"part_{index}.pdf"
+                extract_pages(source, part, start, end)
+                parts.append(part)
+            merged = root / "merged.pdf"
+
+            self.assertEqual(merge_pdfs(parts, merged), 10)
+            with pikepdf.open(merged) as result:
+                widths = [int(page.mediabox[2]) for page in result.pages]
+            self.assertEqual(widths, list(range(100, 110)))
+
+    def test_merge_onto_source_keeps_document_metadata_and_outline(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            source = root / "source.pdf"
+            import pikepdf
+
+            pdf = pikepdf.new()
+            for width in range(100, 106):
+                pdf.add_blank_page(page_size=(width, 200))
+            with pdf.open_metadata(set_pikepdf_as_editor=False) as meta:
+                meta["dc:creator"] = ["Records office"]
+            pdf.docinfo["/Title"] = "Annual report"
+            with pdf.open_outline() as outline:
+                outline.root.append(pikepdf.OutlineItem("Chapter 2", 4))
+            pdf.Root.AcroForm = pikepdf.Dictionary(Fields=pikepdf.Array())
+            pdf.Root.Names = pikepdf.Dictionary(
+                Dests=pikepdf.Dictionary(Names=pikepdf.Array(["intro", pikepdf.Array([pdf.pages[1].obj])]))
+            )
+            pdf.save(source)
+
+            parts = []
+            for index, (start, end) in enumerate(plan_page_ranges(6, max_shards=2, min_pages_per_shard=1)):
+                part = root / f"part_{index}.pdf"
+                extract_pages(source, part, start, end)
+                # Stand in for OCRmyPDF: a new text layer on every page and no document data.
+                with pikepdf.open(part, allow_overwriting_input=True) as ocr:
+                    for offset, page in enumerate(ocr.pages):
+                        page.Contents = ocr.make_stream(f"% ocr page {start + offset}".encode())
+                    ocr.save(part)
+                parts.append(part)
+            merged = root / "merged.pdf"
+
+            self.assertEqual(merge_pdfs(parts, merged, source), 6)
+            with pikepdf.open(merged) as result:
+                self.assertEqual(str(result.docinfo["/Title"]), "Annual report")
+                self.assertEqual(result.open_metadata()["dc:creator"], ["Records office"])
+                with result.open_outline() as outline:
+                    (item,) = outline.root
+                    self.assertEqual(item.title, "Chapter 2")
+                    self.assertEqual(pikepdf.Page(item.destination[0]).index, 4)
+                self.assertIn("/AcroForm", result.Root)
+                intro = result.Root.Names.Dests.Names[1][0]
+                self.assertEqual(pikepdf.Page(intro).index, 1)
+                self.assertEqual(
+                    [page.Contents.read_bytes() for page in result.pages],
+                    [f"% ocr page {index}".encode() for index in range(6)],
+                )
+                self.assertEqual([int(page.mediabox[2]) for page in result.pages], list(range(100, 106)))
+
+    def test_merge_onto_source_rejects_a_page_count_mismatch(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            source = root / "source.pdf"
+            part = root / "part.pdf"
+            _write_blank_pdf(source, 4)
+            extract_pages(source, part, 0, 3)
+
+            with self.assertRaises(ValueError):
+                merge_pdfs([part], root / "merged.pdf", source)
+
+    def test_extract_rejects_out_of_range_pages(self) -> None:
+        with TemporaryDirectory() as tmp:
+            source = Path(tmp) / "source.pdf"
+            _write_blank_pdf(source, 3)
+
+            with self.assertRaises(ValueError):
+                extract_pages(source, Path(tmp) / "part.pdf", 2, 5)
+
+    def test_count_pages_returns_none_for_invalid_pdf(self) -> None:
+        with TemporaryDirectory() as tmp:
+            broken = Path(tmp) / "broken.pdf"
+            broken.write_bytes(b"not a pdf")
+            valid = Path(tmp) / "valid.pdf"
+            _write_blank_pdf(valid, 4)
+
+            self.assertIsNone(count_pages(broken))
+            self.assertEqual(count_pages(valid), 4)
+
+
+@unittest.skipUnless(pikepdf_available(), "pikepdf is not installed")
+class ProbeTextLayerTests(unittest.TestCase):
+    def test_text_on_every_page_is_searchable(self) -> None:
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "text.pdf"
+            _write_text_pdf(path, text_pages=3)
+
+            self.assertEqual(probe_text_layer(path), (True, 3, 3))
+
+    def test_probe_stops_at_first_page_without_text(self) -> None:
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "mixed.pdf"
+            _write_text_pdf(path, text_pages=1, blank_pages=5)
+
+            self.assertEqual(probe_text_layer(path), (False, 2, 6))
+
+    def test_unreadable_file_returns_none(self) -> None:
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "broken.pdf"
+            path.write_bytes(b"not a pdf")
+
+            self.assertIsNone(probe_text_layer(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
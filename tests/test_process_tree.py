@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import psutil
+
+from ocr_app.process_tree import leads_process_group, terminate_process_tree
+
+# Stands in for ocrmypdf: forks a child, which forks a grandchild (like Tesseract
+# or Ghostscript), and records every pid. IGNORE_TERM makes the grandchild
+# ignore SIGTERM so only the SIGKILL escalation can stop it.
+_STUB_OCR = """
+import os, signal, subprocess, sys, time
+
+pid_file, depth, ignore_term = sys.argv[1], int(sys.argv[2]), sys.argv[3] == "1"
+if depth == 0 and ignore_term:
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+if depth > 0:
+    subprocess.Popen([sys.executable, __file__, pid_file, str(depth - 1), sys.argv[3]])
+with open(pid_file, "a", encoding="utf-8") as handle:
+    handle.write(f"{os.getpid()}\\n")
+time.sleep(60)
+"""
+
+
+def _is_gone(pid: int) -> bool:
+    try:
+        return psutil.Process(pid).status() == psutil.STATUS_ZOMBIE
+    except psutil.Error:
+        return True
+
+
+@unittest.skipUnless(hasattr(os, "killpg"), "process groups need POSIX")
+class TerminateProcessTreeTests(unittest.TestCase):
+    def _start_stub(self, tmp: str, ignore_term: bool = False, new_group: bool = True) -> tuple[subprocess.Popen, list[int]]:
+        script = Path(tmp) / "stub_ocr.py"
+        script.write_text(_STUB_OCR, encoding="utf-8")
+        pid_file = Path(tmp) / "pids.txt"
+        proc = subprocess.Popen(
+            [sys.executable, str(script), str(pid_file), "2", "1" if ignore_term else "0"],
+            start_new_session=new_group,
+        )
+        self.addCleanup(proc.wait)
+        deadline = time.monotonic() + 10.0
+        pids: list[int] = []
+        while time.monotonic() < deadline:
+            if pid_file.exists():
+                pids = [int(line) for line in pid_file.read_text(encoding="utf-8").split()]
+                if len(pids) == 3:
+                    break
+            time.sleep(0.02)
+        self.assertEqual(len(pids), 3, "stub never started its children")
+        self.addCleanup(self._kill_leftovers, pids)
+        return proc, pids
+
+    @staticmethod
+    def _kill_leftovers(pids: list[int]) -> None:
+        for pid in pids:
+            try:
+                psutil.Process(pid).kill()
+            except psutil.Error:
+                pass
+
+    def _wait_all_gone(self, pids: list[int], timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if all(_is_gone(pid) for pid in pids):
+                return True
+            time.sleep(0.02)
+        return False
+
+    def test_process_group_signal_reaches_grandchildren(self) -> None:
+        with TemporaryDirectory() as tmp:
+            proc, pids = self._start_stub(tmp)
+            self.assertTrue(leads_process_group(proc.pid))
+
+            report = terminate_process_tree(proc.pid, term_grace=5.0)
+            proc.wait(timeout=5.0)
+
+            self.assertEqual(report["method"], "process_group")
+            self.assertEqual(report["processes"], 3)
+            self.assertEqual(report["killed"], 0)
+            self.assertTrue(self._wait_all_gone(pids))
+
+    def test_processes_ignoring_sigterm_are_killed_after_the_grace(self) -> None:
+        with TemporaryDirectory() as tmp:
+            proc, pids = self._start_stub(tmp, ignore_term=True)
+
+            started = time.monotonic()
+            report = terminate_process_tree(proc.pid, term_grace=0.3, kill_grace=5.0)
+            proc.wait(timeout=5.0)
+
+            self.assertGreaterEqual(report["killed"], 1)
+            self.assertEqual(report["survivors"], 0)
+            self.assertLess(time.monotonic() - started, 5.0)
+            self.assertTrue(self._wait_all_gone(pids))
+
+    def test_process_tree_fallback_without_own_group(self) -> None:
+        with TemporaryDirectory() as tmp:
+            proc, pids = self._start_stub(tmp, new_group=False)
+            self.assertFalse(leads_process_group(proc.pid))
+
+            report = terminate_process_tree(proc.pid, term_grace=5.0)
+            proc.wait(timeout=5.0)
+
+            self.assertEqual(report["method"], "process_tree")
+            self.assertEqual(report["processes"], 3)
+            self.assertTrue(self._wait_all_gone(pids))
+
+
+if __name__ == "__main__":
+    unittest.main()
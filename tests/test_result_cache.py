@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from ocr_app.result_cache import ResultCache, cache_key, hash_file
+
+
+class ResultCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+    def _source(self, name: str, size: int) -> Path:
+        path = self.root / name
+        path.write_bytes(b"x" * size)
+        return path
+
+    def test_key_depends_on_content_and_options(self) -> None:
+        first = self._source("a.pdf", 10)
+        same = self._source("b.pdf", 10)
+        content = hash_file(first)
+
+        self.assertEqual(content, hash_file(same))
+        self.assertEqual(cache_key(content, {"force_ocr": False}), cache_key(content, {"force_ocr": False}))
+        self.assertNotEqual(cache_key(content, {"force_ocr": False}), cache_key(content, {"force_ocr": True}))
+
+    def test_store_then_lookup_returns_private_copy(self) -> None:
+        cache = ResultCache(self.root / "cache", max_bytes=1024)
+        key = cache_key("abc", {})
+        source = self._source("out.pdf", 100)
+
+        self.assertIsNone(cache.lookup(key))
+        self.assertTrue(cache.store(key, source))
+        entry = cache.lookup(key)
+
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry.read_bytes(), source.read_bytes())
+        if os.name != "nt":
+            self.assertEqual(entry.stat().st_mode & 0o777, 0o600)
+
+    def test_eviction_removes_least_recently_used_entries(self) -> None:
+        cache = ResultCache(self.root / "cache", max_bytes=250)
+        keys = [cache_key(str(index), {}) for index in range(3)]
+        for index, key in enumerate(keys[:2]):
+            self.assertTrue(cache.store(key, self._source(f"{index}.pdf", 100)))
+            entry = cache.lookup(key)
+            os.utime(entry, (1000 + index, 1000 + index))
+        # Touch the oldest entry so the second one becomes least recently used.
+        os.utime(cache.lookup(keys[0]), (2000, 2000))
+
+        self.assertTrue(cache.store(keys[2], self._source("2.pdf", 100)))
+
+        self.assertIsNotNone(cache.lookup(keys[0]))
+        self.assertIsNone(cache.lookup(keys[1]))
+        self.assertIsNotNone(cache.lookup(keys[2]))
+        self.assertLessEqual(cache.size_bytes(), 250)
+
+    def test_outputs_larger_than_cap_are_not_stored(self) -> None:
+        cache = ResultCache(self.root / "cache", max_bytes=50)
+        key = cache_key("big", {})
+
+        self.assertFalse(cache.store(key, self._source("big.pdf", 100)))
+        self.assertIsNone(cache.lookup(key))
+
+    def test_rejects_malformed_keys(self) -> None:
+        cache = ResultCache(self.root / "cache", max_bytes=1024)
+
+        self.assertIsNone(cache.lookup("../../etc/passwd"))
+        self.assertFalse(cache.store("../escape", self._source("x.pdf", 1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import unittest
+
+from ocr_app.scheduling import (
+    AdmissionController,
+    GpuCircuitBreaker,
+    GpuDispatcher,
+    PressureSample,
+    allocate_ocr_jobs,
+    cpu_budget,
+    ram_staging_estimate,
+    ram_staging_fits,
+)
+
+GIB = 1024 * 1024 * 1024
+MIB = 1024 * 1024
+
+
+class AllocateOcrJobsTests(unittest.TestCase):
+    def test_long_queue_keeps_one_job_per_file(self) -> None:
+        allocation = allocate_ocr_jobs(
+            page_count=400, budget=8, jobs_in_use=3, queued_remaining=200, free_slots=4
+        )
+
+        self.assertEqual(allocation.jobs, 1)
+
+    def test_last_large_file_gets_idle_cores(self) -> None:
+        allocation = allocate_ocr_jobs(
+            page_count=900, budget=16, jobs_in_use=2, queued_remaining=0, free_slots=5, max_jobs=8
+        )
+
+        self.assertEqual(allocation.jobs, 8)
+        self.assertEqual(allocation.idle_cores, 14)
+
+    def test_small_documents_are_capped_by_page_count(self) -> None:
+        allocation = allocate_ocr_jobs(
+            page_count=6, budget=16, jobs_in_use=0, queued_remaining=0, free_slots=0
+        )
+
+        self.assertEqual(allocation.jobs, 1)
+
+    def test_cores_are_held_back_for_files_that_can_still_start(self) -> None:
+        allocation = allocate_ocr_jobs(
+            page_count=None, budget=8, jobs_in_use=0, queued_remaining=3, free_slots=3
+        )
+
+        self.assertEqual(allocation.jobs, 5)
+        self.assertEqual(allocation.reserved_for_queue, 3)
+
+    def test_never_oversubscribes_below_one_job(self) -> None:
+        allocation = allocate_ocr_jobs(
+            page_count=100, budget=4, jobs_in_use=9, queued_remaining=2, free_slots=2
+        )
+
+        self.assertEqual(allocation.jobs, 1)
+        self.assertEqual(allocation.idle_cores, 0)
+
+    def test_cpu_budget_reserves_a_core_for_the_gui(self) -> None:
+        self.assertEqual(cpu_budget(8), 7)
+        self.assertEqual(cpu_budget(1), 1)
+
+
+class RamStagingTests(unittest.TestCase):
+    def test_estimate_uses_the_larger_of_size_and_page_based_guesses(self) -> None:
+        mib = 1024 * 1024
+        self.assertEqual(ram_staging_estimate(10 * mib), 80 * mib)
+        self.assertEqual(ram_staging_estimate(1 * mib, page_count=100), 800 * mib)
+
+    def test_admission_counts_running_reservations_and_free_floor(self) -> None:
+        gib = 1024 * 1024 * 1024
+        self.assertTrue(ram_staging_fits(gib, free_bytes=4 * gib, reserved_bytes=gib, min_free_bytes=gib))
+        self.assertFalse(ram_staging_fits(gib, free_bytes=4 * gib, reserved_bytes=2 * gib + 1, min_free_bytes=gib))
+
+
+
+class GpuDispatcherTests(unittest.TestCase):
+    def test_budget_uses_free_vram_and_default_task_size(self) -> None:
+        dispatcher = GpuDispatcher(lambda: (2 * GIB, 12 * GIB), task_bytes=2 * GIB, headroom_bytes=GIB)
+        dispatcher.begin_batch()
+
+        self.assertEqual(dispatcher.capacity(), 4)
+        self.assertTrue(dispatcher.admit(3))
+        self.assertFalse(dispatcher.admit(4))
+
+    def test_measured_per_task_use_shrinks_the_budget(self) -> None:
+        samples = [(GIB, 9 * GIB), (7 * GIB, 9 * GIB)]
+        dispatcher = GpuDispatcher(lambda: samples.pop(0), task_bytes=GIB, headroom_bytes=0)
+        dispatcher.begin_batch()
+        self.assertEqual(dispatcher.capacity(), 8)
+
+        dispatcher.observe(gpu_tasks_running=2)
+
+        self.assertEqual(dispatcher.task_bytes(), 3 * GIB)
+        self.assertEqual(dispatcher.capacity(), 2)
+        self.assertIn("measured", dispatcher.describe())
+
+    def test_configured_cap_and_missing_metrics(self) -> None:
+        configured = GpuDispatcher(lambda: (0, 48 * GIB), max_tasks=3)
+        configured.begin_batch()
+        blind = GpuDispatcher(lambda: None)
+        blind.begin_batch()
+
+        self.assertEqual(configured.capacity(), 3)
+        self.assertEqual(blind.capacity(), 2)
+        self.assertIn("no VRAM metrics", blind.describe())
+
+    def test_full_gpu_still_admits_one_task(self) -> None:
+        dispatcher = GpuDispatcher(lambda: (8 * GIB, 8 * GIB))
+        dispatcher.begin_batch()
+
+        self.assertEqual(dispatcher.capacity(), 1)
+
+
+class GpuCircuitBreakerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.breaker = GpuCircuitBreaker(failure_threshold=3, cooldown_seconds=60.0, clock=lambda: self.now)
+
+    def _trip(self) -> None:
+        for unit in ("a", "b", "c"):
+            self.assertTrue(self.breaker.allow(unit))
+        self.assertFalse(self.breaker.record_failure("a"))
+        self.assertFalse(self.breaker.record_failure("b"))
+        self.assertTrue(self.breaker.record_failure("c"))
+
+    def test_consecutive_failures_open_the_breaker(self) -> None:
+        self.breaker.record_failure("x")
+        self.breaker.record_success("y")
+        self.assertEqual(self.breaker.failures, 0)
+
+        self._trip()
+
+        self.assertEqual(self.breaker.state, "open")
+        self.assertEqual(self.breaker.trips, 1)
+        self.assertFalse(self.breaker.allow("d"))
+        self.assertIn("GPU retry in 60s", self.breaker.describe())
+
+    def test_single_half_open_probe_closes_on_success(self) -> None:
+        self._trip()
+        self.now = 61.0
+
+        self.assertTrue(self.breaker.allow("probe"))
+        self.assertEqual(self.breaker.state, "half_open")
+        self.assertFalse(self.breaker.allow("other"))
+        # A late failure from a file started before the trip does not count against the probe.
+        self.assertFalse(self.breaker.record_failure("a"))
+        self.assertTrue(self.breaker.record_success("probe"))
+
+        self.assertEqual(self.breaker.state, "closed")
+        self.assertTrue(self.breaker.allow("other"))
+
+    def test_failed_probe_reopens_and_abandoned_probe_frees_the_slot(self) -> None:
+        self._trip()
+        self.now = 61.0
+        self.assertTrue(self.breaker.allow("probe"))
+        self.assertTrue(self.breaker.record_failure("probe"))
+        self.assertEqual((self.breaker.state, self.breaker.trips), ("open", 2))
+
+        self.now = 122.0
+        self.assertTrue(self.breaker.allow("canceled"))
+        self.breaker.abandon("canceled")
+        self.assertTrue(self.breaker.allow("next"))
+        self.assertEqual(self.breaker.probe_id, "next")
+
+
+class AdmissionControllerTests(unittest.TestCase):
+    def _controller(self, samples: list[PressureSample], **kwargs) -> AdmissionController:
+        self.now = 0.0
+
+        def clock() -> float:
+            self.now += 1.0
+            return self.now
+
+        return AdmissionController(
+            lambda: samples.pop(0),
+            min_available_bytes=GIB,
+            max_swap_out_rate=8 * MIB,
+            max_load_per_cpu=2.0,
+            base_task_bytes=256 * MIB,
+            rss_per_input_mb=16 * MIB,
+            clock=clock,
+            **kwargs,
+        )
+
+    def test_memory_floor_counts_expected_peak_and_running_growth(self) -> None:
+        controller = self._controller([PressureSample(2 * GIB, 0, 0.5, 4)])
+        controller.observe()
+
+        self.assertEqual(controller.expected_peak(32 * MIB), 768 * MIB)
+        self.assertTrue(controller.admit(768 * MIB, 0, running=1))
+        self.assertFalse(controller.admit(768 * MIB, 512 * MIB, running=1))
+        self.assertIn("available RAM 2048 MiB", controller.hold_reason)
+        # Nothing running: always start one file so the batch keeps moving.
+        self.assertTrue(controller.admit(768 * MIB, 512 * MIB, running=0))
+
+    def test_swap_rate_and_load_average_hold_starts(self) -> None:
+        controller = self._controller(
+            [
+                PressureSample(8 * GIB, 100 * MIB, 1.0, 4),
+                PressureSample(8 * GIB, 120 * MIB, 1.0, 4),
+                PressureSample(8 * GIB, 120 * MIB, 9.0, 4),
+            ]
+        )
+        controller.observe()
+        self.assertTrue(controller.admit(0, 0, running=1))
+
+        controller.observe()
+        self.assertFalse(controller.admit(0, 0, running=1))
+        self.assertIn("swapping out 20 MiB/s", controller.describe())
+
+        controller.observe()
+        self.assertFalse(controller.admit(0, 0, running=1))
+        self.assertIn("load average 9.0 over 8.0", controller.hold_reason)
+
+    def test_learns_peak_rss_per_input_mib(self) -> None:
+        controller = self._controller([])
+        controller.learn(100 * MIB, 256 * MIB + 100 * 48 * MIB)
+        controller.learn(512 * 1024, 4 * GIB)  # Under 1 MiB of input: ignored.
+
+        self.assertEqual(controller.learned_samples, 1)
+        self.assertEqual(controller.rss_per_input_mb, 32 * MIB)
+        self.assertEqual(controller.expected_peak(10 * MIB), 256 * MIB + 320 * MIB)
+        self.assertEqual(controller.describe(), "Admission: no metrics")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import psutil
+
+from ocr_app.tree_sampler import ProcessTreeSampler
+
+# A parent that starts a grandchild which writes (and syncs) 4 MiB, then burns CPU until killed.
+_WRITER_TREE = (
+    "import subprocess, sys; "
+    "subprocess.run([sys.executable, '-c', sys.argv[1]], check=True)"
+)
+_WRITER = (
+    "import os, sys\n"
+    "with open(sys.argv[1], 'wb') as handle:\n"
+    "    handle.write(b'0' * (4 * 1024 * 1024)); handle.flush(); os.fsync(handle.fileno())\n"
+    "open(sys.argv[1] + '.done', 'w').close()\n"
+    "while True: pass\n"
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ProcessTreeSamplerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.target = Path(tmp.name) / "written.bin"
+        writer = _WRITER.replace("sys.argv[1]", repr(str(self.target)))
+        self.proc = subprocess.Popen([sys.executable, "-c", _WRITER_TREE, writer])
+        self.addCleanup(self._stop_tree)
+        deadline = time.monotonic() + 10.0
+        while not Path(f"{self.target}.done").exists():
+            if time.monotonic() > deadline:
+                self.fail("writer grandchild did not start")
+            time.sleep(0.05)
+
+    def _stop_tree(self) -> None:
+        try:
+            for child in psutil.Process(self.proc.pid).children(recursive=True):
+                child.kill()
+        except psutil.Error:
+            pass
+        self.proc.kill()
+        self.proc.wait()
+
+    def test_aggregates_cpu_and_rss_over_descendants(self) -> None:
+        sampler = ProcessTreeSampler()
+
+        sampler.sample("task", [self.proc.pid])
+        time.sleep(0.3)
+        sample = sampler.sample("task", [self.proc.pid])
+
+        self.assertEqual(sample.processes, 2)
+        # The busy grandchild dominates; the root only waits.
+        self.assertGreater(sample.cpu_percent, 50.0)
+        self.assertGreater(sample.rss_bytes, psutil.Process(self.proc.pid).memory_info().rss)
+
+    def test_descendant_io_counts_from_process_start(self) -> None:
+        if not hasattr(psutil.Process, "io_counters"):
+            self.skipTest("per-process I/O counters are unavailable on this platform")
+        grandchild = psutil.Process(self.proc.pid).children()[0]
+        try:
+            if grandchild.io_counters().write_bytes == 0:
+                self.skipTest("filesystem does not account block writes")
+        except psutil.AccessDenied:
+            self.skipTest("I/O counters are not readable here")
+        clock = FakeClock()
+        sampler = ProcessTreeSampler(clock=clock)
+
+        first = sampler.sample("task", [self.proc.pid])
+        clock.now += 2.0
+        second = sampler.sample("task", [self.proc.pid])
+
+        self.assertGreaterEqual(first.write_bytes, 4 * 1024 * 1024)
+        self.assertEqual(first.write_rate, 0.0)
+        self.assertEqual(second.write_bytes, 0)
+
+    def test_child_lists_are_cached_between_relists(self) -> None:
+        clock = FakeClock()
+        sampler = ProcessTreeSampler(relist_seconds=5.0, clock=clock)
+        with mock.patch.object(psutil.Process, "children", autospec=True, side_effect=psutil.Process.children) as walk:
+            for _tick in range(3):
+                self.assertEqual(sampler.sample("task", [self.proc.pid]).processes, 2)
+                clock.now += 1.0
+            self.assertEqual(walk.call_count, 1)
+
+            clock.now += 5.0
+            sampler.sample("task", [self.proc.pid])
+            self.assertEqual(walk.call_count, 2)
+
+    def test_exited_processes_are_dropped(self) -> None:
+        clock = FakeClock()
+        sampler = ProcessTreeSampler(relist_seconds=60.0, clock=clock)
+        sampler.sample("task", [self.proc.pid])
+
+        grandchild = psutil.Process(self.proc.pid).children()[0]
+        grandchild.kill()
+        grandchild.wait(5)
+        self.proc.wait(5)
+        sample = sampler.sample("task", [self.proc.pid])
+
+        self.assertIsNone(sampler.sample("missing", []))
+        self.assertEqual(sample.processes, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
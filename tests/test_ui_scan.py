@@ -2,7 +2,11 @@ from __future__ import annotations
 
 import os
 import json
+import shutil
+import threading
+import time
 import unittest
+from concurrent.futures import Future
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from unittest import mock
@@ -14,7 +18,10 @@ from PySide6.QtGui import QCloseEvent
 from PySide6.QtWidgets import QApplication, QPushButton, QToolButton
 
 from ocr_app.models import TaskItem
-from ocr_app.ui import MainWindow
+from ocr_app.scheduling import PressureSample, allocate_ocr_jobs
+from ocr_app.tree_sampler import TreeSample
+from ocr_app.config import TEMP_ROOT
+from ocr_app.ui import TABLE_COL_RESULT, MainWindow
 
 
 class DummySettings:
@@ -33,21 +40,75 @@ class FakeCloseEvent:
         self.ignored = True
 
 
+class FakeWorkerPool:
+    def __init__(self) -> None:
+        self.submitted: list[dict] = []
+        self.active: set[str] = set()
+        self.pending_events: list[dict] = []
+
+    def resize(self, size: int) -> None:
+        pass
+
+    def busy_count(self) -> int:
+        return len(self.active)
+
+    def can_accept(self) -> bool:
+        return True
+
+    def submit(self, config: dict) -> int:
+        self.submitted.append(config)
+        self.active.add(config["task_id"])
+        # Never a live PID, so priority changes cannot touch a real process.
+        return 99_999_000 + len(self.submitted)
+
+    def cancel(self, task_id: str) -> dict | None:
+        return self.cancel_many([task_id]).result().get(task_id)
+
+    def cancel_many(self, task_ids: list[str]) -> Future:
+        reports = {}
+        for task_id in task_ids:
+            if task_id in self.active:
+                self.active.discard(task_id)
+                reports[task_id] = {"method": "process_group", "processes": 1, "killed": 0, "survivors": 0}
+        future: Future = Future()
+        future.set_result(reports)
+        return future
+
+    def poll(self) -> list[dict]:
+        events, self.pending_events = self.pending_events, []
+        for event in events:
+            if event.get("type") == "done":
+                self.active.discard(event["task_id"])
+        return events
+
+    def shutdown(self, timeout: float = 2.0, wait: bool = True) -> Future:
+        future: Future = Future()
+        future.set_result(None)
+        return future
+
+
 class MainWindowScanTests(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
         cls.app = QApplication.instance() or QApplication([])
 
     def setUp(self) -> None:
+        state_dir = TemporaryDirectory()
+        self.addCleanup(state_dir.cleanup)
+        self.duration_history = Path(state_dir.name) / "duration_history.jsonl"
         patchers = [
             mock.patch.object(MainWindow, "_restore_queue_state_prompt", lambda self: None),
             mock.patch.object(MainWindow, "_check_runtime_dependencies", lambda self: None),
+            mock.patch.object(MainWindow, "_duration_history_path", lambda _self: self.duration_history),
         ]
         self.addCleanup(mock.patch.stopall)
         for patcher in patchers:
             patcher.start()
         self.window = MainWindow(self.app)
         self.window.settings = DummySettings()
+        # Keep admission control independent of the test machine's load.
+        self.window.admission.sample_source = lambda: None
+        self.window.admission.sample = None
 
     def tearDown(self) -> None:
         self.window.poll_timer.stop()
@@ -66,7 +127,10 @@ class MainWindowScanTests(unittest.TestCase):
     def _add_task_row(self, pdf_path: Path) -> TaskItem:
         self.window.add_paths([str(pdf_path)])
         task_id = next(reversed(self.window.tasks))
-        return self.window.tasks[task_id]
+        task = self.window.tasks[task_id]
+        # Files wait for the background text probe (it brings the page count) before they start.
+        self._process_events_until(lambda: task.text_probe != "pending")
+        return task
 
     def test_expand_to_pdfs_skips_direct_symlink_inputs(self) -> None:
         with TemporaryDirectory() as tmp:
@@ -232,6 +296,894 @@ class MainWindowScanTests(unittest.TestCase):
             self.assertTrue(event.ignored)
             self.assertEqual(task.status, "Running")
 
+    def _running_task_with_temp_dir(self, pdf_path: Path, pool: FakeWorkerPool) -> TaskItem:
+        pdf_path.write_bytes(b"%PDF-1.4\nrunning\n")
+        task = self._add_task_row(pdf_path)
+        task.status = "Running"
+        task.temp_dir = TEMP_ROOT / task.task_id
+        task.temp_dir.mkdir(parents=True, exist_ok=True)
+        self.addCleanup(lambda: shutil.rmtree(task.temp_dir, ignore_errors=True))
+        (task.temp_dir / "page.png").write_bytes(b"x" * 1024)
+        pool.active.add(task.task_id)
+        return task
+
+    def _process_events_until(self, condition, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.app.processEvents()
+            if condition():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_cancel_all_stops_every_worker_in_one_round_and_cleans_up_in_background(self) -> None:
+        pool = FakeWorkerPool()
+        self.window.worker_pool = pool
+        with TemporaryDirectory() as tmp:
+            tasks = [self._running_task_with_temp_dir(Path(tmp) / f"{name}.pdf", pool) for name in ("a", "b")]
+
+            with mock.patch.object(pool, "cancel_many", wraps=pool.cancel_many) as cancel_many:
+                self.window.cancel_all()
+
+            cancel_many.assert_called_once_with([task.task_id for task in tasks])
+            self.assertEqual([task.status for task in tasks], ["Canceled", "Canceled"])
+            self.assertTrue(self._process_events_until(lambda: not any(task.temp_dir.exists() for task in tasks)))
+            self.assertTrue(self._process_events_until(lambda: self.window.teardown_cleanups == 0))
+            self.assertFalse(self.window.teardown_label.isVisibleTo(self.window))
+            self.assertFalse(any(".discard-" in path.name for path in TEMP_ROOT.iterdir()))
+
+    def test_close_waits_for_background_cleanup_after_saving_state(self) -> None:
+        pool = FakeWorkerPool()
+        self.window.worker_pool = pool
+        with TemporaryDirectory() as tmp:
+            state_file = Path(tmp) / "queue_state.json"
+            task = self._running_task_with_temp_dir(Path(tmp) / "running.pdf", pool)
+            event = FakeCloseEvent()
+
+            with (
+                mock.patch.object(MainWindow, "_state_file_path", lambda _self: state_file),
+                mock.patch.object(self.window, "_prompt_exit_queue_action", return_value="preserve"),
+            ):
+                self.window.closeEvent(event)
+
+            self.assertTrue(event.ignored)
+            self.assertTrue(self.window.close_requested)
+            self.assertTrue(state_file.exists())
+            self.assertEqual(task.status, "Canceled")
+            self.assertTrue(self._process_events_until(lambda: not self.window._teardown_pending()))
+            self.assertFalse(task.temp_dir.exists())
+
+    def test_real_ocr_progress_replaces_the_estimated_ticks(self) -> None:
+        pool = FakeWorkerPool()
+        self.window.worker_pool = pool
+        with TemporaryDirectory() as tmp:
+            task = self._running_task_with_temp_dir(Path(tmp) / "running.pdf", pool)
+            task.started_monotonic = time.monotonic()
+            task.estimated_seconds = 1.0
+
+            pool.pending_events = [
+                {
+                    "type": "progress",
+                    "task_id": task.task_id,
+                    "stage": "ocr",
+                    "desc": "OCR",
+                    "unit": "page",
+                    "done": 10,
+                    "total": 20,
+                    "stage_elapsed": 10.0,
+                }
+            ]
+            self.window._poll_workers()
+
+            # scan (5%) + half of OCR (37.5%) of the run, inside the 5-95% band.
+            self.assertEqual(task.progress_value, 43)
+            self.assertIn("10/20 pages", task.metrics["progress_detail"])
+            self.assertIn("left", task.metrics["progress_detail"])
+            self.window._advance_running_progress()
+            self.assertEqual(task.progress_value, 43)
+
+    def test_large_pdf_is_split_into_page_ranges_and_merged(self) -> None:
+        try:
+            import pikepdf
+        except ImportError:
+            self.skipTest("pikepdf is not installed")
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            pdf_path = root / "long.pdf"
+            pdf = pikepdf.new()
+            for _ in range(240):
+                pdf.add_blank_page()
+            pdf.save(pdf_path)
+
+            task = self._add_task_row(pdf_path)
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.batch_log_dir = root / "logs"
+            self.window.batch_running = True
+            self.window.total_batch = 1
+            self.window.current_worker_limit = 4
+            self.window.current_shard_large_pdfs = True
+            self.window._enqueue_tasks([task])
+
+            self.window._schedule_tasks()
+
+            self.assertEqual(task.status, "Running")
+            self.assertEqual([config["kind"] for config in pool.submitted], ["shard"] * 4)
+            self.assertEqual(pool.submitted[0]["page_range"], [0, 60])
+            self.assertEqual(pool.submitted[-1]["page_range"], [180, 240])
+            self.assertTrue(all(config["ocr_jobs"] >= 1 for config in pool.submitted))
+
+            pool.pending_events = [
+                {"type": "progress", "task_id": pool.submitted[0]["task_id"], "stage": "linearize", "done": 1, "total": 1}
+            ]
+            self.window._poll_workers()
+            # One of four equal page ranges finished its run: a quarter of the 0-90% band.
+            self.assertEqual(task.progress_value, 22)
+
+            pool.pending_events = [
+                {"type": "done", "task_id": config["task_id"], "success": True} for config in pool.submitted
+            ]
+            self.window._poll_workers()
+
+            merge = pool.submitted[-1]
+            self.assertEqual(merge["kind"], "merge")
+            self.assertEqual(merge["task_id"], task.task_id)
+            self.assertEqual(len(merge["parts"]), 4)
+
+            pool.pending_events = [
+                {"type": "done", "task_id": task.task_id, "success": True, "output_pdf": merge["output_pdf"]}
+            ]
+            self.window._poll_workers()
+
+            self.assertEqual(task.status, "Done")
+            self.assertEqual(task.metrics["shard_count"], 4)
+
+    def _searchable_task(self, root: Path) -> tuple[TaskItem, FakeWorkerPool]:
+        pdf_path = root / "searchable.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4\n")
+        task = self._add_task_row(pdf_path)
+        # The real background probe may already have reported this stub file.
+        task.text_probe = "pending"
+        self.window._apply_text_probe(task.task_id, (True, 3, 3))
+        pool = FakeWorkerPool()
+        self.window.worker_pool = pool
+        self.window.batch_log_dir = root / "logs"
+        self.window.batch_running = True
+        self.window.total_batch = 1
+        self.window.current_force_ocr = False
+        self.window._enqueue_tasks([task])
+        return task, pool
+
+    def test_worker_wakeup_starts_the_next_queued_file_without_the_timer(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.poll_timer.stop()
+            self.window.batch_log_dir = root / "logs"
+            self.window.batch_running = True
+            self.window.current_worker_limit = 1
+            tasks = []
+            for name in ("a.pdf", "gone.pdf", "b.pdf"):
+                pdf_path = root / name
+                pdf_path.write_bytes(b"%PDF-1.4\n")
+                tasks.append(self._add_task_row(pdf_path))
+            self.window.total_batch = len(tasks)
+            self.window._enqueue_tasks(tasks)
+            self.window._schedule_tasks()
+            self.assertEqual([config["task_id"] for config in pool.submitted], [tasks[0].task_id])
+            tasks[1].status = "Canceled"
+
+            pool.pending_events = [{"type": "done", "task_id": tasks[0].task_id, "success": True}]
+            # The pool's reader thread emits the signal; delivery is queued to the GUI thread.
+            emitter = threading.Thread(target=self.window.worker_events_ready.emit)
+            emitter.start()
+            emitter.join()
+            self.app.processEvents()
+
+            self.assertEqual(tasks[0].status, "Done")
+            self.assertEqual([config["task_id"] for config in pool.submitted], [tasks[0].task_id, tasks[2].task_id])
+            self.assertEqual(list(self.window.running_tasks), [tasks[2].task_id])
+            self.assertEqual(len(self.window.run_queue), 0)
+
+    def test_file_waits_for_its_background_page_count_before_starting(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            pdf_path = root / "scan.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4\n")
+            task = self._add_task_row(pdf_path)
+            task.text_probe = "pending"
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.batch_log_dir = root / "logs"
+            self.window.batch_running = True
+            self.window.total_batch = 1
+            self.window.current_force_ocr = True
+            self.window._enqueue_tasks([task])
+
+            self.window._schedule_tasks()
+            self.assertEqual(pool.submitted, [])
+            self.assertEqual(task.status, "Queued")
+
+            self.window._apply_text_probe(task.task_id, (False, 1, 12))
+
+            self.assertEqual(task.status, "Running")
+            self.assertEqual(len(pool.submitted), 1)
+            self.assertEqual(task.metrics["page_count"], 12)
+
+    def test_batch_progress_is_kept_as_running_totals(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.poll_timer.stop()
+            self.window.batch_log_dir = root / "logs"
+            self.window.batch_running = True
+            self.window.current_worker_limit = 2
+            tasks = []
+            for name in ("a.pdf", "b.pdf", "c.pdf", "d.pdf"):
+                pdf_path = root / name
+                pdf_path.write_bytes(b"%PDF-1.4\n")
+                tasks.append(self._add_task_row(pdf_path))
+            self.window.total_batch = len(tasks)
+            self.window._enqueue_tasks(tasks)
+            self.window._schedule_tasks()
+            first, second = tasks[:2]
+            for task in (first, second):
+                # Real progress only, so the tick's estimated animation leaves the bars alone.
+                task.metrics["real_progress"] = True
+            self.window._set_progress(first, 40)
+            self.window._set_progress(second, 20)
+            self.window._cancel_tasks([tasks[3].task_id])
+
+            # A tick must not walk the queue: the table of tasks is off limits.
+            with mock.patch.object(self.window, "tasks", {}):
+                self.window._on_poll_timer()
+            self.assertEqual(self.window.batch_percent_label.text(), "40%")
+
+            pool.pending_events = [{"type": "done", "task_id": first.task_id, "success": True}]
+            self.window._poll_workers()
+
+            # 100 (first) + 100 (canceled) + 20 (second) + third's start tick, over four files.
+            self.assertEqual(self.window.batch_progress_sum, second.progress_value + tasks[2].progress_value)
+            self.assertEqual(
+                self.window.batch_percent_label.text(),
+                f"{(200 + second.progress_value + tasks[2].progress_value) // 4}%",
+            )
+
+    def test_log_batches_expand_repeat_counts_and_tally_held_back_lines(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            pdf_path = root / "scan.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4\n")
+            task = self._add_task_row(pdf_path)
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.gui_log_level = "WARNING"
+            self.window.batch_log_dir = root / "logs"
+            self.window.batch_running = True
+            self.window.total_batch = 1
+            self.window.current_worker_limit = 1
+            self.window._enqueue_tasks([task])
+            self.window._schedule_tasks()
+            self.assertEqual(pool.submitted[0]["gui_log_level"], "WARNING")
+            self.window.log_view.clear()
+
+            stamp = "12:00:00"
+            skip_line = "skipping all processing on this page"
+            for held_back in (3, 2):
+                self.window._handle_worker_event(
+                    task,
+                    {
+                        "type": "log_batch",
+                        "task_id": task.task_id,
+                        "lines": [
+                            {"message": f"{stamp} | INFO | MainThread | 1 {skip_line}", "count": 4},
+                            {"message": f"{stamp} | WARNING | MainThread | low resolution", "count": 1},
+                        ],
+                        "held_back": held_back,
+                    },
+                )
+
+            self.assertEqual(task.metrics["skip_page_hits"], 8)
+            self.assertEqual(task.metrics["log_lines_held_back"], 5)
+            shown = self.window.log_view.toPlainText().splitlines()
+            self.assertEqual(len(shown), 4)
+            self.assertTrue(shown[0].endswith("on this page (x4)"))
+            self.assertTrue(shown[1].endswith("low resolution"))
+            self.assertEqual(self.window.log_entries[-1][1], "WARNING")
+
+    def test_text_probe_verdict_is_shown_for_queued_task(self) -> None:
+        with TemporaryDirectory() as tmp:
+            pdf_path = Path(tmp) / "scan.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4\n")
+            task = self._add_task_row(pdf_path)
+            task.text_probe = "pending"
+
+            self.window._apply_text_probe(task.task_id, (False, 2, 10))
+
+            self.assertEqual(task.text_probe, "needs_ocr")
+            self.assertEqual(task.page_count, 10)
+            self.assertIn("page 2 has no text", self.window.table.item(task.row, TABLE_COL_RESULT).toolTip())
+
+    def test_searchable_pdf_is_copied_without_ocr(self) -> None:
+        with TemporaryDirectory() as tmp:
+            task, pool = self._searchable_task(Path(tmp))
+            self.window.current_searchable_action = "copy"
+
+            self.window._schedule_tasks()
+
+            self.assertEqual(len(pool.submitted), 1)
+            self.assertEqual(pool.submitted[0]["kind"], "passthrough")
+            pool.pending_events = [
+                {"type": "done", "task_id": task.task_id, "success": True, "skipped_searchable": True}
+            ]
+            self.window._poll_workers()
+            self.assertEqual(task.status, "Skipped (Already Searchable)")
+
+    def test_searchable_pdf_is_skipped_without_worker(self) -> None:
+        with TemporaryDirectory() as tmp:
+            task, pool = self._searchable_task(Path(tmp))
+            self.window.current_searchable_action = "skip"
+
+            self.window._schedule_tasks()
+
+            self.assertEqual(pool.submitted, [])
+            self.assertEqual(task.status, "Skipped (Already Searchable)")
+            self.assertFalse(self.window.batch_running)
+
+    def test_deferred_durability_flushes_outputs_once_after_batch(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            pdf_path = root / "scan.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4\n")
+            task = self._add_task_row(pdf_path)
+            task.text_probe = ""
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.batch_log_dir = root / "logs"
+            self.window.batch_running = True
+            self.window.total_batch = 1
+            self.window.current_durability = "deferred"
+            self.window._enqueue_tasks([task])
+
+            self.window._schedule_tasks()
+            self.assertEqual(pool.submitted[0]["durability"], "deferred")
+
+            with mock.patch("ocr_app.ui.sync_filesystems", return_value=("syncfs", 1)) as sync:
+                pool.pending_events = [
+                    {"type": "done", "task_id": task.task_id, "success": True, "install_seconds": 0.01}
+                ]
+                self.window._poll_workers()
+                self.window.durability_barrier_thread.join(timeout=5.0)
+
+            sync.assert_called_once_with([task.output_path])
+            self.app.processEvents()
+            self.assertIn("Durability barrier (syncfs)", self.window.log_view.toPlainText())
+
+    def test_close_waits_for_durability_barrier_without_blocking(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            pdf_path = root / "scan.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4\n")
+            task = self._add_task_row(pdf_path)
+            task.status = "Done"
+            task.run_token = self.window.active_run_token
+            self.window.current_durability = "deferred"
+            self.window.worker_pool = FakeWorkerPool()
+            release = threading.Event()
+
+            def slow_sync(_outputs):
+                release.wait(5.0)
+                return "syncfs", 1
+
+            event = FakeCloseEvent()
+            with (
+                mock.patch("ocr_app.ui.sync_filesystems", side_effect=slow_sync),
+                mock.patch.object(MainWindow, "_state_file_path", lambda _self: root / "queue_state.json"),
+            ):
+                self.window._start_durability_barrier()
+                started = time.monotonic()
+                self.window.closeEvent(event)
+                self.assertLess(time.monotonic() - started, 1.0)
+
+                self.assertTrue(event.ignored)
+                self.assertTrue(self.window._teardown_pending())
+                self.assertIn("Flushing outputs", self.window.teardown_label.text())
+                with mock.patch.object(self.window, "close") as close:
+                    release.set()
+                    self.assertTrue(self._process_events_until(lambda: not self.window._teardown_pending()))
+                close.assert_called_once_with()
+
+    def test_close_stops_gpu_service_without_blocking(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            self.window.worker_pool = FakeWorkerPool()
+            release = threading.Event()
+            handle = mock.Mock()
+            handle.stop.side_effect = lambda: release.wait(5.0)
+            self.window.gpu_service = handle
+
+            event = FakeCloseEvent()
+            with mock.patch.object(MainWindow, "_state_file_path", lambda _self: root / "queue_state.json"):
+                started = time.monotonic()
+                self.window.closeEvent(event)
+                self.assertLess(time.monotonic() - started, 1.0)
+
+                self.assertIsNone(self.window.gpu_service)
+                self.assertTrue(event.ignored)
+                self.assertTrue(self.window._teardown_pending())
+                with mock.patch.object(self.window, "close") as close:
+                    release.set()
+                    self.assertTrue(self._process_events_until(lambda: not self.window._teardown_pending()))
+                close.assert_called_once_with()
+            handle.stop.assert_called_once_with()
+
+    def test_finished_files_train_the_duration_model_and_persist_history(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.batch_log_dir = root / "logs"
+            self.window.duration_model.min_samples = 2
+            for index, pages in enumerate((10, 20, 40)):
+                pdf_path = root / f"scan{index}.pdf"
+                pdf_path.write_bytes(b"%PDF-1.4\n")
+                task = self._add_task_row(pdf_path)
+                task.text_probe = ""
+                task.page_count = pages
+                self.window._enqueue_tasks([task])
+                self.window.batch_running = True
+                self.window.total_batch += 1
+                self.window._schedule_tasks()
+                pool.pending_events = [
+                    {
+                        "type": "done",
+                        "task_id": task.task_id,
+                        "success": True,
+                        "cache_status": "disabled",
+                        "duration_seconds": 2.0 + pages,
+                        "input_size": 1024,
+                        "phase_seconds": {"validate": 0.001, "ocr": 1.5 + pages, "install": 0.01},
+                        "child_rusage": {"cpu_user": float(pages), "cpu_system": 1.0, "max_rss": pages * 1024 * 1024},
+                    }
+                ]
+                self.window._poll_workers()
+
+            self.assertEqual(self.window.duration_model.samples, 3)
+            self.assertIn("predicted_seconds", task.metrics)
+            self.assertEqual(len(self.duration_history.read_text(encoding="utf-8").splitlines()), 3)
+            self.app.processEvents()
+            self.assertIn("Duration model: predicted", self.window.log_view.toPlainText())
+            self.assertIn("duration model=MAE", self.window.log_view.toPlainText())
+            self.assertIn("dispatch", task.metrics["phase_seconds"])
+            self.assertIn("ocr child cpu=73.0s, ocr child peak rss=40.0 MB", self.window.log_view.toPlainText())
+            self.assertIn(
+                "Batch phase timings (avg over 3 files): validate 0.001s, ocr 24.833s, install 0.010s, dispatch",
+                self.window.log_view.toPlainText(),
+            )
+
+            # Queued files without a page count are priced by size, without a stat per tick.
+            pdf_path = root / "unprobed.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4\n" * 512)
+            queued = self._add_task_row(pdf_path)
+            self.window._enqueue_tasks([queued])
+            predicted = self.window.duration_model.predict(self.window._duration_record(queued))
+            self.assertIsNotNone(predicted)
+            with mock.patch.object(Path, "stat", side_effect=AssertionError("stat on a GUI tick")):
+                remaining = self.window._batch_remaining_seconds()
+            self.assertAlmostEqual(remaining, predicted / max(1, self.window.current_worker_limit), places=3)
+
+            # A new window starts from the saved history.
+            restored = MainWindow(self.app)
+            restored.poll_timer.stop()
+            restored.metrics_timer.stop()
+            restored.state_timer.stop()
+            self.addCleanup(restored.close)
+            self.assertEqual(restored.duration_model.samples, 3)
+
+    def test_process_tree_samples_feed_peaks_summary_and_metrics_export(self) -> None:
+        samples = iter(
+            [
+                TreeSample(processes=1, cpu_percent=0.0, rss_bytes=100, read_bytes=0, write_bytes=0,
+                           read_rate=0.0, write_rate=0.0),
+                TreeSample(processes=4, cpu_percent=310.0, rss_bytes=5 * 1024 * 1024, read_bytes=2048,
+                           write_bytes=1024, read_rate=2048.0, write_rate=1024.0),
+                TreeSample(processes=3, cpu_percent=120.0, rss_bytes=3 * 1024 * 1024, read_bytes=1024,
+                           write_bytes=4096, read_rate=1024.0, write_rate=4096.0),
+            ]
+        )
+        roots: list[list[int]] = []
+
+        class FakeSampler:
+            def sample(self, key: str, root_pids: list[int]) -> TreeSample:
+                roots.append(list(root_pids))
+                return next(samples)
+
+            def forget(self, key: str) -> None:
+                pass
+
+            def retain(self, keys: list[str]) -> None:
+                pass
+
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.tree_sampler = FakeSampler()
+            self.window.batch_log_dir = root / "logs"
+            pdf_path = root / "scan.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4\n")
+            task = self._add_task_row(pdf_path)
+            self.window._enqueue_tasks([task])
+            self.window.batch_running = True
+            self.window.total_batch = 1
+            self.window._schedule_tasks()
+            self.window._update_metrics_labels()
+            self.window._update_metrics_labels()
+            # The worker writes the per-file log; the fake pool does not.
+            task.log_file.parent.mkdir(parents=True, exist_ok=True)
+            task.log_file.write_text("", encoding="utf-8")
+            pool.pending_events = [
+                {"type": "done", "task_id": task.task_id, "success": True, "duration_seconds": 2.0, "input_size": 9}
+            ]
+            self.window._poll_workers()
+
+            self.assertEqual(roots, [[99_999_001]] * 3)
+            self.assertEqual((task.peak_cpu_percent, task.peak_rss_bytes, task.peak_processes), (310.0, 5242880, 4))
+            self.assertEqual((task.io_read_bytes, task.io_write_bytes), (3072, 5120))
+            self.assertEqual((task.peak_read_rate, task.peak_write_rate), (2048.0, 4096.0))
+            log_text = task.log_file.read_text(encoding="utf-8")
+            self.assertIn("Peak processes in task tree: 4", log_text)
+            self.assertIn("Task tree I/O: 3.0 KB read / 5.0 KB written", log_text)
+            exported = [
+                json.loads(line)
+                for line in (root / "logs" / "metrics.jsonl").read_text(encoding="utf-8").splitlines()
+            ]
+            self.assertEqual(len(exported), 1)
+            self.assertEqual(exported[0]["input"], str(pdf_path))
+            self.assertEqual(exported[0]["gui_sampled"]["io_write_bytes"], 5120)
+            self.assertEqual(exported[0]["metrics"]["duration_seconds"], 2.0)
+            self.app.processEvents()
+            self.assertIn("tree peak cpu=310%, tree peak rss=5.0 MB, tree io=3.0 KB read / 5.0 KB written",
+                          self.window.log_view.toPlainText())
+            self.assertIn("Per-file metrics:", self.window.log_view.toPlainText())
+
+    def test_ram_staging_is_used_only_while_tmpfs_has_room(self) -> None:
+        if os.name == "nt":
+            self.skipTest("tmpfs staging is POSIX-only")
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            ram_root = root / "shm" / "ocr_gui_jobs"
+            ram_root.parent.mkdir()
+            tasks = []
+            for name in ("a.pdf", "b.pdf"):
+                pdf_path = root / name
+                pdf_path.write_bytes(b"%PDF-1.4\n" + b"0" * 1024)
+                tasks.append(self._add_task_row(pdf_path))
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.batch_log_dir = root / "logs"
+            self.window.batch_running = True
+            self.window.total_batch = 2
+            self.window.current_worker_limit = 2
+            self.window.current_ram_staging = True
+            for task in tasks:
+                self.window._enqueue_tasks([task])
+                task.page_count = 100
+
+            gib = 1024 * 1024 * 1024
+            usage = mock.Mock(free=gib + 900 * 1024 * 1024)
+            with mock.patch("ocr_app.ui.RAM_TEMP_ROOT", ram_root), mock.patch(
+                "ocr_app.ui.shutil.disk_usage", return_value=usage
+            ):
+                self.window._schedule_tasks()
+
+            self.assertEqual([Path(config["temp_dir"]).parent for config in pool.submitted], [ram_root, TEMP_ROOT])
+            self.assertEqual(ram_root.stat().st_mode & 0o777, 0o700)
+
+    def test_starting_files_does_not_walk_the_queue(self) -> None:
+        class UnwalkableTasks(dict):
+            def _walked(self, *_args):
+                raise AssertionError("scheduling walked every task")
+
+            values = items = keys = __iter__ = _walked
+
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            ram_root = root / "shm" / "ocr_gui_jobs"
+            ram_root.parent.mkdir()
+            tasks = []
+            for index in range(6):
+                pdf_path = root / f"scan{index}.pdf"
+                pdf_path.write_bytes(b"%PDF-1.4\n")
+                tasks.append(self._add_task_row(pdf_path))
+                tasks[-1].page_count = 10
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.batch_log_dir = root / "logs"
+            self.window.batch_running = True
+            self.window.total_batch = len(tasks)
+            self.window.current_worker_limit = 3
+            self.window.current_use_gpu = True
+            self.window.current_ram_staging = True
+            self.window._enqueue_tasks(tasks)
+
+            usage = mock.Mock(free=64 * 1024 * 1024 * 1024)
+            with (
+                mock.patch.object(self.window, "tasks", UnwalkableTasks(self.window.tasks)),
+                mock.patch("ocr_app.ui.RAM_TEMP_ROOT", ram_root),
+                mock.patch("ocr_app.ui.shutil.disk_usage", return_value=usage),
+            ):
+                self.window._schedule_tasks()
+                pool.pending_events = [{"type": "done", "task_id": tasks[0].task_id, "success": True}]
+                self.window._poll_workers()
+
+            self.assertEqual([task.status for task in tasks[:4]], ["Done", "Running", "Running", "Running"])
+            self.assertEqual(len(pool.submitted), 4)
+            self.assertEqual(self.window.queue_active_badge.text(), "5 Active")
+
+    def test_gpu_files_over_the_vram_budget_run_on_cpu(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            tasks = []
+            for name in ("a.pdf", "b.pdf", "c.pdf"):
+                pdf_path = root / name
+                pdf_path.write_bytes(b"%PDF-1.4\n")
+                tasks.append(self._add_task_row(pdf_path))
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.batch_log_dir = root / "logs"
+            self.window.batch_running = True
+            self.window.total_batch = 3
+            self.window.current_worker_limit = 3
+            self.window.current_use_gpu = True
+            self.window.gpu_dispatcher.max_tasks = 2
+            for task in tasks:
+                self.window._enqueue_tasks([task])
+                task.page_count = 10
+
+            self.window._schedule_tasks()
+
+            self.assertEqual([config["use_gpu"] for config in pool.submitted], [True, True, False])
+            self.assertEqual([task.metrics["ocr_backend"] for task in tasks], ["gpu", "gpu", "cpu"])
+            self.assertEqual(self.window._gpu_tasks_running(), 2)
+
+    def test_job_allocation_counts_queued_files_from_the_queue(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            tasks = []
+            for name in ("a.pdf", "b.pdf", "c.pdf"):
+                pdf_path = root / name
+                pdf_path.write_bytes(b"%PDF-1.4\n")
+                tasks.append(self._add_task_row(pdf_path))
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.batch_log_dir = root / "logs"
+            self.window.batch_running = True
+            self.window.total_batch = 3
+            self.window.current_worker_limit = 2
+            for task in tasks:
+                task.page_count = 10
+            self.window._enqueue_tasks(tasks)
+
+            with mock.patch("ocr_app.ui.allocate_ocr_jobs", wraps=allocate_ocr_jobs) as allocate:
+                self.window._schedule_tasks()
+
+            self.assertEqual([task.status for task in tasks], ["Running", "Running", "Queued"])
+            # Arguments: pages, budget, jobs in use, queued units, free slots, max jobs.
+            self.assertEqual([call.args[3] for call in allocate.call_args_list], [2, 1])
+            self.assertEqual(allocate.call_args_list[1].args[2], tasks[0].metrics["ocr_jobs"])
+
+    def test_admission_control_holds_files_under_memory_pressure(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            tasks = []
+            for name in ("a.pdf", "b.pdf"):
+                pdf_path = root / name
+                pdf_path.write_bytes(b"%PDF-1.4\n")
+                tasks.append(self._add_task_row(pdf_path))
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.batch_log_dir = root / "logs"
+            self.window.batch_running = True
+            self.window.total_batch = 2
+            self.window.current_worker_limit = 2
+            for task in tasks:
+                self.window._enqueue_tasks([task])
+                task.page_count = 10
+            available = [1400 * 1024 * 1024]
+            self.window.admission.sample_source = lambda: PressureSample(available[0], 0, 0.0, 4)
+            self.window.admission.observe()
+
+            self.window._schedule_tasks()
+
+            self.assertEqual([task.status for task in tasks], ["Running", "Queued"])
+            self.assertIn("Admission control: holding new files", self.window.log_view.toPlainText())
+            self.assertIn("1 queued, 1 running", self.window.log_view.toPlainText())
+            # Re-checking a held file uses the size recorded when it was added.
+            with mock.patch.object(Path, "stat", autospec=True, side_effect=Path.stat) as stat:
+                self.window._schedule_tasks()
+            self.assertEqual(tasks[1].status, "Queued")
+            self.assertNotIn(mock.call(tasks[1].input_path), stat.call_args_list)
+            self.window._update_metrics_labels()
+            self.assertIn("Holding new files", self.window.metrics_health.text())
+
+            available[0] = 8 * 1024 * 1024 * 1024
+            self.window.admission.observe()
+            self.window._schedule_tasks()
+
+            self.assertEqual(tasks[1].status, "Running")
+            self.assertIn("resumed starting files", self.window.log_view.toPlainText())
+
+    def test_memory_limited_file_is_retried_alone_without_the_limit(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            tasks = []
+            for name in ("a.pdf", "b.pdf", "c.pdf"):
+                pdf_path = root / name
+                pdf_path.write_bytes(b"%PDF-1.4\n")
+                tasks.append(self._add_task_row(pdf_path))
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.batch_log_dir = root / "logs"
+            self.window.batch_running = True
+            self.window.total_batch = 3
+            self.window.current_worker_limit = 2
+            self.window.current_memory_limit_mb = 2048
+            for task in tasks:
+                self.window._enqueue_tasks([task])
+                task.page_count = 10
+            self.window._schedule_tasks()
+            self.assertEqual(pool.submitted[0]["memory_limit_bytes"], 2048 * 1024 * 1024)
+
+            first, second, third = tasks
+            pool.active.discard(first.task_id)
+            self.window._handle_worker_event(
+                first,
+                {"type": "done", "success": False, "error": "Memory limit exceeded", "memory_limit_exceeded": True},
+            )
+            self.window._schedule_tasks()
+
+            # The retry waits for the pool to drain and holds back the other queued file.
+            self.assertEqual((first.status, third.status), ("Queued", "Queued"))
+            self.assertEqual(len(pool.submitted), 2)
+
+            pool.active.discard(second.task_id)
+            second.status = "Done"
+            self.window._schedule_tasks()
+
+            self.assertEqual(first.status, "Running")
+            self.assertEqual(pool.submitted[-1]["task_id"], first.task_id)
+            self.assertEqual(pool.submitted[-1]["memory_limit_bytes"], 0)
+            self.assertEqual(third.status, "Queued")
+            self.assertEqual(self.window.finished_batch, 0)
+
+    def test_open_gpu_breaker_routes_new_files_to_cpu(self) -> None:
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            pdf_path = root / "a.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4\n")
+            task = self._add_task_row(pdf_path)
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.batch_log_dir = root / "logs"
+            self.window.batch_running = True
+            self.window.total_batch = 1
+            self.window.current_worker_limit = 1
+            self.window.current_use_gpu = True
+            self.window._enqueue_tasks([task])
+            task.page_count = 10
+            for unit_id in ("x", "y", "z"):
+                self.window.gpu_breaker.allow(unit_id)
+                self.window._record_gpu_outcome(unit_id, {"success": False, "gpu_failed": True})
+
+            self.window._schedule_tasks()
+
+            self.assertEqual(self.window.gpu_breaker.state, "open")
+            self.assertFalse(pool.submitted[0]["use_gpu"])
+            self.assertEqual(task.metrics["ocr_backend"], "cpu")
+            self.assertIn("GPU circuit breaker opened", self.window.log_view.toPlainText())
+
+    def test_cached_large_pdf_skips_page_range_ocr(self) -> None:
+        try:
+            import pikepdf
+        except ImportError:
+            self.skipTest("pikepdf is not installed")
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            pdf_path = root / "long.pdf"
+            pdf = pikepdf.new()
+            for _ in range(240):
+                pdf.add_blank_page()
+            pdf.save(pdf_path)
+
+            task = self._add_task_row(pdf_path)
+            pool = FakeWorkerPool()
+            self.window.worker_pool = pool
+            self.window.batch_log_dir = root / "logs"
+            self.window.batch_running = True
+            self.window.total_batch = 1
+            self.window.current_worker_limit = 4
+            self.window.current_shard_large_pdfs = True
+            self.window.current_result_cache = True
+            self.window._enqueue_tasks([task])
+
+            self.window._schedule_tasks()
+
+            self.assertEqual([config["kind"] for config in pool.submitted], ["cache_probe"])
+            pool.pending_events = [
+                {
+                    "type": "done",
+                    "kind": "cache_probe",
+                    "task_id": task.task_id,
+                    "success": True,
+                    "cache_status": "hit",
+                    "output_pdf": pool.submitted[0]["output_pdf"],
+                }
+            ]
+            self.window._poll_workers()
+
+            self.assertEqual(task.status, "Done")
+            self.assertEqual(task.metrics["cache_status"], "hit")
+            self.assertEqual(len(pool.submitted), 1)
+
+
+    def test_merge_is_not_cached_when_a_page_range_ran_on_another_engine(self) -> None:
+        try:
+            import pikepdf
+        except ImportError:
+            self.skipTest("pikepdf is not installed")
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            pdf = pikepdf.new()
+            for _ in range(240):
+                pdf.add_blank_page()
+
+            merges = []
+            for index, engines in enumerate((["easyocr"] * 4, ["easyocr", "tesseract", "easyocr", "easyocr"])):
+                pdf_path = root / f"long{index}.pdf"
+                pdf.save(pdf_path)
+                task = self._add_task_row(pdf_path)
+                pool = FakeWorkerPool()
+                self.window.worker_pool = pool
+                self.window.batch_log_dir = root / "logs"
+                self.window.batch_running = True
+                self.window.total_batch += 1
+                self.window.current_worker_limit = 4
+                self.window.current_shard_large_pdfs = True
+                self.window.current_result_cache = True
+                self.window._enqueue_tasks([task])
+                self.window._schedule_tasks()
+
+                pool.pending_events = [
+                    {
+                        "type": "done",
+                        "kind": "cache_probe",
+                        "task_id": task.task_id,
+                        "success": False,
+                        "cache_status": "miss",
+                        "cache_key": "a" * 64,
+                        "cache_engine": "easyocr",
+                    }
+                ]
+                self.window._poll_workers()
+                shards = [config for config in pool.submitted if config["kind"] == "shard"]
+                pool.pending_events = [
+                    {"type": "done", "task_id": config["task_id"], "success": True, "engine_used": engine}
+                    for config, engine in zip(shards, engines)
+                ]
+                self.window._poll_workers()
+                merges.append(pool.submitted[-1])
+                pool.pending_events = [
+                    {"type": "done", "task_id": task.task_id, "success": True, "output_pdf": merges[-1]["output_pdf"]}
+                ]
+                self.window._poll_workers()
+
+            self.assertEqual([merge["kind"] for merge in merges], ["merge", "merge"])
+            self.assertEqual(merges[0]["cache_key"], "a" * 64)
+            self.assertEqual(merges[1]["cache_key"], "")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _imports_pyside(module: str) -> bool:
+    probe = f"import sys, {module}; print(any(name.split('.')[0] == 'PySide6' for name in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    return result.stdout.strip() == "True"
+
+
+class WorkerBootstrapTests(unittest.TestCase):
+    def test_worker_entry_module_does_not_import_qt(self) -> None:
+        self.assertFalse(_imports_pyside("ocr_app.worker"))
+
+    def test_worker_pool_module_does_not_import_qt(self) -> None:
+        self.assertFalse(_imports_pyside("ocr_app.worker_pool"))
+
+    def test_spawn_main_module_does_not_import_qt(self) -> None:
+        # Spawned children re-import the parent's __main__ module.
+        self.assertFalse(_imports_pyside("ocr_app.__main__"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from typing import Any
+
+import psutil
+
+from ocr_app.worker_pool import WorkerPool
+
+
+def _report_pid_job(config: dict[str, Any], queue_obj: Any) -> None:
+    queue_obj.put({"type": "status", "task_id": config["task_id"], "status": "Running"})
+    queue_obj.put(
+        {
+            "type": "done",
+            "task_id": config["task_id"],
+            "success": True,
+            "worker_pid": os.getpid(),
+        }
+    )
+
+
+def _sleepy_job(config: dict[str, Any], queue_obj: Any) -> None:
+    time.sleep(float(config.get("sleep", 30.0)))
+    _report_pid_job(config, queue_obj)
+
+
+def _stubborn_job(config: dict[str, Any], queue_obj: Any) -> None:
+    # Ignores SIGTERM, so only the SIGKILL after the grace period stops it.
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    queue_obj.put({"type": "status", "task_id": config["task_id"], "status": "Running"})
+    time.sleep(60)
+
+
+def _subprocess_job(config: dict[str, Any], queue_obj: Any) -> None:
+    # Like _run_ocr_command: the OCR tool runs as a child of the worker.
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    queue_obj.put({"type": "status", "task_id": config["task_id"], "status": "Running", "child_pid": child.pid})
+    child.wait()
+
+
+def _crashing_job(config: dict[str, Any], queue_obj: Any) -> None:
+    os._exit(3)
+
+
+def _fork_context_or_skip(test: unittest.TestCase) -> Any:
+    try:
+        return mp.get_context("fork")
+    except ValueError:
+        test.skipTest("fork start method unavailable")
+
+
+class WorkerPoolTests(unittest.TestCase):
+    def _make_pool(self, job: Any, **kwargs: Any) -> WorkerPool:
+        pool = WorkerPool(job=job, context=_fork_context_or_skip(self), **kwargs)
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    def _wait_for(self, pool: WorkerPool, event_type: str, task_id: str, timeout: float = 10.0) -> dict[str, Any]:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for event in pool.poll():
+                if event.get("type") == event_type and event.get("task_id") == task_id:
+                    return event
+            time.sleep(0.02)
+        self.fail(f"Timed out waiting for {event_type} from {task_id}")
+
+    def _run_to_idle(self, pool: WorkerPool, task_id: str) -> dict[str, Any]:
+        pool.submit({"task_id": task_id})
+        done = self._wait_for(pool, "done", task_id)
+        deadline = time.monotonic() + 10.0
+        while not pool.can_accept() or pool.busy_count():
+            if time.monotonic() > deadline:
+                self.fail("Worker never reported idle")
+            pool.poll()
+            time.sleep(0.02)
+        return done
+
+    def test_worker_is_reused_across_tasks(self) -> None:
+        pool = self._make_pool(_report_pid_job, size=1)
+
+        first = self._run_to_idle(pool, "aaaaaaaa")
+        second = self._run_to_idle(pool, "bbbbbbbb")
+
+        self.assertEqual(first["worker_pid"], second["worker_pid"])
+
+    def test_worker_is_recycled_after_task_limit(self) -> None:
+        pool = self._make_pool(_report_pid_job, size=1, max_tasks_per_worker=1)
+
+        first = self._run_to_idle(pool, "aaaaaaaa")
+        second = self._run_to_idle(pool, "bbbbbbbb")
+
+        self.assertNotEqual(first["worker_pid"], second["worker_pid"])
+
+    def test_cancel_stops_only_the_running_task(self) -> None:
+        pool = self._make_pool(_sleepy_job, size=2)
+        worker_pid = pool.submit({"task_id": "aaaaaaaa"})
+
+        self.assertEqual(pool.worker_pid("aaaaaaaa"), worker_pid)
+        self.assertTrue(pool.cancel("aaaaaaaa"))
+        self.assertIsNone(pool.worker_pid("aaaaaaaa"))
+        self.assertEqual(pool.busy_count(), 0)
+
+        pool.submit({"task_id": "bbbbbbbb", "sleep": 0.0})
+        done = self._wait_for(pool, "done", "bbbbbbbb")
+        self.assertNotEqual(done["worker_pid"], worker_pid)
+
+    @unittest.skipUnless(hasattr(os, "killpg"), "process groups need POSIX")
+    def test_cancel_also_stops_the_task_subprocess(self) -> None:
+        pool = self._make_pool(_subprocess_job, size=1)
+        pool.submit({"task_id": "aaaaaaaa"})
+        status = self._wait_for(pool, "status", "aaaaaaaa")
+        child = psutil.Process(status["child_pid"])
+
+        report = pool.cancel("aaaaaaaa")
+
+        self.assertEqual(report["method"], "process_group")
+        self.assertEqual(report["processes"], 2)
+        deadline = time.monotonic() + 5.0
+        while time.monotonic() < deadline:
+            try:
+                if child.status() == psutil.STATUS_ZOMBIE:
+                    break
+            except psutil.Error:
+                break
+            time.sleep(0.02)
+        else:
+            child.kill()
+            self.fail("Task subprocess outlived the canceled worker")
+
+    @unittest.skipUnless(hasattr(os, "killpg"), "process groups need POSIX")
+    def test_cancel_many_stops_workers_together_off_the_calling_thread(self) -> None:
+        pool = self._make_pool(_stubborn_job, size=3)
+        task_ids = ["aaaaaaaa", "bbbbbbbb", "cccccccc"]
+        for task_id in task_ids:
+            pool.submit({"task_id": task_id})
+        running: set[str] = set()
+        deadline = time.monotonic() + 10.0
+        while running != set(task_ids) and time.monotonic() < deadline:
+            running.update(event["task_id"] for event in pool.poll() if event.get("type") == "status")
+            time.sleep(0.02)
+        self.assertEqual(running, set(task_ids))
+
+        started = time.monotonic()
+        future = pool.cancel_many(task_ids)
+        returned_after = time.monotonic() - started
+        self.assertEqual(pool.busy_count(), 0)
+        reports = future.result(timeout=10.0)
+        elapsed = time.monotonic() - started
+
+        self.assertLess(returned_after, 0.5)
+        self.assertEqual(sorted(reports), task_ids)
+        self.assertTrue(all(report["killed"] == 1 for report in reports.values()))
+        # One shared SIGTERM grace (1s), not one per worker.
+        self.assertLess(elapsed, 2.5)
+
+    def test_shutdown_without_wait_resolves_when_workers_exit(self) -> None:
+        pool = self._make_pool(_report_pid_job, size=1)
+        self._run_to_idle(pool, "aaaaaaaa")
+
+        future = pool.shutdown(wait=False)
+
+        self.assertIsNone(future.result(timeout=10.0))
+        self.assertEqual(pool.busy_count(), 0)
+
+    def test_notifier_wakes_the_caller_once_per_poll(self) -> None:
+        pool = self._make_pool(_sleepy_job, size=1)
+        wakeups: list[float] = []
+        woke = threading.Event()
+
+        def notify() -> None:
+            wakeups.append(time.monotonic())
+            woke.set()
+
+        pool.set_notifier(notify)
+        pool.submit({"task_id": "aaaaaaaa", "sleep": 0.2})
+
+        self.assertTrue(woke.wait(10.0))
+        time.sleep(0.3)
+        # Events kept arriving, but the reader waits for a poll before waking the caller again.
+        self.assertEqual(len(wakeups), 1)
+        woke.clear()
+        events = pool.poll()
+        while not any(event.get("type") == "done" for event in events):
+            self.assertTrue(woke.wait(10.0))
+            woke.clear()
+            events = pool.poll()
+        self.assertEqual(events[-1]["task_id"], "aaaaaaaa")
+
+    def test_notifier_reports_a_crashed_worker_without_polling(self) -> None:
+        pool = self._make_pool(_crashing_job, size=1)
+        woke = threading.Event()
+        pool.set_notifier(woke.set)
+        pool.submit({"task_id": "aaaaaaaa"})
+
+        self.assertTrue(woke.wait(10.0))
+        events: list[dict[str, Any]] = []
+        deadline = time.monotonic() + 10.0
+        while not events and time.monotonic() < deadline:
+            woke.wait(1.0)
+            woke.clear()
+            events = [event for event in pool.poll() if event.get("type") == "worker_lost"]
+        self.assertEqual(events[0]["exitcode"], 3)
+
+    def test_crashed_worker_reports_lost_task(self) -> None:
+        pool = self._make_pool(_crashing_job, size=1)
+        pool.submit({"task_id": "aaaaaaaa"})
+
+        event = self._wait_for(pool, "worker_lost", "aaaaaaaa")
+
+        self.assertEqual(event["exitcode"], 3)
+        self.assertTrue(pool.can_accept())
+
+
+if __name__ == "__main__":
+    unittest.main()